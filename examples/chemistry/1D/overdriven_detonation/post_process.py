@@ -3,7 +3,7 @@ import processing.plot as plot
 import processing.readwritedatafiles as readwritedatafiles
 
 ### Postprocess
-fname = "Data_final.pkl"
+fname = "Data_final.npz"
 solver = readwritedatafiles.read_data_file(fname)
 print('Solution Final Time:', solver.time)
 
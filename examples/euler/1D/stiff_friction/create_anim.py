@@ -19,7 +19,7 @@ for i in range(15):
 	print(i)
 
 	# Read data file
-	fname = "Data_" + str(i) + ".pkl"
+	fname = "Data_" + str(i) + ".npz"
 	solver = readwritedatafiles.read_data_file(fname)
 
 	# Unpack
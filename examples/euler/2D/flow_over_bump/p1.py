@@ -1,7 +1,7 @@
 from p0 import *
 
 Restart = {
-	"File" : "p0_final.pkl",
+	"File" : "p0_final.npz",
 	"StartFromFileTime" : True
 }
 
@@ -1,7 +1,7 @@
 from p1 import *
 
 Restart = {
-	"File" : "p1_final.pkl",
+	"File" : "p1_final.npz",
 	"StartFromFileTime" : True
 }
 
@@ -3,7 +3,7 @@ import processing.plot as plot
 import processing.readwritedatafiles as readwritedatafiles
 
 # Read data file
-fname = "p2_final.pkl"
+fname = "p2_final.npz"
 solver = readwritedatafiles.read_data_file(fname)
 
 # Unpack
@@ -5,8 +5,8 @@ import processing.plot as plot
 import processing.readwritedatafiles as readwritedatafiles
 
 # Read data file
-fname = "Data_final.pkl"
-#fname = "Data_n160_P2.pkl"
+fname = "Data_final.npz"
+#fname = "Data_n160_P2.npz"
 solver = readwritedatafiles.read_data_file(fname)
 
 # Unpack
@@ -4,7 +4,7 @@ import processing.plot as plot
 import processing.readwritedatafiles as readwritedatafiles
 
 # Read data file
-fname = "Data_final.pkl"
+fname = "Data_final.npz"
 solver = readwritedatafiles.read_data_file(fname)
 
 # Unpack
@@ -85,7 +85,7 @@ while (j < order.shape[0]):
 		os.system("quail " + outfile)
 
 		# Access and process the final time step
-		final_file = inputdeck.Output['Prefix'] + '_final.pkl'
+		final_file = inputdeck.Output['Prefix'] + '_final.npz'
 
 		# Read data file
 		solver = readwritedatafiles.read_data_file(final_file)
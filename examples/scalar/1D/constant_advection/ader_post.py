@@ -3,7 +3,7 @@ import processing.plot as plot
 import processing.readwritedatafiles as readwritedatafiles
 
 ### Postprocess RestartFile First
-fname = "Data_final.pkl"
+fname = "Data_final.npz"
 solver = readwritedatafiles.read_data_file(fname)
 print('Restart File Start Time:', solver.time)
 
@@ -21,7 +21,7 @@ plot.plot_solution(mesh, physics, solver, "Scalar", plot_numerical=True,
 		legend_label="DG RestartFile")
 
 ### Postprocess ADER Solution Second
-fname = "ader_final.pkl"
+fname = "ader_final.npz"
 solver = readwritedatafiles.read_data_file(fname)
 print('Solution Final Time:', solver.time)
 
@@ -1,7 +1,7 @@
 from constant_advection import *
 
 Restart = {
-	"File" : "Data_final.pkl",
+	"File" : "Data_final.npz",
 	"StartFromFileTime" : True
 }
 
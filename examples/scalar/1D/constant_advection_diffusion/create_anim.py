@@ -18,7 +18,7 @@ imgs_all = []
 j = 0
 for i in range(25):
 	print(i)
-	fname = "Data_" + str(i) + ".pkl"
+	fname = "Data_" + str(i) + ".npz"
 	solver = readwritedatafiles.read_data_file(fname)
 	# Unpack
 	mesh = solver.mesh
@@ -18,8 +18,8 @@ imgs_all = []
 j = 0
 for i in range(20):
 	print(i)
-	fname = "Data_" + str(i) + ".pkl"
-	fname2 = "WENO_" + str(i) + ".pkl"
+	fname = "Data_" + str(i) + ".npz"
+	fname2 = "WENO_" + str(i) + ".npz"
 	solver = readwritedatafiles.read_data_file(fname)
 	solver2 =  readwritedatafiles.read_data_file(fname2)
 	# Unpack
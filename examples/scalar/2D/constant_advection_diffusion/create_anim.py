@@ -17,7 +17,7 @@ for i in range(33):
 	print(i)
 
 	# Read data file
-	fname = "Data_" + str(i) + ".pkl"
+	fname = "Data_" + str(i) + ".npz"
 	solver = readwritedatafiles.read_data_file(fname)
 
 	# Unpack
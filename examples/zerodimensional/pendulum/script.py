@@ -68,7 +68,7 @@ for j in range(dt.shape[0]):
 	os.system("quail " + filename)
 
 	# Access and process the final time step
-	final_file = model_psr.prefix + '_final.pkl'
+	final_file = model_psr.prefix + '_final.npz'
 
 	# Read data file
 	solver = readwritedatafiles.read_data_file(final_file)
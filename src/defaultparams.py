@@ -25,7 +25,7 @@
 Restart = {
 	"File" : None,
 		# If file name provided (str), then will restart from said data file
-		# (pickle format)
+		# (checkpoint or legacy pickle format)
 	"StartFromFileTime" : True
 		# If True, then will restart from time saved in restart file
 }
@@ -43,9 +43,25 @@ TimeStepping = {
 		# Time step size (2nd priority)
 	"CFL" : None,
 		# CFL number (3rd priority)
+	"CFLUpdateInterval" : 1,
+		# Number of time steps between updates of the CFL-based time step;
+		# the time step is kept constant in between
+	"CFLWaveSpeedFromResidual" : False,
+		# If True, the maximum wave speed of each element is recorded by
+		# the first element residual evaluation of the time step preceding
+		# a CFL update instead of interpolating the state again to compute
+		# the time step, which then lags the solution by one time step
+		# (DG solver with "Serial" ResidualParallelism only)
 	"TimeStepper" : "RK4",
 		# Time stepping scheme
 		# See general.StepperType
+	"RelativeTolerance" : 1e-6,
+		# Relative tolerance of the local error estimate for the adaptive
+		# time steppers (BS32 and DP54). The time step of the deck (or a
+		# starting guess if none is given) is only used for the first step.
+	"AbsoluteTolerance" : 1e-6,
+		# Absolute tolerance of the local error estimate for the adaptive
+		# time steppers
 	"OperatorSplittingExplicit" : "SSPRK3",
 		# Explicit time stepping scheme for source terms if doing operator
 		# splitting
@@ -54,6 +70,20 @@ TimeStepping = {
 		# Implicit time stepping scheme for source terms if doing operator
 		# splitting
 		# See general.SourceStepperType
+	"SourceStiffnessGroups" : 1,
+		# Number of groups of elements integrated independently by the
+		# LSODA and BDF source solvers. Elements are sorted by the
+		# estimated stiffness of their source terms (spectral radius of the
+		# source term Jacobian) and split into groups of equal size, so
+		# that stiff elements do not force small time steps on the others.
+	"LocalTimeSteppingLevels" : 1,
+		# Maximum number of time step levels for local time stepping with
+		# ADER-DG. Elements of level l take time steps 2**l times the
+		# smallest one, as allowed by their own CFL condition (based on
+		# their smallest height); 1 means that all elements take the same
+		# time step. Requires CFL. The coupling between levels slightly
+		# lowers the largest stable CFL number compared to global time
+		# stepping.
 	"ODEScheme" : "FE",
 		# Sets the specific time integration scheme when choosing to solve
 		# an ODE or system of ODEs alone (see physics/zerodimensional
@@ -135,13 +165,43 @@ Numerics = {
 		# Sets the threshold requirement for the predictor step's
 		# nonlinear solve. Lower values can be chosen which speeds up
 		# the simulations, but at the cost of some error increase.
+	"HelperCacheDirectory" : None,
+		# If a directory name is provided (str), the precomputed solver
+		# helpers (quadrature, basis, geometry, and mass matrix data) are
+		# stored there and reused by later runs with the same mesh, basis,
+		# order, and quadrature settings
+		# If None, the helpers are always recomputed
+	"ResidualParallelism" : "Serial",
+		# How the residual is evaluated; see ParallelismType in general.py
+		# "Processes" partitions the elements across worker processes that
+		# share the solution and residual arrays (DG solver only, requires
+		# the fork start method); results are identical to "Serial"
+		# "Threads" evaluates blocks of elements (and the corresponding
+		# faces) on a thread pool (DG solver only); results are identical
+		# to "Serial"
+	"NumWorkers" : 0,
+		# Number of workers (processes or threads) for parallel residual
+		# evaluation
+		# If 0, the number of available CPUs is used
+	"ResidualBlockSize" : 0,
+		# Number of elements per block for "Threads" (rounded down to a
+		# multiple of 8)
+		# If 0, chosen such that the temporaries of a block fit in cache
+	"SumFactorizationMinOrder" : 3,
+		# Minimum solution order at which the DG solver evaluates the
+		# element residual of tensor-product bases (LagrangeQuad and
+		# LegendreQuad) with sum factorization, i.e., by applying the 1D
+		# basis one direction at a time; below this order, the full basis
+		# matrices are faster
+		# If None, sum factorization is never used
 }
 
 
 ''' Mesh parameters '''
 Mesh = {
 	"File" : None,
-		# Name of Gmsh mesh file to read
+		# Name of Gmsh mesh file (.msh) or quail mesh file (.qmesh, see
+		# Mesh.save) to read
 		# If None, then will create a uniform mesh on either a line segment
 		# domain (1D) or a rectangular domain (2D) based on below parameters
 	"ElementShape" : "Segment",
@@ -164,6 +224,12 @@ Mesh = {
 	"PeriodicBoundariesY" : [],
 		# List of the names of the two periodic boundaries in y-direction
 		# If empty, then no periodicity in y-direction
+	"CacheDirectory" : None,
+		# If a directory name is provided (str), the processed mesh (after
+		# reading the mesh file and imposing periodicity) is stored there
+		# as a quail mesh file and reused by later runs with the same mesh
+		# parameters and mesh file
+		# If None, the mesh is always processed
 }
 
 
@@ -238,6 +304,16 @@ Output = {
 		# If True, then a data file will be written for the initial condition
 	"WriteFinalSolution" : True,
 		# If True, then a data file will be written for the final solution
+	"DataFileType" : "Checkpoint",
+		# Format of the data files; see DataFileType in general.py
+		# "Checkpoint" stores only the state coefficients, the time, and
+		# the input deck, while "Pickle" (legacy) pickles the whole solver
+	"AsyncWrite" : False,
+		# If True, then data files are written by a background thread while
+		# the time loop continues (checkpoint format only)
+	"WriteQueueSize" : 4,
+		# Maximum number of snapshots waiting to be written when AsyncWrite
+		# is True; the time loop waits if the queue is full
 	"AutoPostProcess" : True,
 		# If True, then postprocessing script (if provided) will be
 		# automatically called at the end of the simulation
@@ -249,6 +325,14 @@ Output = {
 	"ProgressBar" : False,
 		# If False, iteration info is printed to console
 		# If True, a progress bar is given instead of iteration info
+	"Profile" : False,
+		# If True, the time spent in each phase of the solve (residual
+		# contributions, limiters, time step computation, source stepper,
+		# ADER predictor, and I/O) is recorded and reported at the end of
+		# the run
+	"ProfileFile" : None,
+		# If Profile is True and a file name is given, the cumulative and
+		# per-time-step timings are also written to this JSON file
 	"CustomFunctionFilename" : "custom_user_function"
 		# Name of the user's custom function definitions.
 }
@@ -128,6 +128,12 @@ class StepperType(Enum):
 		# Low-storage 4th-order Runge-Kutta
 	SSPRK3 = auto()
 		# Strong stability-preserving third-order Runge-Kutta
+	BS32 = auto()
+		# Bogacki-Shampine 3(2) embedded Runge-Kutta pair with adaptive
+		# time steps
+	DP54 = auto()
+		# Dormand-Prince 5(4) embedded Runge-Kutta pair with adaptive time
+		# steps
 	ADER = auto()
 		# ADER
 	Strang = auto()
@@ -149,6 +155,9 @@ class SourceStepperType(Enum):
 		# 2nd-order trapezoidal method
 	LSODA = auto()
 		# Scipy LSODA built-in ode solver
+	BDF = auto()
+		# Scipy BDF solver (solve_ivp) with the block-diagonal source term
+		# Jacobian
 
 
 class PhysicsType(Enum):
@@ -226,6 +235,31 @@ class NodeType(Enum):
 		# Gauss-Lobatto nodes (segments and quadrilaterals only)
 
 
+class ParallelismType(Enum):
+	'''
+	This enum contains the available modes for evaluating the residual.
+	See src/solver/parallel.py for more information.
+	'''
+	Serial = auto()
+		# Single process
+	Processes = auto()
+		# Elements partitioned across worker processes
+	Threads = auto()
+		# Blocks of elements evaluated by a pool of threads
+
+
+class DataFileType(Enum):
+	'''
+	This enum contains the available data file formats. See
+	src/processing/readwritedatafiles.py for more information.
+	'''
+	Checkpoint = auto()
+		# Versioned checkpoint (.npz) with the state coefficients and a
+		# JSON header; the solver is rebuilt from the header when read
+	Pickle = auto()
+		# Legacy format (.pkl) in which the entire solver is pickled
+
+
 INTERIORFACE = -1
 NULLFACE = -2
 
@@ -243,9 +277,9 @@ def set_solver_params(params=None, **kwargs):
 	return params
 
 
-def pass_function(*args):
+def pass_function(*args, **kwargs):
 	pass
 
 
-def zero_function(*args):
+def zero_function(*args, **kwargs):
 	return 0.
\ No newline at end of file
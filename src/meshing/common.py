@@ -59,36 +59,23 @@ def mesh_1D(num_elems=10, xmin=-1., xmax=1.):
 			num_elems=num_elems)
 
 	''' Interior faces '''
-	mesh.num_interior_faces = num_elems - 1
-	mesh.allocate_interior_faces()
-	for i in range(mesh.num_interior_faces):
-		interior_face = mesh.interior_faces[i]
-		interior_face.elemL_ID = i
-		interior_face.faceL_ID = 1
-		interior_face.elemR_ID = i + 1
-		interior_face.faceR_ID = 0
+	num_interior_faces = num_elems - 1
+	elemL_IDs = np.arange(num_interior_faces)
+	mesh.set_interior_faces(elemL_IDs, np.ones(num_interior_faces,
+			dtype=int), elemL_IDs + 1, np.zeros(num_interior_faces,
+			dtype=int))
 
 	''' Boundary groups and faces '''
 	# Left
 	boundary_group = mesh.add_boundary_group("x1")
-	boundary_group.num_boundary_faces = 1
-	boundary_group.allocate_boundary_faces()
-	boundary_face = boundary_group.boundary_faces[0]
-	boundary_face.elem_ID = 0
-	boundary_face.face_ID = 0
+	boundary_group.set_boundary_faces([0], [0])
 	# Right
 	boundary_group = mesh.add_boundary_group("x2")
-	boundary_group.num_boundary_faces = 1
-	boundary_group.allocate_boundary_faces()
-	boundary_face = boundary_group.boundary_faces[0]
-	boundary_face.elem_ID = num_elems - 1
-	boundary_face.face_ID = 1
+	boundary_group.set_boundary_faces([num_elems - 1], [1])
 
 	''' Create element-to-node-ID map '''
-	mesh.allocate_elem_to_node_IDs_map()
-	for elem_ID in range(mesh.num_elems):
-		for n in range(mesh.num_nodes_per_elem):
-			mesh.elem_to_node_IDs[elem_ID][n] = elem_ID + n
+	mesh.elem_to_node_IDs = np.arange(num_elems).reshape(-1, 1) + \
+			np.arange(mesh.num_nodes_per_elem)
 
 	''' Create element objects '''
 	mesh.create_elements()
@@ -139,79 +126,38 @@ def mesh_2D(num_elems_x=10, num_elems_y =10, xmin=-1., xmax=1.,
 	# Store coordinates
 	mesh.node_coords = xp
 
+	# Element and node IDs laid out on the grid [num_elems_y, num_elems_x]
+	# and [num_nodes_y, num_nodes_x]
+	elem_IDs = np.arange(mesh.num_elems).reshape(num_elems_y, num_elems_x)
+	node_IDs = np.arange(mesh.num_nodes).reshape(num_nodes_y, num_nodes_x)
+
 	''' Interior faces '''
-	# Number of interior faces
-	mesh.num_interior_faces = num_elems_y*(num_elems_x-1) + \
-			num_elems_x*(num_elems_y-1)
-	mesh.allocate_interior_faces()
-	# x-direction
-	n = 0
-	for ny in range(num_elems_y):
-		for nx in range(num_elems_x-1):
-			interior_face = mesh.interior_faces[n]
-			interior_face.elemL_ID = num_elems_x*ny + nx
-			interior_face.faceL_ID = 1
-			interior_face.elemR_ID = num_elems_x*ny + nx + 1
-			interior_face.faceR_ID = 3
-			n += 1
-	# y-direction
-	for nx in range(num_elems_x):
-		for ny in range(num_elems_y-1):
-			interior_face = mesh.interior_faces[n]
-			interior_face.elemL_ID = num_elems_x*ny + nx
-			interior_face.faceL_ID = 2
-			interior_face.elemR_ID = num_elems_x*(ny + 1) + nx
-			interior_face.faceR_ID = 0
-			n += 1
+	# x-direction (ordered by row, then by column)
+	elemL_IDs_x = elem_IDs[:, :-1].reshape(-1)
+	# y-direction (ordered by column, then by row)
+	elemL_IDs_y = elem_IDs[:-1, :].transpose().reshape(-1)
+	mesh.set_interior_faces(
+			np.concatenate([elemL_IDs_x, elemL_IDs_y]),
+			np.repeat([1, 2], [elemL_IDs_x.shape[0], elemL_IDs_y.shape[0]]),
+			np.concatenate([elemL_IDs_x + 1, elemL_IDs_y + num_elems_x]),
+			np.repeat([3, 0], [elemL_IDs_x.shape[0], elemL_IDs_y.shape[0]]))
 
 	''' Boundary groups and faces '''
-	# x1
-	boundary_group = mesh.add_boundary_group("x1")
-	boundary_group.num_boundary_faces = num_elems_y
-	boundary_group.allocate_boundary_faces()
-	n = 0
-	for boundary_face in boundary_group.boundary_faces:
-		boundary_face.elem_ID = num_elems_x*n
-		boundary_face.face_ID = 3
-		n += 1
-	# x2
-	boundary_group = mesh.add_boundary_group("x2")
-	boundary_group.num_boundary_faces = num_elems_y
-	boundary_group.allocate_boundary_faces()
-	n = 0
-	for boundary_face in boundary_group.boundary_faces:
-		boundary_face.elem_ID = num_elems_x*(n + 1) - 1
-		boundary_face.face_ID = 1
-		n += 1
-	# y1
-	boundary_group = mesh.add_boundary_group("y1")
-	boundary_group.num_boundary_faces = num_elems_x
-	boundary_group.allocate_boundary_faces()
-	n = 0
-	for boundary_face in boundary_group.boundary_faces:
-		boundary_face.elem_ID = n
-		boundary_face.face_ID = 0
-		n += 1
-	# y2
-	boundary_group = mesh.add_boundary_group("y2")
-	boundary_group.num_boundary_faces = num_elems_x
-	boundary_group.allocate_boundary_faces()
-	n = 0
-	for boundary_face in boundary_group.boundary_faces:
-		boundary_face.elem_ID = mesh.num_elems - num_elems_x + n
-		boundary_face.face_ID = 2
-		n += 1
+	for bname, bgroup_elem_IDs, face_ID in [
+			("x1", elem_IDs[:, 0], 3),
+			("x2", elem_IDs[:, -1], 1),
+			("y1", elem_IDs[0, :], 0),
+			("y2", elem_IDs[-1, :], 2)]:
+		boundary_group = mesh.add_boundary_group(bname)
+		boundary_group.set_boundary_faces(bgroup_elem_IDs.copy(),
+				np.full(bgroup_elem_IDs.shape[0], face_ID))
 
 	''' Create element-to-node-ID map '''
-	mesh.allocate_elem_to_node_IDs_map()
-	elem = 0
-	for ny in range(num_elems_y):
-		for nx in range(num_elems_x):
-			mesh.elem_to_node_IDs[elem][0] = num_nodes_x*ny + nx
-			mesh.elem_to_node_IDs[elem][1] = num_nodes_x*ny + nx + 1
-			mesh.elem_to_node_IDs[elem][2] = num_nodes_x*(ny+1) + nx
-			mesh.elem_to_node_IDs[elem][3] = num_nodes_x*(ny+1) + nx + 1
-			elem += 1
+	mesh.elem_to_node_IDs = np.stack([
+			node_IDs[:-1, :-1].reshape(-1),
+			node_IDs[:-1, 1:].reshape(-1),
+			node_IDs[1:, :-1].reshape(-1),
+			node_IDs[1:, 1:].reshape(-1)], axis=1)
 
 	''' Create element objects '''
 	mesh.create_elements()
@@ -279,24 +225,26 @@ def split_quadrils_into_tris(mesh_old):
 
 		return tri1_node_IDs, tri2_node_IDs
 
-	def modify_element_face_info(elem_ID, face_ID):
+	def modify_element_face_info(elem_IDs, face_IDs):
 		'''
 		This nested function modifies element and local face IDs.
 
 		Inputs:
 		-------
-			elem_ID: element ID
-			face_ID: local face ID
+			elem_IDs: element IDs [nf]
+			face_IDs: local face IDs [nf]
 
 		Outputs:
 		--------
-			elem_ID: element ID (modified)
-			face_ID: local face ID (modified)
+			elem_IDs: element IDs (modified) [nf]
+			face_IDs: local face IDs (modified) [nf]
 		'''
-		if face_ID == 1 or face_ID == 2:
-			elem_ID += num_elems_old
-		face_ID = old_to_new_face[face_ID]
-		return elem_ID, face_ID
+		# Faces 1 and 2 of each quadrilateral belong to the second
+		# triangle
+		elem_IDs = elem_IDs + num_elems_old*((face_IDs == 1) |
+				(face_IDs == 2))
+		face_IDs = old_to_new_face[face_IDs]
+		return elem_IDs, face_IDs
 
 	# New number of elements
 	num_elems_old = mesh_old.num_elems
@@ -316,36 +264,26 @@ def split_quadrils_into_tris(mesh_old):
 
 	# Boundary groups
 	for bgroup in mesh.boundary_groups.values():
-		for bface in bgroup.boundary_faces:
-			bface.elem_ID, bface.face_ID = modify_element_face_info(
-					bface.elem_ID, bface.face_ID)
-
-	# Modify existing interior faces
-	for int_face in mesh.interior_faces:
-		int_face.elemL_ID, int_face.faceL_ID = modify_element_face_info(
-				int_face.elemL_ID, int_face.faceL_ID)
-		int_face.elemR_ID, int_face.faceR_ID = modify_element_face_info(
-				int_face.elemR_ID, int_face.faceR_ID)
-
-	# Create new interior_faces ("diagonal" faces)
-	mesh.num_interior_faces += num_elems_old
-	for elem_ID in range(num_elems_old):
-		int_face = mesh_defs.InteriorFace()
-		int_face.elemL_ID = elem_ID
-		int_face.faceL_ID = 0
-		int_face.elemR_ID = elem_ID + num_elems_old
-		int_face.faceR_ID = 0
-		mesh.interior_faces.append(int_face)
-
-	# Element-to-node-ID map
-	mesh.allocate_elem_to_node_IDs_map()
-	for elem_ID in range(num_elems_old):
-		# First triangle
-		mesh.elem_to_node_IDs[elem_ID] = mesh_old.elem_to_node_IDs[elem_ID,
-				tri1_node_IDs]
-		# Second triangle
-		mesh.elem_to_node_IDs[elem_ID+num_elems_old] = \
-				mesh_old.elem_to_node_IDs[elem_ID, tri2_node_IDs]
+		bgroup.set_boundary_faces(*modify_element_face_info(
+				bgroup.elem_IDs, bgroup.face_IDs))
+
+	# Modify existing interior faces and create new interior faces
+	# ("diagonal" faces)
+	elemL_IDs, faceL_IDs = modify_element_face_info(mesh.int_face_elemL_IDs,
+			mesh.int_face_faceL_IDs)
+	elemR_IDs, faceR_IDs = modify_element_face_info(mesh.int_face_elemR_IDs,
+			mesh.int_face_faceR_IDs)
+	diagonal_elem_IDs = np.arange(num_elems_old)
+	mesh.set_interior_faces(
+			np.concatenate([elemL_IDs, diagonal_elem_IDs]),
+			np.concatenate([faceL_IDs, np.zeros(num_elems_old, dtype=int)]),
+			np.concatenate([elemR_IDs, diagonal_elem_IDs + num_elems_old]),
+			np.concatenate([faceR_IDs, np.zeros(num_elems_old, dtype=int)]))
+
+	# Element-to-node-ID map (first triangles, then second triangles)
+	mesh.elem_to_node_IDs = np.concatenate([
+			mesh_old.elem_to_node_IDs[:, tri1_node_IDs],
+			mesh_old.elem_to_node_IDs[:, tri2_node_IDs]])
 
 	# Create element objects
 	mesh.create_elements()
@@ -20,6 +20,7 @@
 #       Contains functions for processing Gmsh files.
 #
 # ------------------------------------------------------------------------ #
+import mmap
 import numpy as np
 
 import errors
@@ -291,55 +292,155 @@ class PhysicalGroup(object):
 		self.entity_tags = set()
 
 
-class FaceInfo(object):
+class MeshFile(object):
 	'''
-	This class holds information about a given interior or boundary face.
+	This class provides access to a Gmsh file through a memory map. Lines
+	in the ASCII parts of the file are read as with a regular file object,
+	while the payloads of the sections of binary files are mapped directly
+	into numpy arrays.
 
 	Attributes:
 	-----------
-	num_adjacent_elems: int
-		number of elements adjacent to given face
-	at_boundary: bool
-		True if boundary face, False if interior face
-	boundary_group_num: int
-		boundary group number (in quail)
-	elem_ID: int
-		ID of current adjacent element
-	face_ID: int
-		local ID of face from perspective of current adjacent element
-	num_face_nodes: int
-		number of face nodes (q = 1)
-	node_IDs_sort: tuple
-		global IDs of face nodes sorted in ascending order
+	buffer: mmap object
+		memory map of the file
+	position: int
+		current position in the file
+	binary: bool
+		True if binary file, False if ASCII file
+	int_type: numpy dtype
+		type of the integers (int) in binary files
+	size_type: numpy dtype
+		type of the sizes (size_t) in binary files
+	float_type: numpy dtype
+		type of the floating point numbers (double) in binary files
 
 	Methods:
 	---------
-	set_info
-		sets attributes
+	readline
+		reads the next line
+	read_lines
+		reads the next lines as raw bytes
+	read_binary
+		maps the next binary entries into a numpy array
+	find_line
+		finds the first line that starts with a given string
+	set_binary_types
+		sets the types of the binary entries
 	'''
-	def __init__(self):
-		self.num_adjacent_elems = 0
-		self.at_boundary = False
-		self.boundary_group_num = 0
-		self.elem_ID = 0
-		self.face_ID = 0
-		self.num_face_nodes = 0
-		self.node_IDs_sort = tuple() # should be a tuple (hashable)
-
-	def set_info(self, **kwargs):
+	def __init__(self, file_name):
+		with open(file_name, "rb") as fo:
+			try:
+				self.buffer = mmap.mmap(fo.fileno(), 0,
+						access=mmap.ACCESS_READ)
+			except ValueError:
+				# Empty file
+				raise errors.FileReadError("Empty file")
+		self.position = 0
+		self.binary = False
+		self.int_type = np.dtype(np.int32)
+		self.size_type = np.dtype(np.uint64)
+		self.float_type = np.dtype(np.float64)
+
+	def seek(self, position):
+		self.position = position
+
+	def tell(self):
+		return self.position
+
+	def readline(self):
+		'''
+		This method reads the next line.
+
+		Outputs:
+		--------
+			fl: line (including the newline character); empty string at
+				the end of the file
 		'''
-		This method is a wrapper for setting all of this class's attributes.
-		Note that node_IDs_sort can be passed as a numpy array, list, etc.;
-		it will be converted to a tuple, which is hashable and can therefore
-		be used as a dictionary key.
+		return self.read_lines(1).decode()
+
+	def read_lines(self, num_lines):
 		'''
-		for key in kwargs:
-			if key == "node_IDs_sort":
-				self.node_IDs_sort = tuple(kwargs[key]) # make it hashable
-			elif hasattr(self, key):
-				setattr(self, key, kwargs[key])
-			else:
-				raise AttributeError
+		This method reads the next lines.
+
+		Inputs:
+		-------
+			num_lines: number of lines to read
+
+		Outputs:
+		--------
+			text: bytes containing the lines (including the newline
+				characters)
+		'''
+		self.buffer.seek(self.position)
+		text = b"".join([self.buffer.readline() for _ in
+				range(num_lines)])
+		self.position = self.buffer.tell()
+
+		return text
+
+	def read_binary(self, dtype, count):
+		'''
+		This method maps the next binary entries into a numpy array
+		without copying them.
+
+		Inputs:
+		-------
+			dtype: type of the entries
+			count: number of entries
+
+		Outputs:
+		--------
+			data: read-only array of entries [count]
+		'''
+		count = int(count)
+		if self.position + count*dtype.itemsize > len(self.buffer):
+			raise errors.FileReadError("Unexpected end of file")
+		data = np.frombuffer(self.buffer, dtype=dtype, count=count,
+				offset=self.position)
+		self.position += count*dtype.itemsize
+
+		return data
+
+	def find_line(self, string):
+		'''
+		This method finds the first line that starts with a given string.
+
+		Inputs:
+		-------
+			string: input string
+
+		Outputs:
+		--------
+			position: position of the line; -1 if not found
+		'''
+		key = string.encode()
+		if self.buffer[:len(key)] == key:
+			return 0
+		position = self.buffer.find(b"\n" + key, 0)
+		if position >= 0:
+			position += 1
+
+		return position
+
+	def set_binary_types(self, data_size, byte_order):
+		'''
+		This method sets the types of the binary entries.
+
+		Inputs:
+		-------
+			data_size: size of the size_t type (in bytes)
+			byte_order: byte order of the entries ("<" for little endian,
+				">" for big endian)
+		'''
+		self.binary = True
+		self.int_type = np.dtype(byte_order + "i4")
+		self.size_type = np.dtype(byte_order + "u%d" % (data_size))
+		self.float_type = np.dtype(byte_order + "f8")
+
+	def close(self):
+		# Arrays mapped by read_binary may still refer to the memory map,
+		# so it is unmapped only once they are deleted
+		self.buffer = None
 
 
 def go_to_line_below_string(fo, string):
@@ -349,29 +450,184 @@ def go_to_line_below_string(fo, string):
 
 	Inputs:
 	-------
-		fo: file object
+		fo: mesh file object
 		string: input string
 
 	Outputs:
 	--------
-		fo: file object (current position is modified)
+		fo: mesh file object (current position is modified)
+	'''
+	# Search from beginning
+	position = fo.find_line(string)
+	if position < 0:
+		raise errors.FileReadError
+
+	# Skip line with string
+	fo.seek(position)
+	fo.readline()
+
+
+def read_lines(fo, num_lines):
+	'''
+	This function reads a given number of lines from a file in one go.
+
+	Inputs:
+	-------
+		fo: mesh file object
+		num_lines: number of lines to read
+
+	Outputs:
+	--------
+		fo: mesh file object (current position is modified)
+		text: bytes containing the lines (including newline characters)
 	'''
-	# Start from beginning
-	fo.seek(0)
+	return fo.read_lines(num_lines)
 
-	# Compare line by line
-	found = False
-	while not found:
-		fl = fo.readline()
-		if not fl:
-			# reached end of file
-			break
-		if fl.startswith(string):
-			found = True
 
-	if not found:
+def read_array(fo, num_lines, dtype):
+	'''
+	This function reads a block of lines that each contain the same number
+	of entries and converts it to an array.
+
+	Inputs:
+	-------
+		fo: mesh file object
+		num_lines: number of lines to read
+		dtype: data type of the entries
+
+	Outputs:
+	--------
+		fo: mesh file object (current position is modified)
+		data: array of entries [num_lines, num_entries_per_line]
+	'''
+	data = np.fromstring(read_lines(fo, num_lines), dtype=dtype, sep=" ")
+	if num_lines == 0:
+		return data.reshape(0, 0)
+	if data.shape[0] % num_lines != 0:
 		raise errors.FileReadError
 
+	return data.reshape(num_lines, -1)
+
+
+def read_section_header(fo):
+	'''
+	This function reads the header of the entity, node, or element section
+	for Gmsh 4.1.
+
+	Inputs:
+	-------
+		fo: mesh file object
+
+	Outputs:
+	--------
+		fo: mesh file object (current position is modified)
+		header: numbers of points, curves, surfaces, and volumes
+			(entities); or number of entity blocks, number of nodes or
+			elements, and minimum and maximum node or element tags
+	'''
+	if fo.binary:
+		return [int(l) for l in fo.read_binary(fo.size_type, 4)]
+	else:
+		return [int(l) for l in fo.readline().split()]
+
+
+def read_block_header(fo):
+	'''
+	This function reads the header of an entity block in the node or element
+	section for Gmsh 4.1.
+
+	Inputs:
+	-------
+		fo: mesh file object
+
+	Outputs:
+	--------
+		fo: mesh file object (current position is modified)
+		header: entity dimension, entity tag, parametric flag (nodes) or
+			Gmsh element type (elements), and number of nodes or elements
+			in block
+	'''
+	if fo.binary:
+		return [int(l) for l in fo.read_binary(fo.int_type, 3)] + \
+				[int(fo.read_binary(fo.size_type, 1)[0])]
+	else:
+		return [int(l) for l in fo.readline().split()]
+
+
+def count_entries_per_line(text):
+	'''
+	This function counts the number of whitespace-separated entries in
+	each line of a block of text.
+
+	Inputs:
+	-------
+		text: bytes containing the lines (each terminated by a newline
+			character)
+
+	Outputs:
+	--------
+		num_entries: number of entries in each line [num_lines]
+	'''
+	chars = np.frombuffer(text, dtype=np.uint8)
+	newlines = chars == ord("\n")
+	is_space = newlines | (chars == ord(" ")) | (chars == ord("\t")) | \
+			(chars == ord("\r"))
+
+	# An entry starts wherever a non-whitespace character follows a
+	# whitespace character (or the start of the text)
+	entry_starts = ~is_space
+	entry_starts[1:] &= is_space[:-1]
+
+	# Line of each entry
+	line_IDs = np.cumsum(newlines)[entry_starts]
+
+	return np.bincount(line_IDs, minlength=np.count_nonzero(newlines))
+
+
+def get_old_to_new_node_IDs(old_node_IDs):
+	'''
+	This function creates the map from Gmsh-assigned (old) node IDs to new
+	IDs.
+
+	Inputs:
+	-------
+		old_node_IDs: Gmsh-assigned node IDs in the order in which the
+			nodes are read [num_nodes]
+
+	Outputs:
+	--------
+		old_to_new_node_IDs: maps old node IDs to new IDs; -1 for old IDs
+			not assigned to any node [max(old_node_IDs) + 1]
+	'''
+	old_to_new_node_IDs = np.full(np.amax(old_node_IDs) + 1, -1)
+	old_to_new_node_IDs[old_node_IDs] = np.arange(old_node_IDs.shape[0])
+
+	return old_to_new_node_IDs
+
+
+def convert_node_IDs(old_to_new_node_IDs, old_node_IDs):
+	'''
+	This function converts Gmsh-assigned (old) node IDs to new IDs.
+
+	Inputs:
+	-------
+		old_to_new_node_IDs: maps old node IDs to new IDs (see
+			get_old_to_new_node_IDs)
+		old_node_IDs: old node IDs (any shape)
+
+	Outputs:
+	--------
+		node_IDs: new node IDs (same shape as old_node_IDs)
+	'''
+	if old_node_IDs.size > 0 and (np.amin(old_node_IDs) < 0 or
+			np.amax(old_node_IDs) >= old_to_new_node_IDs.shape[0]):
+		raise errors.DoesNotExistError("Node not found!")
+	node_IDs = old_to_new_node_IDs[old_node_IDs]
+	if np.any(node_IDs < 0):
+		raise errors.DoesNotExistError("Node not found!")
+
+	return node_IDs
+
 
 def check_mesh_format(fo):
 	'''
@@ -379,12 +635,17 @@ def check_mesh_format(fo):
 
 	Inputs:
 	-------
-		fo: file object
+		fo: mesh file object
 
 	Outputs:
 	--------
-		fo: file object (current position is modified)
+		fo: mesh file object (current position is modified; binary types
+			are set for binary files)
 		ver: Gmsh file version
+
+	Notes:
+	------
+		Binary files are only supported for Gmsh 4.1.
 	'''
 	# Find beginning of section
 	go_to_line_below_string(fo, "$MeshFormat")
@@ -397,7 +658,23 @@ def check_mesh_format(fo):
 				"Only versions 2.2 and 4.1 are supported.")
 	file_type = int(fl.split()[1])
 	if file_type != 0:
-		raise errors.FileReadError("Only ASCII format supported")
+		if ver != VERSION4:
+			raise errors.FileReadError("Only ASCII format supported " +
+					"for version 2.2")
+		data_size = int(fl.split()[2])
+		if data_size != 4 and data_size != 8:
+			raise errors.FileReadError("Unsupported data size")
+
+		# The integer 1 is written in binary to detect the byte order
+		one = fo.read_binary(np.dtype("<i4"), 1)[0]
+		if one == 1:
+			fo.set_binary_types(data_size, "<")
+		elif one.byteswap() == 1:
+			fo.set_binary_types(data_size, ">")
+		else:
+			raise errors.FileReadError("Unknown byte order")
+		# Rest of line
+		fo.readline()
 
 	# Verify footer
 	fl = fo.readline()
@@ -413,12 +690,12 @@ def import_physical_groups(fo, mesh):
 
 	Inputs:
 	-------
-		fo: file object
+		fo: mesh file object
 		mesh: mesh object
 
 	Outputs:
 	-------
-		fo: file object (current position is modified)
+		fo: mesh file object (current position is modified)
 		phys_groups: list of physical group objects
 		num_phys_groups: number of physical groups
 	'''
@@ -468,11 +745,11 @@ def get_nodes_ver2(fo):
 
 	Inputs:
 	-------
-		fo: file object
+		fo: mesh file object
 
 	Outputs:
 	--------
-		fo: file object (current position is modified)
+		fo: mesh file object (current position is modified)
 		node_coords: node coordinates
 		old_to_new_node_IDs: maps Gmsh-assigned (old) node IDs to new IDs
 
@@ -486,28 +763,19 @@ def get_nodes_ver2(fo):
 	num_nodes = int(fo.readline())
 	if num_nodes == 0:
 		raise ValueError("No nodes to import!")
-	old_to_new_node_IDs = {}
-	# Allocate nodes - assume 3D first
-	node_coords = np.zeros([num_nodes, 3])
 
-	# Extract nodes
-	new_node_ID = 0
-	for n in range(num_nodes):
-		fl = fo.readline()
-		ls = fl.split()
-		# Node ID
-		old_node_ID = int(ls[0])
-		old_to_new_node_IDs.update({old_node_ID : new_node_ID})
-		# Node coordinates
-		for d in range(3):
-			node_coords[new_node_ID, d] = float(ls[d+1])
-		# Sanity check
-		if int(ls[0]) > num_nodes:
-			raise errors.FileReadError
+	# Extract nodes - each line contains the node ID and the 3D coordinates
+	data = read_array(fo, num_nodes, float)
+	if data.shape[1] != 4:
+		raise errors.FileReadError
+	old_node_IDs = data[:, 0].astype(int)
+	node_coords = data[:, 1:]
 
-		new_node_ID += 1
+	# Sanity check
+	if np.amax(old_node_IDs) > num_nodes:
+		raise errors.FileReadError
 
-	return node_coords, old_to_new_node_IDs
+	return node_coords, get_old_to_new_node_IDs(old_node_IDs)
 
 
 def get_nodes_ver4(fo):
@@ -516,11 +784,11 @@ def get_nodes_ver4(fo):
 
 	Inputs:
 	-------
-		fo: file object
+		fo: mesh file object
 
 	Outputs:
 	--------
-		fo: file object (current position is modified)
+		fo: mesh file object (current position is modified)
 		node_coords: node coordinates
 		old_to_new_node_IDs: maps Gmsh-assigned (old) node IDs to new IDs
 
@@ -530,39 +798,49 @@ def get_nodes_ver4(fo):
 		in which nodes are read. Gmsh does not necessarily follow this
 		convention, especially with the newer versions.
 	'''
-	fl = fo.readline()
-	ls = [int(l) for l in fl.split()]
+	ls = read_section_header(fo)
 	num_blocks = ls[0]
 	num_nodes = ls[1]
 	if num_nodes == 0:
 		raise ValueError("No nodes to import!")
 
-	old_to_new_node_IDs = {}
 	# Allocate nodes - assume 3D first
+	old_node_IDs = np.zeros(num_nodes, dtype=int)
 	node_coords = np.zeros([num_nodes, 3])
 
 	# Extract nodes
 	new_node_ID = 0
 	for b in range(num_blocks):
 		# One block at a time
-		fl = fo.readline()
-		ls = [int(l) for l in fl.split()]
+		ls = read_block_header(fo)
 		num_nodes_in_block = ls[3]
-		new_node_IDs = np.zeros(num_nodes_in_block, dtype=int)
-		# Node IDs
-		for n in range(num_nodes_in_block):
-			fl = fo.readline()
-			old_node_ID = int(fl)
-			new_node_IDs[n] = new_node_ID
-			old_to_new_node_IDs.update({old_node_ID : new_node_ID})
-			new_node_ID += 1
-		# Node coordinates
-		for n in range(num_nodes_in_block):
-			fl = fo.readline()
-			inode = new_node_IDs[n]
-			node_coords[inode] = [float(l) for l in fl.split()[:3]]
+		new_node_IDs = slice(new_node_ID, new_node_ID + num_nodes_in_block)
+		if fo.binary:
+			# Node IDs
+			old_node_IDs[new_node_IDs] = fo.read_binary(fo.size_type,
+					num_nodes_in_block)
+			# Node coordinates (followed by the parametric coordinates of
+			# dimension ls[0], if ls[2] is nonzero)
+			num_coords = 3 + ls[0]*ls[2]
+			coords = fo.read_binary(fo.float_type,
+					num_nodes_in_block*num_coords).reshape(
+					num_nodes_in_block, num_coords)
+		else:
+			# Node IDs
+			old_node_IDs[new_node_IDs] = read_array(fo, num_nodes_in_block,
+					int).reshape(-1)
+			# Node coordinates (followed by the parametric coordinates, if
+			# any)
+			coords = read_array(fo, num_nodes_in_block, float)
+		node_coords[new_node_IDs] = coords[:, :3]
+
+		new_node_ID += num_nodes_in_block
+
+	if fo.binary:
+		# Rest of line after binary data
+		fo.readline()
 
-	return node_coords, old_to_new_node_IDs
+	return node_coords, get_old_to_new_node_IDs(old_node_IDs)
 
 
 def import_nodes(fo, ver, mesh):
@@ -571,13 +849,13 @@ def import_nodes(fo, ver, mesh):
 
 	Inputs:
 	-------
-		fo: file object
+		fo: mesh file object
 		ver: Gmsh file version
 		mesh: mesh object
 
 	Outputs:
 	--------
-		fo: file object (current position is modified)
+		fo: mesh file object (current position is modified)
 		mesh: mesh object (modified)
 		old_to_new_node_IDs: maps Gmsh-assigned (old) node IDs to new IDs
 
@@ -632,39 +910,56 @@ def import_mesh_entities(fo, ver, mesh, phys_groups):
 
 	Inputs:
 	-------
-		fo: file object
+		fo: mesh file object
 		ver: Gmsh file version
 		mesh: mesh object
 		phys_groups: list of physical group objects
 
 	Outputs:
 	--------
-		fo: file object (current position is modified)
+		fo: mesh file object (current position is modified)
 		phys_groups: list of physical group objects (modified)
 	'''
-	def get_entity_tag(fo, phys_groups, num_phys_tags_idx, phys_num_idx):
+	def get_entity_tag(fo, phys_groups, entity_dim, store):
 		'''
 		This inner function obtains the tag of a given entity and stores it
 		in the corresponding physical group
 
 		Inputs:
 		-------
-			fo: file object
+			fo: mesh file object
 			phys_groups: list of physical group objects
-			num_phys_tags_idx: index to obtain number of physical tags
-			phys_num_idx: index to obtain physical group number
+			entity_dim: dimension of entity
+			store: if False, the entity is skipped
 
 		Outputs:
 		--------
-			fo: file object (current position is modified)
+			fo: mesh file object (current position is modified)
 			phys_groups: list of physical group objects (modified)
 		'''
-		fl = fo.readline()
-		ls = fl.split()
-		entity_tag = int(ls[0])
-		num_phys_tags = int(ls[num_phys_tags_idx])
+		if fo.binary:
+			entity_tag = int(fo.read_binary(fo.int_type, 1)[0])
+			# Skip point coordinates or bounding box
+			fo.read_binary(fo.float_type, 3 if entity_dim == 0 else 6)
+			num_phys_tags = int(fo.read_binary(fo.size_type, 1)[0])
+			phys_nums = fo.read_binary(fo.int_type, num_phys_tags)
+			if entity_dim > 0:
+				# Skip bounding entities
+				num_bounding_tags = int(fo.read_binary(fo.size_type, 1)[0])
+				fo.read_binary(fo.int_type, num_bounding_tags)
+		else:
+			fl = fo.readline()
+			ls = fl.split()
+			entity_tag = int(ls[0])
+			# Points have coordinates, other entities a bounding box
+			num_phys_tags_idx = 4 if entity_dim == 0 else 7
+			num_phys_tags = int(ls[num_phys_tags_idx])
+			phys_nums = ls[num_phys_tags_idx + 1:]
+
+		if not store:
+			return
 		if num_phys_tags == 1:
-			phys_num = int(ls[phys_num_idx])
+			phys_num = int(phys_nums[0])
 			for phys_group in phys_groups:
 				if phys_group.gmsh_phys_num == phys_num:
 					break
@@ -679,35 +974,19 @@ def import_mesh_entities(fo, ver, mesh, phys_groups):
 	# Find beginning of section
 	go_to_line_below_string(fo, "$Entities")
 
-	fl = fo.readline()
-	ls = [int(l) for l in fl.split()]
-	num_points = ls[0]
-	num_curves = ls[1]
-	num_surfaces = ls[2]
-	num_volumes = ls[3]
-
-	# Read entities
-	if mesh.ndims == 2:
-		# Skip points
-		for _ in range(num_points):
-			fo.readline()
-		# Curves + surfaces
-		for _ in range(num_curves + num_surfaces):
-			get_entity_tag(fo, phys_groups, 7, 8)
-		# Skip volumes
-		for _ in range(num_volumes):
-			fo.readline()
-	else:
-		# 1D
-		# Points
-		for _ in range(num_points):
-			get_entity_tag(fo, phys_groups, 4, 5)
-		# Curves
-		for _ in range(num_curves):
-			get_entity_tag(fo, phys_groups, 7, 8)
-		# Skip surfaces and volumes
-		for _ in range(num_surfaces + num_volumes):
-			fl = fo.readline()
+	# Number of points, curves, surfaces, and volumes
+	num_entities = read_section_header(fo)
+
+	# Read entities - only those of elements and boundary faces are
+	# stored
+	for entity_dim in range(4):
+		store = entity_dim == mesh.ndims or entity_dim == mesh.ndims - 1
+		for _ in range(num_entities[entity_dim]):
+			get_entity_tag(fo, phys_groups, entity_dim, store)
+
+	if fo.binary:
+		# Rest of line after binary data
+		fo.readline()
 
 	# Verify footer
 	fl = fo.readline()
@@ -717,109 +996,111 @@ def import_mesh_entities(fo, ver, mesh, phys_groups):
 	return phys_groups
 
 
-def get_elem_bface_info_ver2(fo, mesh, phys_groups, num_phys_groups,
-		gmsh_element_database):
+def get_elem_bface_blocks_ver2(fo, phys_groups, gmsh_element_database):
 	'''
-	This function imports element and boundary face info for Gmsh 2.2.
+	This function reads the elements and boundary faces for Gmsh 2.2.
 
 	Inputs:
 	-------
-		fo: file object
-		mesh: mesh object
+		fo: mesh file object
 		phys_groups: list of physical group objects
-		num_phys_groups: number of physical groups
-		gmsh_element_database: database on Gmsh elements
+		gmsh_element_database: Gmsh element database
 
 	Outputs:
 	--------
-		fo: file object (current position is modified)
-		mesh: mesh object (modified)
+		fo: mesh file object (current position is modified)
+		blocks: list of (etype, phys_group, node_IDs) tuples, where each
+			tuple holds a set of consecutive lines with the same Gmsh
+			element type and physical group, and node_IDs contains the
+			Gmsh-assigned (old) node IDs [num_in_block, num_nodes]
 	'''
 	# Number of elements and boundary faces
 	num_elems_bfaces = int(fo.readline())
 	if num_elems_bfaces == 0:
 		raise ValueError("No elements or boundary faces to import")
 
-	# Loop
-	for _ in range(num_elems_bfaces):
-		fl = fo.readline()
-		ls = fl.split()
-		etype = int(ls[1]) # Gmsh element type
-		phys_num = int(ls[3])
+	# Read all lines at once - each line contains the ID, the Gmsh element
+	# type, the number of tags, the tags (the first of which is the
+	# physical group number), and the node IDs
+	text = read_lines(fo, num_elems_bfaces)
+	data = np.fromstring(text, dtype=int, sep=" ")
+	num_entries = count_entries_per_line(text)
+	if num_entries.shape[0] != num_elems_bfaces or \
+			np.sum(num_entries) != data.shape[0]:
+		raise errors.FileReadError
+	line_starts = np.zeros(num_elems_bfaces, dtype=int)
+	line_starts[1:] = np.cumsum(num_entries)[:-1]
+
+	# Split into blocks of consecutive lines with the same layout
+	line_info = np.stack([num_entries, data[line_starts + 1],
+			data[line_starts + 2], data[line_starts + 3]], axis=1)
+	block_starts = np.flatnonzero(np.any(line_info[1:] != line_info[:-1],
+			axis=1)) + 1
+	block_starts = np.concatenate([[0], block_starts, [num_elems_bfaces]])
+
+	blocks = []
+	for start, end in zip(block_starts[:-1], block_starts[1:]):
+		num_entries_in_line, etype, num_tags, phys_num = line_info[start]
 
-		# Extract physical group
+		# Find physical group
 		found = False
 		for phys_group in phys_groups:
 			if phys_group.gmsh_phys_num == phys_num:
 				found = True
 				break
 		if not found:
-			raise errors.DoesNotExistError("All elements and boundary" +
+			raise errors.DoesNotExistError("All elements and boundary " +
 					"faces must be assigned to a physical group")
 
-		# Process
-		if phys_group.ndims == mesh.ndims:
-			# Element
-			# Make sure only one type of volume element in type
-			gorder = gmsh_element_database[etype].gorder
-			gbasis = gmsh_element_database[etype].gbasis
-
-			if mesh.num_elems == 0:
-				mesh.set_params(gbasis=gbasis, gorder=gorder, num_elems=0)
-			else:
-				if gorder != mesh.gorder or gbasis != mesh.gbasis:
-					raise ValueError(">1 element type not supported")
-
-			# Increment number of elements
-			mesh.num_elems += 1
+		# Get nodes
+		tag_offset = 3 # 3 integers (including num_tags) before tags start
+		istart = num_tags + tag_offset # starting index of node numbering
+		num_nodes = gmsh_element_database[etype].num_nodes
+		if num_entries_in_line - istart != num_nodes:
+			raise Exception("Wrong number of nodes")
+		lines = data[line_starts[start]:line_starts[start] +
+				(end - start)*num_entries_in_line].reshape(end - start, -1)
 
-		elif phys_group.ndims == mesh.ndims - 1:
-			# Boundary face
-			try:
-				bgroup = mesh.boundary_groups[phys_group.name]
-			except KeyError:
-				# Add new boundary group
-				bgroup = mesh.add_boundary_group(phys_group.name)
-				phys_group.boundary_group_num = bgroup.number
+		blocks.append((etype, phys_group, lines[:, istart:]))
 
-			# Increment number of boundary faces
-			bgroup.num_boundary_faces += 1
+	return blocks
 
 
-def get_elem_bface_info_ver4(fo, mesh, phys_groups, num_phys_groups,
+def get_elem_bface_blocks_ver4(fo, mesh, phys_groups,
 		gmsh_element_database):
 	'''
-	This function imports element and boundary face info for Gmsh 4.1.
+	This function reads the elements and boundary faces for Gmsh 4.1.
 
 	Inputs:
 	-------
-		fo: file object
+		fo: mesh file object
 		mesh: mesh object
 		phys_groups: list of physical group objects
-		num_phys_groups: number of physical groups
-		gmsh_element_database: database on Gmsh elements
+		gmsh_element_database: Gmsh element database
 
 	Outputs:
 	--------
-		fo: file object (current position is modified)
-		mesh: mesh object (modified)
+		fo: mesh file object (current position is modified)
+		blocks: list of (etype, phys_group, node_IDs) tuples, one per
+			Gmsh entity block, where node_IDs contains the Gmsh-assigned
+			(old) node IDs [num_in_block, num_nodes]; blocks of entities
+			that are neither elements nor boundary faces are skipped
 	'''
-	fl = fo.readline()
-	lint = [int(l) for l in fl.split()]
+	lint = read_section_header(fo)
 	num_entity_blocks = lint[0]
 	num_elems_bfaces = lint[1]
 	if num_elems_bfaces == 0:
 		raise ValueError("No elements or boundary faces to import")
 
+	blocks = []
 	for _ in range(num_entity_blocks):
-		fl = fo.readline()
-		lint = [int(l) for l in fl.split()]
+		lint = read_block_header(fo)
 		ndims = lint[0]
 		entity_tag = lint[1]
 		etype = lint[2] # Gmsh element type
 		num_in_block = lint[3]
 
-		# Find physical boundary group
+		# Find physical group
 		found = False
 		for phys_group in phys_groups:
 			if entity_tag in phys_group.entity_tags and \
@@ -830,46 +1111,32 @@ def get_elem_bface_info_ver4(fo, mesh, phys_groups, num_phys_groups,
 			raise errors.DoesNotExistError("All elements and boundary " +
 					"faces must be assigned to a physical group")
 
-		if ndims == mesh.ndims:
-			# Element
-			# Get element type data
-			gorder = gmsh_element_database[etype].gorder
-			gbasis = gmsh_element_database[etype].gbasis
-
-			# Loop
-			for _ in range(num_in_block):
-				# Make sure only one type of volume element in type
-				fo.readline()
-				if mesh.num_elems == 0:
-					mesh.set_params(gbasis=gbasis, gorder=gorder,
-							num_elems=0)
-				else:
-					if gorder != mesh.gorder or gbasis != mesh.gbasis:
-						raise ValueError(">1 element type not supported")
-
-				# Increment number of elements
-				mesh.num_elems += 1
-
-		elif ndims == mesh.ndims - 1:
-			# Boundary face
-
-			if phys_group.boundary_group_num >= 0:
-				bgroup = mesh.boundary_groups[phys_group.name]
-			else:
-				# Group has not been assigned yet
-				bgroup = mesh.add_boundary_group(phys_group.name)
-				phys_group.boundary_group_num = bgroup.number
-
-			# Loop and increment number of boundary faces
-			for _ in range(num_in_block):
-				fo.readline()
-				bgroup.num_boundary_faces += 1
+		if fo.binary:
+			# Each element consists of the ID and the node IDs
+			num_nodes = gmsh_element_database[etype].num_nodes
+			lines = fo.read_binary(fo.size_type, num_in_block*(
+					num_nodes + 1)).reshape(num_in_block, num_nodes + 1)
+			lines = lines.astype(int)
+		elif ndims == mesh.ndims or ndims == mesh.ndims - 1:
+			# Each line contains the ID and the node IDs
+			lines = read_array(fo, num_in_block, int)
+			if lines.shape[1] - 1 != \
+					gmsh_element_database[etype].num_nodes:
+				raise Exception("Wrong number of nodes")
 		else:
 			# Skip
-			for _ in range(num_in_block):
-				fo.readline()
+			read_lines(fo, num_in_block)
+			continue
 
-	return mesh
+		if ndims == mesh.ndims or ndims == mesh.ndims - 1:
+			# Element or boundary face
+			blocks.append((etype, phys_group, lines[:, 1:]))
+
+	if fo.binary:
+		# Rest of line after binary data
+		fo.readline()
+
+	return blocks
 
 
 def import_mesh_elems_boundary_faces(fo, ver, mesh, phys_groups,
@@ -879,7 +1146,7 @@ def import_mesh_elems_boundary_faces(fo, ver, mesh, phys_groups,
 
 	Inputs:
 	-------
-		fo: file object
+		fo: mesh file object
 		ver: Gmsh file version
 		mesh: mesh object
 		phys_groups: list of physical group objects
@@ -888,18 +1155,25 @@ def import_mesh_elems_boundary_faces(fo, ver, mesh, phys_groups,
 
 	Outputs:
 	--------
-		fo: file object (current position is modified)
+		fo: mesh file object (current position is modified)
 		mesh: mesh object (modified)
+		blocks: list of (etype, phys_group, node_IDs) tuples (see
+			get_elem_bface_blocks_ver2)
+
+	Notes:
+	------
+		Boundary groups are created in the order in which they are first
+		encountered.
 	'''
 	# Find beginning of section
 	go_to_line_below_string(fo, "$Elements")
 
-	# Get element and boundary face info
+	# Read elements and boundary faces
 	if ver == VERSION2:
-		get_elem_bface_info_ver2(fo, mesh, phys_groups, num_phys_groups,
+		blocks = get_elem_bface_blocks_ver2(fo, phys_groups,
 				gmsh_element_database)
 	else:
-		get_elem_bface_info_ver4(fo, mesh, phys_groups, num_phys_groups,
+		blocks = get_elem_bface_blocks_ver4(fo, mesh, phys_groups,
 				gmsh_element_database)
 
 	# Verify footer
@@ -907,443 +1181,210 @@ def import_mesh_elems_boundary_faces(fo, ver, mesh, phys_groups,
 	if not fl.startswith("$EndElements"):
 		raise errors.FileReadError
 
-	return mesh
-
-
-def add_face_info_to_table(node0_to_faces_info, num_face_nodes, node_IDs,
-	at_boundary, group_num, elem_ID, face_ID):
-	'''
-	This function adds face (boundary or interior) info to the
-	node0_to_faces_info table.
-
-	Inputs:
-	-------
-		node0_to_faces_info: list of dicts, where, for a given dict, each
-			key is a tuple containing the global node IDs defining a face
-			(in ascending order) and the corresponding value is an object
-			containing relevant info about the face; all the keys for a
-			given dict have the same node0, which is the smallest global
-			node ID of the keys (tuples); the list is indexed by node0;
-			this is used to connect faces to elements
-		num_face_nodes: number of (q = 1) face nodes
-		node_IDs: global IDs of nodes defining the face
-		at_boundary: True if boundary face; False if interior face
-		group_num: number of physical group if boundary face; -1 if
-			interior face
-		elem_ID: element ID of current adjacent element
-		face_ID: local face ID from perspective of current adjacent element
-
-	Outputs:
-	--------
-		face_info: object containing relevant face info
-		already_added: True if face has already been added to table; False
-			if otherwise
-		node0_to_faces_info: see above (modified)
-	'''
-	if num_face_nodes <= 0:
-		raise ValueError("Need num_face_nodes > 1")
-
-	# Sort nodes and convert to tuple (to make it hashable)
-	node_IDs_sort = tuple(np.sort(node_IDs[:num_face_nodes]))
-
-	# Extract correct faces_info dict
-	node0 = node_IDs_sort[0]
-	faces_info = node0_to_faces_info[node0]
-
-	# Check if face already exists in table
-	already_added = False
-	if node_IDs_sort in faces_info:
-		already_added = True
-		face_info = faces_info[node_IDs_sort]
-		face_info.num_adjacent_elems += 1
-	else:
-		# Not yet added, so add now
-		face_info = FaceInfo()
-		faces_info.update({node_IDs_sort : face_info})
-		face_info.set_info(at_boundary=at_boundary,
-				boundary_group_num=group_num, elem_ID=elem_ID,
-				face_ID=face_ID, num_face_nodes=num_face_nodes,
-				node_IDs_sort=node_IDs_sort)
-		if not at_boundary:
-			face_info.num_adjacent_elems = 1
-
-	return face_info, already_added
-
-
-def delete_face_info_from_table(node0_to_faces_info, num_face_nodes,
-		node_IDs):
-	'''
-	This function deletes face (boundary or interior) info from the
-	node0_to_faces_info table.
+	# Get element and boundary face info
+	for etype, phys_group, node_IDs in blocks:
+		if phys_group.ndims == mesh.ndims:
+			# Element
+			# Make sure only one type of volume element in type
+			gorder = gmsh_element_database[etype].gorder
+			gbasis = gmsh_element_database[etype].gbasis
 
-	Inputs:
-	-------
-		node0_to_faces_info: see above description of add_face_info_to_table
-		num_face_nodes: number of (q = 1) face nodes
-		node_IDs: global IDs of nodes defining the face
+			if mesh.num_elems == 0:
+				mesh.set_params(gbasis=gbasis, gorder=gorder, num_elems=0)
+			else:
+				if gorder != mesh.gorder or gbasis != mesh.gbasis:
+					raise ValueError(">1 element type not supported")
 
-	Outputs:
-	--------
-		node0_to_faces_info: see above (modified)
-	'''
-	if num_face_nodes <= 0:
-		raise ValueError("Need num_face_nodes > 1")
+			# Increment number of elements
+			mesh.num_elems += node_IDs.shape[0]
 
-	# Sort nodes and convert to tuple (to make it hashable)
-	node_IDs_sort = tuple(np.sort(node_IDs[:num_face_nodes]))
+		elif phys_group.ndims == mesh.ndims - 1:
+			# Boundary face
+			if phys_group.boundary_group_num >= 0:
+				bgroup = mesh.boundary_groups[phys_group.name]
+			else:
+				# Group has not been assigned yet
+				bgroup = mesh.add_boundary_group(phys_group.name)
+				phys_group.boundary_group_num = bgroup.number
 
-	# Extract correct faces_info dict
-	n0 = node_IDs_sort[0]
-	faces_info = node0_to_faces_info[n0]
+			# Increment number of boundary faces
+			bgroup.num_boundary_faces += node_IDs.shape[0]
 
-	# Delete
-	if node_IDs_sort in faces_info:
-		del faces_info[node_IDs_sort]
+	return mesh, blocks
 
 
-def process_elems_bfaces_ver2(fo, mesh, phys_groups, num_phys_groups,
-		gmsh_element_database, old_to_new_node_IDs, num_bfaces_per_bgroup,
-		node0_to_faces_info):
+def get_elem_face_node_IDs(mesh):
 	'''
-	This function processes element and boundary face info for Gmsh 2.2.
+	This function obtains the global IDs of the principal nodes of each
+	local face of each element.
 
 	Inputs:
 	-------
-		fo: file object
 		mesh: mesh object
-		phys_groups: list of physical group objects
-		num_phys_groups: number of physical groups
-		gmsh_element_database: Gmsh element database
-		old_to_new_node_IDs: maps Gmsh-assigned (old) node IDs to new IDs
-		num_bfaces_per_bgroup: number of boundary faces per boundary group
-		node0_to_faces_info: see above description of add_face_info_to_table
 
 	Outputs:
 	--------
-		fo: file object (current position is modified)
-		mesh: mesh object (modified)
-		node0_to_faces_info: see above description of add_face_info_to_table
-			(modified)
+		face_node_IDs: global IDs of principal face nodes, sorted in
+			ascending order for each face [num_elems*num_faces_per_elem,
+			num_face_nodes]; face_ID of elem_ID is stored in row
+			elem_ID*num_faces_per_elem + face_ID
 	'''
-	num_elems_bfaces = int(fo.readline())
-	num_elems = 0 # counter for number of elements
+	gbasis = mesh.gbasis
+	local_node_nums = np.stack([gbasis.get_local_face_principal_node_nums(
+			mesh.gorder, face_ID) for face_ID in range(gbasis.NFACES)])
+	face_node_IDs = mesh.elem_to_node_IDs[:, local_node_nums].reshape(
+			-1, local_node_nums.shape[1])
 
-	# Loop through entities
-	for _ in range(num_elems_bfaces):
-		fl = fo.readline()
-		ls = fl.split()
-		etype = int(ls[1]) # Gmsh element type
-		phys_num = int(ls[3])
-
-		# Find physical group
-		found = False
-		for phys_group in phys_groups:
-			if phys_group.gmsh_phys_num == phys_num:
-				found = True
-				break
-		if not found:
-			raise errors.DoesNotExistError("Physical group not found!")
-
-		# Get nodes
-		num_tags = int(ls[2]) # number of tags
-		tag_offset = 3 # 3 integers (including num_tags) before tags start
-		istart = num_tags + tag_offset # starting index of node numbering
-		num_nodes = gmsh_element_database[etype].num_nodes
-		elist = ls[istart:] # list of nodes (string format)
-		if len(elist) != num_nodes:
-			raise Exception("Wrong number of nodes")
-
-		# Convert nodes IDs
-		node_IDs = np.zeros(num_nodes, dtype=int)
-		for i in range(num_nodes):
-			node_IDs[i] = old_to_new_node_IDs[int(elist[i])]
-
-		if phys_group.boundary_group_num >= 0:
-			# This is a boundary face
-
-			# Get info
-			gbasis = gmsh_element_database[etype].gbasis
-			gorder = gmsh_element_database[etype].gorder
-			bgroup_num = phys_group.boundary_group_num
-			bgroup = mesh.boundary_groups[phys_group.name]
-			num_face_nodes = gbasis.get_num_basis_coeff(1)
-
-			# Add face info to table
-			_, _ = add_face_info_to_table(node0_to_faces_info,
-					num_face_nodes, node_IDs, True, bgroup_num, -1,
-					num_bfaces_per_bgroup[bgroup_num])
-
-			# Increment number of boundary faces
-			num_bfaces_per_bgroup[bgroup_num] += 1
-
-		elif phys_group.boundary_group_num == -1:
-			# This is a volume element
-
-			# Get info
-			gorder = gmsh_element_database[etype].gorder
-			gbasis = gmsh_element_database[etype].gbasis
-			num_nodes = gbasis.get_num_basis_coeff(gorder)
-			# Sanity check
-			if num_nodes != gmsh_element_database[etype].num_nodes:
-				raise Exception("Number of nodes doesn't match up")
-
-			# Convert from Gmsh node ordering to quail node ordering and
-			# store
-			new_node_IDs = node_IDs[gmsh_element_database[etype].node_order]
-			mesh.elem_to_node_IDs[num_elems] = new_node_IDs
-
-			# Increment elem counter
-			num_elems += 1
-
-		else:
-			raise ValueError
+	return np.sort(face_node_IDs, axis=1)
 
 
-def process_elems_bfaces_ver4(fo, mesh, phys_groups, num_phys_groups,
-		gmsh_element_database, old_to_new_node_IDs, num_bfaces_per_bgroup,
-		node0_to_faces_info):
+def match_faces(elem_face_node_IDs, bface_node_IDs):
 	'''
-	This function processes element and boundary face info for Gmsh 4.1.
+	This function connects element faces to each other (interior faces)
+	and to boundary faces.
 
 	Inputs:
 	-------
-		fo: file object
-		mesh: mesh object
-		phys_groups: list of physical group objects
-		num_phys_groups: number of physical groups
-		gmsh_element_database: Gmsh element database
-		old_to_new_node_IDs: maps Gmsh-assigned (old) node IDs to new IDs
-		num_bfaces_per_bgroup: number of boundary faces per boundary group
-		node0_to_faces_info: see above description of add_face_info_to_table
+		elem_face_node_IDs: global IDs of principal face nodes of element
+			faces, sorted in ascending order for each face
+			[num_elem_faces, num_face_nodes]
+		bface_node_IDs: global IDs of principal face nodes of boundary
+			faces, sorted in ascending order for each face [num_bfaces,
+			num_face_nodes]
 
 	Outputs:
 	--------
-		fo: file object (current position is modified)
-		mesh: mesh object (modified)
-		node0_to_faces_info: see above description of add_face_info_to_table
-			(modified)
-	'''
-	fl = fo.readline()
-	lint = [int(l) for l in fl.split()]
-	num_entity_blocks = lint[0]
-	num_elems_bfaces = lint[1]
-	num_elems = 0 # counter for number of elements
+		int_face_IDs: indices of the left and right element faces of each
+			interior face [num_interior_faces, 2]
+		bface_to_elem_face_IDs: index of the element face adjacent to each
+			boundary face [num_bfaces]
 
-	for _ in range(num_entity_blocks):
-		fl = fo.readline()
-		lint = [int(l) for l in fl.split()]
-		ndims = lint[0]
-		entity_tag = lint[1]
-		etype = lint[2] # Gmsh element type
-		num_in_block = lint[3]
-
-		if ndims == mesh.ndims:
-			# Volume element
-
-			# Get info
-			gorder = gmsh_element_database[etype].gorder
-			gbasis = gmsh_element_database[etype].gbasis
-
-			# Extract and process nodes
-			for _ in range(num_in_block):
-				fl = fo.readline()
-				lint = [int(l) for l in fl.split()]
-
-				# Convert from Gmsh to quail node ordering and store
-				nodes = np.array(lint[1:])
-				for n in range(len(nodes)):
-					nodes[n] = old_to_new_node_IDs[nodes[n]]
-				new_node_IDs = nodes[gmsh_element_database[etype].node_order]
-				mesh.elem_to_node_IDs[num_elems] = new_node_IDs
-
-				# Increment number of elements
-				num_elems += 1
-
-		elif ndims == mesh.ndims - 1:
-			# Boundary face
-
-			# Find physical boundary group
-			found = False
-			for phys_group in phys_groups:
-				if entity_tag in phys_group.entity_tags:
-					if phys_group.ndims == ndims:
-						bgroup_num = phys_group.boundary_group_num
-						found = True
-						break
-			if not found:
-				raise errors.DoesNotExistError("Physical boundary group " +
-						"not found")
-			bgroup = mesh.boundary_groups[phys_group.name]
-
-			# Get info
-			gbasis = gmsh_element_database[etype].gbasis
-			num_face_nodes = gbasis.get_num_basis_coeff(1)
-
-			# Loop
-			for _ in range(num_in_block):
-				fl = fo.readline()
-				lint = [int(l) for l in fl.split()]
-
-				# Convert node IDs
-				nodes = np.array(lint[1:])
-				for n in range(len(nodes)):
-					nodes[n] = old_to_new_node_IDs[nodes[n]]
-
-				# Add face info to table
-				_, _ = add_face_info_to_table(node0_to_faces_info,
-						num_face_nodes, nodes, True, bgroup_num, -1,
-						num_bfaces_per_bgroup[bgroup_num])
-
-				# Increment number of boundary faces
-				num_bfaces_per_bgroup[bgroup_num] += 1
-
-		else:
-			# Skip
-			for _ in range(num_in_block):
-				fo.readline()
-
-
-def fill_mesh(fo, ver, mesh, phys_groups, num_phys_groups,
-		gmsh_element_database, old_to_new_node_IDs):
+	Notes:
+	------
+		Faces are matched by sorting the face node IDs instead of looking
+		them up in a table. For each interior face, the left element face
+		is the one with the lower index. Interior faces are ordered by the
+		index of the right element face.
+	'''
+	num_elem_faces = elem_face_node_IDs.shape[0]
+	face_node_IDs = np.concatenate([elem_face_node_IDs, bface_node_IDs])
+	num_faces = face_node_IDs.shape[0]
+
+	# Sort faces by their node IDs so that matching faces are adjacent;
+	# since the sort is stable, element faces remain in ascending order
+	# and precede boundary faces
+	face_IDs = np.lexsort(face_node_IDs.T[::-1])
+	face_node_IDs = face_node_IDs[face_IDs]
+
+	# Find groups of matching faces
+	new_group = np.ones(num_faces, dtype=bool)
+	new_group[1:] = np.any(face_node_IDs[1:] != face_node_IDs[:-1], axis=1)
+	group_starts = np.flatnonzero(new_group)
+	num_in_group = np.diff(np.append(group_starts, num_faces))
+	num_bfaces_in_group = np.add.reduceat(face_IDs >= num_elem_faces,
+			group_starts)
+	num_elems_in_group = num_in_group - num_bfaces_in_group
+
+	# Sanity checks
+	if np.any((num_bfaces_in_group > 0) & (num_elems_in_group > 1)):
+		raise ValueError("More than one element adjacent to boundary face")
+	if np.any(num_elems_in_group > 2):
+		raise ValueError("More than two elements adjacent to interior face")
+	is_bface = (num_bfaces_in_group == 1) & (num_elems_in_group == 1)
+	is_int_face = (num_bfaces_in_group == 0) & (num_elems_in_group == 2)
+	unmatched = ~(is_bface | is_int_face)
+	if np.any(unmatched):
+		for node_IDs_sort in face_node_IDs[group_starts[unmatched]]:
+			print(tuple(node_IDs_sort))
+		raise ValueError("Above %d faces not identified" % (
+				np.count_nonzero(unmatched)) + " as valid boundary or " +
+				"interior faces")
+
+	# Interior faces
+	starts = group_starts[is_int_face]
+	int_face_IDs = np.stack([face_IDs[starts], face_IDs[starts + 1]],
+			axis=1)
+	int_face_IDs = int_face_IDs[np.argsort(int_face_IDs[:, 1])]
+
+	# Boundary faces
+	starts = group_starts[is_bface]
+	bface_to_elem_face_IDs = np.empty(bface_node_IDs.shape[0], dtype=int)
+	bface_to_elem_face_IDs[face_IDs[starts + 1] - num_elem_faces] = \
+			face_IDs[starts]
+
+	return int_face_IDs, bface_to_elem_face_IDs
+
+
+def fill_mesh(mesh, gmsh_element_database, blocks, old_to_new_node_IDs):
 	'''
 	This function fills the mesh.
 
 	Inputs:
 	-------
-		fo: file object
-		ver: Gmsh file version
 		mesh: mesh object
-		phys_groups: list of physical group objects
-		num_phys_groups: number of physical groups
 		gmsh_element_database: Gmsh element database
+		blocks: list of (etype, phys_group, node_IDs) tuples (see
+			get_elem_bface_blocks_ver2)
 		old_to_new_node_IDs: maps Gmsh-assigned (old) node IDs to new IDs
 
 	Outputs:
 	--------
-		fo: file object (current position is modified)
 		mesh: mesh object (modified)
 	'''
-	# Allocate boundary groups and faces
-	for bgroup in mesh.boundary_groups.values():
-		bgroup.allocate_boundary_faces()
 	# Allocate element-to-node_IDs map
 	mesh.allocate_elem_to_node_IDs_map()
-	# Over-allocate interior_faces since we haven't distinguished
-	# between interior and boundary faces yet
-	num_faces_per_elem = mesh.gbasis.NFACES
-	mesh.num_interior_faces = mesh.num_elems*num_faces_per_elem
-	mesh.allocate_interior_faces()
-
-	# reset num_interior_faces - use as a counter
-	mesh.num_interior_faces = 0
-
-	# Table to store face info and connect elements to faces
-	node0_to_faces_info = [{} for n in range(mesh.num_nodes)] # list of dicts
-
-	# Go to Gmsh elements section
-	go_to_line_below_string(fo, "$Elements")
-
-	# Boundary face counter
-	num_bfaces_per_bgroup = [0 for i in range(mesh.num_boundary_groups)]
 
 	# Process elements and boundary faces
-	if ver == VERSION2:
-		process_elems_bfaces_ver2(fo, mesh, phys_groups, num_phys_groups,
-				gmsh_element_database, old_to_new_node_IDs,
-				num_bfaces_per_bgroup, node0_to_faces_info)
-	else:
-		process_elems_bfaces_ver4(fo, mesh, phys_groups, num_phys_groups,
-				gmsh_element_database, old_to_new_node_IDs,
-				num_bfaces_per_bgroup, node0_to_faces_info)
-
-	# Verify footer
-	fl = fo.readline()
-	if not fl.startswith("$EndElements"):
-		raise errors.FileReadError
+	elem_node_IDs = []
+	bface_node_IDs = [[] for _ in range(mesh.num_boundary_groups)]
+	for etype, phys_group, node_IDs in blocks:
+		elem_data = gmsh_element_database[etype]
 
-	# Fill boundary and interior face info
-	for elem_ID in range(mesh.num_elems):
-		for face_ID in range(mesh.gbasis.NFACES):
-			# Get local q = 1 face nodes
-			gbasis = mesh.gbasis
-			local_node_nums = gbasis.get_local_face_principal_node_nums(
-					mesh.gorder, face_ID)
-			num_face_nodes = local_node_nums.shape[0]
-
-			# Convert to global node IDs
-			global_node_nums = mesh.elem_to_node_IDs[elem_ID][
-					local_node_nums]
-
-			# Add to face info table
-			face_info, already_added = add_face_info_to_table(
-					node0_to_faces_info, num_face_nodes, global_node_nums,
-					False, -1, elem_ID, face_ID)
-
-			if already_added:
-				# Face was already added to table previously
-
-				# Identify element as either boundary face or interior face
-				if face_info.at_boundary:
-					# Boundary face
-
-					if face_info.num_adjacent_elems != 1:
-						raise ValueError("More than one element adjacent " +
-								"to boundary face")
-
-					# Find physical group
-					found = False
-					for phys_group in phys_groups:
-						if phys_group.boundary_group_num == \
-								face_info.boundary_group_num:
-							found = True
-							break
-					if not found:
-						raise errors.DoesNotExistError("Physical boundary " +
-								"group not found")
-					boundary_group = mesh.boundary_groups[phys_group.name]
-
-					# Fill in info
-					boundary_face = boundary_group.boundary_faces[
-							face_info.face_ID]
-					boundary_face.elem_ID = elem_ID
-					boundary_face.face_ID = face_ID
-				else:
-					# Interior face
-
-					if face_info.num_adjacent_elems != 2:
-						raise ValueError("More than two elements adjacent " +
-								"to interior face")
-
-					# Fill in info
-					int_face = mesh.interior_faces[mesh.num_interior_faces]
-					int_face.elemL_ID = face_info.elem_ID
-					int_face.faceL_ID = face_info.face_ID
-					int_face.elemR_ID = elem_ID
-					int_face.faceR_ID = face_ID
-
-					# Increment number of interior faces
-					mesh.num_interior_faces += 1
-
-				delete_face_info_from_table(node0_to_faces_info,
-						num_face_nodes, global_node_nums)
-
-	# Any faces not accounted for?
-	num_faces_left = 0
-	for n in range(mesh.num_nodes):
-		faces_info = node0_to_faces_info[n]
-		for node_IDs_sort in faces_info.keys():
-			print(node_IDs_sort)
-			num_faces_left += 1
-
-	if num_faces_left != 0:
-		raise ValueError("Above %d faces not identified" % (num_faces_left) +
-			" as valid boundary or interior faces")
-
-	# Make sure number of interior faces makes sense
-	if mesh.num_interior_faces > mesh.num_elems*num_faces_per_elem:
-		raise ValueError
-	# Remove superfluous (empty) interior faces
-	mesh.interior_faces = mesh.interior_faces[:mesh.num_interior_faces]
+		if phys_group.boundary_group_num >= 0:
+			# These are boundary faces - keep the principal nodes
+			num_face_nodes = elem_data.gbasis.get_num_basis_coeff(1)
+			bface_node_IDs[phys_group.boundary_group_num].append(
+					node_IDs[:, :num_face_nodes])
+		else:
+			# These are volume elements - convert from Gmsh node ordering
+			# to quail node ordering
+			elem_node_IDs.append(node_IDs[:, elem_data.node_order])
+
+	# Convert node IDs and store
+	mesh.elem_to_node_IDs[:] = convert_node_IDs(old_to_new_node_IDs,
+			np.concatenate(elem_node_IDs))
+
+	# Boundary faces of all boundary groups, in order of group number
+	num_face_nodes = mesh.gbasis.get_local_face_principal_node_nums(
+			mesh.gorder, 0).shape[0]
+	bface_node_IDs = np.concatenate([np.zeros([0, num_face_nodes],
+			dtype=int)] + [node_IDs for bgroup_node_IDs in bface_node_IDs
+			for node_IDs in bgroup_node_IDs])
+	if bface_node_IDs.shape[1] != num_face_nodes:
+		raise ValueError("Number of boundary face nodes doesn't match up")
+	bface_node_IDs = convert_node_IDs(old_to_new_node_IDs, bface_node_IDs)
+
+	# Match faces
+	int_face_IDs, bface_to_elem_face_IDs = match_faces(
+			get_elem_face_node_IDs(mesh), np.sort(bface_node_IDs, axis=1))
+
+	# Fill boundary face info
+	num_faces_per_elem = mesh.gbasis.NFACES
+	elem_IDs, face_IDs = np.divmod(bface_to_elem_face_IDs,
+			num_faces_per_elem)
+	offset = 0
+	for bgroup in sorted(mesh.boundary_groups.values(),
+			key=lambda bgroup: bgroup.number):
+		num_boundary_faces = bgroup.num_boundary_faces
+		bgroup.set_boundary_faces(
+				elem_IDs[offset:offset + num_boundary_faces],
+				face_IDs[offset:offset + num_boundary_faces])
+		offset += num_boundary_faces
+
+	# Fill interior face info
+	elem_IDs, face_IDs = np.divmod(int_face_IDs, num_faces_per_elem)
+	mesh.set_interior_faces(elem_IDs[:, 0], face_IDs[:, 0], elem_IDs[:, 1],
+			face_IDs[:, 1])
 
 	# Create elements
 	mesh.create_elements()
@@ -1365,8 +1406,9 @@ def import_gmsh_mesh(file_name):
 	if file_name[-4:] != ".msh":
 		raise errors.FileReadError("Wrong file type")
 
-	# Open file
-	fo = open(file_name, "r")
+	# Open file - it is memory-mapped so that binary data can be read
+	# without copying
+	fo = MeshFile(file_name)
 
 	# Mesh object
 	mesh = mesh_defs.Mesh(num_elems=0)
@@ -1379,12 +1421,14 @@ def import_gmsh_mesh(file_name):
 	mesh, old_to_new_node_IDs = import_nodes(fo, ver, mesh)
 	phys_groups, num_phys_groups = import_physical_groups(fo, mesh)
 	phys_groups = import_mesh_entities(fo, ver, mesh, phys_groups)
-	mesh = import_mesh_elems_boundary_faces(fo, ver, mesh, phys_groups,
-			num_phys_groups, gmsh_element_database)
+	mesh, blocks = import_mesh_elems_boundary_faces(fo, ver, mesh,
+			phys_groups, num_phys_groups, gmsh_element_database)
+
+	# Done with file
+	fo.close()
 
 	# Create rest of mesh
-	fill_mesh(fo, ver, mesh, phys_groups, num_phys_groups,
-			gmsh_element_database, old_to_new_node_IDs)
+	fill_mesh(mesh, gmsh_element_database, blocks, old_to_new_node_IDs)
 
 	# Ensure valid mesh
 	mesh_tools.check_face_orientations(mesh)
@@ -1392,7 +1436,4 @@ def import_gmsh_mesh(file_name):
 	# Print some stats
 	print("%d elements in the mesh" % (mesh.num_elems))
 
-	# Done with file
-	fo.close()
-
 	return mesh
@@ -22,14 +22,87 @@
 # ------------------------------------------------------------------------ #
 from enum import Enum, auto
 import numpy as np
+import os
+import types
 
+import errors
 from general import ShapeType
 import numerics.basis.basis as basis_defs
+import numerics.basis.tools as basis_tools
 
 
-class InteriorFace():
+# Version of the quail mesh file format (.qmesh); bump whenever the
+# contents of the file change
+QMESH_VERSION = 1
+
+
+class TopologyField():
+	'''
+	This class is a descriptor for an attribute of a topology view (see
+	TopologyView) that is stored in an integer array of a topology table.
+
+	Attributes:
+	-----------
+	array_name : str
+		name of the array in the topology table
+	'''
+	def __init__(self, array_name):
+		self.array_name = array_name
+
+	def __get__(self, view, owner=None):
+		if view is None:
+			return self
+		return int(getattr(view.table, self.array_name)[view.index])
+
+	def __set__(self, view, value):
+		getattr(view.table, self.array_name)[view.index] = value
+
+
+class TopologyView():
 	'''
-	This class provides information about a given interior face.
+	This is a base class for objects whose attributes are views into the
+	integer arrays of a topology table, i.e. of the mesh for interior
+	faces and of a boundary group for boundary faces. Modifying an
+	attribute of a view modifies the corresponding array.
+
+	Attributes:
+	-----------
+	table : object
+		topology table that stores the arrays
+	index : int
+		index of this object in the arrays
+
+	Methods:
+	---------
+	get_fields
+		returns the topology fields of the class
+	'''
+	def __init__(self, table=None, index=0):
+		if table is None:
+			# Standalone object that stores its own data
+			table = types.SimpleNamespace(**{field.array_name :
+					np.zeros(1, dtype=int) for field in self.get_fields()})
+			index = 0
+		self.table = table
+		self.index = index
+
+	@classmethod
+	def get_fields(cls):
+		'''
+		This method returns the topology fields of the class
+
+		Outputs:
+		--------
+			fields: list of TopologyField objects
+		'''
+		return [field for field in vars(cls).values() if
+				isinstance(field, TopologyField)]
+
+
+class InteriorFace(TopologyView):
+	'''
+	This class provides information about a given interior face. Interior
+	faces of a mesh are views into the interior face arrays of the mesh.
 
 	Attributes:
 	-----------
@@ -42,16 +115,16 @@ class InteriorFace():
 	faceR_ID : int
 		local ID of face from perspective of right element
 	'''
-	def __init__(self):
-		self.elemL_ID = 0
-		self.faceL_ID = 0
-		self.elemR_ID = 0
-		self.faceR_ID = 0
+	elemL_ID = TopologyField("int_face_elemL_IDs")
+	faceL_ID = TopologyField("int_face_faceL_IDs")
+	elemR_ID = TopologyField("int_face_elemR_IDs")
+	faceR_ID = TopologyField("int_face_faceR_IDs")
 
 
-class BoundaryFace():
+class BoundaryFace(TopologyView):
 	'''
-	This class provides information about a given boundary face.
+	This class provides information about a given boundary face. Boundary
+	faces of a boundary group are views into the arrays of the group.
 
 	Attributes:
 	-----------
@@ -60,14 +133,63 @@ class BoundaryFace():
 	face_ID : int
 		local ID of face from perspective of adjacent element
 	'''
-	def __init__(self):
-		self.elem_ID = 0
-		self.face_ID = 0
+	elem_ID = TopologyField("elem_IDs")
+	face_ID = TopologyField("face_IDs")
+
+
+def get_topology_views(table, views, view_class):
+	'''
+	This function returns the list of views into the arrays of a topology
+	table, building it if needed.
+
+	Inputs:
+	-------
+		table: topology table (mesh or boundary group)
+		views: previously built list of views (None if not built yet)
+		view_class: class of the views (InteriorFace or BoundaryFace)
+
+	Outputs:
+	--------
+		views: list of views
+	'''
+	num_views = getattr(table, view_class.get_fields()[0].array_name).shape[0]
+	if views is None or len(views) != num_views:
+		views = [view_class(table, index) for index in range(num_views)]
+
+	return views
+
+
+def set_topology_views(table, views, view_class):
+	'''
+	This function replaces the arrays of a topology table with the data of
+	the given views, which then become views into the new arrays.
+
+	Inputs:
+	-------
+		table: topology table (mesh or boundary group)
+		views: list of views
+		view_class: class of the views (InteriorFace or BoundaryFace)
+
+	Outputs:
+	--------
+		views: list of views (bound to table)
+	'''
+	views = list(views)
+	# Copy the data first since the views may view the current arrays
+	arrays = {field.array_name : np.array([field.__get__(view) for view in
+			views], dtype=int) for field in view_class.get_fields()}
+	for array_name, array in arrays.items():
+		setattr(table, array_name, array)
+	for index, view in enumerate(views):
+		view.table = table
+		view.index = index
+
+	return views
 
 
 class BoundaryGroup():
 	'''
-	This class stores boundary face objects for a given boundary group.
+	This class stores the boundary faces of a given boundary group.
 
 	Attributes:
 	-----------
@@ -77,30 +199,81 @@ class BoundaryGroup():
 		boundary number
 	num_boundary_faces : int
 		number of faces in boundary group
+	elem_IDs : numpy array
+		IDs of the elements adjacent to the boundary faces
+		[num_boundary_faces]
+	face_IDs : numpy array
+		local IDs of the boundary faces from the perspective of the
+		adjacent elements [num_boundary_faces]
 	boundary_faces : list
-		list of BoundaryFace objects
+		list of BoundaryFace objects (views into elem_IDs and face_IDs,
+		built on first access)
 
 	Methods:
 	---------
 	allocate_boundary_faces
-		allocates list of BoundaryFace objects
+		allocates elem_IDs and face_IDs
+	set_boundary_faces
+		sets elem_IDs and face_IDs
 	'''
 	def __init__(self):
 		self.name = ""
 		self.number = -1
 		self.num_boundary_faces = 0
-		self.boundary_faces = []
+		self.elem_IDs = np.zeros(0, dtype=int)
+		self.face_IDs = np.zeros(0, dtype=int)
+		self._boundary_faces = None
+
+	@property
+	def boundary_faces(self):
+		self._boundary_faces = get_topology_views(self,
+				self._boundary_faces, BoundaryFace)
+		return self._boundary_faces
+
+	@boundary_faces.setter
+	def boundary_faces(self, boundary_faces):
+		self._boundary_faces = set_topology_views(self, boundary_faces,
+				BoundaryFace)
+		self.num_boundary_faces = len(self._boundary_faces)
+
+	def __getstate__(self):
+		# The views are rebuilt on demand
+		state = self.__dict__.copy()
+		state["_boundary_faces"] = None
+		return state
 
 	def allocate_boundary_faces(self):
 		'''
-		This method allocates the list of boundary_face objects
+		This method allocates elem_IDs and face_IDs
+
+		Outputs:
+		--------
+			self.elem_IDs: zeros [num_boundary_faces]
+			self.face_IDs: zeros [num_boundary_faces]
+		'''
+		self.set_boundary_faces(np.zeros(self.num_boundary_faces,
+				dtype=int), np.zeros(self.num_boundary_faces, dtype=int))
+
+	def set_boundary_faces(self, elem_IDs, face_IDs):
+		'''
+		This method sets elem_IDs and face_IDs
+
+		Inputs:
+		-------
+			elem_IDs: IDs of the adjacent elements [num_boundary_faces]
+			face_IDs: local IDs of the faces from the perspective of the
+				adjacent elements [num_boundary_faces]
 
 		Outputs:
 		--------
-			self.boundary_faces
+			self.elem_IDs: set
+			self.face_IDs: set
+			self.num_boundary_faces: updated
 		'''
-		self.boundary_faces = [BoundaryFace() for i in \
-				range(self.num_boundary_faces)]
+		self.elem_IDs = np.asarray(elem_IDs, dtype=int)
+		self.face_IDs = np.asarray(face_IDs, dtype=int)
+		self.num_boundary_faces = self.elem_IDs.shape[0]
+		self._boundary_faces = None
 
 
 class Element():
@@ -128,7 +301,9 @@ class Element():
 
 class Mesh():
 	'''
-	This class stores information about the mesh.
+	This class stores information about the mesh. The topology is stored
+	as integer arrays; the lists of face and element objects are views
+	built on first access.
 
 	Attributes:
 	-----------
@@ -140,8 +315,18 @@ class Mesh():
 		coordinates of nodes [num_nodes, ndims]
 	num_interior_faces : int
 		number of interior faces
+	int_face_elemL_IDs : numpy array
+		ID of "left" element of each interior face [num_interior_faces]
+	int_face_faceL_IDs : numpy array
+		local ID of each interior face from the perspective of the left
+		element [num_interior_faces]
+	int_face_elemR_IDs : numpy array
+		ID of "right" element of each interior face [num_interior_faces]
+	int_face_faceR_IDs : numpy array
+		local ID of each interior face from the perspective of the right
+		element [num_interior_faces]
 	interior_faces : list
-		list of interior face objects
+		list of interior face objects (views into the above arrays)
 	num_boundary_groups : int
 		number of boundary face groups
 	boundary_groups : dict
@@ -158,6 +343,12 @@ class Mesh():
 	elem_to_node_IDs : numpy array
 		maps element ID to global node IDs
 		[num_elems, num_nodes_per_elem]
+	elem_to_neighbor_IDs : numpy array
+		maps element ID and local face ID to the ID of the neighbor
+		across said face (-1 for boundary faces) [num_elems, num_faces]
+	elem_to_face_IDs : numpy array
+		maps element ID and local face ID to the interior face ID (-1 for
+		boundary faces) [num_elems, num_faces]
 	elements : list
 		list of Element objects
 
@@ -168,11 +359,22 @@ class Mesh():
 	allocate_elem_to_node_IDs_map
 		allocates self.elem_to_node_IDs
 	allocate_interior_faces
-		allocates self.interior_faces
+		allocates the interior face arrays
+	set_interior_faces
+		sets the interior face arrays
 	add_boundary_group
 		appends new boundary group to self.boundary_groups
 	create_elements
-		creates self.elements
+		creates elem_to_neighbor_IDs and elem_to_face_IDs
+	save
+		writes the mesh to a quail mesh file
+	load
+		reads the mesh from a quail mesh file
+
+	Notes:
+	------
+		The lists of views must not be resized; the arrays should be set
+		instead (or the lists replaced as a whole).
 	'''
 	def __init__(self, ndims=1, num_nodes=1, num_elems=1, gbasis=None,
 			gorder=1):
@@ -183,7 +385,11 @@ class Mesh():
 		self.num_nodes = num_nodes
 		self.node_coords = None
 		self.num_interior_faces = 0
-		self.interior_faces = []
+		self.int_face_elemL_IDs = np.zeros(0, dtype=int)
+		self.int_face_faceL_IDs = np.zeros(0, dtype=int)
+		self.int_face_elemR_IDs = np.zeros(0, dtype=int)
+		self.int_face_faceR_IDs = np.zeros(0, dtype=int)
+		self._interior_faces = None
 		self.num_boundary_groups = 0
 		self.boundary_groups = {}
 		self.gbasis = gbasis
@@ -191,7 +397,43 @@ class Mesh():
 		self.num_elems = num_elems
 		self.num_nodes_per_elem = gbasis.get_num_basis_coeff(gorder)
 		self.elem_to_node_IDs = np.zeros(0, dtype=int)
-		self.elements = []
+		self.elem_to_neighbor_IDs = np.zeros([0, 0], dtype=int)
+		self.elem_to_face_IDs = np.zeros([0, 0], dtype=int)
+		self._elements = None
+
+	@property
+	def interior_faces(self):
+		self._interior_faces = get_topology_views(self,
+				self._interior_faces, InteriorFace)
+		return self._interior_faces
+
+	@interior_faces.setter
+	def interior_faces(self, interior_faces):
+		self._interior_faces = set_topology_views(self, interior_faces,
+				InteriorFace)
+		self.num_interior_faces = len(self._interior_faces)
+
+	@property
+	def elements(self):
+		if self._elements is None:
+			self._elements = [Element(elem_ID) for elem_ID in range(
+					self.elem_to_neighbor_IDs.shape[0])]
+			for elem in self._elements:
+				elem.node_IDs = self.elem_to_node_IDs[elem.ID]
+				elem.node_coords = self.node_coords[elem.node_IDs]
+				elem.face_to_neighbors = self.elem_to_neighbor_IDs[elem.ID]
+		return self._elements
+
+	@elements.setter
+	def elements(self, elements):
+		self._elements = elements
+
+	def __getstate__(self):
+		# The views are rebuilt on demand
+		state = self.__dict__.copy()
+		state["_interior_faces"] = None
+		state["_elements"] = None
+		return state
 
 	def set_params(self, gbasis, gorder=1, num_elems=1):
 		'''
@@ -234,14 +476,47 @@ class Mesh():
 
 	def allocate_interior_faces(self):
 		'''
-		This method allocates self.interior_faces
+		This method allocates the interior face arrays
 
 		Outputs:
 		--------
-			self.interior_faces: list of InteriorFace objects
+			self.int_face_elemL_IDs: zeros [num_interior_faces]
+			self.int_face_faceL_IDs: zeros [num_interior_faces]
+			self.int_face_elemR_IDs: zeros [num_interior_faces]
+			self.int_face_faceR_IDs: zeros [num_interior_faces]
+		'''
+		zeros = np.zeros(self.num_interior_faces, dtype=int)
+		self.set_interior_faces(zeros, zeros.copy(), zeros.copy(),
+				zeros.copy())
+
+	def set_interior_faces(self, elemL_IDs, faceL_IDs, elemR_IDs,
+			faceR_IDs):
 		'''
-		self.interior_faces = [InteriorFace() for i in range(
-				self.num_interior_faces)]
+		This method sets the interior face arrays
+
+		Inputs:
+		-------
+			elemL_IDs: IDs of the left elements [num_interior_faces]
+			faceL_IDs: local IDs of the faces from the perspective of the
+				left elements [num_interior_faces]
+			elemR_IDs: IDs of the right elements [num_interior_faces]
+			faceR_IDs: local IDs of the faces from the perspective of the
+				right elements [num_interior_faces]
+
+		Outputs:
+		--------
+			self.int_face_elemL_IDs: set
+			self.int_face_faceL_IDs: set
+			self.int_face_elemR_IDs: set
+			self.int_face_faceR_IDs: set
+			self.num_interior_faces: updated
+		'''
+		self.int_face_elemL_IDs = np.asarray(elemL_IDs, dtype=int)
+		self.int_face_faceL_IDs = np.asarray(faceL_IDs, dtype=int)
+		self.int_face_elemR_IDs = np.asarray(elemR_IDs, dtype=int)
+		self.int_face_faceR_IDs = np.asarray(faceR_IDs, dtype=int)
+		self.num_interior_faces = self.int_face_elemL_IDs.shape[0]
+		self._interior_faces = None
 
 	def add_boundary_group(self, bname):
 		'''
@@ -268,33 +543,108 @@ class Mesh():
 
 	def create_elements(self):
 		'''
-		This method creates self.elements
+		This method creates the element-to-neighbor and element-to-face
+		maps. The list of Element objects is rebuilt on next access.
 
 		Outputs:
 		--------
-			self.elements: list of Element objects
+			self.elem_to_neighbor_IDs: maps element ID and local face ID
+				to neighbor ID [num_elems, num_faces]
+			self.elem_to_face_IDs: maps element ID and local face ID to
+				interior face ID [num_elems, num_faces]
 		'''
-		# Allocate
-		self.elements = [Element() for i in range(self.num_elems)]
+		elemL_IDs = self.int_face_elemL_IDs
+		elemR_IDs = self.int_face_elemR_IDs
+		faceL_IDs = self.int_face_faceL_IDs
+		faceR_IDs = self.int_face_faceR_IDs
+		int_face_IDs = np.arange(self.num_interior_faces)
 
-		# Fill in information for each element
-		for elem_ID in range(self.num_elems):
-			elem = self.elements[elem_ID]
+		# Fill in information about neighbors
+		self.elem_to_neighbor_IDs = np.full([self.num_elems,
+				self.gbasis.NFACES], -1)
+		self.elem_to_neighbor_IDs[elemL_IDs, faceL_IDs] = elemR_IDs
+		self.elem_to_neighbor_IDs[elemR_IDs, faceR_IDs] = elemL_IDs
 
-			elem.ID = elem_ID
-			elem.node_IDs = self.elem_to_node_IDs[elem_ID]
-			elem.node_coords = self.node_coords[elem.node_IDs]
-			elem.face_to_neighbors = np.full(self.gbasis.NFACES, -1)
+		# Fill in information about interior faces
+		self.elem_to_face_IDs = np.full([self.num_elems,
+				self.gbasis.NFACES], -1)
+		self.elem_to_face_IDs[elemL_IDs, faceL_IDs] = int_face_IDs
+		self.elem_to_face_IDs[elemR_IDs, faceR_IDs] = int_face_IDs
 
-		# Fill in information about neighbors
-		for int_face in self.interior_faces:
-			elemL_ID = int_face.elemL_ID
-			elemR_ID = int_face.elemR_ID
-			faceL_ID = int_face.faceL_ID
-			faceR_ID = int_face.faceR_ID
+		self._elements = None
 
-			elemL = self.elements[elemL_ID]
-			elemR = self.elements[elemR_ID]
+	def save(self, fname):
+		'''
+		This method writes the mesh to a quail mesh file (.qmesh), in which
+		the mesh is stored as flat arrays. The file is written atomically
+		so that concurrent runs never read a partially written file.
 
-			elemL.face_to_neighbors[faceL_ID] = elemR_ID
-			elemR.face_to_neighbors[faceR_ID] = elemL_ID
+		Inputs:
+		-------
+			fname: file name
+		'''
+		bgroups = sorted(self.boundary_groups.values(),
+				key=lambda bgroup: bgroup.number)
+		arrays = {
+			"version" : np.array(QMESH_VERSION),
+			"ndims" : np.array(self.ndims),
+			"gbasis" : np.array(self.gbasis.BASIS_TYPE.name),
+			"gbasis_order" : np.array(self.gbasis.order),
+			"gorder" : np.array(self.gorder),
+			"node_coords" : self.node_coords,
+			"elem_to_node_IDs" : self.elem_to_node_IDs,
+			"interior_faces" : np.stack([self.int_face_elemL_IDs,
+					self.int_face_faceL_IDs, self.int_face_elemR_IDs,
+					self.int_face_faceR_IDs], axis=1),
+			"boundary_group_names" : np.array([bgroup.name for bgroup in
+					bgroups], dtype=str),
+		}
+		for i, bgroup in enumerate(bgroups):
+			arrays["boundary_faces_%d" % (i)] = np.stack([bgroup.elem_IDs,
+					bgroup.face_IDs], axis=1)
+
+		tmp_fname = fname + ".%d.tmp" % (os.getpid())
+		with open(tmp_fname, "wb") as fo:
+			np.savez(fo, **arrays)
+		os.replace(tmp_fname, fname)
+
+	def load(self, fname):
+		'''
+		This method reads the mesh from a quail mesh file (.qmesh) written
+		by the save method.
+
+		Inputs:
+		-------
+			fname: file name
+
+		Outputs:
+		--------
+			self: mesh object (filled in, including the interior faces, the
+				boundary groups, and the elements)
+		'''
+		with np.load(fname, allow_pickle=False) as data:
+			if int(data["version"]) != QMESH_VERSION:
+				raise errors.FileReadError("Incompatible mesh file version")
+
+			gbasis = basis_tools.set_basis(int(data["gbasis_order"]),
+					str(data["gbasis"]))
+			self.ndims = int(data["ndims"])
+			self.node_coords = data["node_coords"]
+			self.num_nodes = self.node_coords.shape[0]
+			elem_to_node_IDs = data["elem_to_node_IDs"]
+			self.set_params(gbasis=gbasis, gorder=int(data["gorder"]),
+					num_elems=elem_to_node_IDs.shape[0])
+			self.elem_to_node_IDs = elem_to_node_IDs
+
+			# Interior faces
+			self.set_interior_faces(*data["interior_faces"].T.copy())
+
+			# Boundary groups
+			self.boundary_groups = {}
+			self.num_boundary_groups = 0
+			for i, bname in enumerate(data["boundary_group_names"]):
+				boundary_faces = data["boundary_faces_%d" % (i)]
+				bgroup = self.add_boundary_group(str(bname))
+				bgroup.set_boundary_faces(*boundary_faces.T.copy())
+
+		self.create_elements()
@@ -20,7 +20,9 @@
 #       Contains helper functions related to meshes.
 #
 # ------------------------------------------------------------------------ #
+import hashlib
 import numpy as np
+import os
 
 import meshing.meshbase as mesh_defs
 import numerics.basis.tools as basis_tools
@@ -51,7 +53,7 @@ def ref_to_phys(mesh, elem_ID, xref):
 	gbasis.get_basis_val_grads(xref, get_val=True)
 
 	# Element node coordinates
-	elem_coords = mesh.elements[elem_ID].node_coords
+	elem_coords = mesh.node_coords[mesh.elem_to_node_IDs[elem_ID]]
 
 	# Convert to physical space
 	xphys = np.matmul(gbasis.basis_val, elem_coords)
@@ -59,6 +61,38 @@ def ref_to_phys(mesh, elem_ID, xref):
 	return xphys # [nq, ndims]
 
 
+def ref_to_phys_elems(mesh, elem_IDs, xref):
+	'''
+	This function converts reference space coordinates to physical
+	space coordinates for a batch of elements. This is the batched
+	version of ref_to_phys.
+
+	Inputs:
+	-------
+		mesh: mesh object
+		elem_IDs: element IDs [n]; if None, all elements are used
+		xref: coordinates in reference space [nq, ndims]
+
+	Outputs:
+	--------
+		xphys: coordinates in physical space [n, nq, ndims]
+	'''
+	gbasis = mesh.gbasis
+
+	# Get basis values
+	gbasis.get_basis_val_grads(xref, get_val=True)
+
+	# Element node coordinates
+	if elem_IDs is None:
+		elem_IDs = np.arange(mesh.num_elems)
+	elem_coords = mesh.node_coords[mesh.elem_to_node_IDs[elem_IDs]]
+
+	# Convert to physical space
+	xphys = np.matmul(gbasis.basis_val, elem_coords)
+
+	return xphys # [n, nq, ndims]
+
+
 def element_volumes(mesh, solver=None):
 	'''
 	This function calculates total and per-element volumes
@@ -80,8 +114,7 @@ def element_volumes(mesh, solver=None):
 			return solver.elem_helpers.vol_elems, \
 					solver.elem_helpers.domain_vol
 
-	# Allocate, unpack
-	vol_elems = np.zeros(mesh.num_elems)
+	# Unpack
 	gorder = mesh.gorder
 	gbasis = mesh.gbasis
 
@@ -90,10 +123,9 @@ def element_volumes(mesh, solver=None):
 	quad_pts, quad_wts = gbasis.get_quadrature_data(quad_order)
 
 	# Get element volumes
-	for elem_ID in range(mesh.num_elems):
-		djac, _, _ = basis_tools.element_jacobian(mesh, elem_ID, quad_pts,
-				get_djac=True)
-		vol_elems[elem_ID] = np.sum(quad_wts*djac)
+	djac, _, _ = basis_tools.element_jacobians(mesh, None, quad_pts,
+			get_djac=True)
+	vol_elems = np.sum((quad_wts*djac)[:, :, 0], axis=1)
 
 	# Get domain volume
 	domain_vol = np.sum(vol_elems)
@@ -136,6 +168,37 @@ def get_element_centroid(mesh, elem_ID):
 	return xcentroid # [1, ndims]
 
 
+def get_face_node_IDs(mesh, elem_IDs, face_IDs, principal=True):
+	'''
+	This function obtains the global IDs of the nodes of a batch of faces.
+
+	Inputs:
+	-------
+		mesh: mesh object
+		elem_IDs: element IDs [nf]
+		face_IDs: local face IDs from the perspective of said elements [nf]
+		principal: [OPTIONAL] if True, only the principal nodes are
+			returned; else, all of the face nodes
+
+	Outputs:
+	--------
+		face_node_IDs: global IDs of the face nodes, in the local face
+			node ordering of the given elements [nf, num_face_nodes]
+	'''
+	gbasis = mesh.gbasis
+	if principal:
+		get_local_node_nums = gbasis.get_local_face_principal_node_nums
+	else:
+		get_local_node_nums = gbasis.get_local_face_node_nums
+
+	# Local IDs of face nodes for each face
+	local_node_nums = np.stack([get_local_node_nums(mesh.gorder, face_ID)
+			for face_ID in range(gbasis.NFACES)])
+
+	return mesh.elem_to_node_IDs[np.reshape(elem_IDs, (-1, 1)),
+			local_node_nums[face_IDs]] # [nf, num_face_nodes]
+
+
 def check_face_orientations(mesh):
 	'''
 	This function checks the face orientations for 2D meshes.
@@ -148,45 +211,35 @@ def check_face_orientations(mesh):
 	------
 		An error is raised if face orientations don't match up.
 	'''
-	gbasis = mesh.gbasis
-	if mesh.ndims == 1:
+	if mesh.ndims == 1 or mesh.num_interior_faces == 0:
 		# Don't need to check for 1D
 		return
 
-	for interior_face in mesh.interior_faces:
-		elemL_ID = interior_face.elemL_ID
-		elemR_ID = interior_face.elemR_ID
-		faceL_ID = interior_face.faceL_ID
-		faceR_ID = interior_face.faceR_ID
-
-		# Get local IDs of element nodes
-		elemL_node_IDs = mesh.elements[elemL_ID].node_IDs
-		elemR_node_IDs = mesh.elements[elemR_ID].node_IDs
-
-		''' Get global IDs of face nodes '''
-		# Local IDs - left
-		face_node_IDs = gbasis.get_local_face_principal_node_nums(
-				mesh.gorder, faceL_ID)
-		# Global IDs - left
-		global_node_IDs_L = elemL_node_IDs[face_node_IDs]
-		# Local IDs - right
-		face_node_IDs = gbasis.get_local_face_principal_node_nums(
-				mesh.gorder, faceR_ID)
-		# Global IDs - right
-		global_node_IDs_R = elemR_node_IDs[face_node_IDs]
-
-		# Node ordering should be reversed between the two elements
-		if not np.all(global_node_IDs_L == global_node_IDs_R[::-1]):
-			raise Exception("Face orientation for elemL_ID = %d, elemR_ID "
-					% (elemL_ID) + "= %d is incorrect" % (elemR_ID))
+	elemL_IDs = mesh.int_face_elemL_IDs
+	elemR_IDs = mesh.int_face_elemR_IDs
+
+	''' Get global IDs of face nodes '''
+	# Left
+	global_node_IDs_L = get_face_node_IDs(mesh, elemL_IDs,
+			mesh.int_face_faceL_IDs)
+	# Right
+	global_node_IDs_R = get_face_node_IDs(mesh, elemR_IDs,
+			mesh.int_face_faceR_IDs)
+
+	# Node ordering should be reversed between the two elements
+	incorrect = np.any(global_node_IDs_L != global_node_IDs_R[:, ::-1],
+			axis=1)
+	if np.any(incorrect):
+		i = np.argmax(incorrect)
+		raise Exception("Face orientation for elemL_ID = %d, elemR_ID "
+				% (elemL_IDs[i]) + "= %d is incorrect" % (elemR_IDs[i]))
 
 
 def verify_periodic_compatibility(mesh, boundary_group, icoord):
 	'''
 	This function checks whether a boundary is compatible with periodicity.
 	Specifically, it verifies that all boundary nodes are located on the same
-	plane, up to a given tolerance. It then potentially slightly modifies the
-	node coordinates to ensure the exact same value.
+	plane, up to a given tolerance.
 
 	Inputs:
 	-------
@@ -196,33 +249,21 @@ def verify_periodic_compatibility(mesh, boundary_group, icoord):
 
 	Outputs:
 	--------
-		mesh: mesh object (coordinates potentially modified)
 		coord: position of boundary in the icoord direction
 	'''
-	coord = np.nan
-	gbasis = mesh.gbasis
-	for boundary_face in boundary_group.boundary_faces:
-		# Extract info
-		elem_ID = boundary_face.elem_ID
-		face_ID = boundary_face.face_ID
-
-		# Get local IDs of nodes on face
-		local_node_IDs = gbasis.get_local_face_node_nums(
-				mesh.gorder, face_ID)
-
-		# Physical coordinates of nodes
-		elem_coords = mesh.elements[elem_ID].node_coords
-		coords = elem_coords[local_node_IDs]
+	if boundary_group.num_boundary_faces == 0:
+		return np.nan
 
-		# Make sure all nodes have same icoord-position (within TOL)
-		if np.isnan(coord):
-			coord = coords[0, icoord]
-		if np.any(np.abs(coords[:, icoord] - coord) > TOL):
-			raise ValueError("Boundary %s not compatible with periodicity" %
-					(boundary_group.name))
+	# Physical coordinates of nodes on each face [nf, num_face_nodes]
+	coords = mesh.node_coords[get_face_node_IDs(mesh,
+			boundary_group.elem_IDs, boundary_group.face_IDs,
+			principal=False), icoord]
 
-		# Now force each node to have the same exact icoord-position
-		coords[:, icoord] = coord
+	# Make sure all nodes have same icoord-position (within TOL)
+	coord = coords[0, 0]
+	if np.any(np.abs(coords - coord) > TOL):
+		raise ValueError("Boundary %s not compatible with periodicity" %
+				(boundary_group.name))
 
 	return coord
 
@@ -261,8 +302,6 @@ def reorder_periodic_boundary_nodes(mesh, b1, b2, icoord,
 		where node1_ID is the ID of a node on boundary 1 and node2_ID is the
 		ID of the node on boundary 2 that corresponds to node1
 	'''
-	gbasis = mesh.gbasis
-
 	if b1 is None and b2 is None:
 		# Trivial case - no periodicity in given direction
 		return None, None, None, next_node_ID
@@ -300,17 +339,8 @@ def reorder_periodic_boundary_nodes(mesh, b1, b2, icoord,
 	Deal with first boundary
 	'''
 	# Populate node maps for first boundary
-	for boundary_face in boundary_group1.boundary_faces:
-		# Extract info
-		elem_ID = boundary_face.elem_ID
-		face_ID = boundary_face.face_ID
-
-		# Local IDs of face nodes
-		local_node_IDs = gbasis.get_local_face_principal_node_nums(
-				mesh.gorder, face_ID)
-		# Global IDs of face nodes
-		global_node_IDs = mesh.elem_to_node_IDs[elem_ID][local_node_IDs]
-
+	for global_node_IDs in get_face_node_IDs(mesh,
+			boundary_group1.elem_IDs, boundary_group1.face_IDs):
 		# Populate node maps
 		for node_ID in global_node_IDs:
 			if old_to_new_node_map[node_ID] == -1:
@@ -331,17 +361,8 @@ def reorder_periodic_boundary_nodes(mesh, b1, b2, icoord,
 	Deal with second boundary
 	'''
 	# Populate node maps for second boundary
-	for boundary_face in boundary_group2.boundary_faces:
-		# Extract info
-		elem_ID = boundary_face.elem_ID
-		face_ID = boundary_face.face_ID
-
-		# Local IDs of face nodes
-		local_node_IDs = gbasis.get_local_face_principal_node_nums(
-				mesh.gorder, face_ID)
-		# Global IDs of face nodes
-		global_node_IDs = mesh.elem_to_node_IDs[elem_ID][local_node_IDs]
-
+	for global_node_IDs in get_face_node_IDs(mesh,
+			boundary_group2.elem_IDs, boundary_group2.face_IDs):
 		for node2_ID in global_node_IDs:
 			''' Find matching nodes on boundary group 1 '''
 
@@ -449,21 +470,17 @@ def remap_nodes(mesh, old_to_new_node_map, new_to_old_node_map,
 	# Fill up node maps with non-periodic nodes
 	# Note: non-periodic nodes come after the periodic nodes
 	if next_node_ID != -1:
-		for node_ID in range(mesh.num_nodes):
-			if old_to_new_node_map[node_ID] == -1:
-				# Has not been re-ordered yet
-				old_to_new_node_map[node_ID] = next_node_ID
-				new_to_old_node_map[next_node_ID] = node_ID
-				next_node_ID += 1
+		# Nodes that have not been re-ordered yet
+		node_IDs = np.flatnonzero(old_to_new_node_map == -1)
+		new_node_IDs = next_node_ID + np.arange(node_IDs.shape[0])
+		old_to_new_node_map[node_IDs] = new_node_IDs
+		new_to_old_node_map[new_node_IDs] = node_IDs
 
 	# Assign new node IDs
 	mesh.node_coords = mesh.node_coords[new_to_old_node_map]
 
 	# New elem_to_node_IDs
-	num_elems = mesh.num_elems
-	for elem_ID in range(num_elems):
-		mesh.elem_to_node_IDs[elem_ID,:] = old_to_new_node_map[
-				mesh.elem_to_node_IDs[elem_ID, :]]
+	mesh.elem_to_node_IDs[:] = old_to_new_node_map[mesh.elem_to_node_IDs]
 
 
 def match_boundary_pair(mesh, icoord, boundary_group1, boundary_group2,
@@ -488,9 +505,6 @@ def match_boundary_pair(mesh, icoord, boundary_group1, boundary_group2,
 		mesh: mesh object (modified - new interior faces, removed boundary
 			groups)
 	'''
-	gbasis = mesh.gbasis
-	interior_faces = mesh.interior_faces
-
 	if boundary_group1 is None and boundary_group2 is None:
 		return
 	elif boundary_group1 is None or boundary_group2 is None:
@@ -500,7 +514,6 @@ def match_boundary_pair(mesh, icoord, boundary_group1, boundary_group2,
 	Remap node_pairs and idx_in_node_pairs
 	'''
 	# Allocate
-	new_node_pairs = np.zeros_like(node_pairs, dtype=int) - 1
 	idx_in_node_pairs = np.zeros(mesh.num_nodes, dtype=int) - 1
 	# Remap
 	new_node_pairs = old_to_new_node_map[node_pairs]
@@ -516,67 +529,52 @@ def match_boundary_pair(mesh, icoord, boundary_group1, boundary_group2,
 	'''
 	Identify and create periodic interior_faces
 	'''
-	for boundary_face1 in boundary_group1.boundary_faces:
-		# Extract info
-		elem_ID1 = boundary_face1.elem_ID
-		face_ID1 = boundary_face1.face_ID
-
-		# Local IDs of face nodes
-		local_node_IDs = gbasis.get_local_face_principal_node_nums(
-			mesh.gorder, face_ID1)
-		# Global IDs of face nodes
-		global_node_IDs = mesh.elem_to_node_IDs[elem_ID1][local_node_IDs]
-		# Sort for easy comparison later
-		global_node_IDs_1 = np.sort(global_node_IDs)
-
-		# Pair each node with corresponding one on other boundary
-		for boundary_face2 in boundary_group2.boundary_faces:
-			# Extract info
-			elem_ID2 = boundary_face2.elem_ID
-			face_ID2 = boundary_face2.face_ID
-
-			# Local IDs of face nodes
-			local_node_IDs = gbasis.get_local_face_principal_node_nums(
-					mesh.gorder, face_ID2)
-			# Global IDs of face nodes
-			global_node_IDs = mesh.elem_to_node_IDs[elem_ID2][local_node_IDs]
-			# Sort for easy comparison later
-			global_node_IDs_2 = np.sort(global_node_IDs)
-
-			''' Check for complete match between all nodes '''
-			# Get nodes on boundary 2 paired with those in global_node_IDs_1
-			idx1 = idx_in_node_pairs[global_node_IDs_1]
-			nodes1_partner_IDs = node_pairs[idx1, 1]
-			# Sort
-			nodes1_partner_IDs_sort = np.sort(nodes1_partner_IDs)
-
-			match = False
-			if np.all(global_node_IDs_2 == nodes1_partner_IDs_sort):
-				# Matching nodes
-				match = True
-
-				# Sanity check
-				if not np.all(global_node_IDs_2 == nodes1_partner_IDs):
-					raise ValueError("Node ordering on opposite periodic " +
-							"faces is different")
-
-				# Create interior face between these two faces
-				mesh.num_interior_faces += 1
-				interior_faces.append(mesh_defs.InteriorFace())
-				interior_face = interior_faces[-1]
-				interior_face.elemL_ID = elem_ID1
-				interior_face.faceL_ID = face_ID1
-				interior_face.elemR_ID = elem_ID2
-				interior_face.faceR_ID = face_ID2
-
-				# Decrement number of boundary faces
-				boundary_group1.num_boundary_faces -= 1
-				boundary_group2.num_boundary_faces -= 1
-
-				break
-
-		if not match:
+	elem_IDs1 = boundary_group1.elem_IDs
+	face_IDs1 = boundary_group1.face_IDs
+	elem_IDs2 = boundary_group2.elem_IDs
+	face_IDs2 = boundary_group2.face_IDs
+	num_faces1 = elem_IDs1.shape[0]
+	num_faces2 = elem_IDs2.shape[0]
+
+	# Global IDs of face nodes, sorted for easy comparison
+	global_node_IDs_1 = np.sort(get_face_node_IDs(mesh, elem_IDs1,
+			face_IDs1), axis=1)
+	global_node_IDs_2 = np.sort(get_face_node_IDs(mesh, elem_IDs2,
+			face_IDs2), axis=1)
+
+	# Get nodes on boundary 2 paired with those in global_node_IDs_1
+	nodes1_partner_IDs = node_pairs[idx_in_node_pairs[global_node_IDs_1], 1]
+	nodes1_partner_IDs_sort = np.sort(nodes1_partner_IDs, axis=1)
+
+	''' Check for complete match between all nodes '''
+	# The faces on boundary 2 come first so that each face on boundary 1
+	# is matched with the first face on boundary 2 with the same nodes
+	_, idx_first, inverse = np.unique(np.concatenate([global_node_IDs_2,
+			nodes1_partner_IDs_sort]), axis=0, return_index=True,
+			return_inverse=True)
+	match_IDs = idx_first[inverse.reshape(-1)[num_faces2:]]
+
+	# Matched faces on boundary 1 must be matched with a face on boundary
+	# 2 that has the same node ordering
+	unmatched = match_IDs >= num_faces2
+	misordered = np.any(nodes1_partner_IDs != nodes1_partner_IDs_sort,
+			axis=1)
+	if np.any(unmatched | misordered):
+		if unmatched[np.argmax(unmatched | misordered)]:
 			raise ValueError("Could not find matching boundary face")
+		raise ValueError("Node ordering on opposite periodic " +
+				"faces is different")
+
+	# Create interior faces between the matching faces
+	mesh.set_interior_faces(
+			np.concatenate([mesh.int_face_elemL_IDs, elem_IDs1]),
+			np.concatenate([mesh.int_face_faceL_IDs, face_IDs1]),
+			np.concatenate([mesh.int_face_elemR_IDs, elem_IDs2[match_IDs]]),
+			np.concatenate([mesh.int_face_faceR_IDs, face_IDs2[match_IDs]]))
+
+	# Decrement number of boundary faces
+	boundary_group1.num_boundary_faces -= num_faces1
+	boundary_group2.num_boundary_faces -= np.unique(match_IDs).shape[0]
 
 	# Verification
 	if boundary_group1.num_boundary_faces != 0 or \
@@ -624,42 +622,22 @@ def verify_periodic_mesh(mesh):
 	-------
 		mesh: mesh object
 	'''
-	# Loop through interior faces
-	for interior_face in mesh.interior_faces:
-		# Extract info
-		elemL_ID = interior_face.elemL_ID
-		elemR_ID = interior_face.elemR_ID
-		faceL_ID = interior_face.faceL_ID
-		faceR_ID = interior_face.faceR_ID
-		gbasis = mesh.gbasis
-		gorder = mesh.gorder
-
-		''' Get global IDs of face nodes '''
-		# Local IDs - left
-		local_node_IDs = gbasis.get_local_face_principal_node_nums(
-				gorder, faceL_ID)
-		# Global IDs - left
-		global_node_IDs_L = mesh.elem_to_node_IDs[elemL_ID][local_node_IDs]
-		# Local IDs - right
-		local_node_IDs = gbasis.get_local_face_principal_node_nums(
-			gorder, faceR_ID)
-		# Global IDs - right
-		global_node_IDs_R = mesh.elem_to_node_IDs[elemR_ID][local_node_IDs]
-
-		''' If exact same global nodes, then this is NOT a periodic face '''
-		# Sort for easy comparison
-		global_node_IDs_L = np.sort(global_node_IDs_L)
-		global_node_IDs_R = np.sort(global_node_IDs_R)
-		if np.all(global_node_IDs_L == global_node_IDs_R):
-			# Skip non-periodic faces
-			continue
-
-		''' Compare distances '''
-		coordsL = mesh.node_coords[global_node_IDs_L]
-		coordsR = mesh.node_coords[global_node_IDs_R]
-		dists = np.linalg.norm(coordsL-coordsR, axis=1)
-		if np.abs(np.max(dists) - np.min(dists)) > TOL:
-			raise ValueError
+	''' Get global IDs of face nodes '''
+	# Sort for easy comparison
+	global_node_IDs_L = np.sort(get_face_node_IDs(mesh,
+			mesh.int_face_elemL_IDs, mesh.int_face_faceL_IDs), axis=1)
+	global_node_IDs_R = np.sort(get_face_node_IDs(mesh,
+			mesh.int_face_elemR_IDs, mesh.int_face_faceR_IDs), axis=1)
+
+	''' If exact same global nodes, then this is NOT a periodic face '''
+	periodic = np.any(global_node_IDs_L != global_node_IDs_R, axis=1)
+
+	''' Compare distances '''
+	coordsL = mesh.node_coords[global_node_IDs_L[periodic]]
+	coordsR = mesh.node_coords[global_node_IDs_R[periodic]]
+	dists = np.linalg.norm(coordsL-coordsR, axis=2)
+	if np.any(np.abs(np.max(dists, axis=1) - np.min(dists, axis=1)) > TOL):
+		raise ValueError
 
 
 def make_periodic_translational(mesh, x1=None, x2=None, y1=None, y2=None):
@@ -718,3 +696,37 @@ def make_periodic_translational(mesh, x1=None, x2=None, y1=None, y2=None):
 
 	print("\nDONE")
 	print("-------------------------------------------------")
+
+
+def get_mesh_cache_file(mesh_params):
+	'''
+	This function returns the name of the mesh cache file for the given
+	mesh parameters. The file name is a hash of the mesh parameters and,
+	if a mesh file is read, of the path, size, and modification time of
+	said file.
+
+	Inputs:
+	-------
+		mesh_params: mesh parameters from the input deck
+
+	Outputs:
+	--------
+		fname: cache file name (None if mesh caching is disabled)
+	'''
+	cache_dir = mesh_params["CacheDirectory"]
+	if cache_dir is None:
+		return None
+
+	h = hashlib.sha1()
+	h.update(repr(mesh_defs.QMESH_VERSION).encode())
+	for key in sorted(mesh_params):
+		if key != "CacheDirectory":
+			h.update(repr((key, mesh_params[key])).encode())
+
+	mesh_file = mesh_params["File"]
+	if mesh_file is not None:
+		stat = os.stat(mesh_file)
+		h.update(repr((os.path.abspath(mesh_file), stat.st_size,
+				stat.st_mtime_ns)).encode())
+
+	return os.path.join(cache_dir, "mesh_" + h.hexdigest() + ".qmesh")
@@ -102,7 +102,8 @@ def get_stiffness_matrix_ader(mesh, basis, basis_st, order, dt, elem_ID,
 		basis: basis object
 		basis_st: space-time basis object
 		order: solution order
-		dt: time step
+		dt: time step (only used for the temporal direction in physical
+			space)
 		elem_ID: element index
 		grad_dir: direction of gradient calculation
 
@@ -165,6 +166,78 @@ def get_stiffness_matrix_ader(mesh, basis, basis_st, order, dt, elem_ID,
 	return SM # [nb_st, nb_st]
 
 
+def get_stiffness_matrices_ader(mesh, basis, basis_st, order):
+	'''
+	Calculate the spatial stiffness matrices for the ADER-DG prediction
+	step in physical space for all elements. This is the batched version
+	of get_stiffness_matrix_ader with physical_space=True and
+	grad_dir=0, ..., ndims-1.
+
+	Inputs:
+	-------
+		mesh: mesh object
+		basis: basis object
+		basis_st: space-time basis object
+		order: solution order
+
+	Outputs:
+	--------
+		SMS_elems: transposed stiffness matrices in space for each element
+			[num_elems, nb_st, nb_st, ndims]
+
+	Notes:
+	------
+		The spatial stiffness matrices do not depend on the time step.
+		For affine elements, i.e. elements with a constant Jacobian, the
+		physical stiffness matrices are linear combinations of the
+		reference stiffness matrices weighted by the entries of the
+		inverse Jacobian. The stiffness matrices of the remaining elements
+		are contracted against the stacked inverse Jacobians at the
+		quadrature points.
+	'''
+	ndims = mesh.ndims
+	nb_st = basis_st.nb
+
+	# Quadrature and space-time basis data
+	quad_order_st = basis_st.get_quadrature_order(mesh, order*2)
+	quad_pts_st, quad_wts_st = basis_st.get_quadrature_data(quad_order_st)
+	basis_st.get_basis_val_grads(quad_pts_st, get_val=True,
+			get_ref_grad=True)
+	basis_st_val = basis_st.basis_val*quad_wts_st # [nq_st, nb_st]
+	basis_ref_grad = basis_st.basis_ref_grad[:, :, :ndims]
+			# [nq_st, nb_st, ndims]
+
+	# Inverse Jacobians
+	_, jac, ijac = basis_tools.element_jacobians(mesh, None, quad_pts_st,
+			get_djac=True, get_jac=True, get_ijac=True)
+			# [num_elems, nq_st, ndims, ndims]
+
+	# Identify affine elements
+	jac_elems = jac[:, 0]
+	tol = basis_tools.AFFINE_RTOL*np.max(np.abs(jac_elems), axis=(1, 2))
+	affine = np.all(np.abs(jac - jac_elems[:, np.newaxis]) <=
+			tol.reshape(-1, 1, 1, 1), axis=(1, 2, 3))
+
+	SMS_elems = np.empty([mesh.num_elems, nb_st, nb_st, ndims])
+
+	# Affine elements: combine the transposed reference stiffness
+	# matrices
+	SMS_ref = np.tensordot(basis_st_val, basis_ref_grad, axes=[[0], [0]])
+			# [nb_st, nb_st, ndims]
+	SMS_elems[affine] = np.tensordot(ijac[affine, 0], SMS_ref,
+			axes=[[1], [2]]).transpose((0, 2, 3, 1))
+
+	# Remaining elements: physical gradients at the quadrature points
+	non_affine = np.logical_not(affine)
+	if np.any(non_affine):
+		basis_phys_grad = np.matmul(basis_ref_grad, ijac[non_affine])
+				# [n, nq_st, nb_st, ndims]
+		SMS_elems[non_affine] = np.tensordot(basis_st_val,
+				basis_phys_grad, axes=[[0], [1]]).transpose((1, 0, 2, 3))
+
+	return SMS_elems # [num_elems, nb_st, nb_st, ndims]
+
+
 def get_temporal_flux_ader(mesh, basis1, basis2, order,
 		physical_space=False):
 	'''
@@ -759,6 +759,9 @@ class BasisBase(ABC):
 	calculate_normals: method
 		method to obtain normals for element faces [options in
 		src/numerics/basis/tools.py]
+	calculate_normals_faces: method
+		batched version of calculate_normals for many faces at once
+		[options in src/numerics/basis/tools.py]
 	skip_interp: boolean
 		if True, then interpolation to the quadrature points is skipped;
 		useful for a collocated scheme in which the quadrature points
@@ -780,6 +783,8 @@ class BasisBase(ABC):
 		gradient for the basis depending on the optional arguments
 	force_colocated_nodes_quad_pts
 		if flag is True, method forces node pts equal to quadrature pts
+	get_tensor_product_basis
+		returns the 1D basis whose tensor product gives this basis
 	'''
 	@property
 	@abstractmethod
@@ -807,6 +812,7 @@ class BasisBase(ABC):
 		self.quadrature_type = -1
 		self.get_1d_nodes = basis_tools.set_1D_node_calc("Equidistant")
 		self.calculate_normals = None
+		self.calculate_normals_faces = None
 		self.skip_interp = False
 		self.num_pts_colocated = 0
 
@@ -858,12 +864,13 @@ class BasisBase(ABC):
 
 		Inputs:
 		-------
-			ijac: inverse of the Jacobian [nq, ndims, ndims]
+			ijac: inverse of the Jacobian [nq, ndims, ndims]; a batch of
+				inverse Jacobians [ne, nq, ndims, ndims] is also accepted
 
 		Outputs:
 		--------
 			basis_phys_grad: evaluated gradient of the basis function in
-				physical space [nq, nb, ndims]
+				physical space [nq, nb, ndims] (or [ne, nq, nb, ndims])
 		'''
 		ndims = self.NDIMS
 		nb = self.nb
@@ -875,13 +882,14 @@ class BasisBase(ABC):
 			raise ValueError("basis_ref_grad not evaluated")
 
 		# check to see if ijac has been passed and has the right shape
-		if ijac is None or ijac.shape != (nq, ndims, ndims):
+		if ijac is None or ijac.shape[-3:] != (nq, ndims, ndims) or \
+				ijac.ndim not in [3, 4]:
 			raise ValueError("basis_ref_grad and ijac shapes not compatible")
 
-		basis_phys_grad = np.transpose(np.matmul(ijac.transpose(0, 2, 1),
-				basis_ref_grad.transpose(0, 2, 1)), (0, 2, 1))
+		basis_phys_grad = np.swapaxes(np.matmul(np.swapaxes(ijac, -1, -2),
+				basis_ref_grad.transpose(0, 2, 1)), -1, -2)
 
-		return basis_phys_grad # [nq, nb, ndims]
+		return basis_phys_grad # [..., nq, nb, ndims]
 
 	def get_basis_val_grads(self, quad_pts, get_val=True, get_ref_grad=False,
 			get_phys_grad=False, ijac=None):
@@ -993,6 +1001,20 @@ class BasisBase(ABC):
 		except AttributeError:
 			pass
 
+	def get_tensor_product_basis(self):
+		'''
+		Returns the 1D basis whose tensor product (with the first reference
+		coordinate varying fastest) gives this basis. This allows the
+		basis to be evaluated and integrated one direction at a time (sum
+		factorization).
+
+		Outputs:
+		--------
+			basis_1D: 1D basis object (None if this basis is not a tensor
+				product of 1D bases)
+		'''
+		return None
+
 
 class LagrangeSeg(BasisBase, SegShape):
 	'''
@@ -1008,6 +1030,7 @@ class LagrangeSeg(BasisBase, SegShape):
 	def __init__(self, order):
 		super().__init__(order)
 		self.calculate_normals = basis_tools.calculate_1D_normals
+		self.calculate_normals_faces = basis_tools.calculate_1D_normals_faces
 	
 
 	def get_nodes(self, p):
@@ -1098,6 +1121,7 @@ class LagrangeQuad(BasisBase, QuadShape):
 	def __init__(self, order):
 		super().__init__(order)
 		self.calculate_normals = basis_tools.calculate_2D_normals
+		self.calculate_normals_faces = basis_tools.calculate_2D_normals_faces
 
 	def get_nodes(self, p):
 		'''
@@ -1162,6 +1186,12 @@ class LagrangeQuad(BasisBase, QuadShape):
 
 		return basis_ref_grad # [nq, nb, ndims]
 
+	def get_tensor_product_basis(self):
+		basis_1D = LagrangeSeg(self.order)
+		basis_1D.get_1d_nodes = self.get_1d_nodes
+
+		return basis_1D
+
 	def get_local_face_node_nums(self, p, face_ID):
 		'''
 		Returns local IDs of all nodes on face
@@ -1206,6 +1236,7 @@ class LagrangeTri(BasisBase, TriShape):
 	def __init__(self, order):
 		super().__init__(order)
 		self.calculate_normals = basis_tools.calculate_2D_normals
+		self.calculate_normals_faces = basis_tools.calculate_2D_normals_faces
 
 	def get_nodes(self, p):
 		# get_nodes only has equidistant_nodes option for triangles
@@ -1300,6 +1331,7 @@ class LagrangeHex(BasisBase, HexShape):
 	def __init__(self, order):
 		super().__init__(order)
 		self.calculate_normals = basis_tools.calculate_2D_normals
+		self.calculate_normals_faces = basis_tools.calculate_2D_normals_faces
 
 	def get_nodes(self, p):
 		'''
@@ -1371,6 +1403,12 @@ class LagrangeHex(BasisBase, HexShape):
 
 		return basis_ref_grad # [nq, nb, ndims]
 
+	def get_tensor_product_basis(self):
+		# The basis functions vary fastest in the second reference
+		# direction (see get_lagrange_basis_3D), unlike the nodes and
+		# quadrature points, so sum factorization does not apply as is
+		return None
+
 
 class LagrangePrism(BasisBase, PrismShape):
 	'''
@@ -1386,6 +1424,7 @@ class LagrangePrism(BasisBase, PrismShape):
 	def __init__(self, order):
 		super().__init__(order)
 		self.calculate_normals = basis_tools.calculate_2D_normals
+		self.calculate_normals_faces = basis_tools.calculate_2D_normals_faces
 
 	def get_nodes(self, p):
 		# get_nodes only has equidistant_nodes option for prisms
@@ -1556,6 +1595,9 @@ class LegendreQuad(BasisBase, QuadShape):
 
 		return basis_ref_grad # [nq, nb, ndims]
 
+	def get_tensor_product_basis(self):
+		return LegendreSeg(self.order)
+
 
 class HierarchicH1Tri(BasisBase, TriShape):
 	'''
@@ -30,6 +30,11 @@ import numerics.basis.basis as basis_defs
 import numerics.quadrature.segment as segment
 
 
+# Relative tolerance on the variation of the Jacobian determinant within an
+# element below which the element is treated as affine
+AFFINE_RTOL = 1.e-12
+
+
 def set_basis(order, basis_name):
 	'''
 	Sets the basis class given the basis_name string argument
@@ -150,6 +155,36 @@ def gauss_lobatto_nodes_1D_range(start, stop, nnodes):
 	return xnodes # [nnodes, 1]
 
 
+def get_tensor_product_points_1D(pts):
+	'''
+	This function extracts the 1D points whose tensor product (with the
+	first coordinate varying fastest) gives the given points, e.g. the
+	quadrature points of quadrilaterals and hexahedra
+
+	Inputs:
+	-------
+		pts: coordinates of points in ref space [npts, ndims]
+
+	Outputs:
+	--------
+		pts_1D: coordinates of the 1D points [npts_1D, 1] (None if the
+			points are not a tensor product of 1D points)
+	'''
+	npts, ndims = pts.shape
+	npts_1D = int(round(npts**(1./ndims)))
+	if npts_1D**ndims != npts:
+		return None
+
+	pts_1D = pts[:npts_1D, 0]
+	idx = np.arange(npts)
+	for k in range(ndims):
+		if not np.array_equal(pts[:, k], pts_1D[(idx//npts_1D**k) %
+				npts_1D]):
+			return None
+
+	return pts_1D.reshape(-1, 1) # [npts_1D, 1]
+
+
 def get_inv_mass_matrices(mesh, basis, order):
 	'''
 	Calculate the inverse mass matrices for all elements
@@ -163,16 +198,47 @@ def get_inv_mass_matrices(mesh, basis, order):
 	Outputs:
 	--------
 		iMM_all: all inverse mass matrices
+
+	Notes:
+	------
+		For affine elements, i.e. elements with a constant Jacobian
+		determinant (e.g. linear segments and triangles, and
+		parallelograms), the mass matrix is the reference mass matrix
+		scaled by the Jacobian determinant, so that a single inverse is
+		needed. The mass matrices of the remaining elements are inverted
+		in a batch.
 	'''
+	gbasis = mesh.gbasis
 	nb = basis.nb
 
-	iMM_all = np.zeros([mesh.num_elems, nb, nb])
+	# Quadrature and basis values
+	quad_order = gbasis.get_quadrature_order(mesh, order*2)
+	quad_pts, quad_wts = basis.get_quadrature_data(quad_order)
+	basis.get_basis_val_grads(quad_pts, get_val=True)
+	basis_val = basis.basis_val # [nq, nb]
+
+	# Jacobian determinants
+	djac, _, _ = element_jacobians(mesh, None, quad_pts, get_djac=True)
+	djac = djac[:, :, 0] # [num_elems, nq]
+
+	# Identify affine elements
+	djac_elems = djac[:, 0]
+	affine = np.all(np.abs(djac - djac_elems.reshape(-1, 1)) <=
+			AFFINE_RTOL*djac_elems.reshape(-1, 1), axis=1)
+
+	iMM_all = np.empty([mesh.num_elems, nb, nb])
+
+	# Affine elements: scale the inverse reference mass matrix
+	iMM_ref = np.linalg.inv(np.matmul(basis_val.transpose(),
+			basis_val*quad_wts)) # [nb, nb]
+	iMM_all[affine] = iMM_ref/djac_elems[affine].reshape(-1, 1, 1)
 
-	for elem_ID in range(mesh.num_elems):
-		# Calculate the inv mass matrix in physical space
-		iMM = get_elem_inv_mass_matrix(mesh, basis, order, elem_ID, True)
-		# Store
-		iMM_all[elem_ID] = iMM
+	# Remaining elements: batched inverse
+	non_affine = np.logical_not(affine)
+	if np.any(non_affine):
+		MM = np.matmul(basis_val.transpose(), basis_val*quad_wts*
+				djac[non_affine][:, :, np.newaxis]) # [n, nb, nb]
+		iMM_all[non_affine] = np.linalg.inv(MM)
 
 	return iMM_all # [mesh.num_elems, nb, nb]
 
@@ -324,7 +390,7 @@ def element_jacobian(mesh, elem_ID, quad_pts, get_djac=False, get_jac=False,
 	if ndims != mesh.ndims:
 		raise Exception("Dimensions don't match")
 
-	elem_coords = mesh.elements[elem_ID].node_coords
+	elem_coords = mesh.node_coords[mesh.elem_to_node_IDs[elem_ID]]
 
 	# Compute Jacobian
 	jac = np.tensordot(basis_ref_grad, elem_coords.transpose(),
@@ -342,6 +408,71 @@ def element_jacobian(mesh, elem_ID, quad_pts, get_djac=False, get_jac=False,
 		# [nq, 1], [nq, ndims, ndims], and [nq, ndims, ndims]
 
 
+def element_jacobians(mesh, elem_IDs, quad_pts, get_djac=False,
+		get_jac=False, get_ijac=False):
+	'''
+	Evaluate the geometric Jacobian for a batch of elements at the same
+	reference points. This is the batched version of element_jacobian.
+
+	Inputs:
+	-------
+		mesh: mesh object
+		elem_IDs: element indices [n]; if None, all elements are used
+		quad_pts: coordinates of quadrature points [nq, ndims]
+		get_djac: [OPTIONAL] flag to calculate Jacobian determinant
+			(Default: False)
+		get_jac: [OPTIONAL] flag to calculate Jacobian (Default: False)
+		get_ijac: [OPTIONAL] flag to calculate inverse of the Jacobian
+			(Default: False)
+
+	Outputs:
+	--------
+		djac: determinant of the Jacobian [n, nq, 1] (None if not
+			requested)
+		jac: Jacobian [n, nq, ndims, ndims] (None if not requested)
+		ijac: inverse Jacobian [n, nq, ndims, ndims] (None if not
+			requested)
+	'''
+	gbasis = mesh.gbasis
+	ndims = gbasis.NDIMS
+
+	# Gradients in reference space
+	basis_ref_grad = gbasis.get_grads(quad_pts) # [nq, nb, ndims]
+
+	if ndims != mesh.ndims:
+		raise Exception("Dimensions don't match")
+
+	if elem_IDs is None:
+		elem_IDs = np.arange(mesh.num_elems)
+	elem_coords = mesh.node_coords[mesh.elem_to_node_IDs[elem_IDs]]
+			# [n, nb, ndims]
+
+	# Compute Jacobian
+	jac = np.tensordot(basis_ref_grad, elem_coords,
+			axes=[[1], [1]]).transpose((2, 0, 3, 1))
+
+	# Get determinant and check for nonpositive Jacobian
+	djac = None
+	if get_djac:
+		djac = np.linalg.det(jac)[:, :, np.newaxis]
+		if np.any(djac <= 0.):
+			bad_ID = elem_IDs[np.where(np.any(djac <= 0.,
+					axis=(1, 2)))[0][0]]
+			raise Exception("Nonpositive Jacobian (elem_ID = %d)" % (
+					bad_ID))
+
+	# Get inverse
+	ijac = None
+	if get_ijac:
+		ijac = np.linalg.inv(jac)
+
+	if not get_jac:
+		jac = None
+
+	return djac, jac, ijac
+		# [n, nq, 1], [n, nq, ndims, ndims], and [n, nq, ndims, ndims]
+
+
 def calculate_1D_normals(mesh, elem_ID, face_ID, quad_pts):
 
 	'''
@@ -390,7 +521,7 @@ def calculate_2D_normals(mesh, elem_ID, face_ID, quad_pts):
 	'''
 	gbasis = mesh.gbasis
 	gorder = mesh.gorder
-	elem_coords = mesh.elements[elem_ID].node_coords
+	elem_coords = mesh.node_coords[mesh.elem_to_node_IDs[elem_ID]]
 
 	''' Get face coordinates '''
 	# Get local IDs of face nodes
@@ -411,6 +542,85 @@ def calculate_2D_normals(mesh, elem_ID, face_ID, quad_pts):
 	return normals # [nq, ndims]
 
 
+def calculate_1D_normals_faces(mesh, elem_IDs, face_IDs, quad_pts):
+	'''
+	Calculate the normals for a batch of 1D faces. This is the batched
+	version of calculate_1D_normals.
+
+	Inputs:
+	-------
+		mesh: mesh object
+		elem_IDs: element indices [n]
+		face_IDs: local face indices [n]
+		quad_pts: points in reference space at which to calculate normals
+
+	Outputs:
+	--------
+		normals: normal vectors [n, nq, ndims]
+	'''
+	face_IDs = np.asarray(face_IDs)
+	nq = quad_pts.shape[0]
+
+	if np.any((face_IDs != 0) & (face_IDs != 1)):
+		raise ValueError
+
+	normals = np.zeros([face_IDs.shape[0], nq, mesh.ndims])
+
+	# 1D normals calculation
+	normals[:, 0] = np.where(face_IDs == 0, -1., 1.)[:, np.newaxis]
+
+	return normals # [n, nq, ndims]
+
+
+def calculate_2D_normals_faces(mesh, elem_IDs, face_IDs, quad_pts):
+	'''
+	Calculate the normals for a batch of faces of 2D shapes (triangles
+	and quadrilaterals). This is the batched version of
+	calculate_2D_normals.
+
+	Inputs:
+	-------
+		mesh: mesh object
+		elem_IDs: element indices [n]
+		face_IDs: local face indices [n]
+		quad_pts: points in reference space at which to calculate normals
+
+	Outputs:
+	--------
+		normals: normal vectors [n, nq, ndims]
+	'''
+	gbasis = mesh.gbasis
+	gorder = mesh.gorder
+	elem_IDs = np.asarray(elem_IDs)
+	face_IDs = np.asarray(face_IDs)
+
+	# Instantiate segment basis
+	basis_seg = basis_defs.LagrangeSeg(gorder)
+	# Compute basis values
+	basis_ref_grad = basis_seg.get_grads(quad_pts) # [nq, nfnodes, 1]
+
+	nq = quad_pts.shape[0]
+	normals = np.zeros([elem_IDs.shape[0], nq, mesh.ndims])
+
+	# Faces with the same local ID share the same local face nodes
+	for face_ID in np.unique(face_IDs):
+		idx = np.where(face_IDs == face_ID)[0]
+		# Get local IDs of face nodes
+		fnodes = gbasis.get_local_face_node_nums(gorder, face_ID)
+		# Extract coordinates of face nodes
+		face_coords = mesh.node_coords[
+				mesh.elem_to_node_IDs[elem_IDs[idx]][:, fnodes]]
+				# [nf, nfnodes, ndims]
+
+		# Gradient of physical space w.r.t ref space
+		xphys_grad = np.matmul(face_coords.transpose(0, 2, 1)[:, np.newaxis],
+				basis_ref_grad)[:, :, :, 0] # [nf, nq, ndims]
+		normals[idx, :, 0] = xphys_grad[:, :, 1]
+		normals[idx, :, 1] = -xphys_grad[:, :, 0]
+
+	return normals # [n, nq, ndims]
+
+
 def get_lagrange_basis_1D(xq, xnodes, basis_val=None, basis_ref_grad=None):
 	'''
 	Calculates the 1D Lagrange basis functions
@@ -23,6 +23,119 @@
 import numpy as np
 
 
+# Cache of precomputed einsum contraction paths, keyed by the subscripts
+# and the operand shapes (which are fixed for a given solver)
+einsum_paths = {}
+
+
+def einsum(subscripts, *operands, out=None):
+	'''
+	This function is a drop-in replacement for np.einsum that computes
+	the optimal contraction path once for a given set of subscripts and
+	operand shapes and reuses it in subsequent calls.
+
+	Inputs:
+	-------
+		subscripts: einsum subscripts string
+		operands: arrays to contract
+		out: optional array in which to store the result
+
+	Outputs:
+	--------
+		result: contracted array
+	'''
+	key = (subscripts,) + tuple(op.shape for op in operands)
+	path = einsum_paths.get(key)
+	if path is None:
+		path = np.einsum_path(subscripts, *operands,
+				optimize='optimal')[0]
+		einsum_paths[key] = path
+
+	return np.einsum(subscripts, *operands, out=out, optimize=path)
+
+
+class WorkArrays(object):
+	'''
+	This class is an arena of reusable work arrays. Arrays are handed out
+	by name and shape and reused by later requests with the same name and
+	shape, so that repeated residual evaluations do not allocate new
+	arrays. The contents of an array are only valid until the next
+	request with the same name and shape.
+
+	Attributes:
+	-----------
+	arrays: dict
+		work arrays, keyed by (name, shape)
+	'''
+	def __init__(self):
+		self.arrays = {}
+
+	def __getstate__(self):
+		# The work arrays are not worth storing
+		return {"arrays" : {}}
+
+	def get(self, name, shape):
+		'''
+		Returns an (uninitialized) work array.
+
+		Inputs:
+		-------
+			name: name of the array
+			shape: shape of the array
+
+		Outputs:
+		--------
+			array: work array
+		'''
+		key = (name, tuple(shape))
+		array = self.arrays.get(key)
+		if array is None:
+			array = np.empty(shape)
+			self.arrays[key] = array
+
+		return array
+
+	def zeros(self, name, shape):
+		'''
+		Returns a work array filled with zeros. Same inputs and outputs as
+		get.
+		'''
+		array = self.get(name, shape)
+		array.fill(0.)
+
+		return array
+
+	def take(self, name, a, indices):
+		'''
+		Returns a[indices] (along the first axis) in a work array.
+
+		Inputs:
+		-------
+			name: name of the array
+			a: array to take from
+			indices: indices along the first axis
+
+		Outputs:
+		--------
+			array: work array with the selected entries of a
+		'''
+		array = self.get(name, (indices.shape[0],) + a.shape[1:])
+		# The default mode ("raise") would allocate a buffer, but "clip"
+		# silently maps out-of-range indices to valid ones, so the indices
+		# are checked unless Python runs with -O
+		if __debug__ and indices.shape[0] > 0 and (np.min(indices) < 0 or
+				np.max(indices) >= a.shape[0]):
+			raise IndexError("Index out of range for an array with %d "
+					"entries" % (a.shape[0]))
+		return np.take(a, indices, axis=0, out=array, mode="clip")
+
+	def get_num_bytes(self):
+		'''
+		Returns the total size of the work arrays in bytes.
+		'''
+		return sum(array.nbytes for array in self.arrays.values())
+
+
 def get_element_mean(Uq, quad_wts, djac, vol):
 	'''
 	This function computes element averages of the state.
@@ -43,7 +156,7 @@ def get_element_mean(Uq, quad_wts, djac, vol):
 	return U_mean # [ne, 1, ns]
 
 
-def evaluate_state(Uc, basis_val, skip_interp=False):
+def evaluate_state(Uc, basis_val, skip_interp=False, out=None):
 	'''
 	This function evaluates the state based on the given basis values.
 
@@ -54,25 +167,28 @@ def evaluate_state(Uc, basis_val, skip_interp=False):
 	    skip_interp: if True, then will simply copy the state coefficients;
 	    	useful for a colocated scheme, i.e. quadrature points and
 	    	solution nodes (for a nodal basis) are the same
+	    out: optional array in which to store the result [ne, nq, ns]
 
 	Outputs:
 	--------
 	    Uq: values of state [ne, nq, ns]
 	'''
 	if skip_interp:
-		Uq = Uc.copy()
-	else:
-		if basis_val.ndim == 3:
-			# For faces, there is a different basis_val for each face
-			Uq = np.einsum('ijn, ink -> ijk', basis_val, Uc)
+		if out is None:
+			Uq = Uc.copy()
 		else:
-			# For elements, all elements have the same basis_val
-			Uq = np.einsum('jn, ink -> ijk', basis_val, Uc)
+			Uq = out
+			Uq[:] = Uc
+	else:
+		# For faces, there is a different basis_val for each face
+		# ([nf, nq, nb]); for elements, all elements have the same
+		# basis_val ([nq, nb]), which matmul broadcasts
+		Uq = np.matmul(basis_val, Uc, out=out)
 
 	return Uq # [ne, nq, ns]
 
 
-def evaluate_gradient(Uc, basis_phys_grad_elems):
+def evaluate_gradient(Uc, basis_phys_grad_elems, out=None):
 	'''
 	This function evaluates the gradient of the state based on the 
 	physical gradient of the basis.
@@ -82,20 +198,34 @@ def evaluate_gradient(Uc, basis_phys_grad_elems):
 	    Uc: state coefficients [ne, nb, ns]
 	    basis_phys_grad_elems: evaluated gradient of the basis function in
 			physical space [nq, nb, ndims]
+	    out: optional contiguous array in which to store the result
+	    	[ne, nq, ndims, ns]; the returned gradient is a view of it
 
 	Outputs:
 	--------
 	    gUq: gradient of the state [ne, nq, ns, ndims]
 	'''
+	ne, nb, ns = Uc.shape
+	nq = basis_phys_grad_elems.shape[-3]
+	ndims = basis_phys_grad_elems.shape[-1]
+
+	# Move the basis index last so the contraction is a (batched)
+	# matrix product over nb
+	grad = np.swapaxes(basis_phys_grad_elems, -1, -2)
 	if basis_phys_grad_elems.ndim == 4:
-		gUq = np.einsum('ijml, imk -> ijkl', basis_phys_grad_elems, Uc)
+		# [ne, nq, ndims, nb] x [ne, 1, nb, ns]
+		gUq = np.matmul(grad, Uc[:, np.newaxis], out=out)
 	else:
-		gUq = np.einsum('jml, imk -> ijkl', basis_phys_grad_elems, Uc)
+		# [nq*ndims, nb] x [ne, nb, ns]
+		if out is not None:
+			out = out.reshape(ne, nq*ndims, ns)
+		gUq = np.matmul(grad.reshape(nq*ndims, nb), Uc, out=out).reshape(
+				ne, nq, ndims, ns)
 
-	return gUq # [ne, nq, ns, ndims]
+	return np.swapaxes(gUq, 2, 3) # [ne, nq, ns, ndims]
 
 
-def ref_to_phys_grad(ijac, gU_ref):
+def ref_to_phys_grad(ijac, gU_ref, out=None):
 	'''
 	This function converts a gradient in reference space to one in 
 	physical space given the inverse jacobian evaluated at the 
@@ -105,11 +235,209 @@ def ref_to_phys_grad(ijac, gU_ref):
 	-------
 		ijac: inverse jacobian [ne, num_pts, ndims, ndims]
 		gU_ref: reference gradient of the state [ne, num_pts, ns, ndims]
+		out: optional array in which to store the result
+			[ne, num_pts, ns, ndims]
 
 	Outputs:
 	--------
 		gU_phys: physical gradient of the state [ne, num_pts, ns, ndims]
 	'''
-	gU_phys = np.einsum('ijpl, ijkp -> ijkl', ijac, gU_ref)
+	gU_phys = np.matmul(gU_ref, ijac, out=out)
+
+	return gU_phys # [ne, num_pts, ns, ndims]
+
+
+def apply_tensor_product(mats, Uc, out=None):
+	'''
+	This function applies the tensor product of 1D matrices to the values
+	of each element one direction at a time (sum factorization). With the
+	1D basis values, this interpolates the state to tensor-product
+	quadrature points; with their transposes, it integrates back to the
+	basis coefficients.
+
+	Inputs:
+	-------
+		mats: 1D matrices, one per reference direction, with the first
+			direction varying fastest in the point/coefficient ordering
+			[ndims][n_out, n_in]
+		Uc: values [ne, n_in**ndims, ns]
+		out: optional array in which to store the result
+			[ne, n_out**ndims, ns]
+
+	Outputs:
+	--------
+		Uq: transformed values [ne, n_out**ndims, ns]
+
+	Notes:
+	------
+		The cost per element and state variable is O(n^(ndims+1)), as
+		opposed to O(n^(2*ndims)) for the equivalent [n_out**ndims,
+		n_in**ndims] matrix.
+	'''
+	ne, _, ns = Uc.shape
+	ndims = len(mats)
+
+	# First direction (fastest varying): one matrix product over all
+	# elements, with the state index moved before the direction index
+	A = mats[0]
+	n_out, n_in = A.shape
+	X = np.swapaxes(Uc.reshape(-1, n_in, ns), 1, 2).reshape(-1, n_in)
+	X = np.swapaxes(np.matmul(X, A.T).reshape(-1, ns, n_out), 1, 2)
+	n_fast = n_out
+	if ndims == 1:
+		if out is None:
+			return X.reshape(ne, n_fast, ns)
+		out[:] = X.reshape(ne, n_fast, ns)
+		return out
+
+	# Remaining directions: batched matrix products in which the already
+	# transformed (faster) directions and the state index are contiguous
+	for k in range(1, ndims):
+		A = mats[k]
+		n_out, n_in = A.shape
+		X = X.reshape(-1, n_in, n_fast*ns)
+		out_k = None
+		if k == ndims - 1 and out is not None:
+			out_k = out.reshape(X.shape[0], n_out, n_fast*ns)
+		X = np.matmul(A, X, out=out_k)
+		n_fast *= n_out
+
+	if out is not None:
+		return out
+	return X.reshape(ne, n_fast, ns) # [ne, n_out**ndims, ns]
+
+
+def evaluate_state_sum_factorization(Uc, basis_val_1D, ndims, out=None):
+	'''
+	This function evaluates the state at tensor-product quadrature points
+	using sum factorization. Equivalent to evaluate_state with the tensor
+	product of the 1D basis values.
+
+	Inputs:
+	-------
+	    Uc: state coefficients [ne, nb, ns]
+	    basis_val_1D: 1D basis values [nq_1D, nb_1D]
+	    ndims: number of dimensions
+	    out: optional array in which to store the result [ne, nq, ns]
+
+	Outputs:
+	--------
+	    Uq: values of state [ne, nq, ns]
+	'''
+	return apply_tensor_product([basis_val_1D]*ndims, Uc, out=out)
+
+
+def evaluate_gradient_sum_factorization(Uc, basis_val_1D, basis_ref_grad_1D,
+		ijac, out=None, work=None):
+	'''
+	This function evaluates the physical gradient of the state at
+	tensor-product quadrature points using sum factorization. Equivalent
+	to evaluate_gradient with the physical gradient of the tensor-product
+	basis.
+
+	Inputs:
+	-------
+	    Uc: state coefficients [ne, nb, ns]
+	    basis_val_1D: 1D basis values [nq_1D, nb_1D]
+	    basis_ref_grad_1D: 1D basis gradient [nq_1D, nb_1D]
+	    ijac: inverse Jacobian [ne, nq, ndims, ndims]
+	    out: optional array in which to store the result
+	    	[ne, nq, ns, ndims]
+	    work: optional WorkArrays object for the temporary arrays
+
+	Outputs:
+	--------
+	    gUq: gradient of the state [ne, nq, ns, ndims]
+	'''
+	ne, _, ns = Uc.shape
+	nq, ndims = ijac.shape[1:3]
+	if work is None:
+		work = WorkArrays()
+
+	# Reference gradient, one direction at a time
+	gUq_ref = work.get("gradient_sum_factorization/gUq_ref",
+			[ndims, ne, nq, ns])
+	for r in range(ndims):
+		mats = [basis_val_1D]*ndims
+		mats[r] = basis_ref_grad_1D
+		apply_tensor_product(mats, Uc, out=gUq_ref[r])
+
+	if out is None:
+		out = np.empty([ne, nq, ns, ndims])
+
+	# Physical gradient; the sums over the (few) reference directions are
+	# written out since einsum is slow for such short contractions
+	tmp = work.get("gradient_sum_factorization/tmp", [ne, nq, ns])
+	for l in range(ndims):
+		gUq_l = out[..., l]
+		np.multiply(gUq_ref[0], ijac[:, :, 0, l, np.newaxis], out=gUq_l)
+		for r in range(1, ndims):
+			gUq_l += np.multiply(gUq_ref[r], ijac[:, :, r, l, np.newaxis],
+					out=tmp)
+
+	return out # [ne, nq, ns, ndims]
+
+
+def get_scatter_plan(elem_IDs):
+	'''
+	This function precomputes a plan for adding per-face contributions
+	back to the elements they belong to. Contributions are grouped into
+	slots such that each element appears at most once per slot; slot k
+	holds the k-th contribution (in face order) of every element. The
+	plan therefore reproduces the sequential accumulation order of
+	np.add.at exactly while only using plain fancy indexing.
+
+	Inputs:
+	-------
+		elem_IDs: element ID of each contribution [nf]
+
+	Outputs:
+	--------
+		plan: list of (target element IDs, source contribution IDs)
+			tuples, one per slot [num_slots]
+	'''
+	elem_IDs = np.asarray(elem_IDs, dtype=int)
+	nf = elem_IDs.shape[0]
+	if nf == 0:
+		return []
+
+	# A stable sort keeps the face ordering within each element
+	order = np.argsort(elem_IDs, kind='stable')
+	sorted_IDs = elem_IDs[order]
+
+	# Rank of each contribution among those going to the same element
+	idx = np.arange(nf)
+	is_start = np.empty(nf, dtype=bool)
+	is_start[0] = True
+	is_start[1:] = sorted_IDs[1:] != sorted_IDs[:-1]
+	seg_start = np.maximum.accumulate(np.where(is_start, idx, 0))
+	rank = idx - seg_start
+
+	plan = []
+	for k in range(rank.max() + 1):
+		sources = order[rank == k]
+		plan.append((elem_IDs[sources], sources))
+
+	return plan # [num_slots]
+
+
+def scatter_add(res, plan, R):
+	'''
+	This function adds per-face contributions to the residual using a
+	plan from get_scatter_plan. The result is identical to
+	np.add.at(res, elem_IDs, R).
+
+	Inputs:
+	-------
+		res: residual array [ne, nb, ns]
+		plan: scatter plan (see get_scatter_plan)
+		R: contributions [nf, nb, ns]
+
+	Outputs:
+	--------
+		res: residual array (modified)
+	'''
+	for targets, sources in plan:
+		res[targets] += R[sources]
 
-	return gU_phys # [ne, num_pts, ns, ndims]
\ No newline at end of file
+	return res # [ne, nb, ns]
@@ -113,15 +113,8 @@ class WENO(base.LimiterBase):
 		self.quad_wts_elem = elem_helpers.quad_wts
 
 		# identify neighboring elements and store
-		elemP_IDs = np.empty([num_elems], dtype=int)
-		elemM_IDs = np.empty([num_elems], dtype=int)
-
-		for elem_ID in range(num_elems):
-			elemP_IDs[elem_ID] = mesh.elements[elem_ID].face_to_neighbors[1]
-			elemM_IDs[elem_ID] = mesh.elements[elem_ID].face_to_neighbors[0]
-	
-		self.elemP_IDs = elemP_IDs
-		self.elemM_IDs = elemM_IDs
+		self.elemP_IDs = mesh.elem_to_neighbor_IDs[:, 1].copy()
+		self.elemM_IDs = mesh.elem_to_neighbor_IDs[:, 0].copy()
 
 		# Allocate the right and left eigenvectors (needed for scalar case)
 		self.right_eigen = np.ones([num_elems, 1, ns, ns])
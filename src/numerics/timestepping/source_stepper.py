@@ -8,7 +8,8 @@
 from abc import ABC, abstractmethod
 import numpy as np
 import scipy
-from scipy.integrate import ode
+from scipy.integrate import ode, solve_ivp
+from scipy.sparse import bsr_matrix
 
 import numerics.helpers.helpers as helpers
 
@@ -26,6 +27,7 @@ class SourceSolvers():
 		- Backward Difference (BDF1)
 		- Trapezoidal Scheme (Trapezoidal)
 		- Scipy's Stiff LSODA Scheme (LSODA)
+		- Scipy's BDF Scheme with a block-diagonal Jacobian (BDF)
 	'''
 	class SourceStepperBase(ABC):
 		'''
@@ -45,6 +47,9 @@ class SourceSolvers():
 		balance_const: numpy array of floats (shaped like res)
 			balancing constant array used only with the Simpler splitting
 			scheme
+		fd_jacobian: bool
+			True if the source term Jacobians are approximated with finite
+			differences (set when the source terms do not provide them)
 
 		Abstract Methods:
 		-----------------
@@ -58,11 +63,58 @@ class SourceSolvers():
 			self.num_time_steps = 0
 			self.get_time_step = None
 			self.balance_const = None
+			# Set to True if the source terms do not provide Jacobians, in
+			# which case they are approximated with finite differences
+			self.fd_jacobian = False
 
 		def __repr__(self):
 			return '{self.__class__.__name__}(TimeStep={self.dt})'.format( \
 					self=self)
 
+		def get_source_jacobian(self, solver, Uq, x, Sq, time=None):
+			'''
+			Evaluates the Jacobian of the source terms. If the source terms
+			do not provide their Jacobians, then these are approximated
+			with one-sided finite differences for all points at once.
+
+			Inputs:
+			-------
+				solver: solver object (e.g., DG, ADERDG, etc...)
+				Uq: solution state at the points [ne, nq, ns]
+				x: coordinates of the points [ne, nq, ndims]
+				Sq: source terms evaluated at Uq [ne, nq, ns]
+				time: time (solver.time if not given)
+
+			Outputs:
+			--------
+				Sjac: source term Jacobian [ne, nq, ns, ns]
+			'''
+			physics = solver.physics
+			ns = Uq.shape[-1]
+			Sjac = np.zeros(Uq.shape + (ns,))
+			if time is None:
+				time = solver.time
+
+			if not self.fd_jacobian:
+				try:
+					return physics.eval_source_term_jacobians(Uq, x, time,
+							Sjac)
+				except NotImplementedError:
+					self.fd_jacobian = True
+					Sjac[:] = 0.
+
+			# Perturb one state variable at a time
+			h = np.sqrt(np.finfo(float).eps)*np.maximum(np.abs(Uq), 1.)
+			for s in range(ns):
+				Uq_pert = Uq.copy()
+				Uq_pert[..., s] += h[..., s]
+				Sq_pert = np.zeros_like(Uq)
+				Sq_pert = physics.eval_source_terms(Uq_pert, x, time,
+						Sq_pert)
+				Sjac[..., s] = (Sq_pert - Sq)/h[..., s:s+1]
+
+			return Sjac # [ne, nq, ns, ns]
+
 	class BDF1(SourceStepperBase):
 		'''
 		1st-order Backward Differencing (BDF1) method inherits attributes
@@ -182,9 +234,17 @@ class SourceSolvers():
 	class Trapezoidal(SourceStepperBase):
 		'''
 		2nd-order Trapezoidal method. The resulting nonlinear system is solved
-		using Scipy rootfinding, as opposed to linearization, due to improved
+		with Newton's method, as opposed to linearization, due to improved
 		convergence properties.
+
+		Additional methods and attributes are commented below.
 		'''
+		# Maximum number of Newton iterations
+		MAX_NEWTON_ITERATIONS = 50
+		# Relative and absolute tolerances on the Newton updates
+		NEWTON_RTOL = 1e-12
+		NEWTON_ATOL = 1e-14
+
 		def take_time_step(self, solver):
 			mesh = solver.mesh
 			U = solver.state_coeffs
@@ -204,11 +264,7 @@ class SourceSolvers():
 			# for each element and each quadrature point, fully uncoupled. This
 			# is actually only valid for orthogonal bases - for nodal bases this
 			# could incur some error.
-			for i in range(Uq.shape[0]):
-				for j in range(Uq.shape[1]):
-					sol = scipy.optimize.root(self.rhs_sources, Uq[i, j], args=(solver,
-							x_elems[i, j], Uq[i, j]))
-					Uq[i, j] = sol.x
+			Uq = self.solve_nonlinear_system(solver, x_elems, Uq)
 
 			res = self.res
 
@@ -221,6 +277,93 @@ class SourceSolvers():
 
 			return res # [ne, nb, ns]
 
+		def solve_nonlinear_system(self, solver, x, Uq):
+			'''
+			Solves the trapezoidal rule for all points at once with Newton's
+			method. Points drop out of the iterations once converged.
+
+			Inputs:
+			-------
+				solver: solver object (e.g., DG, ADERDG, etc...)
+				x: coordinates of the points [ne, nq, ndims]
+				Uq: solution state at the points at time n [ne, nq, ns]
+
+			Outputs:
+			--------
+				Uq_new: solution state at the points at time n+1
+					[ne, nq, ns]
+
+			Notes:
+			------
+				Points for which Newton's method fails (no convergence,
+				non-finite values, or a singular Jacobian) are solved one at
+				a time with scipy's root finder instead.
+			'''
+			ns = Uq.shape[-1]
+			dt = solver.stepper.dt
+
+			# Source terms at time n
+			Sq = np.zeros_like(Uq)
+			Sq = solver.physics.eval_source_terms(Uq, x, solver.time, Sq)
+
+			# Flatten the points; each point is stored as [1, ns] so that
+			# the source terms see the usual [n, nq, ns] shapes
+			Uq_flat = Uq.reshape(-1, 1, ns)
+			x_flat = x.reshape(-1, 1, x.shape[-1])
+			rhs_n = Uq_flat + .5*dt*Sq.reshape(-1, 1, ns)
+
+			Uq_new = Uq_flat.copy()
+			active = np.arange(Uq_new.shape[0])
+			failed = []
+			I = np.eye(ns)
+
+			for i in range(self.MAX_NEWTON_ITERATIONS):
+				if active.size == 0:
+					break
+				U_active = Uq_new[active]
+				x_active = x_flat[active]
+
+				# Residual of the trapezoidal rule and its Jacobian
+				Sq_new = np.zeros_like(U_active)
+				Sq_new = solver.physics.eval_source_terms(U_active,
+						x_active, solver.time, Sq_new)
+				F = U_active - .5*dt*Sq_new - rhs_n[active]
+				J = I - .5*dt*self.get_source_jacobian(solver, U_active,
+						x_active, Sq_new)
+				try:
+					dU = np.linalg.solve(J, -F[..., None])[..., 0]
+				except np.linalg.LinAlgError:
+					# Only the points with a singular Jacobian are left to
+					# the fallback; the others keep iterating
+					nonsingular = np.all(np.linalg.matrix_rank(J) == ns,
+							axis=1)
+					failed.append(active[~nonsingular])
+					active = active[nonsingular]
+					U_active = U_active[nonsingular]
+					try:
+						dU = np.linalg.solve(J[nonsingular],
+								-F[nonsingular][..., None])[..., 0]
+					except np.linalg.LinAlgError:
+						break
+
+				U_active += dU
+				Uq_new[active] = U_active
+
+				# Remove converged and failed points from the active set
+				converged = np.all(np.abs(dU) <= self.NEWTON_ATOL +
+						self.NEWTON_RTOL*np.abs(U_active), axis=(1, 2))
+				is_finite = np.all(np.isfinite(U_active), axis=(1, 2))
+				failed.append(active[~is_finite])
+				active = active[is_finite & ~converged]
+
+			# Fall back to scipy's root finder for the remaining points
+			for n in np.concatenate(failed + [active]):
+				sol = scipy.optimize.root(self.rhs_sources, Uq_flat[n, 0],
+						args=(solver, x_flat[n], Uq_flat[n]))
+				Uq_new[n, 0] = sol.x
+
+			return Uq_new.reshape(Uq.shape) # [ne, nq, ns]
+
 		def rhs_sources(self, Uq_new, solver, x, Uq):
 			Uq = Uq.reshape((1, 1, -1))
 			Uq_new = Uq_new.reshape((1, 1, -1))
@@ -245,6 +388,14 @@ class SourceSolvers():
 		Adams-Bashforth scheme and BDF scheme depending on the stiffness
 		of the system. Works for very stiff problems.
 
+		The source terms only couple the state variables at the same
+		point, so the Jacobian is block diagonal. LSODA is told that it is
+		banded, which reduces the cost of estimating and factoring it from
+		quadratic to linear in the number of points. The elements can also
+		be split into groups of similar stiffness (see
+		SourceStiffnessGroups in defaultparams.py) that are integrated
+		independently.
+
 		Additional methods and attributes are commented below.
 		'''
 		def take_time_step(self, solver):
@@ -263,26 +414,27 @@ class SourceSolvers():
 
 			res = self.res
 
-			Uq0, t0 = Uq.reshape(-1), solver.time
-			dt = self.dt
+			groups = self.get_stiffness_groups(solver, x_elems, Uq,
+					solver.params["SourceStiffnessGroups"])
 
-			subiterations = []
+			value = np.empty_like(Uq)
+			for i, elem_IDs in enumerate(groups):
+				subiterations = []
 
-			# Instantiate ode object
-			r = ode(self.rhs_sources, jac=None)
-			r.set_integrator('lsoda', nsteps=50000, atol=1e-14, rtol=1e-12)
-			r.set_initial_value(Uq0, t0).set_f_params(x_elems, Uq, 
-					solver, subiterations)
+				value[elem_IDs] = self.integrate(solver, x_elems[elem_IDs],
+						Uq[elem_IDs], subiterations)
 
-			value = r.integrate(r.t+dt).reshape([res.shape[0], res.shape[1],
-				res.shape[2]])
+				subiterations = np.unique(subiterations)
 
-			subiterations = np.unique(subiterations)
-
-			# Print the number of subiterations for each iteration and
-			# store the total number of ODE subiterations for the solver
-			print("Subiterations:", len(subiterations))
-			solver.count_evaluations += len(subiterations)
+				# Print the number of subiterations for each iteration (and
+				# group) and store the total number of ODE subiterations for
+				# the solver
+				if len(groups) == 1:
+					print("Subiterations:", len(subiterations))
+				else:
+					print("Subiterations (group %d, %d elements): %d" % (i,
+							len(elem_IDs), len(subiterations)))
+				solver.count_evaluations += len(subiterations)
 
 			# Project onto the basis state from the quadrature points
 			solver_tools.L2_projection(mesh, iMM_elems, solver.basis,
@@ -293,6 +445,71 @@ class SourceSolvers():
 
 			return res # [ne, nb, ns]
 
+		def integrate(self, solver, x, Uq, subiterations):
+			'''
+			Integrates the source terms over one time step.
+
+			Inputs:
+			-------
+				solver: solver object (e.g., DG, ADERDG, etc...)
+				x: coordinates of the quadrature points [ne, nq, ndims]
+				Uq: solution state at the quadrature points [ne, nq, ns]
+				subiterations: list to which the times of the source term
+					evaluations are appended
+
+			Outputs:
+			--------
+				value: solution state at the quadrature points at the end
+					of the time step [ne, nq, ns]
+			'''
+			ns = Uq.shape[-1]
+			Uq0, t0 = Uq.reshape(-1), solver.time
+			dt = self.dt
+
+			# Instantiate ode object. The state variables of each point are
+			# stored contiguously, so the block-diagonal Jacobian has
+			# ns - 1 subdiagonals and superdiagonals.
+			r = ode(self.rhs_sources, jac=None)
+			r.set_integrator('lsoda', nsteps=50000, atol=1e-14, rtol=1e-12,
+					lband=ns-1, uband=ns-1)
+			r.set_initial_value(Uq0, t0).set_f_params(x, Uq,
+					solver, subiterations)
+
+			return r.integrate(r.t+dt).reshape(Uq.shape) # [ne, nq, ns]
+
+		def get_stiffness_groups(self, solver, x, Uq, num_groups):
+			'''
+			Splits the elements into groups of equal size sorted by the
+			stiffness of their source terms, estimated as the largest
+			spectral radius of the source term Jacobian at the quadrature
+			points.
+
+			Inputs:
+			-------
+				solver: solver object (e.g., DG, ADERDG, etc...)
+				x: coordinates of the quadrature points [ne, nq, ndims]
+				Uq: solution state at the quadrature points [ne, nq, ns]
+				num_groups: number of groups
+
+			Outputs:
+			--------
+				groups: list of arrays of element IDs (in increasing order
+					within each group)
+			'''
+			ne = Uq.shape[0]
+			if num_groups <= 1 or ne <= 1:
+				return [np.arange(ne)]
+
+			Sq = np.zeros_like(Uq)
+			Sq = solver.physics.eval_source_terms(Uq, x, solver.time, Sq)
+			Sjac = self.get_source_jacobian(solver, Uq, x, Sq)
+			stiffness = np.amax(np.abs(np.linalg.eigvals(Sjac)), axis=(1, 2))
+
+			groups = np.array_split(np.argsort(stiffness, kind="stable"),
+					min(num_groups, ne))
+
+			return [np.sort(elem_IDs) for elem_IDs in groups]
+
 		def rhs_sources(self, t, Uq0, x, Uq, solver, subiterations):
 			'''
 			Internal RHS call for the ODE solver
@@ -320,4 +537,56 @@ class SourceSolvers():
 			# Evaluate source term on quadrature points
 			Sq = solver.physics.eval_source_terms(Uq, x, t, Sq)
 
-			return Sq.reshape(-1) # ode function requires stacked array
\ No newline at end of file
+			return Sq.reshape(-1) # ode function requires stacked array
+
+
+	class BDF(LSODA):
+		'''
+		Scipy BDF solver (solve_ivp) given the sparse block-diagonal
+		Jacobian of the source terms. The Jacobian is evaluated with
+		eval_source_term_jacobians if the source terms provide it;
+		otherwise, scipy approximates it with finite differences using the
+		block-diagonal sparsity pattern. This inherits the element grouping
+		from LSODA.
+
+		Additional methods and attributes are commented below.
+		'''
+		def integrate(self, solver, x, Uq, subiterations):
+			ns = Uq.shape[-1]
+			num_pts = Uq.size // ns
+			shape = (Uq.size, Uq.size)
+			t0, dt = solver.time, self.dt
+
+			# Block sparse row structure of the block-diagonal Jacobian
+			indices = np.arange(num_pts)
+			indptr = np.arange(num_pts + 1)
+
+			# solve_ivp also passes the arguments of rhs_sources
+			def get_jacobian(t, Uq0, *args):
+				Uq_jac = Uq0.reshape(Uq.shape)
+				Sjac = np.zeros(Uq.shape + (ns,))
+				Sjac = solver.physics.eval_source_term_jacobians(Uq_jac, x,
+						t, Sjac)
+				return bsr_matrix((Sjac.reshape(-1, ns, ns), indices,
+						indptr), shape=shape)
+
+			jac = None
+			jac_sparsity = None
+			if not self.fd_jacobian:
+				try:
+					get_jacobian(t0, Uq.reshape(-1))
+					jac = get_jacobian
+				except NotImplementedError:
+					self.fd_jacobian = True
+			if self.fd_jacobian:
+				jac_sparsity = bsr_matrix((np.ones([num_pts, ns, ns]),
+						indices, indptr), shape=shape)
+
+			sol = solve_ivp(self.rhs_sources, (t0, t0 + dt), Uq.reshape(-1),
+					method="BDF", t_eval=[t0 + dt], args=(x, Uq, solver,
+					subiterations), jac=jac, jac_sparsity=jac_sparsity,
+					atol=1e-14, rtol=1e-12)
+			if not sol.success:
+				raise ValueError(sol.message)
+
+			return sol.y[:, -1].reshape(Uq.shape) # [ne, nq, ns]
@@ -32,6 +32,8 @@ import numerics.timestepping.tools as stepper_tools
 import numerics.timestepping.source_stepper as source_stepper
 
 
+import solver.lts as lts
+import solver.profiling as profiling
 import solver.tools as solver_tools
 
 
@@ -77,6 +79,9 @@ class StepperBase(ABC):
 		timesteps, etc...)
 	balance_const: numpy array (shaped like res)
 		balancing constant array used only with the Simpler splitting scheme
+	dt_cfl: float
+		last time step computed from the CFL condition (None if not yet
+		computed)
 
 	Abstract Methods:
 	-----------------
@@ -99,6 +104,7 @@ class StepperBase(ABC):
 		self.num_time_steps = 0
 		self.get_time_step = None
 		self.balance_const = None # kept as None unless set by Simpler scheme
+		self.dt_cfl = None
 
 	def __repr__(self):
 		return '{self.__class__.__name__}(TimeStep={self.dt})'.format( \
@@ -334,6 +340,296 @@ class SSPRK3(StepperBase):
 		return res # [num_elems, nb, ns]
 
 
+class EmbeddedRK(StepperBase):
+	'''
+	Explicit embedded Runge-Kutta pair with adaptive time steps, which
+	inherits attributes from StepperBase. See StepperBase for detailed
+	comments of methods and attributes. The difference between the two
+	solutions of the pair estimates the local error, which is used to
+	reject and retry time steps and to choose the next time step with a
+	proportional-integral (PI) controller. The last stage is evaluated at
+	the new solution, so it is reused as the first stage of the next time
+	step (first same as last, FSAL).
+
+	Reference:
+
+	Hairer, E., Wanner, G., "Solving Ordinary Differential Equations II:
+	Stiff and Differential-Algebraic Problems". Springer, 2nd edition,
+	Section IV.2, 1996.
+
+	Additional methods and attributes are commented below.
+	'''
+	def __init__(self, U):
+		super().__init__(U)
+		'''
+		Additional Attributes:
+		----------------------
+		rka: numpy array
+			stage coefficients (Butcher tableau) [nstages, nstages]
+		rkb: numpy array
+			weights of the higher-order solution [nstages]
+		rke: numpy array
+			difference between the weights of the two solutions [nstages]
+		rkc: numpy array
+			stage times [nstages]
+		error_order: int
+			order of the local error estimate, i.e., one plus the lower
+			order of the pair
+		nstages: int
+			number of stages in scheme
+		dUdt: numpy array
+			time derivative of the solution at each stage
+				(shape: [nstages, num_elems, nb, ns])
+		rtol: float
+			relative tolerance of the local error
+		atol: float
+			absolute tolerance of the local error
+		dt_next: float
+			time step proposed by the controller for the next step
+		error_prev: float
+			error estimate of the last accepted time step
+		fsal_time: float
+			time at which dUdt[0] was evaluated (None if invalid)
+		num_accepted: int
+			number of accepted time steps
+		num_rejected: int
+			number of rejected time steps
+		get_initial_time_step: method
+			method to obtain the first time step from the input deck (None
+			for an automatic starting guess)
+		'''
+		self.set_tableau()
+		self.nstages = self.rkc.shape[0]
+		self.dUdt = np.zeros((self.nstages,) + np.shape(U))
+		self.rtol = 1e-6
+		self.atol = 1e-6
+		self.dt_next = None
+		self.error_prev = 1e-4
+		self.fsal_time = None
+		self.num_accepted = 0
+		self.num_rejected = 0
+		self.get_initial_time_step = None
+
+	def __repr__(self):
+		return '{self.__class__.__name__}(TimeStep={self.dt}, ' \
+				'Accepted={self.num_accepted}, ' \
+				'Rejected={self.num_rejected})'.format(self=self)
+
+	@abstractmethod
+	def set_tableau(self):
+		'''
+		Sets the coefficients of the embedded pair (rka, rkb, rke, rkc,
+		and error_order).
+		'''
+		pass
+
+	def set_tolerances(self, rtol, atol):
+		'''
+		Sets the tolerances of the local error estimate
+
+		Inputs:
+		-------
+			rtol: relative tolerance
+			atol: absolute tolerance
+		'''
+		self.rtol = rtol
+		self.atol = atol
+
+	def get_time_derivative(self, solver, U, time):
+		'''
+		Evaluates the time derivative of the solution
+
+		Inputs:
+		-------
+			solver: solver object (e.g., DG)
+			U: solution array [num_elems, nb, ns]
+			time: solution time
+
+		Outputs:
+		--------
+			dUdt: time derivative of the solution [num_elems, nb, ns]
+			res: residual array [num_elems, nb, ns]
+		'''
+		solver.time = time
+		res = solver.get_residual(U, self.res)
+
+		return solver_tools.mult_inv_mass_matrix(solver.mesh, solver, 1.,
+				res), res
+
+	def get_error_norm(self, U, Unew, error):
+		'''
+		Computes the root-mean-square norm of the local error, scaled by
+		the tolerances
+
+		Inputs:
+		-------
+			U: solution array at the start of the time step
+			Unew: solution array at the end of the time step
+			error: local error estimate
+
+		Outputs:
+		--------
+			error norm; the time step is accepted if it is at most one
+		'''
+		scale = self.atol + self.rtol*np.maximum(np.abs(U), np.abs(Unew))
+
+		return np.sqrt(np.mean((error/scale)**2))
+
+	def get_starting_time_step(self, solver):
+		'''
+		Guesses the first time step from the size of the solution and of
+		its time derivative if the input deck does not specify one
+
+		Inputs:
+		-------
+			solver: solver object (e.g., DG)
+
+		Outputs:
+		--------
+			dt: first time step
+		'''
+		U = solver.state_coeffs
+		time = solver.time
+		self.dUdt[0], _ = self.get_time_derivative(solver, U, time)
+		solver.time = time
+		self.fsal_time = time
+
+		scale = self.atol + self.rtol*np.abs(U)
+		d0 = np.sqrt(np.mean((U/scale)**2))
+		d1 = np.sqrt(np.mean((self.dUdt[0]/scale)**2))
+		if d0 < 1e-5 or d1 < 1e-5:
+			return 1e-6
+		else:
+			return 0.01*d0/d1
+
+	def take_time_step(self, solver):
+		U = solver.state_coeffs
+		dUdt = self.dUdt
+		rka = self.rka
+		k = self.error_order
+
+		# Step size control parameters
+		safety = 0.9
+		fac_min = 0.2
+		fac_max = 5.
+		alpha = 0.7/k
+		beta = 0.4/k
+
+		Time = solver.time
+		dt = self.dt
+		final_step = Time + dt >= self.tfinal
+
+		# First stage, unless reused from the last stage of the previous
+		# time step
+		if self.fsal_time != Time:
+			dUdt[0], res = self.get_time_derivative(solver, U, Time)
+
+		rejected = False
+		while True:
+			for istage in range(1, self.nstages):
+				Utemp = U + dt*np.tensordot(rka[istage, :istage],
+						dUdt[:istage], axes=1)
+				solver.apply_limiter(Utemp)
+				dUdt[istage], res = self.get_time_derivative(solver, Utemp,
+						Time + self.rkc[istage]*dt)
+
+			# The last stage is at the new solution
+			Unew = Utemp
+			error = self.get_error_norm(U, Unew, dt*np.tensordot(self.rke,
+					dUdt, axes=1))
+
+			if error <= 1.:
+				break
+
+			# Reject and retry with a smaller time step (also if the
+			# error is not a number)
+			self.num_rejected += 1
+			rejected = True
+			dt *= max(fac_min, safety*error**(-1./k))
+			if Time + dt == Time:
+				raise ValueError('Time step too small')
+
+		# PI controller for the next time step
+		factor = safety*error**(-alpha)*self.error_prev**beta \
+				if error > 0. else fac_max
+		self.dt_next = dt*min(1. if rejected else fac_max, max(fac_min,
+				factor))
+		self.error_prev = max(error, 1e-4)
+		self.num_accepted += 1
+
+		# First same as last
+		U[:] = Unew
+		dUdt[0] = dUdt[-1]
+		self.fsal_time = Time + dt
+
+		# A shortened final time step no longer reaches FinalTime
+		if final_step and Time + dt < self.tfinal:
+			self.num_time_steps += 1
+
+		self.dt = dt
+		solver.time = Time
+
+		return res # [num_elems, nb, ns]
+
+
+class BS32(EmbeddedRK):
+	'''
+	Bogacki-Shampine 3(2) embedded Runge-Kutta pair inherits attributes
+	from EmbeddedRK. See EmbeddedRK for detailed comments of methods and
+	attributes. The 3rd-order solution is advanced.
+
+	Reference:
+
+	Bogacki, P., Shampine, L.F., "A 3(2) pair of Runge-Kutta formulas".
+	Applied Mathematics Letters. Vol. 2, Num. 4, pp. 321-325, 1989.
+	'''
+	STEPPER_TYPE = StepperType.BS32
+
+	def set_tableau(self):
+		self.rka = np.array([
+				[0., 0., 0., 0.],
+				[1./2., 0., 0., 0.],
+				[0., 3./4., 0., 0.],
+				[2./9., 1./3., 4./9., 0.]])
+		self.rkb = np.array([2./9., 1./3., 4./9., 0.])
+		self.rke = self.rkb - np.array([7./24., 1./4., 1./3., 1./8.])
+		self.rkc = np.array([0., 1./2., 3./4., 1.])
+		self.error_order = 3
+
+
+class DP54(EmbeddedRK):
+	'''
+	Dormand-Prince 5(4) embedded Runge-Kutta pair inherits attributes from
+	EmbeddedRK. See EmbeddedRK for detailed comments of methods and
+	attributes. The 5th-order solution is advanced.
+
+	Reference:
+
+	Dormand, J.R., Prince, P.J., "A family of embedded Runge-Kutta
+	formulae". Journal of Computational and Applied Mathematics. Vol. 6,
+	Num. 1, pp. 19-26, 1980.
+	'''
+	STEPPER_TYPE = StepperType.DP54
+
+	def set_tableau(self):
+		self.rka = np.array([
+				[0., 0., 0., 0., 0., 0., 0.],
+				[1./5., 0., 0., 0., 0., 0., 0.],
+				[3./40., 9./40., 0., 0., 0., 0., 0.],
+				[44./45., -56./15., 32./9., 0., 0., 0., 0.],
+				[19372./6561., -25360./2187., 64448./6561., -212./729., 0.,
+				0., 0.],
+				[9017./3168., -355./33., 46732./5247., 49./176.,
+				-5103./18656., 0., 0.],
+				[35./384., 0., 500./1113., 125./192., -2187./6784.,
+				11./84., 0.]])
+		self.rkb = self.rka[-1].copy()
+		self.rke = self.rkb - np.array([5179./57600., 0., 7571./16695.,
+				393./640., -92097./339200., 187./2100., 1./40.])
+		self.rkc = np.array([0., 1./5., 3./10., 4./5., 8./9., 1., 1.])
+		self.error_order = 5
+
+
 class ADER(StepperBase):
 	'''
 	Arbitrary DERivatives in space and time (ADER) scheme inherits
@@ -360,7 +656,8 @@ class ADER(StepperBase):
 		res = self.res
 
 		# Prediction step
-		Up = solver.calculate_predictor_step(solver, self.dt, W, Up)
+		with solver.profiler.phase(profiling.ADER_PREDICTOR):
+			Up = solver.calculate_predictor_step(solver, self.dt, W, Up)
 		# Correction step
 		res = solver.get_residual(Up, res)
 
@@ -374,6 +671,114 @@ class ADER(StepperBase):
 		return res # [num_elems, nb, ns]
 
 
+class ADERLTS(ADER):
+	'''
+	ADER scheme with local time stepping, which inherits attributes from
+	ADER. See ADER for detailed comments of methods and attributes. The
+	elements are clustered into levels (see solver.lts). Level 0 is the
+	finest, and elements of level l take time steps of size 2**l*dt_min,
+	where dt_min is the smallest time step. In each time step of size dt
+	of the coarsest level L, the elements of level l thus take 2**(L-l)
+	time steps.
+
+	Reference:
+
+	Dumbser, M., Kaser, M., and Toro, E.F., "An arbitrary high-order
+	Discontinuous Galerkin method for elastic waves on unstructured
+	meshes - V. Local time stepping and p-adaptivity". Geophysical
+	Journal International. Vol. 171, Num. 2, pp. 695 - 717, 2007.
+
+	Additional methods and attributes are commented below.
+
+	Attributes:
+	-----------
+	levels: numpy array
+		time step level of each element, set by get_time_step
+		[num_elems]
+	clusters: list
+		lts.Cluster objects of each level, rebuilt when the levels change
+	cluster_levels: numpy array
+		levels from which the clusters were built [num_elems]
+	flux_buffer: numpy array
+		interior face contributions of finer neighbors to the residual of
+		coarser elements [num_elems, nb, ns]
+	'''
+	def __init__(self, U):
+		super().__init__(U)
+		self.levels = None
+		self.clusters = None
+		self.cluster_levels = None
+		self.flux_buffer = np.zeros_like(U)
+
+	def __getstate__(self):
+		# The clusters hold copies of the solver, so they are rebuilt
+		# instead of being written to data files
+		state = self.__dict__.copy()
+		state["clusters"] = None
+		state["cluster_levels"] = None
+
+		return state
+
+	def take_time_step(self, solver):
+		mesh = solver.mesh
+		W = solver.state_coeffs
+		Up = solver.state_coeffs_pred
+		levels = self.levels
+
+		res = self.res
+		flux_buffer = self.flux_buffer
+		flux_buffer[:] = 0.
+
+		if self.clusters is None or not np.array_equal(levels,
+				self.cluster_levels):
+			# Drop the old clusters first since they are referenced by
+			# the copies of this stepper
+			self.clusters = None
+			self.clusters = [lts.Cluster(solver, levels, level) for level
+					in range(np.max(levels) + 1)]
+			self.cluster_levels = levels
+
+		num_substeps = self.clusters[-1].ratio
+		dt_min = self.dt/num_substeps
+
+		for substep in range(num_substeps):
+			# Prediction step of the levels starting a time step
+			with solver.profiler.phase(profiling.ADER_PREDICTOR):
+				for cluster in self.clusters:
+					if substep % cluster.ratio == 0:
+						cluster.set_time(solver.time + substep*dt_min,
+								cluster.ratio*dt_min)
+						Up[cluster.elem_IDs] = \
+								cluster.calculate_predictor_step(W, Up)
+
+			# Correction step of the levels ending a time step, from fine
+			# to coarse so that the flux buffer is complete
+			for cluster in self.clusters:
+				if (substep + 1) % cluster.ratio:
+					continue
+				elem_IDs = cluster.elem_IDs
+				elem_solver = cluster.elem_solver
+				if solver.verbose:
+					elem_solver.min_state = solver.min_state
+					elem_solver.max_state = solver.max_state
+				res_level = cluster.get_residual(Up,
+						substep + 1 - cluster.ratio, flux_buffer)
+				if solver.verbose:
+					solver.min_state = elem_solver.min_state
+					solver.max_state = elem_solver.max_state
+
+				res_level += flux_buffer[elem_IDs]
+				flux_buffer[elem_IDs] = 0.
+				res[elem_IDs] = res_level
+
+				W[elem_IDs] += solver_tools.mult_inv_mass_matrix(mesh,
+						elem_solver, cluster.stepper.dt/2., res_level)
+
+		solver.state_coeffs_pred = Up
+
+		return res # [num_elems, nb, ns]
+
+
 class Strang(StepperBase, source_stepper.SourceSolvers):
 	'''
 	The Strang operator splitting scheme inherits attributes from
@@ -416,6 +821,8 @@ class Strang(StepperBase, source_stepper.SourceSolvers):
 			self.implicit = source_stepper.SourceSolvers.Trapezoidal(U)
 		elif SourceStepperType[implicit] == SourceStepperType.LSODA:
 			self.implicit = source_stepper.SourceSolvers.LSODA(U)
+		elif SourceStepperType[implicit] == SourceStepperType.BDF:
+			self.implicit = source_stepper.SourceSolvers.BDF(U)
 		else:
 			raise NotImplementedError("Time scheme not supported")
 
@@ -441,7 +848,8 @@ class Strang(StepperBase, source_stepper.SourceSolvers):
 		# Second: take the implicit full step for the source term.
 		solver.params["ConvFluxSwitch"] = False
 		physics.source_terms = physics.implicit_sources.copy()
-		implicit.take_time_step(solver)
+		with solver.profiler.phase(profiling.SOURCE_STEPPER):
+			implicit.take_time_step(solver)
 
 		# Third: take the second half-step for the inviscid flux only.
 		physics.source_terms = physics.explicit_sources.copy()
@@ -494,7 +902,8 @@ class Simpler(Strang):
 		# Second: take the implicit full step for the source term.
 		solver.params["ConvFluxSwitch"] = False
 		physics.source_terms = physics.implicit_sources.copy()
-		implicit.take_time_step(solver)
+		with solver.profiler.phase(profiling.SOURCE_STEPPER):
+			implicit.take_time_step(solver)
 
 		# Third: take the second half-step for the inviscid flux only.
 		solver.params["ConvFluxSwitch"] = True
@@ -557,11 +966,18 @@ class ODEIntegrator(StepperBase, source_stepper.SourceSolvers):
 			ode_integrator = source_stepper.SourceSolvers.Trapezoidal(U)
 		elif stepper == SourceStepperType.LSODA:
 			ode_integrator = source_stepper.SourceSolvers.LSODA(U)
+		elif stepper == SourceStepperType.BDF:
+			ode_integrator = source_stepper.SourceSolvers.BDF(U)
 
 		self.ode_integrator = ode_integrator
 
 	def take_time_step(self, solver):
 		self.ode_integrator.dt = self.dt
-		R = self.ode_integrator.take_time_step(solver)
+		if isinstance(self.ode_integrator,
+				source_stepper.SourceSolvers.SourceStepperBase):
+			with solver.profiler.phase(profiling.SOURCE_STEPPER):
+				R = self.ode_integrator.take_time_step(solver)
+		else:
+			R = self.ode_integrator.take_time_step(solver)
 
 		return R
\ No newline at end of file
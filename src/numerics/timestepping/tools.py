@@ -30,6 +30,7 @@ import numerics.basis.tools as basis_tools
 import numerics.helpers.helpers as helpers
 import numerics.timestepping.stepper as stepper_defs
 
+import solver.lts as lts
 import solver.tools as solver_tools
 
 
@@ -56,6 +57,14 @@ def set_stepper(params, U):
 		stepper = stepper_defs.LSRK4(U)
 	elif StepperType[time_stepper] == StepperType.SSPRK3:
 		stepper = stepper_defs.SSPRK3(U)
+	elif StepperType[time_stepper] == StepperType.BS32:
+		stepper = stepper_defs.BS32(U)
+		stepper.set_tolerances(params["RelativeTolerance"],
+				params["AbsoluteTolerance"])
+	elif StepperType[time_stepper] == StepperType.DP54:
+		stepper = stepper_defs.DP54(U)
+		stepper.set_tolerances(params["RelativeTolerance"],
+				params["AbsoluteTolerance"])
 	# If setting a splitting scheme select solvers for the splits
 	elif StepperType[time_stepper] == StepperType.Strang:
 		stepper = stepper_defs.Strang(U)
@@ -129,6 +138,9 @@ def set_time_stepping_approach(stepper, params):
 	elif dt != None and tfinal != None:
 		stepper.get_time_step = get_dt_from_timestepsize
 		stepper.num_time_steps = math.ceil(tfinal/dt)
+	elif cfl != None and params["LocalTimeSteppingLevels"] > 1:
+		stepper.get_time_step = get_dt_from_cfl_lts
+		stepper.num_time_steps = 1
 	elif cfl != None:
 		stepper.get_time_step = get_dt_from_cfl
 		stepper.num_time_steps = 1
@@ -136,6 +148,12 @@ def set_time_stepping_approach(stepper, params):
 		stepper.get_time_step = get_dt_from_timestepsize_and_numtimesteps
 		stepper.num_time_steps = num_time_steps
 
+	# Adaptive steppers only use the above for the first time step
+	if isinstance(stepper, stepper_defs.EmbeddedRK):
+		stepper.get_initial_time_step = stepper.get_time_step
+		stepper.get_time_step = get_dt_adaptive
+		stepper.num_time_steps = max(stepper.num_time_steps, 1)
+
 def get_dt_from_num_time_steps(stepper, solver):
 	'''
 	Calculates dt from the specified number of time steps
@@ -191,8 +209,9 @@ def get_dt_from_timestepsize(stepper, solver):
 
 def get_dt_from_cfl(stepper, solver):
 	'''
-	Calculates dt using a specified CFL number. Updates at everytime step to
-	ensure solution remains within the CFL bound.
+	Calculates dt using a specified CFL number. Updates every
+	CFLUpdateInterval time steps to ensure solution remains within the CFL
+	bound.
 
 	Inputs:
 	-------
@@ -202,10 +221,15 @@ def get_dt_from_cfl(stepper, solver):
 	Outputs:
 	--------
 		dt: time step for the solver
-	'''
-	mesh = solver.mesh
-	ndims = mesh.ndims
 
+	Notes:
+	------
+		If CFLWaveSpeedFromResidual is True, the maximum wave speed of each
+		element is recorded by the first element residual evaluation of
+		the time step preceding an update and used instead of
+		interpolating the state again. The time step then lags the
+		solution by one time step.
+	'''
 	physics = solver.physics
 	U = solver.state_coeffs
 
@@ -213,24 +237,155 @@ def get_dt_from_cfl(stepper, solver):
 	tfinal = solver.params["FinalTime"]
 	stepper.tfinal = tfinal
 	cfl = solver.params["CFL"]
+	interval = solver.params["CFLUpdateInterval"]
 
 	elem_helpers = solver.elem_helpers
-	vol_elems = elem_helpers.vol_elems
-	a = np.zeros([mesh.num_elems, U.shape[1], 1])
+	length_elems = elem_helpers.length_elems
 	basis_val = solver.elem_helpers.basis_val
+	nq = basis_val.shape[0]
+
+	if stepper.dt_cfl is None or solver.itime % interval == 0:
+		if solver.max_wave_speed_elems is not None:
+			# Max wavespeed recorded by the last residual evaluation
+			a = solver.max_wave_speed_elems # [ne]
+		else:
+			# Interpolate state at quad points
+			Uq = helpers.evaluate_state(U, basis_val,
+					skip_interp=solver.basis.skip_interp,
+					out=solver.work_arrays.get("cfl/Uq", (U.shape[0], nq,
+					U.shape[2]))) # [ne, nq, ns]
+
+			# Calculate max wavespeed
+			a = physics.compute_variable("MaxWaveSpeed", Uq,
+					flag_non_physical=True) # [ne, nq, 1]
+
+		# The time step is the minimum of cfl*length_elems/a over all
+		# elements, quadrature points, and length scales (the arrays
+		# broadcast against each other). Since rounding is monotonic, the
+		# minimum is attained at the smallest length scale and the largest
+		# wave speed, so it is computed directly instead of forming the
+		# [ne, nq, ne] array.
+		stepper.dt_cfl = cfl*np.min(length_elems)/np.max(a)
+	dt = stepper.dt_cfl
+
+	# Record the max wavespeed in the first residual evaluation of the
+	# time step preceding the next update
+	solver.record_max_wave_speed = solver.params[
+			"CFLWaveSpeedFromResidual"] and (solver.itime + 1) % \
+			interval == 0
+
+	# logic to ensure final time step yields FinalTime
+	if time + dt < tfinal:
+		stepper.num_time_steps += 1
+		return dt
+	else:
+		return tfinal - time
+
+def get_dt_elems_from_cfl(solver):
+	'''
+	Calculates the allowable time step of each element using a specified
+	CFL number.
+
+	Inputs:
+	-------
+		solver: solver object (e.g., DG, ADERDG, etc...)
+
+	Outputs:
+	--------
+		dt_elems: time step of each element [num_elems]
+
+	Notes:
+	------
+		The length scale is the smallest height of each element rather
+		than vol**(1/ndims), which would overestimate the allowable time
+		step of elongated elements. Both agree on uniform meshes of
+		segments, squares, and right isosceles triangles.
+	'''
+	physics = solver.physics
+	U = solver.state_coeffs
+	cfl = solver.params["CFL"]
+
+	height_elems = solver.elem_helpers.height_elems
+	basis_val = solver.elem_helpers.basis_val
+	nq = basis_val.shape[0]
 
 	# Interpolate state at quad points
 	Uq = helpers.evaluate_state(U, basis_val,
-			skip_interp=solver.basis.skip_interp) # [ne, nq, ns]
+			skip_interp=solver.basis.skip_interp,
+			out=solver.work_arrays.get("cfl/Uq", (U.shape[0], nq,
+			U.shape[2]))) # [ne, nq, ns]
 
 	# Calculate max wavespeed
 	a = physics.compute_variable("MaxWaveSpeed", Uq,
-			flag_non_physical=True)
-	# Calculate the dt for each element
-	dt_elems = cfl*vol_elems**(1./ndims)/a
+			flag_non_physical=True) # [ne, nq, 1]
+
+	return cfl*height_elems/np.max(a, axis=(1, 2)) # [num_elems]
+
+def get_dt_from_cfl_lts(stepper, solver):
+	'''
+	Calculates the time step of the coarsest level for local time stepping
+	using a specified CFL number. The elements are assigned to time step
+	levels at every time step.
 
-	# take minimum to set appropriate dt
-	dt = np.min(dt_elems)
+	Inputs:
+	-------
+		stepper: stepper object (e.g., ADERLTS)
+		solver: solver object (e.g., ADERDG)
+
+	Outputs:
+	--------
+		dt: time step of the coarsest level for the solver
+		stepper.levels: time step level of each element [num_elems]
+
+	Notes:
+	------
+		Elements of level l take 2**l times the smallest time step. The
+		last time step is shortened for all levels to yield FinalTime.
+	'''
+	time = solver.time
+	tfinal = solver.params["FinalTime"]
+	stepper.tfinal = tfinal
+	int_face_helpers = solver.int_face_helpers
+
+	dt_min, stepper.levels = lts.get_time_step_levels(
+			get_dt_elems_from_cfl(solver),
+			solver.params["LocalTimeSteppingLevels"],
+			int_face_helpers.elemL_IDs, int_face_helpers.elemR_IDs)
+	dt = dt_min*2**np.max(stepper.levels)
+
+	# logic to ensure final time step yields FinalTime
+	if time + dt < tfinal:
+		stepper.num_time_steps += 1
+		return dt
+	else:
+		return tfinal - time
+
+def get_dt_adaptive(stepper, solver):
+	'''
+	Returns the time step proposed by an adaptive stepper. The first time
+	step is obtained from the input deck or guessed if not specified.
+
+	Inputs:
+	-------
+		stepper: stepper object (e.g., BS32, DP54)
+		solver: solver object (e.g., DG)
+
+	Outputs:
+	--------
+		dt: time step for the solver
+	'''
+	time = solver.time
+	tfinal = stepper.tfinal
+
+	if stepper.dt_next is None:
+		if stepper.get_initial_time_step is None:
+			stepper.dt_next = stepper.get_starting_time_step(solver)
+		else:
+			stepper.dt_next = stepper.get_initial_time_step(stepper,
+					solver)
+		# From now on, the number of time steps is controlled here
+		stepper.num_time_steps = solver.itime + 1
+	dt = stepper.dt_next
 
 	# logic to ensure final time step yields FinalTime
 	if time + dt < tfinal:
@@ -637,57 +637,36 @@ def plot_mesh(mesh, equal_AR=False, **kwargs):
 		y = plt.ylim()
 
 	'''
-	Loop through interior_faces and plot interior faces
-	'''
-	for interior_face in mesh.interior_faces:
-		# Loop through both connected elements to account for periodic
-		# boundaries
-		for e in range(2):
-			if e == 0:
-				elem_ID = interior_face.elemL_ID
-				face_ID = interior_face.faceL_ID
-			else:
-				elem_ID = interior_face.elemR_ID
-				face_ID = interior_face.faceR_ID
-
-			# Get local node IDs on face
-			local_node_IDs = gbasis.get_local_face_node_nums(mesh.gorder,
-					face_ID)
-
-			# Get coordinates
-			elem = mesh.elements[elem_ID]
-			coords = elem.node_coords[local_node_IDs]
-			if ndims == 1:
-				x = np.full(2, coords[:, 0])
-			else:
-				x = coords[:, 0]; y = coords[:, 1]
-
-			# Plot face
-			plt.plot(x, y, 'k-')
+	Gather the faces to plot
+	'''
+	# Both sides of the interior faces are plotted to account for periodic
+	# boundaries
+	elem_IDs = [mesh.int_face_elemL_IDs, mesh.int_face_elemR_IDs]
+	face_IDs = [mesh.int_face_faceL_IDs, mesh.int_face_faceR_IDs]
+	# Boundary faces
+	for boundary_group in mesh.boundary_groups.values():
+		elem_IDs.append(boundary_group.elem_IDs)
+		face_IDs.append(boundary_group.face_IDs)
 
 	'''
-	Loop through boundary_groups and plot boundary faces
+	Plot faces
 	'''
-	for boundary_group in mesh.boundary_groups.values():
-		for boundary_face in boundary_group.boundary_faces:
-			# Get adjacent element info
-			elem_ID = boundary_face.elem_ID
-			face_ID = boundary_face.face_ID
-
-			# Get local node IDs on face
-			local_node_IDs = gbasis.get_local_face_node_nums(mesh.gorder,
-					face_ID)
-
-			# Get coordinates
-			elem = mesh.elements[elem_ID]
-			coords = elem.node_coords[local_node_IDs]
-			if ndims == 1:
-				x = np.full(2, coords[:, 0])
-			else:
-				x = coords[:, 0]; y = coords[:, 1]
+	for elem_ID, face_ID in zip(np.concatenate(elem_IDs).tolist(),
+			np.concatenate(face_IDs).tolist()):
+		# Get local node IDs on face
+		local_node_IDs = gbasis.get_local_face_node_nums(mesh.gorder,
+				face_ID)
+
+		# Get coordinates
+		coords = mesh.node_coords[mesh.elem_to_node_IDs[elem_ID,
+				local_node_IDs]]
+		if ndims == 1:
+			x = np.full(2, coords[:, 0])
+		else:
+			x = coords[:, 0]; y = coords[:, 1]
 
-			# Plot face
-			plt.plot(x, y, 'k-')
+		# Plot face
+		plt.plot(x, y, 'k-')
 
 	'''
 	If requested, plot element IDs at element centroids
@@ -20,36 +20,375 @@
 #       Contains functions for reading and writing data files.
 #
 # ------------------------------------------------------------------------ #
+import copy
+import json
+import numpy as np
+import os
 import pickle
+import queue
+import threading
 
-def write_data_file(solver, iwrite):
+import errors
+from general import DataFileType
+
+
+# Identifier and version of the checkpoint format. The version must be
+# incremented whenever the layout of the header or the stored arrays
+# changes.
+CHECKPOINT_FORMAT = "quail-checkpoint"
+CHECKPOINT_VERSION = 1
+
+# File extension for each data file type
+DATA_FILE_EXTENSIONS = {
+	DataFileType.Checkpoint : ".npz",
+	DataFileType.Pickle : ".pkl",
+}
+
+
+def get_data_file_name(solver, iwrite):
 	'''
-	This function writes a data file (pickle format).
+	This function returns the name of a data file.
 
 	Inputs:
 	-------
 	    solver: solver object
-	    iwrite: integer to label data file
-	'''
-	
-	# Remove un-pickle-able functions, objects, etc...
-	solver.physics.gas = None
+	    iwrite: integer to label data file (negative for the final
+	    	solution)
 
-	# Get file name
+	Outputs:
+	--------
+	    fname: file name (str)
+	'''
 	prefix = solver.params["Prefix"]
+	ext = DATA_FILE_EXTENSIONS[DataFileType[solver.params["DataFileType"]]]
 	if iwrite >= 0:
-		fname = prefix + "_" + str(iwrite) + ".pkl"
+		fname = prefix + "_" + str(iwrite) + ext
 	else:
-		fname = prefix + "_final" + ".pkl"
+		fname = prefix + "_final" + ext
+
+	return fname
+
+
+def write_data_file(solver, iwrite):
+	'''
+	This function writes a data file in the format given by the
+	DataFileType parameter.
+
+	Inputs:
+	-------
+	    solver: solver object
+	    iwrite: integer to label data file (negative for the final
+	    	solution)
+	'''
+	fname = get_data_file_name(solver, iwrite)
+
+	if DataFileType[solver.params["DataFileType"]] is \
+			DataFileType.Checkpoint:
+		write_checkpoint(solver, fname)
+	else:
+		write_pickle(solver, fname)
+
+
+class AsyncDataFileWriter(object):
+	'''
+	This class writes checkpoint files on a background thread so that the
+	time loop does not wait on disk I/O. Each snapshot copies the state
+	coefficients and the checkpoint header into a bounded queue, which the
+	background thread drains.
+
+	Attributes:
+	-----------
+	snapshots: queue.Queue
+		queue of (file name, header, state coefficients) waiting to be
+		written
+	thread: threading.Thread
+		background thread that writes the snapshots
+	error: Exception
+		first exception raised while writing, if any; re-raised in the
+		calling thread on the next write or flush
+
+	Notes:
+	------
+	    If the queue is full, write blocks until the background thread has
+	    written a snapshot (back-pressure), so at most max_queue_size
+	    copies of the state are held in memory.
+	'''
+	def __init__(self, max_queue_size):
+		self.snapshots = queue.Queue(maxsize=max(max_queue_size, 1))
+		self.error = None
+		self.thread = threading.Thread(target=self.run, daemon=True)
+		self.thread.start()
+
+	def run(self):
+		'''
+		Writes snapshots until the sentinel (None) is received.
+		'''
+		while True:
+			snapshot = self.snapshots.get()
+			try:
+				if snapshot is None:
+					return
+				if self.error is None:
+					save_checkpoint(*snapshot)
+			except Exception as e:
+				self.error = e
+			finally:
+				self.snapshots.task_done()
+
+	def check_error(self):
+		'''
+		Re-raises an exception from the background thread.
+		'''
+		if self.error is not None:
+			error = self.error
+			self.error = None
+			raise error
+
+	def write(self, solver, iwrite):
+		'''
+		Queues a checkpoint of the current solution. Same inputs as
+		write_data_file.
+		'''
+		self.check_error()
+		fname = get_data_file_name(solver, iwrite)
+		self.snapshots.put((fname, get_checkpoint_header(solver),
+				solver.state_coeffs.copy()))
+
+	def flush(self):
+		'''
+		Blocks until all queued snapshots have been written.
+		'''
+		self.snapshots.join()
+		self.check_error()
+
+	def close(self):
+		'''
+		Flushes the queue and stops the background thread. Calling close
+		again after the thread has stopped only re-raises a pending error.
+		'''
+		if self.thread.is_alive():
+			self.snapshots.put(None)
+			self.thread.join()
+		self.check_error()
+
+
+def write_pickle(solver, fname):
+	'''
+	This function writes a data file (legacy pickle format) containing the
+	entire solver object.
+
+	Inputs:
+	-------
+	    solver: solver object
+	    fname: file name (str)
+	'''
+	# Remove un-pickle-able functions, objects, etc...
+	solver.physics.gas = None
 
 	with open(fname, 'wb') as fo:
 		# Save solver
 		pickle.dump(solver, fo, pickle.HIGHEST_PROTOCOL)
 
 
+def encode_json(value):
+	'''
+	This function converts numpy objects in the input deck to a JSON
+	compatible form. Passed as the default argument to json.dumps.
+
+	Inputs:
+	-------
+	    value: object that json cannot serialize by itself
+
+	Outputs:
+	--------
+	    encoded value
+	'''
+	if isinstance(value, np.ndarray):
+		return {"__ndarray__": value.tolist(), "dtype": value.dtype.str}
+	elif isinstance(value, np.generic):
+		return value.item()
+	raise TypeError("Parameter of type %s cannot be written to a " \
+			"checkpoint" % (type(value).__name__))
+
+
+def decode_json(value):
+	'''
+	This function undoes encode_json. Passed as the object_hook argument
+	to json.loads.
+
+	Inputs:
+	-------
+	    value: decoded JSON object (dict)
+
+	Outputs:
+	--------
+	    decoded value
+	'''
+	if "__ndarray__" in value:
+		return np.array(value["__ndarray__"], dtype=value["dtype"])
+	return value
+
+
+def get_checkpoint_header(solver):
+	'''
+	This function assembles the JSON header of a checkpoint file: the
+	time, iteration count, basis, a reference to the mesh, and the input
+	deck.
+
+	Inputs:
+	-------
+	    solver: solver object
+
+	Outputs:
+	--------
+	    header: checkpoint header (dict)
+
+	Notes:
+	------
+	    The input deck is taken from solver.deck_params, which is set when
+	    the solver is built by the driver (see src/solver/builder.py).
+	    Without it, the checkpoint can still be read with read_checkpoint
+	    but the solver cannot be rebuilt from it.
+	'''
+	mesh = solver.mesh
+	deck_params = getattr(solver, "deck_params", None)
+
+	# Reference to the mesh
+	mesh_file = None
+	if deck_params is not None and deck_params["Mesh"]["File"] is not None:
+		mesh_file = os.path.abspath(deck_params["Mesh"]["File"])
+
+	header = {
+		"format" : CHECKPOINT_FORMAT,
+		"version" : CHECKPOINT_VERSION,
+		"solver" : type(solver).__name__,
+		"physics" : solver.physics.PHYSICS_TYPE.name,
+		"basis" : solver.basis.BASIS_TYPE.name,
+		"order" : solver.order,
+		"time" : solver.time,
+		"itime" : solver.itime,
+		"num_time_steps" : solver.stepper.num_time_steps,
+		"mesh" : {
+			"File" : mesh_file,
+			"ndims" : mesh.ndims,
+			"num_elems" : mesh.num_elems,
+			"num_nodes" : mesh.num_nodes,
+		},
+		"params" : solver.params,
+		"deck" : deck_params,
+	}
+
+	return header
+
+
+def save_checkpoint(fname, header, state_coeffs):
+	'''
+	This function writes a checkpoint file from its header and state
+	coefficients. The file is written atomically so that an interrupted
+	write never leaves a truncated checkpoint behind.
+
+	Inputs:
+	-------
+	    fname: file name (str)
+	    header: checkpoint header (dict)
+	    state_coeffs: state coefficients [num_elems, nb, ns]
+	'''
+	tmp_fname = fname + ".%d.tmp" % (os.getpid())
+	with open(tmp_fname, 'wb') as fo:
+		np.savez(fo, header=np.array(json.dumps(header,
+				default=encode_json)), state_coeffs=state_coeffs)
+	os.replace(tmp_fname, fname)
+
+
+def write_checkpoint(solver, fname):
+	'''
+	This function writes a checkpoint file. Only the state coefficients
+	are stored as an array; everything else goes in the JSON header (see
+	get_checkpoint_header).
+
+	Inputs:
+	-------
+	    solver: solver object
+	    fname: file name (str)
+	'''
+	save_checkpoint(fname, get_checkpoint_header(solver),
+			solver.state_coeffs)
+
+
+def read_checkpoint(fname):
+	'''
+	This function reads a checkpoint file without rebuilding the solver.
+
+	Inputs:
+	-------
+	    fname: file name (str)
+
+	Outputs:
+	--------
+	    header: checkpoint header (dict)
+	    state_coeffs: state coefficients [num_elems, nb, ns]
+	'''
+	with np.load(fname, allow_pickle=False) as data:
+		header = json.loads(str(data["header"]), object_hook=decode_json)
+		state_coeffs = data["state_coeffs"]
+
+	if header.get("format") != CHECKPOINT_FORMAT:
+		raise errors.FileReadError(f"{fname} is not a checkpoint file")
+	if header["version"] > CHECKPOINT_VERSION:
+		raise errors.FileReadError(f"{fname} was written with checkpoint " \
+				f"version {header['version']}; only versions up to " \
+				f"{CHECKPOINT_VERSION} are supported")
+
+	return header, state_coeffs
+
+
+def rebuild_solver(header, state_coeffs):
+	'''
+	This function rebuilds a solver object from the contents of a
+	checkpoint file.
+
+	Inputs:
+	-------
+	    header: checkpoint header (dict)
+	    state_coeffs: state coefficients [num_elems, nb, ns]
+
+	Outputs:
+	--------
+	    solver: solver object
+	'''
+	# Imported here since the solver modules import this module
+	import solver.builder as solver_builder
+
+	if header["deck"] is None:
+		raise errors.FileReadError("Checkpoint does not contain the " \
+				"input deck; the solver cannot be rebuilt")
+
+	# Use the absolute path of the mesh file in case the checkpoint is read
+	# from a different directory
+	deck = copy.deepcopy(header["deck"])
+	if header["mesh"]["File"] is not None:
+		deck["Mesh"]["File"] = header["mesh"]["File"]
+
+	# Sections missing from older checkpoints take the default values
+	solver = solver_builder.build_solver_from_defaults(**deck)
+
+	if solver.state_coeffs.shape != state_coeffs.shape:
+		raise errors.FileReadError("Rebuilt solver is not consistent " \
+				"with the checkpoint")
+
+	solver.state_coeffs = state_coeffs
+	solver.time = header["time"]
+	solver.itime = header["itime"]
+	solver.stepper.num_time_steps = header["num_time_steps"]
+
+	return solver
+
+
 def read_data_file(fname):
 	'''
-	This function reads a data file (pickle format).
+	This function reads a data file. Both checkpoint files and legacy
+	pickle files are supported; the format is detected from the contents
+	of the file.
 
 	Inputs:
 	-------
@@ -59,8 +398,16 @@ def read_data_file(fname):
 	--------
 	    solver: solver object
 	'''
-	# Open and get solver
+	# Checkpoints are zip archives
 	with open(fname, 'rb') as fo:
-		solver = pickle.load(fo)
+		is_checkpoint = fo.read(4) == b'PK\x03\x04'
+
+	if is_checkpoint:
+		header, state_coeffs = read_checkpoint(fname)
+		solver = rebuild_solver(header, state_coeffs)
+	else:
+		# Open and get solver
+		with open(fname, 'rb') as fo:
+			solver = pickle.load(fo)
 
 	return solver
@@ -21,11 +21,11 @@
 #
 # ------------------------------------------------------------------------ #
 import numpy as np
-from scipy.linalg import solve_sylvester
+from scipy.linalg import schur, solve_sylvester
 
 import errors
 
-from general import ModalOrNodal, StepperType, ShapeType
+from general import ModalOrNodal, StepperType, ShapeType, ParallelismType
 
 import meshing.meshbase as mesh_defs
 import meshing.tools as mesh_tools
@@ -190,6 +190,11 @@ class ADERHelpers(object):
 	SMS_elems: numpy array
 		stiffness matrix in spatial direction evaluated for each element in
 		physical space
+	schur_T: numpy array
+		upper triangular factor of the complex Schur decomposition of
+		iMM K (used by the implicit predictor)
+	schur_Z: numpy array
+		unitary factor of the complex Schur decomposition of iMM K
 	jac_elems: numpy array
 		Jacobian evaluated at the element nodes
 	ijac_elems: numpy array
@@ -209,12 +214,14 @@ class ADERHelpers(object):
 		self.FTR = np.zeros(0)
 		self.SMT = np.zeros(0)
 		self.SMS_elems = np.zeros(0)
+		self.schur_T = np.zeros(0)
+		self.schur_Z = np.zeros(0)
 		self.jac_elems = np.zeros(0)
 		self.ijac_elems = np.zeros(0)
 		self.djac_elems = np.zeros(0)
 		self.x_elems = np.zeros(0)
 
-	def calc_ader_matrices(self, mesh, basis, basis_st, dt, order):
+	def calc_ader_matrices(self, mesh, basis, basis_st, order):
 		'''
 		Precomputes the matries for the ADER-DG scheme
 
@@ -223,7 +230,6 @@ class ADERHelpers(object):
 			mesh: mesh object
 			basis: basis object
 			basis_st: space-time basis object
-			dt: time step
 			order: solution order
 
 		Outputs:
@@ -243,12 +249,19 @@ class ADERHelpers(object):
 				space [num_elems, nb_st, nb_st]
 			self.K: space-time matrix FTL - SMT [nb_st, nb_st]
 			self.iK: inverse of space-time matrix K [nb_st, nb_st]
+			self.schur_T, self.schur_Z: complex Schur decomposition of
+				iMM K [nb_st, nb_st]
+
+		Notes:
+		------
+			All matrices are defined on the reference time interval
+			[-1, 1] and do not depend on the time step size. The time
+			step enters through the flux and source coefficients and the
+			corrector step, so that dt may change between time steps.
 		'''
 		ndims = mesh.ndims
 		nb = basis_st.nb
 		SMS_ref = np.zeros([nb, nb, ndims])
-		SMS_elems = np.zeros([mesh.num_elems, nb, nb, ndims])
-		iMM_elems = np.zeros([mesh.num_elems, nb, nb])
 
 		# Get flux matrices in time
 		FTL = basis_st_tools.get_temporal_flux_ader(mesh, basis_st, basis_st,
@@ -258,20 +271,13 @@ class ADERHelpers(object):
 
 		# Get stiffness matrix in time
 		SMT = basis_st_tools.get_stiffness_matrix_ader(mesh, basis, basis_st,
-				order, dt, elem_ID=0, grad_dir=-1, physical_space=False)
+				order, None, elem_ID=0, grad_dir=-1, physical_space=False)
 
 		# Get stiffness matrices in space and inverse mass matrices
-		# (physical space)
-		for elem_ID in range(mesh.num_elems):
-			for nd in range(ndims):
-				SMS = basis_st_tools.get_stiffness_matrix_ader(mesh, basis,
-						basis_st, order, dt, elem_ID, grad_dir=nd,
-						physical_space=True)
-				SMS_elems[elem_ID, :, :, nd] = SMS.transpose()
-
-			iMM = basis_st_tools.get_elem_inv_mass_matrix_ader(mesh,
-					basis_st, order, elem_ID, physical_space=True)
-			iMM_elems[elem_ID] = iMM
+		# (physical space) for all elements at once
+		SMS_elems = basis_st_tools.get_stiffness_matrices_ader(mesh, basis,
+				basis_st, order)
+		iMM_elems = basis_tools.get_inv_mass_matrices(mesh, basis_st, order)
 
 		# Get mass matrix (and inverse) in reference space
 		iMM = basis_st_tools.get_elem_inv_mass_matrix_ader(mesh, basis_st,
@@ -282,7 +288,7 @@ class ADERHelpers(object):
 		# Get stiffness matrices in reference space (only in spatial dirs)
 		for nd in range(ndims):
 			SMS_ref[:, :, nd] = basis_st_tools.get_stiffness_matrix_ader(
-				mesh, basis, basis_st, order, dt, elem_ID=0, grad_dir=nd,
+				mesh, basis, basis_st, order, None, elem_ID=0, grad_dir=nd,
 				physical_space=False)
 
 		# Store
@@ -296,6 +302,8 @@ class ADERHelpers(object):
 		self.iMM_elems = iMM_elems
 		self.K = FTL - SMT
 		self.iK = np.linalg.inv(self.K)
+		self.schur_T, self.schur_Z = schur(np.matmul(iMM, self.K),
+				output="complex")
 
 	def get_geom_data(self, mesh, basis, order):
 		'''
@@ -318,38 +326,27 @@ class ADERHelpers(object):
 			self.x_elems: precomputed coordinates of the nodal points
 				in physical space [num_elems, nb, ndims]
 		'''
-		ndims = mesh.ndims
-		num_elems = mesh.num_elems
-		nb = basis.nb
 		gbasis = mesh.gbasis
 		tile_basis = basis_defs.LagrangeSeg(order)
 
 		# Define geometric basis for tiling jac, ijac, and djac
 		xnodes = gbasis.get_nodes(order)
-		nnodes = xnodes.shape[0]
 
 		tile_xnodes = tile_basis.get_nodes(order)
 		tile_nnodes = tile_xnodes.shape[0]
 
-		# Allocate
-		self.jac_elems = np.zeros([num_elems, nb, ndims, ndims])
-		self.ijac_elems = np.zeros([num_elems, nb, ndims, ndims])
-		self.djac_elems = np.zeros([num_elems, nb, 1])
-		self.x_elems = np.zeros([num_elems, nb, ndims])
-
-		for elem_ID in range(mesh.num_elems):
-			# Jacobian
-			djac, jac, ijac = basis_tools.element_jacobian(mesh, elem_ID,
-					xnodes, get_djac=True, get_jac=True, get_ijac=True)
+		# Jacobian
+		djac, jac, ijac = basis_tools.element_jacobians(mesh, None, xnodes,
+				get_djac=True, get_jac=True, get_ijac=True)
 
-			self.jac_elems[elem_ID] = np.tile(jac, (tile_nnodes, 1, 1))
-			self.ijac_elems[elem_ID] = np.tile(ijac, (tile_nnodes, 1, 1))
-			self.djac_elems[elem_ID] = np.tile(djac, (tile_nnodes, 1))
+		self.jac_elems = np.tile(jac, (1, tile_nnodes, 1, 1))
+		self.ijac_elems = np.tile(ijac, (1, tile_nnodes, 1, 1))
+		self.djac_elems = np.tile(djac, (1, tile_nnodes, 1))
 
-			# Physical coordinates of nodal points
-			x = mesh_tools.ref_to_phys(mesh, elem_ID, xnodes)
-			# Store
-			self.x_elems[elem_ID] = np.tile(x, (tile_nnodes, 1))
+		# Physical coordinates of nodal points
+		x = mesh_tools.ref_to_phys_elems(mesh, None, xnodes)
+		# Store
+		self.x_elems = np.tile(x, (1, tile_nnodes, 1))
 
 	def set_tiling_constants(self, basis, elem_helpers_st, bface_helpers_st):
 		'''
@@ -390,8 +387,8 @@ class ADERHelpers(object):
 		elem_helpers_st.time_skip = time_skip
 		elem_helpers_st.time_tile = time_tile
 
-	def compute_helpers(self, mesh, physics, basis, basis_st, dt, order):
-		self.calc_ader_matrices(mesh, basis, basis_st, dt, order)
+	def compute_helpers(self, mesh, physics, basis, basis_st, order):
+		self.calc_ader_matrices(mesh, basis, basis_st, order)
 		self.get_geom_data(mesh, basis_st, order)
 
 
@@ -413,7 +410,10 @@ class ADERDG(base.SolverBase):
 			(StepperType[time_stepper] != StepperType.ODEIntegrator):
 			raise errors.IncompatibleError
 
-		self.stepper = stepper_defs.ADER(self.state_coeffs)
+		if params["LocalTimeSteppingLevels"] > 1:
+			self.stepper = stepper_defs.ADERLTS(self.state_coeffs)
+		else:
+			self.stepper = stepper_defs.ADER(self.state_coeffs)
 		stepper_tools.set_time_stepping_approach(self.stepper, params)
 		stepper_tools.set_source_treatment(physics)
 
@@ -488,12 +488,22 @@ class ADERDG(base.SolverBase):
 				basis.MODAL_OR_NODAL != ModalOrNodal.Nodal:
 			raise errors.IncompatibleError
 
-		if params["CFL"] != None:
-			print("Error Message")
-			print("-------------------------------------------------------")
-			print("CFL-based time-stepping not currently supported in " + \
-					"ADERDG")
-			print("")
+		# The partitioned residual does not handle the space-time helpers
+		if ParallelismType[params["ResidualParallelism"]] is not \
+				ParallelismType.Serial:
+			raise errors.IncompatibleError
+
+		# Local time stepping requires the time step levels from the CFL
+		# condition and does not apply limiters between the time steps of
+		# the levels
+		if params["LocalTimeSteppingLevels"] > 1 and (params["CFL"] is None
+				or params["NumTimeSteps"] is not None or
+				params["TimeStepSize"] is not None or
+				params["ApplyLimiters"]):
+			raise errors.IncompatibleError
+
+		# The ADER-DG element residual does not record the wave speeds
+		if params["CFLWaveSpeedFromResidual"]:
 			raise errors.IncompatibleError
 
 	def precompute_matrix_helpers(self):
@@ -503,7 +513,26 @@ class ADERDG(base.SolverBase):
 		order = self.order
 		basis = self.basis
 		basis_st = self.basis_st
-		stepper = self.stepper
+
+		helper_classes = {
+			"elem_helpers" : DG.ElemHelpers,
+			"int_face_helpers" : DG.InteriorFaceHelpers,
+			"bface_helpers" : DG.BoundaryFaceHelpers,
+			"elem_helpers_st" : ElemHelpersADER,
+			"int_face_helpers_st" : InteriorFaceHelpersADER,
+			"bface_helpers_st" : BoundaryFaceHelpersADER,
+			"ader_helpers" : ADERHelpers,
+		}
+		basis_names = ["basis", "basis_st", "gbasis"]
+
+		# Reuse helpers from a previous run if available
+		cache_file = dg_tools.get_helpers_cache_file(self)
+		if cache_file is not None and dg_tools.load_helpers(cache_file,
+				self, helper_classes):
+			print("Loaded precomputed helpers from " + cache_file)
+			self.ader_helpers.set_tiling_constants(basis,
+					self.elem_helpers_st, self.bface_helpers_st)
+			return
 
 		self.elem_helpers = DG.ElemHelpers()
 		self.elem_helpers.compute_helpers(mesh, physics, basis,
@@ -526,11 +555,13 @@ class ADERDG(base.SolverBase):
 		self.bface_helpers_st.compute_helpers(mesh, physics, basis_st,
 				order)
 
-		stepper.dt = stepper.get_time_step(stepper, self)
-		dt = stepper.dt
 		self.ader_helpers = ADERHelpers()
 		self.ader_helpers.compute_helpers(mesh, physics, basis,
-				basis_st, dt, order)
+				basis_st, order)
+
+		if cache_file is not None:
+			dg_tools.save_helpers(cache_file, self, helper_classes,
+					basis_names)
 
 		self.ader_helpers.set_tiling_constants(basis,
 				self.elem_helpers_st, self.bface_helpers_st)
@@ -680,12 +711,6 @@ class ADERDG(base.SolverBase):
 		normals_int_faces = np.tile(normals_int_faces, 
 				(normals_int_faces.shape[1], 1))
 
-		# Allocate resL/R and resL/R_diff (needed for operator splitting)
-		resL = np.zeros_like(self.stepper.res)
-		resR = np.zeros_like(self.stepper.res)
-		resL_diff = np.zeros_like(resL)
-		resR_diff = np.zeros_like(resR)
-
 		if physics.diff_flux_fcn:
 			# Calculate diffusion flux helpers
 			physics.diff_flux_fcn.compute_iface_helpers(self)
@@ -718,6 +743,14 @@ class ADERDG(base.SolverBase):
 			resR_diff = self.calculate_boundary_flux_integral_sum(
 					time_skip, faces_to_basis_ref_gradR[faceR_IDs],
 					quad_wts_st, FR_phys)
+		else:
+			# Zero contributions (needed for operator splitting)
+			work_arrays = self.work_arrays
+			shape = self.stepper.res.shape
+			resL = work_arrays.zeros("int_faces/resL", shape)
+			resR = work_arrays.zeros("int_faces/resR", shape)
+			resL_diff = work_arrays.zeros("int_faces/resL_diff", shape)
+			resR_diff = work_arrays.zeros("int_faces/resR_diff", shape)
 
 		return resL, resR, resL_diff, resR_diff # [nif, nb, ns]
 
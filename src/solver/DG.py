@@ -25,6 +25,7 @@ import numpy as np
 import time
 
 import errors
+from general import ParallelismType, ShapeType
 
 import meshing.meshbase as mesh_defs
 import meshing.tools as mesh_tools
@@ -69,6 +70,13 @@ class ElemHelpers(object):
 		each element
 	x_elems: numpy array
 		physical coordinates of quadrature points for each element
+	basis_val_1D: numpy array
+		stores the evaluated 1D basis function at the 1D quadrature points
+		(tensor-product bases only; used for sum factorization)
+	basis_ref_grad_1D: numpy array
+		stores the evaluated gradient of the 1D basis function at the 1D
+		quadrature points (tensor-product bases only; used for sum
+		factorization)
 	Uq: numpy array
 		solution state vector evaluated at the quadrature points
 	Fq: numpy array
@@ -79,6 +87,13 @@ class ElemHelpers(object):
 		stores the inverse mass matrix for each element
 	vol_elems: numpy array
 		stores the volume of each element
+	length_elems: numpy array
+		stores the length scale of each element used for the CFL condition,
+		i.e., vol_elems**(1/ndims)
+	height_elems: numpy array
+		stores the smallest height of each element, i.e., the distance
+		between a face and the opposite vertex (simplices) or face
+		(quadrilaterals)
 	normals_elems: numpy array
 		stores the normals of each face of each element
 	domain_vol: float
@@ -92,6 +107,8 @@ class ElemHelpers(object):
 	get_basis_and_geom_data
 		precomputes the element's basis function, its gradients,
 		geometric Jacobian info, and volume
+	get_tensor_product_data
+		precomputes the 1D basis data used for sum factorization
 	alloc_other_arrays
 		allocate the solution, flux, and source vectors that are evaluated
 		at the quadrature points
@@ -108,11 +125,15 @@ class ElemHelpers(object):
 		self.ijac_elems = np.zeros(0)
 		self.djac_elems = np.zeros(0)
 		self.x_elems = np.zeros(0)
+		self.basis_val_1D = np.zeros(0)
+		self.basis_ref_grad_1D = np.zeros(0)
 		self.Uq = np.zeros(0)
 		self.Fq = np.zeros(0)
 		self.Sq = np.zeros(0)
 		self.iMM_elems = np.zeros(0)
 		self.vol_elems = np.zeros(0)
+		self.length_elems = np.zeros(0)
+		self.height_elems = np.zeros(0)
 		self.normals_elems = np.zeros(0)
 		self.domain_vol = 0.
 		self.need_phys_grad = True
@@ -176,10 +197,6 @@ class ElemHelpers(object):
 		nb = basis.nb
 
 		# Allocate
-		self.jac_elems = np.zeros([num_elems, nq, ndims, ndims])
-		self.ijac_elems = np.zeros([num_elems, nq, ndims, ndims])
-		self.djac_elems = np.zeros([num_elems, nq, 1])
-		self.x_elems = np.zeros([num_elems, nq, ndims])
 		self.basis_phys_grad_elems = np.zeros([num_elems, nq, nb, basis.NDIMS])
 		self.normals_elems = np.empty([num_elems, mesh.gbasis.NFACES,
 			self.face_quad_pts.shape[0], ndims])
@@ -191,35 +208,72 @@ class ElemHelpers(object):
 		self.basis_val = basis.basis_val
 		self.basis_ref_grad = basis.basis_ref_grad
 
-		for elem_ID in range(mesh.num_elems):
-			# Jacobian
-			djac, jac, ijac = basis_tools.element_jacobian(mesh, elem_ID,
-					quad_pts, get_djac=True, get_jac=True, get_ijac=True)
-			# Store
-			self.jac_elems[elem_ID] = jac
-			self.ijac_elems[elem_ID] = ijac
-			self.djac_elems[elem_ID] = djac
+		# Jacobian (all elements at once)
+		self.djac_elems, self.jac_elems, self.ijac_elems = \
+				basis_tools.element_jacobians(mesh, None, quad_pts,
+				get_djac=True, get_jac=True, get_ijac=True)
 
-			# Physical coordinates of quadrature points
-			x = mesh_tools.ref_to_phys(mesh, elem_ID, quad_pts)
-			# Store
-			self.x_elems[elem_ID] = x
+		# Physical coordinates of quadrature points
+		self.x_elems = mesh_tools.ref_to_phys_elems(mesh, None, quad_pts)
 
-			if self.need_phys_grad:
-				# Physical gradient
-				basis.get_basis_val_grads(quad_pts, get_phys_grad=True,
-						ijac=ijac)
-				self.basis_phys_grad_elems[elem_ID] = basis.basis_phys_grad
-					# [nq, nb, ndims]
+		if self.need_phys_grad:
+			# Physical gradient
+			basis.get_basis_val_grads(quad_pts, get_phys_grad=True,
+					ijac=self.ijac_elems)
+			self.basis_phys_grad_elems = np.ascontiguousarray(
+					basis.basis_phys_grad) # [num_elems, nq, nb, ndims]
 
-			# Face normals
-			for i in range(mesh.gbasis.NFACES):
-				self.normals_elems[elem_ID, i] = mesh.gbasis.calculate_normals(
-						mesh, elem_ID, i, self.face_quad_pts)
+		# Face normals
+		elem_IDs = np.arange(num_elems)
+		for i in range(mesh.gbasis.NFACES):
+			self.normals_elems[:, i] = mesh.gbasis.calculate_normals_faces(
+					mesh, elem_IDs, np.full(num_elems, i),
+					self.face_quad_pts)
 
 		# Volumes
 		self.vol_elems, self.domain_vol = mesh_tools.element_volumes(mesh)
+		self.length_elems = self.vol_elems**(1./mesh.ndims)
+
+		# Smallest heights. The height onto a face is ndims*vol/face_area
+		# for simplices and vol/face_area for parallelograms, so the
+		# smallest one belongs to the largest face.
+		face_areas = np.einsum('ijk, k -> ij', np.linalg.norm(
+				self.normals_elems, axis=3), self.face_quad_wts[:, 0])
+				# [num_elems, nfaces]
+		if mesh.gbasis.SHAPE_TYPE == ShapeType.Quadrilateral:
+			height_scale = 1.
+		else:
+			height_scale = mesh.ndims
+		self.height_elems = height_scale*self.vol_elems/np.max(face_areas,
+				axis=1)
+
+	def get_tensor_product_data(self, mesh, basis, order):
+		'''
+		Precomputes the 1D basis data used to evaluate the element
+		residual with sum factorization. Nothing is computed unless both
+		the basis and the quadrature points are tensor products of 1D
+		ones.
+
+		Inputs:
+		-------
+			mesh: mesh object
+			basis: basis object
+			order: solution order
+
+		Outputs:
+		--------
+			self.basis_val_1D: precomputed 1D basis value [nq_1D, nb_1D]
+			self.basis_ref_grad_1D: precomputed 1D basis gradient
+				[nq_1D, nb_1D]
+		'''
+		basis_1D = basis.get_tensor_product_basis()
+		quad_pts_1D = basis_tools.get_tensor_product_points_1D(
+				self.quad_pts)
+		if basis_1D is None or quad_pts_1D is None:
+			return
 
+		self.basis_val_1D = basis_1D.get_values(quad_pts_1D)
+		self.basis_ref_grad_1D = basis_1D.get_grads(quad_pts_1D)[:, :, 0]
 
 	def alloc_other_arrays(self, physics, basis, order):
 		'''
@@ -261,6 +315,7 @@ class ElemHelpers(object):
 		'''
 		self.get_gaussian_quadrature(mesh, physics, basis, order)
 		self.get_basis_and_geom_data(mesh, basis, order)
+		self.get_tensor_product_data(mesh, basis, order)
 		self.alloc_other_arrays(physics, basis, order)
 		self.iMM_elems = basis_tools.get_inv_mass_matrices(mesh,
 				basis, order)
@@ -311,6 +366,9 @@ class InteriorFaceHelpers(ElemHelpers):
 		face IDs to the left of each interior face
 	faceR_IDs: numpy array
 		face IDs to the right of each interior face
+	scatter_plan: list of tuples
+		precomputed plan for adding the left/right face residuals back
+		to the elements (see helpers.get_scatter_plan)
 	ijacL_elems: numpy array
 		stores the evaluated inverse of the geometric Jacobian for each
 		left element
@@ -348,6 +406,7 @@ class InteriorFaceHelpers(ElemHelpers):
 		self.elemR_IDs = np.empty(0, dtype=int)
 		self.faceL_IDs = np.empty(0, dtype=int)
 		self.faceR_IDs = np.empty(0, dtype=int)
+		self.scatter_plan = []
 		self.ijacL_elems = np.zeros(0)
 		self.ijacR_elems = np.zeros(0)
 
@@ -436,9 +495,6 @@ class InteriorFaceHelpers(ElemHelpers):
 				nq, nb, ndims_basis])
 		self.ijacL_elems = np.zeros([nfaces, nq, ndims, ndims])
 		self.ijacR_elems = np.zeros([nfaces, nq, ndims, ndims])
-		self.normals_int_faces = np.zeros([mesh.num_interior_faces, nq,
-				ndims])
-		djac_faces = np.zeros([mesh.num_interior_faces, nq])
 
 		# Get values on each face (from both left and right perspectives) 
 		# for both the basis and the reference gradient of the basis
@@ -456,37 +512,36 @@ class InteriorFaceHelpers(ElemHelpers):
 			self.faces_to_basis_ref_gradR[face_ID] = basis.basis_ref_grad
 
 		# Normals
-		i = 0
-		for interior_face in mesh.interior_faces:
-			normals = mesh.gbasis.calculate_normals(mesh,
-					interior_face.elemL_ID, interior_face.faceL_ID, quad_pts)
-			self.normals_int_faces[i] = normals
-
+		elemL_IDs = self.elemL_IDs
+		elemR_IDs = self.elemR_IDs
+		faceL_IDs = self.faceL_IDs
+		faceR_IDs = self.faceR_IDs
+		self.normals_int_faces = mesh.gbasis.calculate_normals_faces(mesh,
+				elemL_IDs, faceL_IDs, quad_pts)
+
+		# Inverse Jacobians, grouped by the local face ID since those
+		# faces share the same points in element reference space
+		for face_ID in range(nfaces_per_elem):
 			# Left state
 			# Convert from face ref space to element ref space
-			elem_pts = basis.get_elem_ref_from_face_ref(
-					interior_face.faceL_ID, quad_pts)
-
-			_, _, ijacL = basis_tools.element_jacobian(mesh, 
-					interior_face.elemL_ID, elem_pts, get_djac=False,
-					get_jac=False, get_ijac=True)
+			idx = np.where(faceL_IDs == face_ID)[0]
+			if idx.shape[0] > 0:
+				elem_pts = basis.get_elem_ref_from_face_ref(face_ID,
+						quad_pts)
+				_, _, self.ijacL_elems[idx] = basis_tools.element_jacobians(
+						mesh, elemL_IDs[idx], elem_pts, get_ijac=True)
 
 			# Right state
 			# Convert from face ref space to element ref space
-			elem_pts = basis.get_elem_ref_from_face_ref(
-					interior_face.faceR_ID, quad_pts[::-1])
-			_, _, ijacR = basis_tools.element_jacobian(mesh, 
-					interior_face.elemR_ID, elem_pts, get_djac=False,
-					get_jac=False, get_ijac=True)
-
-			# Store
-			self.ijacL_elems[i] = ijacL
-			self.ijacR_elems[i] = ijacR
-
-			# Used for face_length calculations
-			djac_faces[i] = np.linalg.norm(normals, axis=1)
-			i += 1
-
+			idx = np.where(faceR_IDs == face_ID)[0]
+			if idx.shape[0] > 0:
+				elem_pts = basis.get_elem_ref_from_face_ref(face_ID,
+						quad_pts[::-1])
+				_, _, self.ijacR_elems[idx] = basis_tools.element_jacobians(
+						mesh, elemR_IDs[idx], elem_pts, get_ijac=True)
+
+		# Used for face_length calculations
+		djac_faces = np.linalg.norm(self.normals_int_faces, axis=2)
 		self.face_lengths = mesh_tools.get_face_lengths(djac_faces, quad_wts)
 		
 	def alloc_other_arrays(self, physics, basis, order):
@@ -526,23 +581,24 @@ class InteriorFaceHelpers(ElemHelpers):
 				[num_interior_faces]
 			self.faceR_IDs: Face IDs to the right of each interior face
 				[num_interior_faces]
+			self.scatter_plan: Plan for adding the stacked left and
+				right face residuals back to the elements
 		'''
-		self.elemL_IDs = np.empty(mesh.num_interior_faces, dtype=int)
-		self.elemR_IDs = np.empty(mesh.num_interior_faces, dtype=int)
-		self.faceL_IDs = np.empty(mesh.num_interior_faces, dtype=int)
-		self.faceR_IDs = np.empty(mesh.num_interior_faces, dtype=int)
-		for face_ID in range(mesh.num_interior_faces):
-			int_face = mesh.interior_faces[face_ID]
-			self.elemL_IDs[face_ID] = int_face.elemL_ID
-			self.elemR_IDs[face_ID] = int_face.elemR_ID
-			self.faceL_IDs[face_ID] = int_face.faceL_ID
-			self.faceR_IDs[face_ID] = int_face.faceR_ID
+		self.elemL_IDs = mesh.int_face_elemL_IDs.copy()
+		self.elemR_IDs = mesh.int_face_elemR_IDs.copy()
+		self.faceL_IDs = mesh.int_face_faceL_IDs.copy()
+		self.faceR_IDs = mesh.int_face_faceR_IDs.copy()
+
+		# Left and right contributions are stacked so that a single plan
+		# reproduces the accumulation order of the sequential scatter
+		self.scatter_plan = helpers.get_scatter_plan(np.concatenate([
+				self.elemL_IDs, self.elemR_IDs]))
 
 	def compute_helpers(self, mesh, physics, basis, order):
 		self.get_gaussian_quadrature(mesh, physics, basis, order)
+		self.store_neighbor_info(mesh)
 		self.get_basis_and_geom_data(mesh, basis, order)
 		self.alloc_other_arrays(physics, basis, order)
-		self.store_neighbor_info(mesh)
 
 
 class BoundaryFaceHelpers(InteriorFaceHelpers):
@@ -588,6 +644,9 @@ class BoundaryFaceHelpers(InteriorFaceHelpers):
 	face_IDs: list of numpy arrays 
 		list containing arrays of face IDs of boundary
 		face neighbors for each boundary group
+	scatter_plans: list of lists
+		precomputed plans for adding the boundary face residuals back
+		to the elements for each boundary group
 
 	Methods:
 	--------
@@ -614,6 +673,7 @@ class BoundaryFaceHelpers(InteriorFaceHelpers):
 		self.Fq = np.zeros(0)
 		self.elem_IDs = []
 		self.face_IDs = []
+		self.scatter_plans = []
 
 	def get_basis_and_geom_data(self, mesh, basis, order):
 		'''
@@ -667,49 +727,42 @@ class BoundaryFaceHelpers(InteriorFaceHelpers):
 			self.faces_to_basis_ref_grad[face_ID] = basis.basis_ref_grad
 
 		# Get boundary information
-		i = 0
 		for bgroup in mesh.boundary_groups.values():
-			self.normals_bgroups.append(np.zeros([bgroup.num_boundary_faces,
-					nq, ndims]))
-			self.x_bgroups.append(np.zeros([bgroup.num_boundary_faces,
-					nq, ndims]))
-			self.ijac_bgroups.append(np.zeros([bgroup.num_boundary_faces,
-					nq, ndims, ndims]))
-			self.face_lengths_bgroups.append(np.zeros([
-					bgroup.num_boundary_faces, 1]))
-
-			normal_bgroup = self.normals_bgroups[i]
-			x_bgroup = self.x_bgroups[i]
-			ijac_bgroup = self.ijac_bgroups[i]
-			face_lengths_bgroup = self.face_lengths_bgroups[i]
-
-			j = 0
-			for boundary_face in bgroup.boundary_faces:
-				# Normals
-				normals = mesh.gbasis.calculate_normals(mesh,
-						boundary_face.elem_ID,
-						boundary_face.face_ID, quad_pts)
-				elem_pts = basis.get_elem_ref_from_face_ref(
-						boundary_face.face_ID, quad_pts)
-				djac, jac, ijac = basis_tools.element_jacobian(mesh, 
-					boundary_face.elem_ID, elem_pts, get_djac=True,
-					get_jac=True, get_ijac=True)
-
-				normal_bgroup[j] = normals
-				ijac_bgroup[j] = ijac
-				djac_faces = np.linalg.norm(normals, axis=1)
-				face_lengths_bgroup[j] = mesh_tools.get_face_lengths(
-						djac_faces.reshape([1, nq]), quad_wts)
+			bgroup_elem_IDs = self.elem_IDs[bgroup.number]
+			bgroup_face_IDs = self.face_IDs[bgroup.number]
+
+			# Normals
+			normal_bgroup = mesh.gbasis.calculate_normals_faces(mesh,
+					bgroup_elem_IDs, bgroup_face_IDs, quad_pts)
+			x_bgroup = np.zeros([bgroup.num_boundary_faces, nq, ndims])
+			ijac_bgroup = np.zeros([bgroup.num_boundary_faces, nq, ndims,
+					ndims])
+
+			# Faces with the same local face ID share the same points in
+			# element reference space
+			for face_ID in range(nfaces_per_elem):
+				idx = np.where(bgroup_face_IDs == face_ID)[0]
+				if idx.shape[0] == 0:
+					continue
+				elem_pts = basis.get_elem_ref_from_face_ref(face_ID,
+						quad_pts)
+				_, _, ijac_bgroup[idx] = basis_tools.element_jacobians(
+						mesh, bgroup_elem_IDs[idx], elem_pts, get_djac=True,
+						get_ijac=True)
 
 				# Physical coordinates of quadrature points
-				x = mesh_tools.ref_to_phys(mesh, boundary_face.elem_ID,
-						self.faces_to_xref[boundary_face.face_ID])
-				# Store
-				x_bgroup[j] = x
+				x_bgroup[idx] = mesh_tools.ref_to_phys_elems(mesh,
+						bgroup_elem_IDs[idx], self.faces_to_xref[face_ID])
+
+			djac_faces = np.linalg.norm(normal_bgroup, axis=2)
+			face_lengths_bgroup = mesh_tools.get_face_lengths(djac_faces,
+					quad_wts)
 
-				# Increment
-				j += 1
-			i += 1
+			# Store
+			self.normals_bgroups.append(normal_bgroup)
+			self.x_bgroups.append(x_bgroup)
+			self.ijac_bgroups.append(ijac_bgroup)
+			self.face_lengths_bgroups.append(face_lengths_bgroup)
 
 
 	def alloc_other_arrays(self, physics, basis, order):
@@ -748,23 +801,24 @@ class BoundaryFaceHelpers(InteriorFaceHelpers):
 			self.face_IDs: List containing arrays of face IDs of boundary
 			face neighbors for each boundary group
 			[num_boundary_groups][num_interior_faces]
+			self.scatter_plans: List containing the plans for adding
+			the boundary face residuals back to the elements for each
+			boundary group [num_boundary_groups]
 		'''
 		# Loop through boundary groups
 		for bgroup in mesh.boundary_groups.values():
-			bgroup_elem_IDs = np.empty(bgroup.num_boundary_faces, dtype=int)
-			bgroup_face_IDs = np.empty(bgroup.num_boundary_faces, dtype=int)
-			for bface_ID in range(bgroup.num_boundary_faces):
-				boundary_face = bgroup.boundary_faces[bface_ID]
-				bgroup_elem_IDs[bface_ID] = boundary_face.elem_ID
-				bgroup_face_IDs[bface_ID] = boundary_face.face_ID
+			bgroup_elem_IDs = bgroup.elem_IDs.copy()
+			bgroup_face_IDs = bgroup.face_IDs.copy()
 			self.elem_IDs.append(bgroup_elem_IDs)
 			self.face_IDs.append(bgroup_face_IDs)
+			self.scatter_plans.append(helpers.get_scatter_plan(
+					bgroup_elem_IDs))
 
 	def compute_helpers(self, mesh, physics, basis, order):
 		self.get_gaussian_quadrature(mesh, physics, basis, order)
+		self.store_neighbor_info(mesh)
 		self.get_basis_and_geom_data(mesh, basis, order)
 		self.alloc_other_arrays(physics, basis, order)
-		self.store_neighbor_info(mesh)
 
 
 class DG(base.SolverBase):
@@ -783,6 +837,13 @@ class DG(base.SolverBase):
 		# Precompute helpers
 		self.precompute_matrix_helpers()
 
+		# Use sum factorization for the element residual of
+		# tensor-product bases of high enough order
+		min_order = params["SumFactorizationMinOrder"]
+		self.sum_factorization = min_order is not None and \
+				self.order >= min_order and \
+				self.elem_helpers.basis_val_1D.shape[0] > 0
+
 		if self.limiters:
 			for limiter in self.limiters:
 				limiter.precompute_helpers(self)
@@ -805,11 +866,39 @@ class DG(base.SolverBase):
 		if params["RestartFile"] is None:
 			self.init_state_from_fcn()
 
+	def check_compatibility(self):
+		super().check_compatibility()
+
+		# Local time stepping is only available with ADER-DG
+		if self.params["LocalTimeSteppingLevels"] > 1:
+			raise errors.IncompatibleError
+
+		# The wave speeds are only recorded for all elements at once by the
+		# serial residual
+		if self.params["CFLWaveSpeedFromResidual"] and ParallelismType[
+				self.params["ResidualParallelism"]] is not \
+				ParallelismType.Serial:
+			raise errors.IncompatibleError
+
 	def precompute_matrix_helpers(self):
 		mesh = self.mesh
 		physics = self.physics
 		basis = self.basis
 
+		helper_classes = {
+			"elem_helpers" : ElemHelpers,
+			"int_face_helpers" : InteriorFaceHelpers,
+			"bface_helpers" : BoundaryFaceHelpers,
+		}
+		basis_names = ["basis", "gbasis"]
+
+		# Reuse helpers from a previous run if available
+		cache_file = solver_tools.get_helpers_cache_file(self)
+		if cache_file is not None and solver_tools.load_helpers(
+				cache_file, self, helper_classes):
+			print("Loaded precomputed helpers from " + cache_file)
+			return
+
 		self.elem_helpers = ElemHelpers()
 		self.elem_helpers.compute_helpers(mesh, physics, basis,
 				self.order)
@@ -820,6 +909,10 @@ class DG(base.SolverBase):
 		self.bface_helpers.compute_helpers(mesh, physics, basis,
 				self.order)
 
+		if cache_file is not None:
+			solver_tools.save_helpers(cache_file, self, helper_classes,
+					basis_names)
+
 	def get_element_residual(self, Uc, res_elem):
 		# Unpack
 		physics = self.physics
@@ -835,18 +928,45 @@ class DG(base.SolverBase):
 		nq = quad_wts.shape[0]
 		fluxes = self.params["ConvFluxSwitch"]
 		sources = self.params["SourceSwitch"]
+		work_arrays = self.work_arrays
+		ne, nb = Uc.shape[:2]
 
 		# Interpolate state at quad points
-		Uq = helpers.evaluate_state(Uc, basis_val,
-				skip_interp=self.basis.skip_interp) # [ne, nq, ns]
+		if self.sum_factorization and not self.basis.skip_interp:
+			Uq = helpers.evaluate_state_sum_factorization(Uc,
+					elem_helpers.basis_val_1D, ndims,
+					out=work_arrays.get("elems/Uq", [ne, nq, ns]))
+		else:
+			Uq = helpers.evaluate_state(Uc, basis_val,
+					skip_interp=self.basis.skip_interp,
+					out=work_arrays.get("elems/Uq", [ne, nq, ns]))
+				# [ne, nq, ns]
 		
-		# Interpolate gradient of state at quad points
-		gUq = self.evaluate_gradient(Uc, basis_phys_grad_elems)
+		# Interpolate gradient of state at quad points (only needed for
+		# diffusion)
+		gUq = None
+		if physics.diff_flux_fcn and self.sum_factorization:
+			gUq = helpers.evaluate_gradient_sum_factorization(Uc,
+					elem_helpers.basis_val_1D,
+					elem_helpers.basis_ref_grad_1D, ijac_elems,
+					out=work_arrays.get("elems/gUq", [ne, nq, ns, ndims]),
+					work=work_arrays)
+		elif physics.diff_flux_fcn:
+			gUq = self.evaluate_gradient(Uc, basis_phys_grad_elems,
+					out=work_arrays.get("elems/gUq", [ne, nq, ndims, ns]))
 
 		if self.verbose:
 			# Get min and max of state variables for reporting
 			self.get_min_max_state(Uq)
 
+		if self.record_max_wave_speed:
+			# Get max wavespeed of each element for the CFL condition
+			# (only in the first residual evaluation of the time step)
+			a = physics.compute_variable("MaxWaveSpeed", Uq,
+					flag_non_physical=True) # [ne, nq, 1]
+			self.max_wave_speed_elems = np.max(a, axis=(1, 2)) # [ne]
+			self.record_max_wave_speed = False
+
 		if fluxes:
 			# Evaluate the inviscid flux integral
 			Fq = physics.get_conv_flux_interior(Uq)[0] # [ne, nq, ns, ndims]
@@ -856,19 +976,33 @@ class DG(base.SolverBase):
 				Fq -= physics.get_diff_flux_interior(Uq, gUq) 
 					# [ne, nq, ns, ndims]
 			
-			res_elem += solver_tools.calculate_volume_flux_integral(
-					self, elem_helpers, Fq) # [ne, nb, ns]
+			if self.sum_factorization:
+				calculate_volume_flux_integral = solver_tools. \
+						calculate_volume_flux_integral_sum_factorization
+			else:
+				calculate_volume_flux_integral = \
+						solver_tools.calculate_volume_flux_integral
+			res_elem += calculate_volume_flux_integral(self, elem_helpers,
+					Fq, out=work_arrays.get("elems/res", [ne, nb, ns]),
+					work=work_arrays) # [ne, nb, ns]
 
 		if sources:
 			# Evaluate the source term integral
 			# eval_source_terms is an additive function so source needs to be
 			# initialized to zero for each time step
-			Sq = np.zeros_like(Uq) # [ne, nq, ns]
+			Sq = work_arrays.zeros("elems/Sq", Uq.shape) # [ne, nq, ns]
 			Sq = physics.eval_source_terms(Uq, x_elems, self.time, Sq)
 					# [ne, nq, ns]
 
-			res_elem += solver_tools.calculate_source_term_integral(
-					elem_helpers, Sq) # [ne, nb, ns]
+			if self.sum_factorization:
+				calculate_source_term_integral = solver_tools. \
+						calculate_source_term_integral_sum_factorization
+			else:
+				calculate_source_term_integral = \
+						solver_tools.calculate_source_term_integral
+			res_elem += calculate_source_term_integral(elem_helpers, Sq,
+					out=work_arrays.get("elems/res", [ne, nb, ns]),
+					work=work_arrays) # [ne, nb, ns]
 
 		# Add artificial viscosity term
 		if self.params["ArtificialViscosity"]:
@@ -902,30 +1036,46 @@ class DG(base.SolverBase):
 
 		ns = physics.NUM_STATE_VARS
 		nq = quad_wts.shape[0]
+		nf, nb = UcL.shape[:2]
+		ndims = normals_int_faces.shape[-1]
+		work_arrays = self.work_arrays
+
+		basis_valL = work_arrays.take("int_faces/basis_valL",
+				faces_to_basisL, faceL_IDs) # [nf, nq, nb]
+		basis_valR = work_arrays.take("int_faces/basis_valR",
+				faces_to_basisR, faceR_IDs) # [nf, nq, nb]
 
 		# Interpolate state at quad points
-		UqL = helpers.evaluate_state(UcL, faces_to_basisL[faceL_IDs])
+		UqL = helpers.evaluate_state(UcL, basis_valL,
+				out=work_arrays.get("int_faces/UqL", [nf, nq, ns]))
 				# [nf, nq, ns]
-		UqR = helpers.evaluate_state(UcR, faces_to_basisR[faceR_IDs])
+		UqR = helpers.evaluate_state(UcR, basis_valR,
+				out=work_arrays.get("int_faces/UqR", [nf, nq, ns]))
 				# [nf, nq, ns]
 
-		# Interpolate gradient of state at quad points
-		gUqL_ref = self.evaluate_gradient(UcL, 
-				faces_to_basis_ref_gradL[faceL_IDs])
-		gUqR_ref = self.evaluate_gradient(UcR, 
-				faces_to_basis_ref_gradR[faceR_IDs])
-
-		# Make gradient the physical gradient at L/R states
-		gUqL = self.ref_to_phys_grad(ijacL_elems, gUqL_ref)
-		gUqR = self.ref_to_phys_grad(ijacR_elems, gUqR_ref)
-
-		# Allocate resL and resR (needed for operator splitting)
-		nifL = self.int_face_helpers.elemL_IDs.shape[0]
-		nifR = self.int_face_helpers.elemR_IDs.shape[0]
-		resL = np.zeros([nifL, nq, ns])
-		resR = np.zeros([nifR, nq, ns])
-		resL_diff = np.zeros([nifL, nq, ns])
-		resR_diff = np.zeros([nifR, nq, ns])
+		# Gradients are only needed for diffusion
+		basis_ref_gradL = basis_ref_gradR = gUqL = gUqR = None
+		if physics.diff_flux_fcn:
+			basis_ref_gradL = work_arrays.take("int_faces/basis_ref_gradL",
+					faces_to_basis_ref_gradL, faceL_IDs)
+			basis_ref_gradR = work_arrays.take("int_faces/basis_ref_gradR",
+					faces_to_basis_ref_gradR, faceR_IDs)
+
+			# Interpolate gradient of state at quad points
+			gUqL_ref = self.evaluate_gradient(UcL, basis_ref_gradL,
+					out=work_arrays.get("int_faces/gUqL_ref", [nf, nq,
+					ndims, ns]))
+			gUqR_ref = self.evaluate_gradient(UcR, basis_ref_gradR,
+					out=work_arrays.get("int_faces/gUqR_ref", [nf, nq,
+					ndims, ns]))
+
+			# Make gradient the physical gradient at L/R states
+			gUqL = self.ref_to_phys_grad(ijacL_elems, gUqL_ref,
+					out=work_arrays.get("int_faces/gUqL", [nf, nq, ns,
+					ndims]))
+			gUqR = self.ref_to_phys_grad(ijacR_elems, gUqR_ref,
+					out=work_arrays.get("int_faces/gUqR", [nf, nq, ns,
+					ndims]))
 
 		if physics.diff_flux_fcn:
 			# Calculate diffusion flux helpers
@@ -942,22 +1092,37 @@ class DG(base.SolverBase):
 					# [nf, nq, ns, ndims], [nf, nq, ns, ndims]
 			Fq -= Fq_diff
 
-			FL_phys = self.ref_to_phys_grad(ijacL_elems, FL)
-			FR_phys = self.ref_to_phys_grad(ijacR_elems, FR)
+			FL_phys = FR_phys = None
+			if physics.diff_flux_fcn:
+				FL_phys = self.ref_to_phys_grad(ijacL_elems, FL,
+						out=work_arrays.get("int_faces/FL_phys", FL.shape))
+				FR_phys = self.ref_to_phys_grad(ijacR_elems, FR,
+						out=work_arrays.get("int_faces/FR_phys", FR.shape))
 
 			# Compute contribution to left and right element residuals
 			resL = solver_tools.calculate_boundary_flux_integral(
-					faces_to_basisL[faceL_IDs], quad_wts, Fq)
+					basis_valL, quad_wts, Fq, out=work_arrays.get(
+					"int_faces/resL", [nf, nb, ns]), work=work_arrays)
 			resR = solver_tools.calculate_boundary_flux_integral(
-					faces_to_basisR[faceR_IDs], quad_wts, Fq)
+					basis_valR, quad_wts, Fq, out=work_arrays.get(
+					"int_faces/resR", [nf, nb, ns]), work=work_arrays)
 
 			# Compute additional boundary flux integrals for diffusion terms
 			resL_diff = self.calculate_boundary_flux_integral_sum(
-					faces_to_basis_ref_gradL[faceL_IDs], quad_wts, FL_phys)
+					basis_ref_gradL, quad_wts, FL_phys, out=work_arrays.get(
+					"int_faces/resL_diff", [nf, nb, ns]), work=work_arrays)
 
 			resR_diff = self.calculate_boundary_flux_integral_sum(
-					faces_to_basis_ref_gradR[faceR_IDs], quad_wts, 
-					FR_phys)
+					basis_ref_gradR, quad_wts, FR_phys, out=work_arrays.get(
+					"int_faces/resR_diff", [nf, nb, ns]), work=work_arrays)
+		else:
+			# Zero contributions (needed for operator splitting)
+			resL = work_arrays.zeros("int_faces/resL", [nf, nq, ns])
+			resR = work_arrays.zeros("int_faces/resR", [nf, nq, ns])
+			resL_diff = work_arrays.zeros("int_faces/resL_diff",
+					[nf, nq, ns])
+			resR_diff = work_arrays.zeros("int_faces/resR_diff",
+					[nf, nq, ns])
 			
 		return resL, resR, resL_diff, resR_diff # [nif, nb, ns]
 
@@ -976,27 +1141,39 @@ class DG(base.SolverBase):
 		x_bgroups = bface_helpers.x_bgroups
 		ijac_bgroups = bface_helpers.ijac_bgroups
 
-		basis_val = bface_helpers.faces_to_basis[face_IDs] # [nbf, nq, nb]
-		basis_ref_grad = bface_helpers.faces_to_basis_ref_grad[face_IDs] 
-
-		# Interpolate state at quad points
-		UqI = helpers.evaluate_state(Uc, basis_val) # [nbf, nq, ns]
-
 		normals = normals_bgroups[bgroup_num] # [nbf, nq, ndims]
 		x = x_bgroups[bgroup_num] # [nbf, nq, ndims]
 		ijac = ijac_bgroups[bgroup_num]
 
+		ns = physics.NUM_STATE_VARS
+		nq = quad_wts.shape[0]
+		nbf, nb = Uc.shape[:2]
+		ndims = normals.shape[-1]
+		work_arrays = self.work_arrays
+
+		basis_val = work_arrays.take("bfaces/basis_val",
+				bface_helpers.faces_to_basis, face_IDs) # [nbf, nq, nb]
+
 		BC = physics.BCs[bgroup.name]
 
 		# Interpolate state at quadrature points
-		UqI = helpers.evaluate_state(Uc, basis_val)
+		UqI = helpers.evaluate_state(Uc, basis_val, out=work_arrays.get(
+				"bfaces/UqI", [nbf, nq, ns])) # [nbf, nq, ns]
 
-		# Interpolate gradient of state at quad points
-		gUq_ref = self.evaluate_gradient(Uc, 
-				basis_ref_grad)
+		# Gradients are only needed for diffusion
+		basis_ref_grad = gUq = None
+		if physics.diff_flux_fcn:
+			basis_ref_grad = work_arrays.take("bfaces/basis_ref_grad",
+					bface_helpers.faces_to_basis_ref_grad, face_IDs)
+
+			# Interpolate gradient of state at quad points
+			gUq_ref = self.evaluate_gradient(Uc, basis_ref_grad,
+					out=work_arrays.get("bfaces/gUq_ref", [nbf, nq, ndims,
+					ns]))
 
-		# Make ref gradient of state the physical gradient
-		gUq = self.ref_to_phys_grad(ijac, gUq_ref)
+			# Make ref gradient of state the physical gradient
+			gUq = self.ref_to_phys_grad(ijac, gUq_ref, out=work_arrays.get(
+					"bfaces/gUq", [nbf, nq, ns, ndims]))
 
 		# Compute any additional helpers for diffusive flux fcn
 		if physics.diff_flux_fcn:
@@ -1005,13 +1182,18 @@ class DG(base.SolverBase):
 		if fluxes:
 			# Compute boundary flux
 			Fq, FqB = BC.get_boundary_flux(physics, UqI, normals, x, self.time, gUq=gUq)
-			FqB_phys = self.ref_to_phys_grad(ijac, FqB)
+			FqB_phys = None
+			if physics.diff_flux_fcn:
+				FqB_phys = self.ref_to_phys_grad(ijac, FqB,
+						out=work_arrays.get("bfaces/FqB_phys", FqB.shape))
 
 			# Compute contribution to adjacent element residual
 			resB = solver_tools.calculate_boundary_flux_integral(
-					basis_val, quad_wts, Fq)
+					basis_val, quad_wts, Fq, out=work_arrays.get(
+					"bfaces/resB", [nbf, nb, ns]), work=work_arrays)
 
 			resB -= self.calculate_boundary_flux_integral_sum(
-				basis_ref_grad, quad_wts, FqB_phys)
+				basis_ref_grad, quad_wts, FqB_phys, out=work_arrays.get(
+				"bfaces/resB_diff", [nbf, nb, ns]), work=work_arrays)
 
 		return resB
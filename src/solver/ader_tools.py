@@ -651,6 +651,51 @@ def predictor_elem_explicit(solver, dt, W, U_pred):
 	return U_pred # [ne, nb_st, ns]
 
 
+def solve_sylvester_batched(T, Z, B, C):
+	'''
+	Solves the Sylvester equations
+
+		AX + XB[ie] = C[ie]
+
+	for all elements at once, where A is shared by all elements. This
+	uses the Bartels-Stewart algorithm with the complex Schur
+	decomposition of A.
+
+	Inputs:
+	-------
+		T: upper triangular (complex) Schur form of A [nb_st, nb_st]
+		Z: unitary Schur vectors of A, i.e., A = Z T Z^H [nb_st, nb_st]
+		B: right-hand matrices [ne, ns, ns]
+		C: right-hand sides [ne, nb_st, ns]
+
+	Outputs:
+	--------
+		X: solutions [ne, nb_st, ns]
+
+	Notes:
+	------
+		With Y = Z^H X, the equations become TY + YB[ie] = Z^H C[ie].
+		Since T is upper triangular, the rows of Y are obtained from the
+		last to the first, each requiring a batched solve of the ns x ns
+		systems of all elements.
+	'''
+	nb_st = T.shape[0]
+	ns = B.shape[-1]
+
+	F = np.matmul(Z.conj().T, C) # [ne, nb_st, ns]
+	Y = np.zeros_like(F)
+	BT = B.transpose(0, 2, 1)
+	I = np.eye(ns)
+
+	for j in range(nb_st - 1, -1, -1):
+		rhs = F[:, j] - np.einsum('k, ikl -> il', T[j, j+1:], Y[:, j+1:])
+		# Y[:, j] (T[j, j] I + B) = rhs
+		Y[:, j] = np.linalg.solve(T[j, j]*I + BT, rhs[:, :, None])[:, :, 0]
+
+	# C is real, so the imaginary part is only round-off
+	return np.matmul(Z, Y).real # [ne, nb_st, ns]
+
+
 def predictor_elem_implicit(solver, dt, W, U_pred):
 	'''
 	Calculates the predicted solution state for the ADER-DG method using a
@@ -662,7 +707,8 @@ def predictor_elem_implicit(solver, dt, W, U_pred):
 
 		AX + XB = C
 
-	This is a built-in function via the scipy.linalg library.
+	for each element, where A is shared by all elements. These are solved
+	for all elements at once with solve_sylvester_batched.
 
 	Inputs:
 	-------
@@ -697,7 +743,6 @@ def predictor_elem_implicit(solver, dt, W, U_pred):
 	FTR = ader_helpers.FTR
 	iMM = ader_helpers.iMM
 	SMS_elems = ader_helpers.SMS_elems
-	K = ader_helpers.K
 
 	# Initialize space-time coefficients
 	U_pred, U_bar = solver.get_spacetime_guess(solver, W, U_pred, dt=dt)
@@ -730,13 +775,14 @@ def predictor_elem_implicit(solver, dt, W, U_pred):
 	# Iterate using a nonlinear Sylvester solver for the
 	# updated space-time coefficients. Solves for X in the form:
 	# 	AX + XB = C
-	# Update: We now transform AX+XB=C into KX=C using kronecker
-	# products.
+	# Note: A = iMM K is the same for all elements and does not depend on
+	# the time step, so its Schur decomposition is precomputed in
+	# ader_helpers. Previous implementations used scipy's solve_sylvester
+	# or a Kronecker product system for each element.
 	niter = 10000
 
-	A = np.matmul(iMM, K)
-
-	U_pred_new = np.zeros_like(U_pred)
+	T = ader_helpers.schur_T
+	Z = ader_helpers.schur_Z
 
 	for i in range(niter):
 		
@@ -749,24 +795,7 @@ def predictor_elem_implicit(solver, dt, W, U_pred):
 				Sjac[:].transpose(0, 2, 1)) + \
 				np.einsum('jk, ikl -> ijl', iMM, Q)
 
-		# Build identity matrices for kronecker procucts
-		I2 = np.eye(A.shape[1])
-		I1 = np.eye(B.shape[1])
-
-		for ie in range(U_pred.shape[0]):
-
-			# Conduct kronecker products to transfrom Ax+xB=C system to Ax=b
-			kronecker = np.kron(I1, A) + np.kron(B[ie, :, :].transpose(), I2)
-			U_pred_hold = np.linalg.solve(kronecker, 
-					C[ie, :, :].transpose().reshape(-1))
-			U_pred_new[ie, :, :] = U_pred_hold.reshape(U_pred.shape[2], 
-					U_pred.shape[1]).transpose()
-
-			# Note: Previous implementaion used sylvester solve directly.
-			# This still requires further testing to determine which is 
-			# more efficient.
-			# U_pred_new[ie, :, :] = solve_sylvester(A, B[ie, :, :],
-			# 		C[ie, :, :])
+		U_pred_new = solve_sylvester_batched(T, Z, B, C)
 
 		# We check when the coefficients are no longer changing.
 		# This can lead to differences between NODAL and MODAL solutions.
@@ -28,7 +28,8 @@ import time
 import errors
 
 from general import ModalOrNodal, NodeType, ShapeType, QuadratureType, \
-		StepperType, LimiterType, BasisType
+		StepperType, LimiterType, BasisType, DataFileType, \
+		ParallelismType
 
 import meshing.meshbase as mesh_defs
 import meshing.tools as mesh_tools
@@ -46,6 +47,8 @@ import numerics.quadrature.segment as segment
 import processing.post as post_defs
 import processing.readwritedatafiles as readwritedatafiles
 
+import solver.parallel as parallel
+import solver.profiling as profiling
 import solver.tools as solver_tools
 
 
@@ -79,6 +82,12 @@ class SolverBase(ABC):
 		minimum values of state variables
 	max_state: numpy array
 		maximum values of state variables
+	max_wave_speed_elems: numpy array
+		maximum wave speed of each element recorded by the element
+		residual (None if not recorded)
+	record_max_wave_speed: bool
+		determines whether the next element residual evaluation records
+		max_wave_speed_elems (reset once recorded)
 
 	Abstract Methods:
 	-----------------
@@ -173,6 +182,10 @@ class SolverBase(ABC):
 		self.min_state = np.zeros(physics.NUM_STATE_VARS)
 		self.max_state = np.zeros(physics.NUM_STATE_VARS)
 
+		# Max wave speed of each element recorded by the element residual
+		# for the CFL condition
+		self.max_wave_speed_elems = None
+		self.record_max_wave_speed = False
 
 		# Search for custom_user_function in case directory
 		custom_user_function = self.params["CustomFunctionFilename"]
@@ -188,6 +201,16 @@ class SolverBase(ABC):
 		# Counter to compare ODE evaluations in ADERDG and Splitting methods
 		self.count_evaluations = 0
 
+		# Worker pool for parallel residual evaluation (created when the
+		# residual is first evaluated)
+		self.residual_pool = None
+
+		# Reusable work arrays for the residual evaluation
+		self.work_arrays = helpers.WorkArrays()
+
+		# Timing of the phases of the solve
+		self.profiler = profiling.Profiler(params["Profile"])
+
 		# Compatibility checks
 		self.check_compatibility()
 
@@ -250,6 +273,23 @@ class SolverBase(ABC):
 				  StepperType[stepper_type] == StepperType.Simpler ) :
 			raise errors.IncompatibleError
 
+		# Adaptive steppers need the final time and cannot be used for
+		# the splitting schemes, which set the time step of each split
+		adaptive_steppers = [StepperType.BS32, StepperType.DP54]
+		if StepperType[stepper_type] in adaptive_steppers and \
+				params["FinalTime"] is None:
+			raise errors.IncompatibleError
+		if StepperType[params["OperatorSplittingExplicit"]] in \
+				adaptive_steppers and ( StepperType[stepper_type] == \
+				StepperType.Strang or StepperType[stepper_type] == \
+				StepperType.Simpler ):
+			raise errors.IncompatibleError
+
+		# Only checkpoint files can be written in the background
+		if params["AsyncWrite"] and DataFileType[params["DataFileType"]] \
+				is not DataFileType.Checkpoint:
+			raise errors.IncompatibleError
+
 		# Currently, positivity-preserving limiter not compatible with
 		# modal triangular basis
 		if LimiterType.PositivityPreserving.name in params["ApplyLimiters"] \
@@ -447,6 +487,15 @@ class SolverBase(ABC):
 		mesh = self.mesh
 		physics = self.physics
 		stepper = self.stepper
+		profiler = self.profiler
+
+		# Evaluate on worker processes or threads if requested
+		if ParallelismType[self.params["ResidualParallelism"]] is not \
+				ParallelismType.Serial:
+			if self.residual_pool is None or self.residual_pool.closed:
+				self.residual_pool = parallel.create_residual_pool(self)
+			with profiler.phase(profiling.PARALLEL_RESIDUAL):
+				return self.residual_pool.get_residual(U, res)
 
 		# Initialize residual to zero
 		if stepper.balance_const is None:
@@ -455,8 +504,10 @@ class SolverBase(ABC):
 			res[:] = stepper.balance_const
 
 		self.get_boundary_face_residuals(U, res)
-		self.get_element_residuals(U, res)
-		self.get_interior_face_residuals(U, res)
+		with profiler.phase(profiling.ELEMENT_RESIDUAL):
+			self.get_element_residuals(U, res)
+		with profiler.phase(profiling.INTERIOR_FACES):
+			self.get_interior_face_residuals(U, res)
 
 		return res
 
@@ -497,24 +548,35 @@ class SolverBase(ABC):
 		faceL_IDs = int_face_helpers.faceL_IDs
 		faceR_IDs = int_face_helpers.faceR_IDs
 
+		work_arrays = self.work_arrays
+		nf = elemL_IDs.shape[0]
+
 		# Extract state coefficients of elements to the left and right of
 		# this interior face
-		UL = U[elemL_IDs]
-		UR = U[elemR_IDs]
+		UL = work_arrays.take("int_faces/UL", U, elemL_IDs)
+		UR = work_arrays.take("int_faces/UR", U, elemR_IDs)
 
 		# Calculate face residuals for left and right elements
 		RL, RR, RL_diff, RR_diff = self.get_interior_face_residual(faceL_IDs, faceR_IDs, UL,
 				UR)
 
-		# Add this residual back to the global. The np.add.at function is
-		# used to correctly handle duplicate element IDs.
-		np.add.at(res, elemL_IDs, -RL)
-		np.add.at(res, elemR_IDs,  RR)
+		# Add this residual back to the global. The precomputed scatter
+		# plan handles duplicate element IDs and preserves the summation
+		# order of np.add.at.
+		scatter_plan = int_face_helpers.scatter_plan
+		R = work_arrays.get("int_faces/R", (2*nf,) + RL.shape[1:])
+		np.negative(RL, out=R[:nf])
+		R[nf:] = RR
+		helpers.scatter_add(res, scatter_plan, R)
 
 		# Add the additional diffusion portion of the residual to the
-		# correct left/right states.
-		np.add.at(res, elemL_IDs,  RL_diff)
-		np.add.at(res, elemR_IDs,  RR_diff)
+		# correct left/right states (a scalar zero without diffusion).
+		if np.ndim(RL_diff) > 0:
+			R_diff = work_arrays.get("int_faces/R_diff",
+					(2*nf,) + RL_diff.shape[1:])
+			R_diff[:nf] = RL_diff
+			R_diff[nf:] = RR_diff
+			helpers.scatter_add(res, scatter_plan, R_diff)
 
 	def get_boundary_face_residuals(self, U, res):
 		'''
@@ -536,6 +598,10 @@ class SolverBase(ABC):
 		bface_helpers = self.bface_helpers
 		elem_IDs = bface_helpers.elem_IDs
 		face_IDs = bface_helpers.face_IDs
+		scatter_plans = bface_helpers.scatter_plans
+
+		work_arrays = self.work_arrays
+		profiler = self.profiler
 
 		# Loop through boundary groups
 		for bgroup in mesh.boundary_groups.values():
@@ -543,11 +609,16 @@ class SolverBase(ABC):
 			bgroup_elem_IDs = elem_IDs[bgroup.number]
 			bgroup_face_IDs = face_IDs[bgroup.number]
 
-			resB = self.get_boundary_face_residual(bgroup,
-					bgroup_face_IDs, U[bgroup_elem_IDs],
-					res[bgroup_elem_IDs])
+			with profiler.phase(profiling.BOUNDARY_FACES + "/" +
+					bgroup.name):
+				resB = self.get_boundary_face_residual(bgroup,
+						bgroup_face_IDs, work_arrays.take("bfaces/U", U,
+						bgroup_elem_IDs), work_arrays.take("bfaces/res",
+						res, bgroup_elem_IDs))
 
-			np.add.at(res, bgroup_elem_IDs, -resB)
+				# resB is either one of the work arrays or a new array
+				helpers.scatter_add(res, scatter_plans[bgroup.number],
+						np.negative(resB, out=resB))
 
 	def apply_limiter(self, U):
 		'''
@@ -563,7 +634,9 @@ class SolverBase(ABC):
 		'''
 		for limiter in self.limiters:
 			if limiter is not None:
-				limiter.limit_solution(self, U)
+				with self.profiler.phase(profiling.LIMITER + "/" +
+						type(limiter).__name__):
+					limiter.limit_solution(self, U)
 
 	def get_min_max_state(self, Uq):
 		'''
@@ -631,6 +704,7 @@ class SolverBase(ABC):
 		physics = self.physics
 		mesh = self.mesh
 		stepper = self.stepper
+		profiler = self.profiler
 		t = self.time
 
 		# Parameters for writing data
@@ -640,8 +714,19 @@ class SolverBase(ABC):
 		write_final_solution = self.params["WriteFinalSolution"]
 		write_initial_solution = self.params["WriteInitialSolution"]
 
+		# Data files are either written directly or queued for a background
+		# writer
+		if self.params["AsyncWrite"]:
+			data_file_writer = readwritedatafiles.AsyncDataFileWriter(
+					self.params["WriteQueueSize"])
+			write_data_file = data_file_writer.write
+		else:
+			data_file_writer = None
+			write_data_file = readwritedatafiles.write_data_file
+
 		if write_initial_solution:
-			readwritedatafiles.write_data_file(self, 0)
+			with profiler.phase(profiling.IO):
+				write_data_file(self, 0)
 
 		t0 = time.time()
 
@@ -652,39 +737,78 @@ class SolverBase(ABC):
 		# Custom user function initial iteration
 		self.custom_user_function(self)
 
-		while self.itime < stepper.num_time_steps:
-			# Reset min and max state
-			self.max_state[:] = -np.inf
-			self.min_state[:] = np.inf
-
-			# Get time step size
-			stepper.dt = stepper.get_time_step(stepper, self)
-
-			# Integrate in time
-			res = stepper.take_time_step(self)
-
-			# Increment time
-			t += stepper.dt
-			self.time = t
-
-			# Custom user function definition
-			self.custom_user_function(self)
-
-			# Print info
-			self.print_info(physics, res, self.itime, t, stepper.dt)
-
-			# Write data file
-			if (self.itime + 1) % write_interval == 0:
-				readwritedatafiles.write_data_file(self,
-						(self.itime + 1) // write_interval)
-
-			self.itime += 1
-
-		t1 = time.time()
-		print("\nWall clock time = %g seconds" % (t1 - t0))
-		print("--------------------------------------------------------" + \
-				"-----------------------")
-		self.wall_clock_time = t1 - t0
-
-		if write_final_solution:
-			readwritedatafiles.write_data_file(self, -1)
+		try:
+			try:
+				while self.itime < stepper.num_time_steps:
+					# Reset min and max state
+					self.max_state[:] = -np.inf
+					self.min_state[:] = np.inf
+
+					# Get time step size
+					with profiler.phase(profiling.TIME_STEP):
+						stepper.dt = stepper.get_time_step(stepper, self)
+
+					# Integrate in time
+					res = stepper.take_time_step(self)
+
+					# Increment time
+					t += stepper.dt
+					self.time = t
+
+					# Custom user function definition
+					self.custom_user_function(self)
+
+					# Print info
+					self.print_info(physics, res, self.itime, t, stepper.dt)
+
+					# Write data file
+					if (self.itime + 1) % write_interval == 0:
+						with profiler.phase(profiling.IO):
+							write_data_file(self,
+									(self.itime + 1) // write_interval)
+
+					profiler.end_time_step()
+					self.itime += 1
+			finally:
+				# Stop the residual workers or threads
+				if self.residual_pool is not None:
+					self.residual_pool.close()
+
+			# Flush data files that are still queued
+			if data_file_writer is not None:
+				with profiler.phase(profiling.IO):
+					data_file_writer.flush()
+
+			t1 = time.time()
+			print("\nWall clock time = %g seconds" % (t1 - t0))
+			if isinstance(stepper, stepper_defs.EmbeddedRK):
+				print("Accepted time steps = %d, rejected time steps = %d"
+						% (stepper.num_accepted, stepper.num_rejected))
+			print("----------------------------------------------------" + \
+					"---------------------------")
+			self.wall_clock_time = t1 - t0
+
+			if write_final_solution:
+				with profiler.phase(profiling.IO):
+					write_data_file(self, -1)
+
+			# Wait for the final data file to be written
+			if data_file_writer is not None:
+				with profiler.phase(profiling.IO):
+					data_file_writer.close()
+		except BaseException:
+			# Stop the data file writer if the solve was interrupted,
+			# without letting a failed write replace the original exception
+			if data_file_writer is not None:
+				try:
+					data_file_writer.close()
+				except Exception as e:
+					print("Suppressed data file writer error: %r" % (e))
+			raise
+
+		# Report the time spent in each phase
+		if profiler.enabled:
+			profiler.wall_clock_time = self.wall_clock_time
+			profiler.print_report()
+			if self.params["ProfileFile"] is not None:
+				profiler.write_json(self.params["ProfileFile"])
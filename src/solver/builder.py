@@ -0,0 +1,352 @@
+# ------------------------------------------------------------------------ #
+#
+#       quail: A lightweight discontinuous Galerkin code for
+#              teaching and prototyping
+#		<https://github.com/IhmeGroup/quail>
+#
+#		Copyright (C) 2020-2021
+#
+#       This program is distributed under the terms of the GNU
+#		General Public License v3.0. You should have received a copy
+#       of the GNU General Public License along with this program.
+#		If not, see <https://www.gnu.org/licenses/>.
+#
+# ------------------------------------------------------------------------ #
+
+# ------------------------------------------------------------------------ #
+#
+#       File : src/solver/builder.py
+#
+#       Contains functions for constructing the mesh, physics, and solver
+#       objects from the (processed) sections of an input deck. Used by the
+#       driver and when rebuilding a solver from a checkpoint file.
+#
+# ------------------------------------------------------------------------ #
+import copy
+import os
+
+import defaultparams as default_deck
+from general import ShapeType, SolverType, PhysicsType
+
+import meshing.common as mesh_common
+import meshing.gmsh as mesh_gmsh
+import meshing.meshbase as mesh_defs
+import meshing.tools as mesh_tools
+
+import physics.zerodimensional.zerodimensional as zerod
+import physics.euler.euler as euler
+import physics.navierstokes.navierstokes as navierstokes
+import physics.scalar.scalar as scalar
+import physics.chemistry.chemistry as chemistry
+
+import physics.navierstokes.tools as ns_tools
+
+import solver.DG as DG
+import solver.ADERDG as ADERDG
+
+
+# Names of the input deck sections, in the order returned by read_inputs
+# in src/quail
+DECK_SECTIONS = ["Restart", "TimeStepping", "Numerics", "Mesh", "Physics",
+		"InitialCondition", "ExactSolution", "BoundaryConditions",
+		"SourceTerms", "Output"]
+
+
+def create_mesh(mesh_params):
+	'''
+	This function creates the mesh object based on the input parameters.
+
+	Inputs:
+	-------
+		mesh_params: mesh parameters from the input deck
+
+	Outputs:
+	--------
+		mesh: mesh object
+	'''
+	# Reuse processed mesh if cached
+	cache_file = mesh_tools.get_mesh_cache_file(mesh_params)
+	if cache_file is not None and os.path.isfile(cache_file):
+		mesh = mesh_defs.Mesh()
+		mesh.load(cache_file)
+		print("Mesh loaded from %s" % (cache_file))
+		return mesh
+
+	if mesh_params["File"] is not None and \
+			mesh_params["File"].endswith(".qmesh"):
+		# quail mesh file
+		mesh = mesh_defs.Mesh()
+		mesh.load(mesh_params["File"])
+	elif mesh_params["File"] is not None:
+		# Gmsh file
+		mesh = mesh_gmsh.import_gmsh_mesh(mesh_params["File"])
+	else:
+		# Create our own mesh
+
+		# Unpack
+		shape = ShapeType[mesh_params["ElementShape"]]
+		xmin = mesh_params["xmin"]
+		xmax = mesh_params["xmax"]
+		num_elems_x = mesh_params["NumElemsX"]
+		num_elems_y = mesh_params["NumElemsY"]
+		ymin = mesh_params["ymin"]
+		ymax = mesh_params["ymax"]
+
+		# Create mesh
+		if shape is ShapeType.Segment:
+			# 1D - segments
+			mesh = mesh_common.mesh_1D(num_elems=num_elems_x,
+					xmin=xmin, xmax=xmax)
+		else:
+			# 2D - quads or tris
+
+			# First start with quads
+			mesh = mesh_common.mesh_2D(num_elems_x=num_elems_x,
+					num_elems_y=num_elems_y, xmin=xmin, xmax=xmax,
+					ymin=ymin, ymax=ymax)
+			# Split into tris if required
+			if shape is ShapeType.Triangle:
+				mesh = mesh_common.split_quadrils_into_tris(mesh)
+
+	''' Impose periodicity if requested '''
+	pb_x = mesh_params["PeriodicBoundariesX"]
+	pb_y = mesh_params["PeriodicBoundariesY"]
+
+	# Store periodic boundaries in pb
+	pb = [None]*4
+	if pb_x != []:
+		pb[:2] = pb_x
+	if pb_y != []:
+		pb[2:] = pb_y
+
+	# Make periodic
+	if pb != [None]*4:
+		mesh_tools.make_periodic_translational(mesh, x1=pb[0], x2=pb[1],
+				y1=pb[2], y2=pb[3])
+
+	# Store processed mesh for later runs
+	if cache_file is not None:
+		os.makedirs(mesh_params["CacheDirectory"], exist_ok=True)
+		mesh.save(cache_file)
+
+	return mesh
+
+
+def set_physics(mesh, physics_type):
+	'''
+	This function creates the physics object based on the input parameters.
+
+	Inputs:
+	-------
+		mesh: mesh object
+		physics_type: desired physics type
+
+	Outputs:
+	--------
+		physics: physics object
+	'''
+	ndims = mesh.ndims
+
+	if PhysicsType[physics_type] == PhysicsType.ConstAdvScalar and \
+			ndims == 1:
+	    physics_class = scalar.ConstAdvScalar1D
+	elif PhysicsType[physics_type] == PhysicsType.ConstAdvScalar and \
+			ndims == 2:
+	    physics_class = scalar.ConstAdvScalar2D
+	elif PhysicsType[physics_type] == PhysicsType.ConstAdvDiffScalar and \
+			ndims == 1:
+		physics_class = scalar.ConstAdvDiffScalar1D
+	elif PhysicsType[physics_type] == PhysicsType.ConstAdvDiffScalar and \
+			ndims == 2:
+		physics_class = scalar.ConstAdvDiffScalar2D
+	elif PhysicsType[physics_type] == PhysicsType.Burgers and ndims == 1:
+	    physics_class = scalar.Burgers1D
+	elif PhysicsType[physics_type] == PhysicsType.ModelProblem:
+		physics_class = zerod.ModelProblem
+	elif PhysicsType[physics_type] == PhysicsType.ModelPSRScalar:
+		physics_class = zerod.ModelPSRScalar
+	elif PhysicsType[physics_type] == PhysicsType.MultispeciesPSR:
+		physics_class = zerod.MultispeciesPSR
+	elif PhysicsType[physics_type] == PhysicsType.Pendulum:
+		physics_class = zerod.Pendulum
+	elif PhysicsType[physics_type] == PhysicsType.Euler and ndims == 1:
+	    physics_class = euler.Euler1D
+	elif PhysicsType[physics_type] == PhysicsType.Euler and ndims == 2:
+	    physics_class = euler.Euler2D
+	elif PhysicsType[physics_type] == PhysicsType.NavierStokes and ndims == 1:
+		physics_class = navierstokes.NavierStokes1D
+	elif PhysicsType[physics_type] == PhysicsType.NavierStokes and ndims == 2:
+		physics_class = navierstokes.NavierStokes2D
+	elif PhysicsType[physics_type] == PhysicsType.Chemistry and ndims ==1:
+		physics_class = chemistry.Chemistry1D
+	else:
+	    raise NotImplementedError
+
+	physics = physics_class()
+
+	return physics
+
+
+def create_physics(mesh, physics_params, IC_params, exact_params,
+		BC_params, source_params):
+	'''
+	This function creates the physics object and sets the initial
+	condition, exact solution, boundary conditions, and source terms.
+
+	Inputs:
+	-------
+		mesh: mesh object
+		physics_params: physics parameters from the input deck
+		IC_params: initial condition parameters from the input deck
+		exact_params: exact solution parameters from the input deck
+		BC_params: boundary condition parameters from the input deck
+		source_params: source term parameters from the input deck
+
+	Outputs:
+	--------
+		physics: physics object
+
+	Notes:
+	------
+		None of the input dicts are modified.
+	'''
+	# Create physics object
+	physics = set_physics(mesh, physics_params["Type"])
+	# Add tranport if using Navier-Stokes
+	physics.get_transport = ns_tools.set_transport(physics_params["Transport"])
+	# Set parameters
+	pparams = physics_params.copy()
+	pparams.pop("Type") # don't pass this key
+	pparams.pop("Transport") # don't pass this key
+	conv_flux_type = pparams.pop("ConvFluxNumerical")
+	diff_flux_type = pparams.pop("DiffFluxNumerical")
+
+	physics.set_conv_num_flux(conv_flux_type)
+	physics.set_diff_num_flux(diff_flux_type)
+	physics.set_physical_params(**pparams)
+
+	# Initial condition
+	iparams = IC_params.copy()
+	IC_type = iparams.pop("Function")
+	physics.set_IC(IC_type=IC_type, **iparams)
+
+	# Exact solution
+	if bool(exact_params): # checks if dictionary is not empty
+		eparams = exact_params.copy()
+		exact_type = eparams.pop("Function")
+		physics.set_exact(exact_type=exact_type, **eparams)
+
+	# Boundary conditions
+	physics.BCs = dict.fromkeys(mesh.boundary_groups.keys())
+
+	for bname, bparams in BC_params.items():
+		bparams = bparams.copy()
+		BC_type = bparams.pop("BCType")
+
+		try:
+			# Function required for StateAll
+			fcn_type = bparams.pop("Function")
+			physics.set_BC(bname, BC_type, fcn_type, **bparams)
+		except KeyError:
+			physics.set_BC(bname, BC_type, **bparams)
+
+	# Source terms
+	for sparams in source_params.values():
+		sparams = sparams.copy()
+		sname = sparams.pop("Function")
+		physics.set_source(source_type=sname, **sparams)
+
+	return physics
+
+
+def create_solver(solver_params, physics, mesh):
+	'''
+	This function creates the solver object.
+
+	Inputs:
+	-------
+		solver_params: merged time stepping, numerics, and output
+			parameters, as well as the solver type ("Solver") and restart
+			file ("RestartFile")
+		physics: physics object
+		mesh: mesh object
+
+	Outputs:
+	--------
+		solver: solver object
+	'''
+	solver_params = solver_params.copy()
+	solver_type = solver_params.pop("Solver")
+	if SolverType[solver_type] is SolverType.DG:
+		solver = DG.DG(solver_params, physics, mesh)
+	elif SolverType[solver_type] is SolverType.ADERDG:
+		solver = ADERDG.ADERDG(solver_params, physics, mesh)
+	else:
+		raise NotImplementedError
+
+	return solver
+
+
+def build_solver(restart_params, stepper_params, numerics_params,
+		mesh_params, physics_params, IC_params, exact_params, BC_params,
+		source_params, output_params):
+	'''
+	This function constructs the mesh, physics, and solver objects from the
+	sections of the input deck.
+
+	Inputs:
+	-------
+		restart_params, ..., output_params: input deck sections (see
+			read_inputs in src/quail)
+
+	Outputs:
+	--------
+		solver: solver object
+
+	Notes:
+	------
+		A copy of the input deck sections is stored in solver.deck_params
+		so that data files can record how the solver was built.
+	'''
+	deck_params = dict(zip(DECK_SECTIONS, copy.deepcopy([restart_params,
+			stepper_params, numerics_params, mesh_params, physics_params,
+			IC_params, exact_params, BC_params, source_params,
+			output_params])))
+
+	# Mesh
+	mesh = create_mesh(mesh_params)
+
+	# Physics
+	physics = create_physics(mesh, physics_params, IC_params, exact_params,
+			BC_params, source_params)
+
+	# Merge solver-related params
+	solver_params = {**stepper_params, **numerics_params, **output_params}
+	solver_params["RestartFile"] = restart_params["File"]
+	solver = create_solver(solver_params, physics, mesh)
+	solver.deck_params = deck_params
+
+	return solver
+
+
+def build_solver_from_defaults(**deck_sections):
+	'''
+	This function constructs the mesh, physics, and solver objects from
+	the default input deck, with the given sections updated.
+
+	Inputs:
+	-------
+		deck_sections: keyword arguments mapping a section name (see
+			DECK_SECTIONS) to the parameters that overwrite its defaults
+
+	Outputs:
+	--------
+		solver: solver object
+	'''
+	sections = []
+	for name in DECK_SECTIONS:
+		section = copy.deepcopy(getattr(default_deck, name))
+		section.update(deck_sections.get(name, {}))
+		sections.append(section)
+
+	return build_solver(*sections)
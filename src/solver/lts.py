@@ -0,0 +1,405 @@
+# ------------------------------------------------------------------------ #
+#
+#       quail: A lightweight discontinuous Galerkin code for
+#              teaching and prototyping
+#		<https://github.com/IhmeGroup/quail>
+#
+#		Copyright (C) 2020-2021
+#
+#       This program is distributed under the terms of the GNU
+#		General Public License v3.0. You should have received a copy
+#       of the GNU General Public License along with this program.
+#		If not, see <https://www.gnu.org/licenses/>.
+#
+# ------------------------------------------------------------------------ #
+
+# ------------------------------------------------------------------------ #
+#
+#       File : src/solver/lts.py
+#
+#       Contains the classes and functions for local time stepping (LTS)
+#       with the ADER-DG solver. Elements are clustered into levels whose
+#       time steps are power-of-two multiples of the smallest one.
+#
+# ------------------------------------------------------------------------ #
+import copy
+import numpy as np
+
+import numerics.helpers.helpers as helpers
+import solver.ader_tools as solver_tools
+import solver.parallel as parallel
+
+
+# Attributes of the (space and space-time) element helpers, ADER helpers,
+# and (space and space-time) face helpers with one entry per element or
+# face, in addition to those partitioned by the parallel residual
+ELEM_HELPER_ATTRS = parallel.ELEM_HELPER_ATTRS + ["Uq", "Fq", "Sq"]
+ADER_HELPER_ATTRS = ["SMS_elems", "iMM_elems", "jac_elems", "ijac_elems",
+		"djac_elems", "x_elems"]
+INT_FACE_HELPER_ATTRS = parallel.INT_FACE_HELPER_ATTRS + ["faceL_IDs_st",
+		"faceR_IDs_st"]
+BFACE_HELPER_ATTRS = parallel.BFACE_HELPER_ATTRS + ["face_IDs_st"]
+
+
+def get_time_step_levels(dt_elems, num_levels, elemL_IDs, elemR_IDs):
+	'''
+	This function assigns each element to a time step level. Elements of
+	level l take time steps of size 2**l*dt_min, where dt_min is the
+	smallest allowable time step of all elements.
+
+	Inputs:
+	-------
+		dt_elems: allowable time step of each element [num_elems]
+		num_levels: maximum number of levels
+		elemL_IDs: element IDs to the left of each interior face
+			[num_interior_faces]
+		elemR_IDs: element IDs to the right of each interior face
+			[num_interior_faces]
+
+	Outputs:
+	--------
+		dt_min: smallest allowable time step
+		levels: level of each element [num_elems]
+
+	Notes:
+	------
+		The levels of neighboring elements are made to differ by at most
+		one by lowering the levels of elements next to much finer ones.
+	'''
+	dt_min = np.min(dt_elems)
+	levels = np.floor(np.log2(dt_elems/dt_min)).astype(int)
+	levels = np.clip(levels, 0, num_levels - 1)
+
+	# Guard against round-off in the logarithm
+	levels[dt_min*2.**levels > dt_elems] -= 1
+	levels = np.maximum(levels, 0)
+
+	# Neighbors differ by at most one level
+	while True:
+		new_levels = levels.copy()
+		np.minimum.at(new_levels, elemL_IDs, levels[elemR_IDs] + 1)
+		np.minimum.at(new_levels, elemR_IDs, levels[elemL_IDs] + 1)
+		if np.array_equal(new_levels, levels):
+			break
+		levels = new_levels
+
+	return dt_min, levels # [num_elems]
+
+
+def get_time_restriction_matrices(basis_st, order, ratio):
+	'''
+	This function computes the matrices that restrict a space-time
+	polynomial on a time interval to each of its subintervals of equal
+	size. The space-time basis is a tensor product in time, so the
+	restriction is exact.
+
+	Inputs:
+	-------
+		basis_st: space-time basis object
+		order: solution order
+		ratio: number of subintervals
+
+	Outputs:
+	--------
+		P: restriction matrices, such that P[j] @ Up gives the
+			coefficients of Up on the j-th subinterval [ratio, nb_st, nb_st]
+	'''
+	quad_pts, _ = basis_st.get_quadrature_data(order*2)
+	basis_val = basis_st.get_values(quad_pts) # [nq, nb_st]
+
+	P = np.empty([ratio, basis_val.shape[1], basis_val.shape[1]])
+	for j in range(ratio):
+		# Reference time of the subinterval in that of the interval
+		sub_pts = quad_pts.copy()
+		sub_pts[:, -1] = (2.*j + 1. + quad_pts[:, -1])/ratio - 1.
+
+		# The restricted polynomial is in the span of the basis, so the
+		# least-squares fit at the quadrature points is exact
+		P[j] = np.linalg.lstsq(basis_val, basis_st.get_values(sub_pts),
+				rcond=None)[0]
+
+	return P # [ratio, nb_st, nb_st]
+
+
+def get_subset_scatter_plan(targets, subset):
+	'''
+	This function computes a scatter plan (see helpers.get_scatter_plan)
+	for a subset of the contributions.
+
+	Inputs:
+	-------
+		targets: target element index of each contribution in the subset
+		subset: indices of the contributions in the subset
+
+	Outputs:
+	--------
+		plan: scatter plan whose sources index all contributions
+	'''
+	return [(targets_slot, subset[sources]) for targets_slot, sources
+			in helpers.get_scatter_plan(targets)]
+
+
+class Cluster(object):
+	'''
+	This class contains the elements of one time step level and the faces
+	whose fluxes they compute, together with copies of the solver whose
+	helpers are restricted to them. Interior faces between two levels are
+	evaluated by the finer level, on each of its time steps, with the
+	predicted solution of the coarser neighbor restricted to that time
+	step. The contributions to the coarser neighbor are accumulated in a
+	flux buffer, which is added to its residual at the end of its own time
+	step, so that the scheme is conservative.
+
+	Attributes:
+	-----------
+	level: int
+		time step level; the time step is 2**level times the smallest
+		one
+	ratio: int
+		2**level
+	elem_IDs: numpy array
+		IDs of the elements of this level [ne]
+	int_face_IDs: numpy array
+		interior faces evaluated by this level, i.e., whose finer
+		neighbor is of this level [nf]
+	coarse_sides: list
+		(level, indices of the contributions, element IDs) of the
+		neighbors across the interior faces in each coarser level; the
+		contributions are ordered as left elements followed by right
+		elements [2*nf]
+	int_face_plan: list
+		scatter plan for the interior face contributions to the elements
+		of this level (local indices)
+	coarse_plan: list
+		scatter plan for the interior face contributions to the flux
+		buffer of coarser elements (global element IDs)
+	coarse_scale: numpy array
+		factor of each interior face contribution, i.e., 1 for the
+		elements of this level and the ratio of the time steps for
+		coarser elements [2*nf, 1, 1]
+	restriction_matrices: dict
+		time restriction matrices (see get_time_restriction_matrices) for
+		each difference between the levels of coarser neighbors and this
+		level
+	bface_plans: list
+		scatter plans for the boundary face contributions to the elements
+		of this level in each boundary group (local indices)
+	stepper: stepper object
+		copy of the stepper with the time step of this level
+	elem_solver: solver object
+		copy of the solver whose element helpers are restricted to the
+		elements of this level
+	face_solver: solver object
+		copy of the solver whose face helpers are restricted to the faces
+		evaluated by this level
+	'''
+	def __init__(self, solver, levels, level):
+		mesh = solver.mesh
+		num_elems = mesh.num_elems
+		physics = solver.physics
+		int_face_helpers = solver.int_face_helpers
+		bface_helpers = solver.bface_helpers
+		elemL_IDs = int_face_helpers.elemL_IDs
+		elemR_IDs = int_face_helpers.elemR_IDs
+
+		self.level = level
+		self.ratio = 2**level
+		self.elem_IDs = np.where(levels == level)[0]
+		local_IDs = np.full(num_elems, -1)
+		local_IDs[self.elem_IDs] = np.arange(self.elem_IDs.shape[0])
+
+		# Interior faces evaluated by this level
+		self.int_face_IDs = np.where(np.minimum(levels[elemL_IDs],
+				levels[elemR_IDs]) == level)[0]
+		side_IDs = np.concatenate([elemL_IDs[self.int_face_IDs],
+				elemR_IDs[self.int_face_IDs]])
+		side_levels = levels[side_IDs]
+		own = np.where(side_levels == level)[0]
+		self.int_face_plan = get_subset_scatter_plan(local_IDs[side_IDs[own]],
+				own)
+		coarse = np.where(side_levels > level)[0]
+		self.coarse_plan = get_subset_scatter_plan(side_IDs[coarse], coarse)
+		self.coarse_scale = 2.**(level - side_levels).reshape(-1, 1, 1)
+		self.coarse_sides = []
+		for coarse_level in np.unique(side_levels[coarse]):
+			idx = np.where(side_levels == coarse_level)[0]
+			self.coarse_sides.append((int(coarse_level), idx, side_IDs[idx]))
+
+		# Boundary faces of the elements of this level
+		bface_idx = [np.where(levels[elem_IDs] == level)[0] for elem_IDs
+				in bface_helpers.elem_IDs]
+		self.bface_plans = [helpers.get_scatter_plan(
+				local_IDs[elem_IDs[idx]]) for elem_IDs, idx in
+				zip(bface_helpers.elem_IDs, bface_idx)]
+
+		# The time basis is otherwise created on first use, which may be
+		# by a copy of the element helpers
+		elem_helpers_st = solver.elem_helpers_st
+		if elem_helpers_st.basis_time is None:
+			_, elem_helpers_st.basis_time = solver_tools.ref_to_phys_time(
+					mesh, solver.time, 0., elem_helpers_st.quad_pts[:, -1:])
+
+		# The numerical flux functions store helper arrays
+		physics = copy.copy(physics)
+		physics.conv_flux_fcn = copy.copy(physics.conv_flux_fcn)
+		if physics.diff_flux_fcn:
+			physics.diff_flux_fcn = copy.copy(physics.diff_flux_fcn)
+		self.stepper = copy.copy(solver.stepper)
+		base_solver = copy.copy(solver)
+		base_solver.physics = physics
+		base_solver.stepper = self.stepper
+		base_solver.work_arrays = helpers.WorkArrays()
+
+		# Elements of this level
+		self.elem_solver = copy.copy(base_solver)
+		for name, attrs in [("elem_helpers", ELEM_HELPER_ATTRS),
+				("elem_helpers_st", ELEM_HELPER_ATTRS),
+				("ader_helpers", ADER_HELPER_ATTRS)]:
+			elem_helpers = copy.copy(getattr(solver, name))
+			for attr in attrs:
+				value = getattr(elem_helpers, attr, None)
+				if isinstance(value, np.ndarray) and value.ndim > 0 and \
+						value.shape[0] == num_elems:
+					setattr(elem_helpers, attr, value[self.elem_IDs])
+			setattr(self.elem_solver, name, elem_helpers)
+
+		# Faces evaluated by this level
+		self.face_solver = copy.copy(base_solver)
+		for name in ["int_face_helpers", "int_face_helpers_st"]:
+			face_helpers = copy.copy(getattr(solver, name))
+			for attr in INT_FACE_HELPER_ATTRS:
+				value = getattr(face_helpers, attr, None)
+				if value is not None:
+					setattr(face_helpers, attr, value[self.int_face_IDs])
+			setattr(self.face_solver, name, face_helpers)
+		for name in ["bface_helpers", "bface_helpers_st"]:
+			face_helpers = copy.copy(getattr(solver, name))
+			for attr in BFACE_HELPER_ATTRS:
+				value = getattr(face_helpers, attr, None)
+				if value is not None:
+					setattr(face_helpers, attr, [v[idx] for v, idx in
+							zip(value, bface_idx)])
+			setattr(self.face_solver, name, face_helpers)
+
+		# Same numerical flux helper sizes as in ADERDG.__init__
+		ns = physics.NUM_STATE_VARS
+		physics.conv_flux_fcn.alloc_helpers(np.zeros([
+				solver.int_face_helpers_st.quad_wts.shape[0], ns]))
+		if physics.diff_flux_fcn:
+			physics.diff_flux_fcn.alloc_helpers(np.zeros([
+					self.int_face_IDs.shape[0],
+					solver.int_face_helpers.quad_wts.shape[0], ns]))
+
+		# Restriction of the predicted solution of coarser neighbors
+		self.restriction_matrices = {coarse_level - level:
+				get_time_restriction_matrices(solver.basis_st, solver.order,
+				2**(coarse_level - level)) for coarse_level, _, _ in
+				self.coarse_sides}
+
+	def set_time(self, time, dt):
+		'''
+		Sets the start time and the size of the current time step of this
+		level.
+
+		Inputs:
+		-------
+			time: start time of the time step
+			dt: time step size
+		'''
+		self.elem_solver.time = time
+		self.face_solver.time = time
+		self.stepper.dt = dt
+
+	def calculate_predictor_step(self, W, Up):
+		'''
+		Calculates the predicted space-time solution of the elements of
+		this level over the current time step.
+
+		Inputs:
+		-------
+			W: solution array [num_elems, nb, ns]
+			Up: predicted space-time solution array [num_elems, nb_st, ns]
+
+		Outputs:
+		--------
+			Up: predicted space-time solution of the elements of this
+				level [ne, nb_st, ns]
+		'''
+		solver = self.elem_solver
+
+		return solver.calculate_predictor_step(solver, self.stepper.dt,
+				W[self.elem_IDs], Up[self.elem_IDs])
+
+	def get_residual(self, Up, substep, flux_buffer):
+		'''
+		Calculates the residual of the elements of this level over the
+		current time step. The contributions of the interior faces to
+		coarser elements are added to the flux buffer.
+
+		Inputs:
+		-------
+			Up: predicted space-time solution array of each element over
+				its current time step [num_elems, nb_st, ns]
+			substep: start of the current time step in units of the
+				smallest time step
+			flux_buffer: accumulated interior face contributions, scaled
+				to the time step of the receiving element
+				[num_elems, nb, ns]
+
+		Outputs:
+		--------
+			res: residual of the elements of this level [ne, nb, ns]
+			flux_buffer: contributions of this level added (modified)
+		'''
+		mesh = self.elem_solver.mesh
+		elem_solver = self.elem_solver
+		face_solver = self.face_solver
+		int_face_helpers = face_solver.int_face_helpers
+		bface_helpers = face_solver.bface_helpers
+		nb = flux_buffer.shape[1]
+		ns = flux_buffer.shape[2]
+
+		res = np.zeros([self.elem_IDs.shape[0], nb, ns])
+		if res.shape[0] == 0:
+			return res
+
+		# Same order as SolverBase.get_residual
+		for bgroup in mesh.boundary_groups.values():
+			elem_IDs = bface_helpers.elem_IDs[bgroup.number]
+			if elem_IDs.shape[0] == 0:
+				continue
+			resB = face_solver.get_boundary_face_residual(bgroup,
+					bface_helpers.face_IDs[bgroup.number], Up[elem_IDs],
+					np.zeros([elem_IDs.shape[0], nb, ns]))
+			helpers.scatter_add(res, self.bface_plans[bgroup.number],
+					-resB)
+
+		elem_solver.get_element_residual(Up[self.elem_IDs], res)
+
+		nf = self.int_face_IDs.shape[0]
+		if nf == 0:
+			return res
+
+		# Restrict the predicted solution of coarser neighbors to the
+		# current time step
+		U = np.concatenate([Up[int_face_helpers.elemL_IDs],
+				Up[int_face_helpers.elemR_IDs]])
+		for coarse_level, idx, elem_IDs in self.coarse_sides:
+			P = self.restriction_matrices[coarse_level - self.level]
+			j = (substep % 2**coarse_level)//self.ratio
+			U[idx] = np.matmul(P[j], Up[elem_IDs])
+
+		RL, RR, RL_diff, RR_diff = face_solver.get_interior_face_residual(
+				int_face_helpers.faceL_IDs, int_face_helpers.faceR_IDs,
+				U[:nf], U[nf:])
+		R = np.concatenate([-RL, RR])
+		helpers.scatter_add(res, self.int_face_plan, R)
+		has_diff = np.ndim(RL_diff) > 0
+		if has_diff:
+			R_diff = np.concatenate([RL_diff, RR_diff])
+			helpers.scatter_add(res, self.int_face_plan, R_diff)
+			R += R_diff
+		helpers.scatter_add(flux_buffer, self.coarse_plan,
+				R*self.coarse_scale)
+
+		return res # [ne, nb, ns]
@@ -0,0 +1,739 @@
+# ------------------------------------------------------------------------ #
+#
+#       quail: A lightweight discontinuous Galerkin code for
+#              teaching and prototyping
+#		<https://github.com/IhmeGroup/quail>
+#
+#		Copyright (C) 2020-2021
+#
+#       This program is distributed under the terms of the GNU
+#		General Public License v3.0. You should have received a copy
+#       of the GNU General Public License along with this program.
+#		If not, see <https://www.gnu.org/licenses/>.
+#
+# ------------------------------------------------------------------------ #
+
+# ------------------------------------------------------------------------ #
+#
+#       File : src/solver/parallel.py
+#
+#       Contains classes for evaluating the residual in parallel by
+#       partitioning the elements and faces.
+#
+# ------------------------------------------------------------------------ #
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+import os
+
+import errors
+from general import ParallelismType
+
+import numerics.helpers.helpers as helpers
+
+
+# Partition boundaries are rounded to multiples of this number of items so
+# that every element/face keeps the same memory alignment as in the serial
+# arrays. Some numpy kernels (e.g. small dot products) take different code
+# paths depending on the alignment of their operands, so this is needed
+# for the partitioned residual to be identical to the serial one.
+ALIGNMENT = 8
+
+# Approximate size of the per-core cache (in bytes) that the automatic
+# block size of the thread pool aims to fill with the temporaries of one
+# block
+BLOCK_CACHE_SIZE = 1 << 20
+
+# Attributes of the element helpers with one entry per element
+ELEM_HELPER_ATTRS = ["basis_phys_grad_elems", "jac_elems", "ijac_elems",
+		"djac_elems", "x_elems", "iMM_elems", "vol_elems"]
+# Attributes of the interior face helpers with one entry per interior face.
+# The face lengths are not partitioned since the diffusive flux functions
+# index them by element ID.
+INT_FACE_HELPER_ATTRS = ["normals_int_faces", "ijacL_elems", "ijacR_elems",
+		"elemL_IDs", "elemR_IDs", "faceL_IDs", "faceR_IDs"]
+# Attributes of the boundary face helpers with one array per boundary group
+# and one entry per boundary face in each array. The face lengths are not
+# partitioned for the same reason as above.
+BFACE_HELPER_ATTRS = ["elem_IDs", "face_IDs", "normals_bgroups",
+		"x_bgroups", "ijac_bgroups"]
+
+
+def get_num_workers(num_workers, num_elems):
+	'''
+	This function returns the number of workers to use.
+
+	Inputs:
+	-------
+		num_workers: requested number of workers (if 0, the number of
+			available CPUs)
+		num_elems: number of elements
+
+	Outputs:
+	--------
+		num_workers: number of workers (at least 1 and at most the number
+			of element blocks of size ALIGNMENT)
+	'''
+	if num_workers <= 0:
+		try:
+			num_workers = len(os.sched_getaffinity(0))
+		except AttributeError:
+			num_workers = os.cpu_count()
+
+	max_workers = -(-num_elems//ALIGNMENT)
+
+	return max(1, min(num_workers, max_workers))
+
+
+def get_block_size(block_size, solver):
+	'''
+	This function returns the number of elements per block for the thread
+	pool.
+
+	Inputs:
+	-------
+		block_size: requested block size (if 0, chosen such that the
+			largest per-element temporaries of a block, i.e., the physical
+			basis gradients, the state and its gradient, and the fluxes at
+			the quadrature points, fit in BLOCK_CACHE_SIZE bytes)
+		solver: solver object
+
+	Outputs:
+	--------
+		block_size: block size (a positive multiple of ALIGNMENT)
+	'''
+	if block_size <= 0:
+		nq = solver.elem_helpers.quad_wts.shape[0]
+		nb = solver.basis.nb
+		ns = solver.physics.NUM_STATE_VARS
+		ndims = solver.mesh.ndims
+		elem_bytes = 8*nq*(nb*ndims + ns + 2*ns*ndims)
+		block_size = BLOCK_CACHE_SIZE//elem_bytes
+
+	return max(ALIGNMENT, block_size//ALIGNMENT*ALIGNMENT)
+
+
+def partition_range(num_items, num_parts):
+	'''
+	This function splits a range of items (elements or faces) into
+	contiguous ranges of nearly equal size. Each range starts at a
+	multiple of ALIGNMENT; some ranges may be empty.
+
+	Inputs:
+	-------
+		num_items: number of items
+		num_parts: number of partitions
+
+	Outputs:
+	--------
+		ranges: list of (first, last + 1) item indices of each partition
+	'''
+	bounds = (np.arange(num_parts + 1)*num_items)//num_parts
+	bounds = np.minimum(-(-bounds//ALIGNMENT)*ALIGNMENT, num_items)
+
+	return [(int(bounds[i]), int(bounds[i+1])) for i in range(num_parts)]
+
+
+def restrict_scatter_plan(plan, first, last):
+	'''
+	This function restricts a scatter plan (see helpers.get_scatter_plan)
+	to the contributions to a contiguous range of elements. The order of
+	the contributions to each element is unchanged.
+
+	Inputs:
+	-------
+		plan: scatter plan
+		first: first element ID of the range
+		last: last element ID of the range + 1
+
+	Outputs:
+	--------
+		plan: restricted scatter plan
+	'''
+	restricted_plan = []
+	for targets, sources in plan:
+		owned = (targets >= first) & (targets < last)
+		if np.any(owned):
+			restricted_plan.append((targets[owned], sources[owned]))
+
+	return restricted_plan
+
+
+class PartitionResidual(object):
+	'''
+	This class evaluates one partition of the residual in two phases.
+	First, the face contributions of a contiguous range of interior faces
+	and of boundary faces (in each boundary group) are computed and stored
+	in arrays shared by all partitions. Second, once all face contributions
+	are available, the residual of a contiguous range of owned elements is
+	assembled: boundary face contributions, element contributions, and
+	interior face contributions are added in the same order as in the
+	serial residual, which makes the result identical to the serial one.
+
+	Each partition works on shallow copies of the solver and physics
+	objects with their own numerical flux functions and work arrays, so
+	different partitions can be evaluated concurrently.
+
+	Attributes:
+	-----------
+	parent: solver object
+		solver whose residual is evaluated; the time and source terms are
+		taken from it at each evaluation
+	elem_range: tuple
+		(first, last + 1) owned element IDs
+	int_face_range: tuple
+		(first, last + 1) interior faces evaluated by this partition
+	bface_ranges: list
+		(first, last + 1) boundary faces evaluated by this partition in
+		each boundary group
+	solver: solver object
+		shallow copy of the parent solver with its own physics object and
+		work arrays
+	face_solver: solver object
+		copy of solver whose face helpers are restricted to the faces
+		evaluated by this partition
+	elem_solver: solver object
+		copy of solver whose element helpers are restricted to the owned
+		elements
+	int_face_plan: list
+		scatter plan for the interior face contributions to the owned
+		elements
+	bface_plans: list
+		scatter plans for the boundary face contributions to the owned
+		elements in each boundary group
+	'''
+	def __init__(self, solver, part_num, num_parts):
+		num_elems = solver.mesh.num_elems
+		int_face_helpers = solver.int_face_helpers
+		bface_helpers = solver.bface_helpers
+		num_int_faces = int_face_helpers.elemL_IDs.shape[0]
+
+		self.parent = solver
+		self.elem_range = partition_range(num_elems, num_parts)[part_num]
+		self.int_face_range = partition_range(num_int_faces,
+				num_parts)[part_num]
+		self.bface_ranges = [partition_range(elem_IDs.shape[0],
+				num_parts)[part_num] for elem_IDs in bface_helpers.elem_IDs]
+		e0, e1 = self.elem_range
+		f0, f1 = self.int_face_range
+
+		# The numerical flux functions store helper arrays
+		physics = copy.copy(solver.physics)
+		physics.conv_flux_fcn = copy.copy(physics.conv_flux_fcn)
+		if physics.diff_flux_fcn:
+			physics.diff_flux_fcn = copy.copy(physics.diff_flux_fcn)
+		self.solver = copy.copy(solver)
+		self.solver.physics = physics
+		self.solver.work_arrays = helpers.WorkArrays()
+
+		# Owned elements
+		elem_helpers = copy.copy(solver.elem_helpers)
+		for attr in ELEM_HELPER_ATTRS:
+			value = getattr(elem_helpers, attr)
+			if value.ndim > 0 and value.shape[0] == num_elems:
+				setattr(elem_helpers, attr, value[e0:e1])
+		self.elem_solver = copy.copy(self.solver)
+		self.elem_solver.elem_helpers = elem_helpers
+
+		# Interior faces evaluated by this partition
+		int_face_helpers = copy.copy(int_face_helpers)
+		for attr in INT_FACE_HELPER_ATTRS:
+			setattr(int_face_helpers, attr,
+					getattr(int_face_helpers, attr)[f0:f1])
+
+		# Boundary faces evaluated by this partition
+		bface_helpers = copy.copy(bface_helpers)
+		for attr in BFACE_HELPER_ATTRS:
+			setattr(bface_helpers, attr, [value[b0:b1] for value, (b0, b1)
+					in zip(getattr(bface_helpers, attr), self.bface_ranges)])
+
+		self.face_solver = copy.copy(self.solver)
+		self.face_solver.int_face_helpers = int_face_helpers
+		self.face_solver.bface_helpers = bface_helpers
+
+		# Contributions to the owned elements
+		self.int_face_plan = restrict_scatter_plan(
+				solver.int_face_helpers.scatter_plan, e0, e1)
+		self.bface_plans = [restrict_scatter_plan(plan, e0, e1) for plan
+				in solver.bface_helpers.scatter_plans]
+
+		# Numerical flux helpers are sized by the number of interior faces
+		if f1 > f0:
+			nq = int_face_helpers.quad_wts.shape[0]
+			ns = physics.NUM_STATE_VARS
+			physics.conv_flux_fcn.alloc_helpers(np.zeros([f1 - f0, nq, ns]))
+			if physics.diff_flux_fcn:
+				physics.diff_flux_fcn.alloc_helpers(np.zeros([f1 - f0, nq,
+						ns]))
+
+	def update_from_parent(self):
+		'''
+		Copies the time and the active source terms of the parent solver,
+		which the shallow copies do not follow.
+		'''
+		for solver in [self.solver, self.face_solver, self.elem_solver]:
+			solver.time = self.parent.time
+		self.solver.physics.source_terms = self.parent.physics.source_terms
+
+	def get_face_residuals(self, U, R_int, R_int_diff, R_bfaces):
+		'''
+		Computes the face contributions of the faces evaluated by this
+		partition.
+
+		Inputs:
+		-------
+			U: solution array [num_elems, nb, ns]
+
+		Outputs:
+		--------
+			R_int: contributions of the interior faces to the left
+				elements followed by those to the right elements
+				[2*num_int_faces, nb, ns] (modified)
+			R_int_diff: additional diffusion contributions, same shape as
+				R_int (modified)
+			R_bfaces: contributions of the boundary faces of each boundary
+				group [nbf, nb, ns] (modified)
+			has_diff: whether the interior faces have additional diffusion
+				contributions (None if no interior faces were evaluated)
+		'''
+		self.update_from_parent()
+		solver = self.face_solver
+		int_face_helpers = solver.int_face_helpers
+		bface_helpers = solver.bface_helpers
+		f0, f1 = self.int_face_range
+		nf = R_int.shape[0]//2
+
+		# Boundary faces; without fluxes, the contributions depend on the
+		# current residual and are computed in get_residual instead
+		if solver.params["ConvFluxSwitch"]:
+			for bgroup in solver.mesh.boundary_groups.values():
+				b0, b1 = self.bface_ranges[bgroup.number]
+				if b1 == b0:
+					continue
+				elem_IDs = bface_helpers.elem_IDs[bgroup.number]
+				face_IDs = bface_helpers.face_IDs[bgroup.number]
+				R_bfaces[bgroup.number][b0:b1] = \
+						solver.get_boundary_face_residual(bgroup, face_IDs,
+						U[elem_IDs], np.zeros_like(U[elem_IDs]))
+
+		# Interior faces
+		if f1 == f0:
+			return None
+		RL, RR, RL_diff, RR_diff = solver.get_interior_face_residual(
+				int_face_helpers.faceL_IDs, int_face_helpers.faceR_IDs,
+				U[int_face_helpers.elemL_IDs], U[int_face_helpers.elemR_IDs])
+		R_int[f0:f1] = -RL
+		R_int[nf+f0:nf+f1] = RR
+		has_diff = bool(np.ndim(RL_diff) > 0)
+		if has_diff:
+			R_int_diff[f0:f1] = RL_diff
+			R_int_diff[nf+f0:nf+f1] = RR_diff
+
+		return has_diff
+
+	def get_residual(self, U, res, R_int, R_int_diff, R_bfaces, has_diff):
+		'''
+		Assembles the residual of the owned elements. Must be called after
+		get_face_residuals has been called for every partition.
+
+		Inputs:
+		-------
+			U: solution array [num_elems, nb, ns]
+			res: residual array initialized with the constant part of the
+				residual [num_elems, nb, ns]
+			R_int, R_int_diff, R_bfaces: face contributions (see
+				get_face_residuals)
+			has_diff: whether any partition has additional diffusion
+				contributions
+
+		Outputs:
+		--------
+			res: rows of the owned elements set
+			min_state: minimum values of the state variables in the owned
+				elements (only computed if the solver is verbose)
+			max_state: maximum values of the state variables in the owned
+				elements (only computed if the solver is verbose)
+		'''
+		self.update_from_parent()
+		solver = self.solver
+		elem_solver = self.elem_solver
+		bface_helpers = solver.bface_helpers
+		e0, e1 = self.elem_range
+		elem_solver.min_state = np.full_like(elem_solver.min_state, np.inf)
+		elem_solver.max_state = np.full_like(elem_solver.max_state,
+				-np.inf)
+		if e1 == e0:
+			return elem_solver.min_state, elem_solver.max_state
+
+		# Same order as SolverBase.get_residual
+		for bgroup in solver.mesh.boundary_groups.values():
+			plan = self.bface_plans[bgroup.number]
+			if solver.params["ConvFluxSwitch"]:
+				resB = R_bfaces[bgroup.number]
+			else:
+				# Only the rows of the owned elements are used
+				elem_IDs = bface_helpers.elem_IDs[bgroup.number]
+				resB = solver.get_boundary_face_residual(bgroup,
+						bface_helpers.face_IDs[bgroup.number], U[elem_IDs],
+						res[elem_IDs])
+			helpers.scatter_add(res, plan, -resB)
+
+		elem_solver.get_element_residual(U[e0:e1], res[e0:e1])
+
+		helpers.scatter_add(res, self.int_face_plan, R_int)
+		if has_diff:
+			helpers.scatter_add(res, self.int_face_plan, R_int_diff)
+
+		return elem_solver.min_state, elem_solver.max_state
+
+
+def run_worker(solver, part_num, num_parts, arrays, conn):
+	'''
+	This function is the main loop of a worker process. For each residual
+	evaluation, the parent process first sends the current time,
+	flux/source switches, and source terms, upon which the worker computes
+	its face contributions; it then sends whether there are additional
+	diffusion contributions, upon which the worker assembles the residual
+	of its elements. The worker stops when it receives None.
+
+	Inputs:
+	-------
+		solver: solver object (copy inherited from the parent process)
+		part_num: partition number
+		num_parts: number of partitions
+		arrays: dict of shared arrays (see ProcessResidualPool)
+		conn: connection to the parent process
+	'''
+	try:
+		partition = PartitionResidual(solver, part_num, num_parts)
+		conn.send(None)
+	except Exception as e:
+		conn.send(e)
+		return
+
+	U = arrays["U"]
+	res = arrays["res"]
+	R_int = arrays["R_int"]
+	R_int_diff = arrays["R_int_diff"]
+	R_bfaces = np.split(arrays["R_bfaces"], arrays["bface_offsets"])
+
+	while True:
+		msg = conn.recv()
+		if msg is None:
+			break
+		try:
+			if len(msg) > 1:
+				solver.time, conv_flux_switch, source_switch, \
+						source_terms = msg
+				solver.params["ConvFluxSwitch"] = conv_flux_switch
+				solver.params["SourceSwitch"] = source_switch
+				solver.physics.source_terms = source_terms
+				conn.send(partition.get_face_residuals(U, R_int,
+						R_int_diff, R_bfaces))
+			else:
+				has_diff, = msg
+				conn.send(partition.get_residual(U, res, R_int, R_int_diff,
+						R_bfaces, has_diff))
+		except Exception as e:
+			conn.send(e)
+
+
+def create_shared_array(shape):
+	'''
+	This function allocates a float array in shared memory.
+
+	Inputs:
+	-------
+		shape: array shape
+
+	Outputs:
+	--------
+		shm: SharedMemory object that owns the buffer
+		array: numpy array backed by the shared memory
+	'''
+	shm = shared_memory.SharedMemory(create=True,
+			size=max(int(np.prod(shape))*8, 1))
+	array = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+	return shm, array
+
+
+class ProcessResidualPool(object):
+	'''
+	This class evaluates the residual with a pool of worker processes, each
+	of which handles one partition (see PartitionResidual). The solution,
+	residual, and face contribution arrays are shared with the workers
+	through shared memory. The workers are forked from the current process,
+	so they start from a copy of the solver at the time the pool is
+	created. Only the time, the flux/source switches, and the source terms
+	are sent to the workers for each evaluation.
+
+	Attributes:
+	-----------
+	solver: solver object
+		solver whose residual is evaluated
+	arrays: dict
+		shared arrays: solution ("U"), residual ("res"), interior face
+		contributions ("R_int", "R_int_diff"), and boundary face
+		contributions of all boundary groups ("R_bfaces", split at
+		"bface_offsets")
+	shms: list
+		SharedMemory objects that own the shared arrays
+	processes: list
+		worker processes
+	conns: list
+		connections to the worker processes
+	closed: bool
+		True once the workers have been stopped
+	'''
+	def __init__(self, solver, num_workers):
+		try:
+			ctx = multiprocessing.get_context("fork")
+		except ValueError:
+			raise errors.IncompatibleError("Parallel residual evaluation " \
+					"with processes requires the fork start method")
+
+		num_workers = get_num_workers(num_workers, solver.mesh.num_elems)
+		ne, nb, ns = solver.state_coeffs.shape
+		num_int_faces = solver.int_face_helpers.elemL_IDs.shape[0]
+		num_bfaces = [elem_IDs.shape[0] for elem_IDs in
+				solver.bface_helpers.elem_IDs]
+
+		self.solver = solver
+		self.shms = []
+		self.arrays = {}
+		for name, shape in [("U", [ne, nb, ns]), ("res", [ne, nb, ns]),
+				("R_int", [2*num_int_faces, nb, ns]),
+				("R_int_diff", [2*num_int_faces, nb, ns]),
+				("R_bfaces", [sum(num_bfaces), nb, ns])]:
+			shm, self.arrays[name] = create_shared_array(shape)
+			self.shms.append(shm)
+		self.arrays["bface_offsets"] = np.cumsum(num_bfaces)[:-1]
+		self.processes = []
+		self.conns = []
+		self.closed = False
+
+		for part_num in range(num_workers):
+			conn, child_conn = ctx.Pipe()
+			process = ctx.Process(target=run_worker, args=(solver,
+					part_num, num_workers, self.arrays, child_conn),
+					daemon=True)
+			process.start()
+			child_conn.close()
+			self.processes.append(process)
+			self.conns.append(conn)
+
+		try:
+			self.gather()
+		except Exception:
+			self.close()
+			raise
+
+	def __getstate__(self):
+		# Processes and shared memory cannot be pickled; an unpickled pool
+		# is closed and gets recreated when needed
+		return {"closed" : True}
+
+	def send(self, msg):
+		'''
+		Sends a message to every worker and waits for their replies.
+
+		Inputs:
+		-------
+			msg: message
+
+		Outputs:
+		--------
+			replies: list of replies from the workers
+		'''
+		for conn in self.conns:
+			conn.send(msg)
+
+		return self.gather()
+
+	def gather(self):
+		'''
+		Waits for a reply from every worker and raises the first error.
+
+		Outputs:
+		--------
+			replies: list of replies from the workers
+		'''
+		replies = [conn.recv() for conn in self.conns]
+		for reply in replies:
+			if isinstance(reply, Exception):
+				raise reply
+
+		return replies
+
+	def get_residual(self, U, res):
+		'''
+		Evaluates the residual. Same inputs and outputs as
+		SolverBase.get_residual.
+		'''
+		solver = self.solver
+		stepper = solver.stepper
+		shared_U = self.arrays["U"]
+		shared_res = self.arrays["res"]
+
+		# Face contributions
+		shared_U[:] = U
+		replies = self.send((solver.time, solver.params["ConvFluxSwitch"],
+				solver.params["SourceSwitch"], solver.physics.source_terms))
+		has_diff = any(replies)
+
+		# Residual of each partition
+		if stepper.balance_const is None:
+			shared_res[:] = 0.
+		else:
+			shared_res[:] = stepper.balance_const
+		replies = self.send((has_diff,))
+
+		res[:] = shared_res
+
+		if solver.verbose:
+			for min_state, max_state in replies:
+				solver.min_state = np.minimum(solver.min_state, min_state)
+				solver.max_state = np.maximum(solver.max_state, max_state)
+
+		return res
+
+	def close(self):
+		'''
+		Stops the workers and releases the shared memory.
+		'''
+		if self.closed:
+			return
+		self.closed = True
+
+		for conn, process in zip(self.conns, self.processes):
+			if process.is_alive():
+				try:
+					conn.send(None)
+				except (BrokenPipeError, OSError):
+					pass
+			process.join()
+			conn.close()
+
+		self.arrays = {}
+		for shm in self.shms:
+			shm.close()
+			shm.unlink()
+
+
+class ThreadResidualPool(object):
+	'''
+	This class evaluates the residual in blocks of elements and faces (see
+	PartitionResidual) with a pool of threads. The blocks are small enough
+	for their temporaries to stay in cache, and the threads overlap the
+	numpy kernels of different blocks, which release the GIL.
+
+	Attributes:
+	-----------
+	solver: solver object
+		solver whose residual is evaluated
+	partitions: list
+		PartitionResidual object of each block
+	R_int: numpy array
+		interior face contributions [2*num_int_faces, nb, ns]
+	R_int_diff: numpy array
+		additional diffusion contributions of the interior faces
+		[2*num_int_faces, nb, ns]
+	R_bfaces: list
+		boundary face contributions of each boundary group [nbf, nb, ns]
+	executor: ThreadPoolExecutor object
+		thread pool
+	closed: bool
+		True once the threads have been stopped
+	'''
+	def __init__(self, solver, num_workers, block_size):
+		num_elems = solver.mesh.num_elems
+		block_size = get_block_size(block_size, solver)
+		num_blocks = -(-num_elems//block_size)
+		ne, nb, ns = solver.state_coeffs.shape
+		num_int_faces = solver.int_face_helpers.elemL_IDs.shape[0]
+		num_bfaces = [elem_IDs.shape[0] for elem_IDs in
+				solver.bface_helpers.elem_IDs]
+
+		self.solver = solver
+		self.partitions = [PartitionResidual(solver, part_num, num_blocks)
+				for part_num in range(num_blocks)]
+		self.R_int = np.zeros([2*num_int_faces, nb, ns])
+		self.R_int_diff = np.zeros_like(self.R_int)
+		self.R_bfaces = [np.zeros([nbf, nb, ns]) for nbf in num_bfaces]
+		self.executor = ThreadPoolExecutor(max_workers=min(
+				get_num_workers(num_workers, num_elems), num_blocks))
+		self.closed = False
+
+	def __getstate__(self):
+		# Threads cannot be pickled; an unpickled pool is closed and gets
+		# recreated when needed
+		return {"closed" : True}
+
+	def get_residual(self, U, res):
+		'''
+		Evaluates the residual. Same inputs and outputs as
+		SolverBase.get_residual.
+		'''
+		solver = self.solver
+		stepper = solver.stepper
+
+		# Face contributions; all blocks must be done before the residual
+		# is assembled
+		has_diff = list(self.executor.map(
+				lambda partition: partition.get_face_residuals(U,
+				self.R_int, self.R_int_diff, self.R_bfaces),
+				self.partitions))
+		has_diff = any(has_diff)
+
+		# Residual of each block
+		if stepper.balance_const is None:
+			res[:] = 0.
+		else:
+			res[:] = stepper.balance_const
+		min_max_states = list(self.executor.map(
+				lambda partition: partition.get_residual(U, res,
+				self.R_int, self.R_int_diff, self.R_bfaces, has_diff),
+				self.partitions))
+
+		if solver.verbose:
+			for min_state, max_state in min_max_states:
+				solver.min_state = np.minimum(solver.min_state, min_state)
+				solver.max_state = np.maximum(solver.max_state, max_state)
+
+		return res
+
+	def close(self):
+		'''
+		Stops the threads.
+		'''
+		if self.closed:
+			return
+		self.closed = True
+		self.executor.shutdown()
+
+
+def create_residual_pool(solver):
+	'''
+	This function creates the pool that evaluates the residual of the
+	solver according to its "ResidualParallelism" parameter.
+
+	Inputs:
+	-------
+		solver: solver object
+
+	Outputs:
+	--------
+		pool: ProcessResidualPool or ThreadResidualPool object
+	'''
+	params = solver.params
+	parallelism = ParallelismType[params["ResidualParallelism"]]
+	if parallelism is ParallelismType.Processes:
+		return ProcessResidualPool(solver, params["NumWorkers"])
+	elif parallelism is ParallelismType.Threads:
+		return ThreadResidualPool(solver, params["NumWorkers"],
+				params["ResidualBlockSize"])
+	else:
+		raise NotImplementedError
@@ -0,0 +1,215 @@
+# ------------------------------------------------------------------------ #
+#
+#       quail: A lightweight discontinuous Galerkin code for
+#              teaching and prototyping
+#		<https://github.com/IhmeGroup/quail>
+#
+#		Copyright (C) 2020-2021
+#
+#       This program is distributed under the terms of the GNU
+#		General Public License v3.0. You should have received a copy
+#       of the GNU General Public License along with this program.
+#		If not, see <https://www.gnu.org/licenses/>.
+#
+# ------------------------------------------------------------------------ #
+
+# ------------------------------------------------------------------------ #
+#
+#       File : src/solver/profiling.py
+#
+#       Contains the profiler used to record the time spent in each phase
+#       of the solve.
+#
+# ------------------------------------------------------------------------ #
+import contextlib
+import json
+import time
+
+
+# Names of the phases timed by the solver. Boundary faces and limiters are
+# timed per boundary group and per limiter, respectively, by appending the
+# name of the boundary group or limiter class after a "/".
+ELEMENT_RESIDUAL = "element_residual"
+INTERIOR_FACES = "interior_faces"
+BOUNDARY_FACES = "boundary_faces"
+PARALLEL_RESIDUAL = "parallel_residual"
+LIMITER = "limiter"
+TIME_STEP = "time_step"
+SOURCE_STEPPER = "source_stepper"
+ADER_PREDICTOR = "ader_predictor"
+IO = "io"
+
+# Returned by Profiler.phase when profiling is disabled
+NULL_PHASE = contextlib.nullcontext()
+
+
+class Phase(object):
+	'''
+	Context manager that adds the wall clock time spent inside it to the
+	given phase of a profiler. The phase may be re-entered while it is
+	active (e.g. a recursive residual evaluation), in which case only the
+	outermost entry is timed so that the time is not counted twice.
+	'''
+	def __init__(self, profiler, name):
+		self.profiler = profiler
+		self.name = name
+		self.start = 0.
+		self.depth = 0
+
+	def __enter__(self):
+		if self.depth == 0:
+			self.start = time.perf_counter()
+		self.depth += 1
+		return self
+
+	def __exit__(self, *exc_info):
+		self.depth -= 1
+		if self.depth == 0:
+			self.profiler.add(self.name, time.perf_counter() - self.start)
+
+
+class Profiler(object):
+	'''
+	Records the cumulative and per-time-step wall clock time spent in each
+	phase of the solve.
+
+	Attributes:
+	-----------
+	enabled: bool
+		if False, nothing is recorded
+	totals: dict
+		cumulative time spent in each phase (in seconds), including the
+		phases outside of the time loop (e.g. writing the initial and final
+		data files)
+	counts: dict
+		number of times each phase was entered (not counting re-entries
+		while the phase is active)
+	step_times: dict
+		time spent in each phase during each time step (in seconds)
+	num_time_steps: int
+		number of completed time steps
+	wall_clock_time: float
+		wall clock time of the time loop (in seconds)
+
+	Notes:
+	------
+		Phases can be nested (e.g. the residual phases inside the source
+		stepper of an ODE integrator), in which case the time is counted
+		in both phases. When the residual is evaluated in parallel, its
+		phases cannot be separated and the residual is timed as a single
+		phase.
+	'''
+	def __init__(self, enabled=False):
+		self.enabled = enabled
+		self.totals = {}
+		self.counts = {}
+		self.step_times = {}
+		self.num_time_steps = 0
+		self.wall_clock_time = 0.
+		self.phases = {}
+		self.current_step = {}
+
+	def phase(self, name):
+		'''
+		Returns a context manager that times the given phase.
+
+		Inputs:
+		-------
+			name: name of the phase
+
+		Outputs:
+		--------
+			phase: context manager
+		'''
+		if not self.enabled:
+			return NULL_PHASE
+		try:
+			return self.phases[name]
+		except KeyError:
+			phase = self.phases[name] = Phase(self, name)
+			return phase
+
+	def add(self, name, elapsed_time):
+		'''
+		Adds time to the given phase.
+
+		Inputs:
+		-------
+			name: name of the phase
+			elapsed_time: time spent in the phase (in seconds)
+		'''
+		self.totals[name] = self.totals.get(name, 0.) + elapsed_time
+		self.counts[name] = self.counts.get(name, 0) + 1
+		self.current_step[name] = self.current_step.get(name, 0.) + \
+				elapsed_time
+
+	def end_time_step(self):
+		'''
+		Stores the time spent in each phase during the current time step.
+		'''
+		if not self.enabled:
+			return
+		for name in self.totals:
+			# Phases first entered in this time step get zeros for the
+			# previous time steps
+			step_times = self.step_times.setdefault(name,
+					[0.]*self.num_time_steps)
+			step_times.append(self.current_step.get(name, 0.))
+		self.current_step.clear()
+		self.num_time_steps += 1
+
+	def get_summary(self):
+		'''
+		Gathers the recorded timings.
+
+		Outputs:
+		--------
+			summary: dict with the wall clock time, the number of time steps,
+				and the total time, number of calls, and per-time-step times
+				of each phase
+		'''
+		phases = {}
+		for name in sorted(self.totals):
+			phases[name] = {
+				"total" : self.totals[name],
+				"calls" : self.counts[name],
+				"step_times" : self.step_times.get(name, []),
+			}
+
+		return {
+			"wall_clock_time" : self.wall_clock_time,
+			"num_time_steps" : self.num_time_steps,
+			"phases" : phases,
+		}
+
+	def print_report(self):
+		'''
+		Prints the time spent in each phase to console.
+		'''
+		wall_clock_time = self.wall_clock_time
+		num_time_steps = max(self.num_time_steps, 1)
+
+		print("\nProfile (phases may be nested):")
+		print("%-32s %10s %8s %8s %12s %12s" % ("Phase", "Total [s]",
+				"%", "Calls", "Mean/step", "Max/step"))
+		for name, phase in self.get_summary()["phases"].items():
+			step_times = phase["step_times"]
+			max_step_time = max(step_times) if step_times else 0.
+			percent = 100.*phase["total"]/wall_clock_time if \
+					wall_clock_time > 0. else 0.
+			print("%-32s %10.4g %8.2f %8d %12.4g %12.4g" % (name,
+					phase["total"], percent, phase["calls"],
+					sum(step_times)/num_time_steps, max_step_time))
+		print("--------------------------------------------------------" + \
+				"-----------------------")
+
+	def write_json(self, fname):
+		'''
+		Writes the recorded timings (see get_summary) to a JSON file.
+
+		Inputs:
+		-------
+			fname: name of the JSON file
+		'''
+		with open(fname, "w") as fo:
+			json.dump(self.get_summary(), fo, indent=1)
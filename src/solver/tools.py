@@ -20,7 +20,10 @@
 #       Contains additional methods (tools) for the DG solver class
 #
 # ------------------------------------------------------------------------ #
+import hashlib
+import json
 import numpy as np
+import os
 import sys
 
 import general
@@ -52,7 +55,8 @@ def set_function_definitions(solver, params):
 			general.zero_function
 
 
-def calculate_volume_flux_integral(solver, elem_helpers, Fq):
+def calculate_volume_flux_integral(solver, elem_helpers, Fq, out=None,
+		work=None):
 	'''
 	Calculates the volume flux integral for the DG scheme
 
@@ -61,6 +65,8 @@ def calculate_volume_flux_integral(solver, elem_helpers, Fq):
 		solver: solver object
 		elem_helpers: helpers defined in ElemHelpers
 		Fq: flux array evaluated at the quadrature points [ne, nq, ns, ndims]
+		out: optional array in which to store the result [ne, nb, ns]
+		work: optional WorkArrays object for the temporary arrays
 
 	Outputs:
 	--------
@@ -71,17 +77,79 @@ def calculate_volume_flux_integral(solver, elem_helpers, Fq):
 	basis_phys_grad_elems = elem_helpers.basis_phys_grad_elems
 			# [ne, nq, nb, ndims]
 	djac_elems = elem_helpers.djac_elems # [ne, nq, 1]
+	if work is None:
+		work = helpers.WorkArrays()
 
 	# Calculate flux quadrature
-	F_quad = np.einsum('ijkl, jm, ijm -> ijkl', Fq, quad_wts, djac_elems)
-			# [ne, nq, ns, ndims]
-	# Calculate residual
-	res_elem = np.einsum('ijnl, ijkl -> ink', basis_phys_grad_elems, F_quad)
+	F_quad = np.multiply(Fq, quad_wts[..., np.newaxis],
+			out=work.get("volume_flux_integral/F_quad", Fq.shape))
+	F_quad *= djac_elems[..., np.newaxis] # [ne, nq, ns, ndims]
+	# Calculate residual as a sum of batched matrix products (one per
+	# dimension)
+	res_elem = np.matmul(np.swapaxes(basis_phys_grad_elems[..., 0], 1, 2),
+			F_quad[..., 0], out=out)
+	for l in range(1, F_quad.shape[3]):
+		res_elem += np.matmul(np.swapaxes(basis_phys_grad_elems[..., l],
+				1, 2), F_quad[..., l], out=work.get(
+				"volume_flux_integral/res_l", res_elem.shape))
 			# [ne, nb, ns]
 	return res_elem # [ne, nb, ns]
 
 
-def calculate_boundary_flux_integral(basis_val, quad_wts, Fq):
+def calculate_volume_flux_integral_sum_factorization(solver, elem_helpers,
+		Fq, out=None, work=None):
+	'''
+	Calculates the volume flux integral for the DG scheme using sum
+	factorization (tensor-product bases only). Same inputs and outputs as
+	calculate_volume_flux_integral.
+
+	Notes:
+	------
+		The flux is first transformed to reference space with the inverse
+		Jacobian; the reference basis gradient is then applied one
+		direction at a time.
+	'''
+	quad_wts = elem_helpers.quad_wts # [nq, 1]
+	djac_elems = elem_helpers.djac_elems # [ne, nq, 1]
+	ijac_elems = elem_helpers.ijac_elems # [ne, nq, ndims, ndims]
+	basis_val_1D = elem_helpers.basis_val_1D # [nq_1D, nb_1D]
+	basis_ref_grad_1D = elem_helpers.basis_ref_grad_1D # [nq_1D, nb_1D]
+	ne, nq, ns, ndims = Fq.shape
+	if work is None:
+		work = helpers.WorkArrays()
+
+	# Calculate flux quadrature
+	F_quad = np.multiply(Fq, quad_wts[..., np.newaxis],
+			out=work.get("volume_flux_integral/F_quad", Fq.shape))
+	F_quad *= djac_elems[..., np.newaxis] # [ne, nq, ns, ndims]
+	# Flux in reference space; the sums over the (few) physical directions
+	# are written out since einsum is slow for such short contractions
+	F_ref = work.get("volume_flux_integral/F_ref", [ndims, ne, nq, ns])
+	tmp = work.get("volume_flux_integral/tmp", [ne, nq, ns])
+	for r in range(ndims):
+		np.multiply(F_quad[..., 0], ijac_elems[:, :, r, 0, np.newaxis],
+				out=F_ref[r])
+		for l in range(1, ndims):
+			F_ref[r] += np.multiply(F_quad[..., l], ijac_elems[:, :, r, l,
+					np.newaxis], out=tmp)
+			# [ndims, ne, nq, ns]
+
+	# Calculate residual as a sum of tensor-product integrals (one per
+	# dimension)
+	for r in range(ndims):
+		mats = [basis_val_1D.T]*ndims
+		mats[r] = basis_ref_grad_1D.T
+		if r == 0:
+			res_elem = helpers.apply_tensor_product(mats, F_ref[r], out=out)
+		else:
+			res_elem += helpers.apply_tensor_product(mats, F_ref[r],
+					out=work.get("volume_flux_integral/res_l",
+					res_elem.shape))
+	return res_elem # [ne, nb, ns]
+
+
+def calculate_boundary_flux_integral(basis_val, quad_wts, Fq, out=None,
+		work=None):
 	'''
 	Calculates the boundary flux integral for the DG scheme
 
@@ -90,46 +158,66 @@ def calculate_boundary_flux_integral(basis_val, quad_wts, Fq):
 		basis_val: basis function for the interior element [nf, nq, nb]
 		quad_wts: quadrature weights [nq, 1]
 		Fq: flux array evaluated at the quadrature points [nf, nq, ns]
+		out: optional array in which to store the result [nf, nb, ns]
+		work: optional WorkArrays object for the temporary arrays
 
 	Outputs:
 	--------
 		resB: residual contribution (from boundary face) [nf, nb, ns]
 	'''
+	if work is None:
+		work = helpers.WorkArrays()
+
 	# Calculate flux quadrature
-	Fq_quad = np.einsum('ijk, jm -> ijk', Fq, quad_wts) # [nf, nq, ns]
+	Fq_quad = np.multiply(Fq, quad_wts, out=work.get(
+			"boundary_flux_integral/Fq_quad", Fq.shape)) # [nf, nq, ns]
 
 	# Calculate residual
-	resB = np.einsum('ijn, ijk -> ink', basis_val, Fq_quad) # [nf, nb, ns]
+	resB = np.matmul(np.swapaxes(basis_val, 1, 2), Fq_quad, out=out)
+			# [nf, nb, ns]
 
 	return resB # [nf, nb, ns]
 
 
-def calculate_boundary_flux_integral_sum(basis_ref_grad, quad_wts, Fq):
+def calculate_boundary_flux_integral_sum(basis_ref_grad, quad_wts, Fq,
+		out=None, work=None):
 	'''
 	Calculates the directional boundary flux integrals for diffusion fluxes
 
 	Inputs:
 	-------
 		basis_ref_grad: evaluated gradient of the basis function in 
-			reference space [nq, nb, ndims]
+			reference space [nf, nq, nb, ndims]
 		quad_wts: quadrature weights [nq, 1]
 		Fq: Direction diffusion flux contribution [nf, nq, ns, ndims]
+		out: optional array in which to store the result [nf, nb, ns]
+		work: optional WorkArrays object for the temporary arrays
 
 	Outputs:
 	--------
 		resB: residual contribution (from boundary face) [nf, nb, ns]
 	'''
+	if work is None:
+		work = helpers.WorkArrays()
 
 	# Calculate flux quadrature
-	Fq_quad = np.einsum('ijkl, jm -> ijkl', Fq, quad_wts) # [nf, nq, ns, ndims]
-
-	# Calculate residual
-	resB = np.einsum('ijnl, ijkl -> ink', basis_ref_grad, Fq_quad)
+	Fq_quad = np.multiply(Fq, quad_wts[..., np.newaxis], out=work.get(
+			"boundary_flux_integral_sum/Fq_quad", Fq.shape))
+			# [nf, nq, ns, ndims]
+
+	# Calculate residual as a sum of batched matrix products (one per
+	# dimension)
+	resB = np.matmul(np.swapaxes(basis_ref_grad[..., 0], 1, 2),
+			Fq_quad[..., 0], out=out)
+	for l in range(1, Fq_quad.shape[3]):
+		resB += np.matmul(np.swapaxes(basis_ref_grad[..., l], 1, 2),
+				Fq_quad[..., l], out=work.get(
+				"boundary_flux_integral_sum/res_l", resB.shape))
 
 	return resB # [nf, nb, ns]
 
 
-def calculate_source_term_integral(elem_helpers, Sq):
+def calculate_source_term_integral(elem_helpers, Sq, out=None, work=None):
 	'''
 	Calculates the source term volume integral for the DG scheme
 
@@ -137,6 +225,8 @@ def calculate_source_term_integral(elem_helpers, Sq):
 	-------
 		elem_helpers: helpers defined in ElemHelpers
 		Sq: source term array evaluated at the quadrature points [ne, nq, ns]
+		out: optional array in which to store the result [ne, nb, ns]
+		work: optional WorkArrays object for the temporary arrays
 
 	Outputs:
 	--------
@@ -146,13 +236,42 @@ def calculate_source_term_integral(elem_helpers, Sq):
 	quad_wts = elem_helpers.quad_wts # [nq, 1]
 	basis_val = elem_helpers.basis_val # [nq, nb]
 	djac_elems = elem_helpers.djac_elems # [ne, nq, 1]
+	if work is None:
+		work = helpers.WorkArrays()
 
 	# Calculate source term quadrature
-	Sq_quad = np.einsum('ijk, jm, ijm -> ijk', Sq, quad_wts, djac_elems)
-			# [ne, nq, ns]
+	Sq_quad = np.multiply(Sq, quad_wts, out=work.get(
+			"source_term_integral/Sq_quad", Sq.shape))
+	Sq_quad *= djac_elems # [ne, nq, ns]
 
 	# Calculate residual
-	res_elem = np.einsum('jn, ijk -> ink', basis_val, Sq_quad) # [ne, nb, ns]
+	res_elem = np.matmul(basis_val.T, Sq_quad, out=out) # [ne, nb, ns]
+
+	return res_elem # [ne, nb, ns]
+
+
+def calculate_source_term_integral_sum_factorization(elem_helpers, Sq,
+		out=None, work=None):
+	'''
+	Calculates the source term volume integral for the DG scheme using sum
+	factorization (tensor-product bases only). Same inputs and outputs as
+	calculate_source_term_integral.
+	'''
+	quad_wts = elem_helpers.quad_wts # [nq, 1]
+	djac_elems = elem_helpers.djac_elems # [ne, nq, 1]
+	basis_val_1D = elem_helpers.basis_val_1D # [nq_1D, nb_1D]
+	ndims = elem_helpers.quad_pts.shape[1]
+	if work is None:
+		work = helpers.WorkArrays()
+
+	# Calculate source term quadrature
+	Sq_quad = np.multiply(Sq, quad_wts, out=work.get(
+			"source_term_integral/Sq_quad", Sq.shape))
+	Sq_quad *= djac_elems # [ne, nq, ns]
+
+	# Calculate residual
+	res_elem = helpers.apply_tensor_product([basis_val_1D.T]*ndims, Sq_quad,
+			out=out) # [ne, nb, ns]
 
 	return res_elem # [ne, nb, ns]
 
@@ -227,7 +346,7 @@ def calculate_artificial_viscosity_integral(physics, elem_helpers, Uc, av_param,
 	# Compute dissipation scaling
 	epsilon = av_param *  np.einsum('ij, il -> ijl', f, h_tilde**3)
 	# Calculate integral, with state coeffs factored out
-	integral = np.einsum('ijm, ijpm, ijnm, jx, ijx -> ipn', epsilon,
+	integral = helpers.einsum('ijm, ijpm, ijnm, jx, ijx -> ipn', epsilon,
 				basis_phys_grad_elems, basis_phys_grad_elems, quad_wts,
 				djac_elems)
 	# Calculate residual
@@ -275,10 +394,9 @@ def mult_inv_mass_matrix(mesh, solver, dt, res):
 	Outputs:
 		U: solution array
 	'''
-	physics = solver.physics
 	iMM_elems = solver.elem_helpers.iMM_elems
 
-	return dt*np.einsum('ijk, ikl -> ijl', iMM_elems, res)
+	return dt*np.matmul(iMM_elems, res)
 
 
 def L2_projection(mesh, iMM, basis, quad_pts, quad_wts, f, U):
@@ -385,3 +503,225 @@ def update_progress(progress):
 			int(round(progress*100)), status) + reset_color
 	sys.stdout.write(text)
 	sys.stdout.flush()
+
+
+# Version of the helper cache format; bump whenever the contents of the
+# helper classes change so that stale cache files are not reused
+HELPER_CACHE_VERSION = 5
+
+# Attributes of basis objects that are set as a side effect of computing
+# the helpers and that are relied upon afterwards
+BASIS_CACHE_ATTRS = ["basis_val", "basis_ref_grad", "basis_phys_grad"]
+
+
+def get_helpers_cache_file(solver, extra_inputs=()):
+	'''
+	Returns the name of the helper cache file for the given solver, or
+	None if helper caching is disabled. The file name is a hash of all
+	inputs that determine the precomputed helpers: the mesh connectivity
+	and coordinates, the solution and geometric bases, the solution
+	order, the quadrature settings, and the physics-dependent quadrature
+	order.
+
+	Inputs:
+	-------
+		solver: solver object
+		extra_inputs: [OPTIONAL] additional solver-specific inputs to
+			include in the hash
+
+	Outputs:
+	--------
+		fname: cache file name (None if caching is disabled)
+	'''
+	cache_dir = solver.params["HelperCacheDirectory"]
+	if cache_dir is None:
+		return None
+
+	mesh = solver.mesh
+	physics = solver.physics
+	basis = solver.basis
+	params = solver.params
+	order = solver.order
+
+	h = hashlib.sha1()
+	def update(*items):
+		for item in items:
+			if isinstance(item, np.ndarray):
+				item = np.ascontiguousarray(item)
+				h.update(repr((item.dtype.str, item.shape)).encode())
+				h.update(item.tobytes())
+			else:
+				h.update(repr(item).encode())
+			h.update(b"|")
+
+	update(HELPER_CACHE_VERSION, type(solver).__name__)
+
+	# Mesh
+	update(mesh.ndims, mesh.gorder, mesh.gbasis.BASIS_TYPE.name,
+			mesh.node_coords, mesh.elem_to_node_IDs)
+	update(np.stack([mesh.int_face_elemL_IDs, mesh.int_face_faceL_IDs,
+			mesh.int_face_elemR_IDs, mesh.int_face_faceR_IDs], axis=1))
+	for bgroup in mesh.boundary_groups.values():
+		update(bgroup.name, bgroup.number, np.stack([bgroup.elem_IDs,
+				bgroup.face_IDs], axis=1))
+
+	# Basis, order, and quadrature
+	update(basis.BASIS_TYPE.name, order, params["ElementQuadrature"],
+			params["FaceQuadrature"], params["NodeType"],
+			params["ColocatedPoints"])
+
+	# Physics (determines the quadrature order and array sizes)
+	update(physics.get_quadrature_order(order), physics.NUM_STATE_VARS,
+			physics.NDIMS)
+
+	update(*extra_inputs)
+
+	return os.path.join(cache_dir, "helpers_" + h.hexdigest() + ".npz")
+
+
+def encode_helper_data(obj, key, arrays):
+	'''
+	Recursively converts helper data into a JSON-serializable description,
+	storing the arrays it contains in a dictionary.
+
+	Inputs:
+	-------
+		obj: object to encode (arrays, lists/tuples, scalars, or None)
+		key: name under which arrays are stored
+		arrays: dictionary of arrays (modified)
+
+	Outputs:
+	--------
+		desc: JSON-serializable description of obj
+	'''
+	if isinstance(obj, (np.ndarray, np.generic)):
+		arrays[key] = np.asarray(obj)
+		return {"array": key, "scalar": isinstance(obj, np.generic)}
+	elif obj is None or isinstance(obj, (bool, int, float, str)):
+		return {"value": obj}
+	elif isinstance(obj, (list, tuple)):
+		return {"list": [encode_helper_data(item, key + "/" + str(i),
+				arrays) for i, item in enumerate(obj)],
+				"tuple": isinstance(obj, tuple)}
+	else:
+		raise TypeError("Cannot cache helper data of type " +
+				type(obj).__name__)
+
+
+def decode_helper_data(desc, arrays):
+	'''
+	Reconstructs helper data from the description given by
+	encode_helper_data.
+
+	Inputs:
+	-------
+		desc: description of the object
+		arrays: arrays stored by encode_helper_data
+
+	Outputs:
+	--------
+		obj: decoded object
+	'''
+	if "array" in desc:
+		array = arrays[desc["array"]]
+		return array[()] if desc["scalar"] else array
+	elif "value" in desc:
+		return desc["value"]
+	else:
+		items = [decode_helper_data(item, arrays) for item in desc["list"]]
+		return tuple(items) if desc["tuple"] else items
+
+
+def save_helpers(fname, solver, helper_names, basis_names):
+	'''
+	Writes the given helper objects of the solver to a cache file. The
+	file is written atomically so that concurrent runs never read a
+	partially written cache.
+
+	Inputs:
+	-------
+		fname: cache file name
+		solver: solver object
+		helper_names: names of the helper attributes of the solver
+		basis_names: names of the basis objects whose evaluated basis
+			data should be restored on load ("gbasis" refers to the
+			geometric basis of the mesh)
+	'''
+	arrays = {}
+	schema = {"version": HELPER_CACHE_VERSION, "helpers": {},
+			"bases": {}}
+	for name in helper_names:
+		schema["helpers"][name] = {attr: encode_helper_data(value,
+				name + "/" + attr, arrays) for attr, value in
+				vars(getattr(solver, name)).items()}
+	for name in basis_names:
+		basis = get_cached_basis(solver, name)
+		schema["bases"][name] = {attr: encode_helper_data(
+				getattr(basis, attr), name + "/" + attr, arrays)
+				for attr in BASIS_CACHE_ATTRS}
+
+	cache_dir = os.path.dirname(fname)
+	if cache_dir:
+		os.makedirs(cache_dir, exist_ok=True)
+	tmp_fname = fname[:-len(".npz")] + ".%d.tmp.npz" % (os.getpid())
+	np.savez(tmp_fname, __schema__=np.array(json.dumps(schema)), **arrays)
+	os.replace(tmp_fname, fname)
+
+
+def load_helpers(fname, solver, helper_classes):
+	'''
+	Reads helper objects from a cache file and attaches them to the solver.
+
+	Inputs:
+	-------
+		fname: cache file name
+		solver: solver object
+		helper_classes: dict mapping the names of the helper attributes
+			of the solver to their classes
+
+	Outputs:
+	--------
+		success: True if the helpers were loaded, False if the cache file
+			does not exist or is incompatible
+		solver: solver object (modified)
+	'''
+	if not os.path.isfile(fname):
+		return False
+
+	with np.load(fname, allow_pickle=False) as data:
+		schema = json.loads(str(data["__schema__"]))
+		if schema["version"] != HELPER_CACHE_VERSION or \
+				set(schema["helpers"]) != set(helper_classes):
+			return False
+		arrays = {key: data[key] for key in data.files}
+
+	for name, HelperClass in helper_classes.items():
+		helper = HelperClass()
+		for attr, desc in schema["helpers"][name].items():
+			setattr(helper, attr, decode_helper_data(desc, arrays))
+		setattr(solver, name, helper)
+	for name, attrs in schema["bases"].items():
+		basis = get_cached_basis(solver, name)
+		for attr, desc in attrs.items():
+			setattr(basis, attr, decode_helper_data(desc, arrays))
+
+	return True
+
+
+def get_cached_basis(solver, name):
+	'''
+	Returns the basis object referred to by name in the helper cache.
+
+	Inputs:
+	-------
+		solver: solver object
+		name: "gbasis" for the geometric basis, otherwise the name of
+			the basis attribute of the solver
+
+	Outputs:
+	--------
+		basis: basis object
+	'''
+	if name == "gbasis":
+		return solver.mesh.gbasis
+	return getattr(solver, name)
@@ -0,0 +1,103 @@
+# ------------------------------------------------------------------------ #
+#
+#       File : test/benchmarks/benchmark_kernels.py
+#
+#       Micro-benchmarks for the contraction kernels in
+#       numerics/helpers/helpers.py and solver/tools.py. Each kernel is
+#       timed against the plain np.einsum formulation it replaced.
+#
+#       Usage: python benchmark_kernels.py [num_elems]
+#
+# ------------------------------------------------------------------------ #
+import numpy as np
+import sys
+import timeit
+sys.path.append('../../src')
+
+import numerics.helpers.helpers as helpers
+import solver.tools as solver_tools
+
+
+class ElemHelpersStub(object):
+	def __init__(self, quad_wts, basis_val, basis_phys_grad_elems,
+			djac_elems):
+		self.quad_wts = quad_wts
+		self.basis_val = basis_val
+		self.basis_phys_grad_elems = basis_phys_grad_elems
+		self.djac_elems = djac_elems
+
+
+def time_call(fcn, number):
+	return min(timeit.repeat(fcn, number=number, repeat=3))/number
+
+
+def report(name, t_ref, t_new):
+	print(f'{name:<36s} einsum {1e3*t_ref:9.3f} ms   '
+			f'kernel {1e3*t_new:9.3f} ms   speedup {t_ref/t_new:6.2f}x')
+
+
+def run(ne, nq, nb, ns, ndims, number=10):
+	rng = np.random.default_rng(0)
+	Uc = rng.random([ne, nb, ns])
+	basis_val = rng.random([nq, nb])
+	basis_val_faces = rng.random([ne, nq, nb])
+	grad = rng.random([ne, nq, nb, ndims])
+	ijac = rng.random([ne, nq, ndims, ndims])
+	gU_ref = rng.random([ne, nq, ns, ndims])
+	quad_wts = rng.random([nq, 1])
+	djac = rng.random([ne, nq, 1])
+	Fq = rng.random([ne, nq, ns, ndims])
+	FqB = rng.random([ne, nq, ns])
+	Sq = rng.random([ne, nq, ns])
+	elem_helpers = ElemHelpersStub(quad_wts, basis_val, grad, djac)
+
+	print(f'ne = {ne}, nq = {nq}, nb = {nb}, ns = {ns}, ndims = {ndims}')
+
+	report('evaluate_state',
+		time_call(lambda: np.einsum('jn, ink -> ijk', basis_val, Uc),
+			number),
+		time_call(lambda: helpers.evaluate_state(Uc, basis_val), number))
+	report('evaluate_state (faces)',
+		time_call(lambda: np.einsum('ijn, ink -> ijk', basis_val_faces,
+			Uc), number),
+		time_call(lambda: helpers.evaluate_state(Uc, basis_val_faces),
+			number))
+	report('evaluate_gradient',
+		time_call(lambda: np.einsum('ijml, imk -> ijkl', grad, Uc),
+			number),
+		time_call(lambda: helpers.evaluate_gradient(Uc, grad), number))
+	report('ref_to_phys_grad',
+		time_call(lambda: np.einsum('ijpl, ijkp -> ijkl', ijac, gU_ref),
+			number),
+		time_call(lambda: helpers.ref_to_phys_grad(ijac, gU_ref), number))
+	report('calculate_volume_flux_integral',
+		time_call(lambda: np.einsum('ijnl, ijkl -> ink', grad,
+			np.einsum('ijkl, jm, ijm -> ijkl', Fq, quad_wts, djac)),
+			number),
+		time_call(lambda: solver_tools.calculate_volume_flux_integral(
+			None, elem_helpers, Fq), number))
+	report('calculate_boundary_flux_integral',
+		time_call(lambda: np.einsum('ijn, ijk -> ink', basis_val_faces,
+			np.einsum('ijk, jm -> ijk', FqB, quad_wts)), number),
+		time_call(lambda: solver_tools.calculate_boundary_flux_integral(
+			basis_val_faces, quad_wts, FqB), number))
+	report('calculate_source_term_integral',
+		time_call(lambda: np.einsum('jn, ijk -> ink', basis_val,
+			np.einsum('ijk, jm, ijm -> ijk', Sq, quad_wts, djac)),
+			number),
+		time_call(lambda: solver_tools.calculate_source_term_integral(
+			elem_helpers, Sq), number))
+	report('artificial viscosity contraction',
+		time_call(lambda: np.einsum('ijm, ijpm, ijnm, jx, ijx -> ipn',
+			Fq[:, :, 0], grad, grad, quad_wts, djac), number),
+		time_call(lambda: helpers.einsum('ijm, ijpm, ijnm, jx, ijx -> ipn',
+			Fq[:, :, 0], grad, grad, quad_wts, djac), number))
+	print()
+
+
+if __name__ == '__main__':
+	ne = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+	# 2D Euler, P2 quadrilaterals
+	run(ne, nq=16, nb=9, ns=4, ndims=2)
+	# 2D Euler, P3 triangles
+	run(ne, nq=19, nb=10, ns=4, ndims=2)
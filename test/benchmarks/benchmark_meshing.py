@@ -0,0 +1,51 @@
+# ------------------------------------------------------------------------ #
+#
+#       File : test/benchmarks/benchmark_meshing.py
+#
+#       Benchmarks for the structured mesh generators in meshing/common.py
+#       (mesh_1D, mesh_2D, and split_quadrils_into_tris) at 1e4 to 1e7
+#       elements.
+#
+#       Usage: python benchmark_meshing.py [max_num_elems]
+#
+# ------------------------------------------------------------------------ #
+import numpy as np
+import sys
+import timeit
+sys.path.append('../../src')
+
+import meshing.common as mesh_common
+
+
+def time_call(fcn, number):
+	return min(timeit.repeat(fcn, number=number, repeat=3))/number
+
+
+def report(name, num_elems, t):
+	print(f'{name:<28s} {num_elems:>10d} elements   {1e3*t:10.3f} ms   '
+			f'{1e9*t/num_elems:8.2f} ns/element')
+
+
+def run(num_elems, number=1):
+	num_elems_x = int(round(np.sqrt(num_elems)))
+
+	report('mesh_1D', num_elems, time_call(lambda: mesh_common.mesh_1D(
+			num_elems=num_elems), number))
+
+	report('mesh_2D', num_elems_x**2, time_call(lambda: mesh_common.mesh_2D(
+			num_elems_x=num_elems_x, num_elems_y=num_elems_x), number))
+
+	mesh = mesh_common.mesh_2D(num_elems_x=num_elems_x,
+			num_elems_y=num_elems_x)
+	report('split_quadrils_into_tris', 2*num_elems_x**2, time_call(
+			lambda: mesh_common.split_quadrils_into_tris(mesh), number))
+	print()
+
+
+if __name__ == '__main__':
+	max_num_elems = int(float(sys.argv[1])) if len(sys.argv) > 1 else \
+			int(1e6)
+	num_elems = int(1e4)
+	while num_elems <= max_num_elems:
+		run(num_elems)
+		num_elems *= 10
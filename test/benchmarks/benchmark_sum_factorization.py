@@ -0,0 +1,86 @@
+# ------------------------------------------------------------------------ #
+#
+#       File : test/benchmarks/benchmark_sum_factorization.py
+#
+#       Benchmarks the DG element residual of LagrangeQuad bases evaluated
+#       with the full basis matrices and with sum factorization, for the
+#       Euler (inviscid) and Navier-Stokes (viscous) equations at a fixed
+#       number of degrees of freedom.
+#
+#       Usage: python benchmark_sum_factorization.py [num_dofs] [max_order]
+#
+# ------------------------------------------------------------------------ #
+import copy
+import numpy as np
+import sys
+import timeit
+sys.path.append('../../src')
+
+import defaultparams
+import solver.builder as solver_builder
+
+
+def build_solver(physics_type, order, num_elems_x, min_order):
+	sections = {name: copy.deepcopy(getattr(defaultparams, name)) for name
+			in solver_builder.DECK_SECTIONS}
+	sections["TimeStepping"].update({"FinalTime" : 1., "CFL" : 0.1})
+	sections["Numerics"].update({"SolutionOrder" : order,
+			"SolutionBasis" : "LagrangeQuad",
+			"SumFactorizationMinOrder" : min_order})
+	sections["Mesh"].update({"ElementShape" : "Quadrilateral",
+			"NumElemsX" : num_elems_x, "NumElemsY" : num_elems_x})
+	if physics_type == "NavierStokes":
+		sections["Mesh"].update({"xmin" : 0., "xmax" : 1., "ymin" : 0.,
+				"ymax" : 1.})
+		sections["Physics"].update({"Type" : "NavierStokes",
+				"ConvFluxNumerical" : "Roe", "DiffFluxNumerical" : "SIP",
+				"GasConstant" : 1., "Transport" : "Constant",
+				"Viscosity" : 0.1, "PrandtlNumber" : 0.71})
+		sections["InitialCondition"] = {"Function" :
+				"ManufacturedSolution"}
+		sections["BoundaryConditions"] = {name : {"BCType" : "StateAll",
+				"Function" : "ManufacturedSolution"} for name in
+				["x1", "x2", "y1", "y2"]}
+	else:
+		sections["Mesh"].update({"xmin" : -5., "xmax" : 5., "ymin" : -5.,
+				"ymax" : 5., "PeriodicBoundariesX" : ["x1", "x2"],
+				"PeriodicBoundariesY" : ["y1", "y2"]})
+		sections["Physics"].update({"Type" : "Euler",
+				"ConvFluxNumerical" : "Roe", "GasConstant" : 1.,
+				"SpecificHeatRatio" : 1.4})
+		sections["InitialCondition"] = {"Function" : "IsentropicVortex"}
+		sections["BoundaryConditions"] = {}
+	sections["ExactSolution"] = {}
+	sections["SourceTerms"] = {}
+
+	return solver_builder.build_solver(*[sections[name] for name in
+			solver_builder.DECK_SECTIONS])
+
+
+def time_element_residual(solver, number):
+	Uc = solver.state_coeffs
+	res = np.zeros_like(Uc)
+	fcn = lambda: solver.get_element_residual(Uc, res)
+	fcn()
+
+	return min(timeit.repeat(fcn, number=number, repeat=3))/number
+
+
+def run(physics_type, order, num_dofs, number=5):
+	num_elems_x = max(1, int(round(np.sqrt(num_dofs)/(order + 1))))
+	t_full = time_element_residual(build_solver(physics_type, order,
+			num_elems_x, None), number)
+	t_sf = time_element_residual(build_solver(physics_type, order,
+			num_elems_x, 0), number)
+	print(f'{physics_type:<14s} p = {order:2d} {num_elems_x**2:8d} elements'
+			f'   full {1e3*t_full:9.3f} ms   sum factorization '
+			f'{1e3*t_sf:9.3f} ms   speedup {t_full/t_sf:6.2f}x')
+
+
+if __name__ == '__main__':
+	num_dofs = int(float(sys.argv[1])) if len(sys.argv) > 1 else int(1e5)
+	max_order = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+	for physics_type in ["Euler", "NavierStokes"]:
+		for order in range(1, max_order + 1):
+			run(physics_type, order, num_dofs)
+		print()
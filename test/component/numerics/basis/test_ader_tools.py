@@ -5,6 +5,7 @@ sys.path.append('../src')
 
 import numerics.basis.basis as basis_defs
 import numerics.basis.ader_tools as basis_st_tools
+import numerics.basis.tools as basis_tools
 import meshing.common as mesh_common
 
 rtol = 1e-14
@@ -381,3 +382,47 @@ def test_legendre_spacetime_massmatrix(order):
 	np.testing.assert_allclose(np.diagonal(iMM), 1./np.diagonal(MM), rtol, atol)
 
 
+@pytest.mark.parametrize('perturbed', [False, True])
+@pytest.mark.parametrize('tris', [False, True])
+def test_batched_ader_matrices_match_per_element(tris, perturbed):
+	'''
+	This test checks the batched physical space-time stiffness and
+	inverse mass matrices against the per-element versions on affine and
+	curved (perturbed) meshes.
+	'''
+	order = 2
+	dt = 0.0132
+	mesh = mesh_common.mesh_2D(num_elems_x=3, num_elems_y=2)
+	if tris:
+		mesh = mesh_common.split_quadrils_into_tris(mesh)
+		basis = basis_defs.LagrangeTri(order)
+		basis_st = basis_defs.LagrangePrism(order)
+	else:
+		basis = basis_defs.LagrangeQuad(order)
+		basis_st = basis_defs.LagrangeHex(order)
+	if perturbed:
+		interior = np.all(np.abs(mesh.node_coords) < 1., axis=1)
+		rng = np.random.default_rng(0)
+		mesh.node_coords[interior] += 0.1*rng.uniform(-1., 1.,
+				size=[np.sum(interior), 2])
+		mesh.create_elements()
+
+	# Set quadrature
+	for b in [basis, basis_st, mesh.gbasis]:
+		b.set_elem_quadrature_type("GaussLegendre")
+		b.set_face_quadrature_type("GaussLegendre")
+
+	SMS_elems = basis_st_tools.get_stiffness_matrices_ader(mesh, basis,
+			basis_st, order)
+	iMM_elems = basis_tools.get_inv_mass_matrices(mesh, basis_st, order)
+
+	for elem_ID in range(mesh.num_elems):
+		for nd in range(mesh.ndims):
+			SMS = basis_st_tools.get_stiffness_matrix_ader(mesh, basis,
+					basis_st, order, dt, elem_ID, grad_dir=nd,
+					physical_space=True)
+			np.testing.assert_allclose(SMS_elems[elem_ID, :, :, nd],
+					SMS.transpose(), 1e-12, 1e-12)
+		iMM = basis_st_tools.get_elem_inv_mass_matrix_ader(mesh, basis_st,
+				order, elem_ID, physical_space=True)
+		np.testing.assert_allclose(iMM_elems[elem_ID], iMM, 1e-12, 1e-12)
@@ -266,3 +266,170 @@ def test_get_modal_basis_tri_nodes_equal_one_p1():
 	np.testing.assert_allclose(basis_val, 
 		np.identity(basis.nb), rtol, atol)
 
+
+
+def perturbed_mesh_2D(tris=False):
+	'''
+	Creates a small 2D mesh with randomly perturbed interior nodes so that
+	the element Jacobians vary within and between elements.
+	'''
+	mesh = mesh_common.mesh_2D(num_elems_x=3, num_elems_y=2)
+	if tris:
+		mesh = mesh_common.split_quadrils_into_tris(mesh)
+	interior = np.all(np.abs(mesh.node_coords) < 1., axis=1)
+	rng = np.random.default_rng(0)
+	mesh.node_coords[interior] += 0.1*rng.uniform(-1., 1.,
+			size=[np.sum(interior), 2])
+	mesh.create_elements()
+
+	return mesh
+
+
+@pytest.mark.parametrize('tris', [False, True])
+def test_element_jacobians_matches_element_jacobian(tris):
+	'''
+	Checks the batched Jacobian against the per-element version
+	'''
+	mesh = perturbed_mesh_2D(tris)
+	quad_pts = np.array([[0.1, 0.2], [0.3, 0.05], [0.25, 0.25]])
+
+	djac, jac, ijac = basis_tools.element_jacobians(mesh, None, quad_pts,
+			get_djac=True, get_jac=True, get_ijac=True)
+
+	for elem_ID in range(mesh.num_elems):
+		djac_e, jac_e, ijac_e = basis_tools.element_jacobian(mesh, elem_ID,
+				quad_pts, get_djac=True, get_jac=True, get_ijac=True)
+		np.testing.assert_allclose(djac[elem_ID], djac_e, rtol, atol)
+		np.testing.assert_allclose(jac[elem_ID], jac_e, rtol, atol)
+		np.testing.assert_allclose(ijac[elem_ID], ijac_e, rtol, atol)
+
+
+def test_element_jacobians_subset_of_elements():
+	'''
+	Checks that the batched Jacobian can be evaluated for a subset of
+	elements
+	'''
+	mesh = perturbed_mesh_2D()
+	quad_pts = np.array([[0.1, -0.2]])
+	elem_IDs = np.array([4, 1, 4])
+
+	_, jac, _ = basis_tools.element_jacobians(mesh, elem_IDs, quad_pts,
+			get_jac=True)
+
+	for i, elem_ID in enumerate(elem_IDs):
+		_, jac_e, _ = basis_tools.element_jacobian(mesh, elem_ID, quad_pts)
+		np.testing.assert_allclose(jac[i], jac_e, rtol, atol)
+
+
+def test_element_jacobians_only_requested():
+	'''
+	Checks that only the requested Jacobian quantities are returned
+	'''
+	mesh = perturbed_mesh_2D()
+	quad_pts = np.array([[0.1, -0.2]])
+
+	djac, jac, ijac = basis_tools.element_jacobians(mesh, None, quad_pts,
+			get_ijac=True)
+
+	assert djac is None
+	assert jac is None
+	assert ijac.shape == (mesh.num_elems, 1, 2, 2)
+
+
+def test_element_jacobians_nonpositive_raises():
+	'''
+	Checks that an inverted element raises an exception
+	'''
+	mesh = mesh_common.mesh_1D(num_elems=2, xmin=-1., xmax=1.)
+	mesh.elem_to_node_IDs[1] = mesh.elem_to_node_IDs[1, ::-1]
+	quad_pts = np.array([[0.]])
+
+	with pytest.raises(Exception, match='elem_ID = 1'):
+		basis_tools.element_jacobians(mesh, None, quad_pts, get_djac=True)
+
+
+@pytest.mark.parametrize('tris', [False, True])
+def test_2D_normals_faces_matches_2D_normals(tris):
+	'''
+	Checks the batched 2D normals against the per-face version
+	'''
+	mesh = perturbed_mesh_2D(tris)
+	quad_pts = np.array([[-0.5], [0.2], [0.7]])
+	nfaces = mesh.gbasis.NFACES
+
+	elem_IDs = np.repeat(np.arange(mesh.num_elems), nfaces)
+	face_IDs = np.tile(np.arange(nfaces), mesh.num_elems)
+	normals = basis_tools.calculate_2D_normals_faces(mesh, elem_IDs,
+			face_IDs, quad_pts)
+
+	for i in range(elem_IDs.shape[0]):
+		expected = basis_tools.calculate_2D_normals(mesh, elem_IDs[i],
+				face_IDs[i], quad_pts)
+		np.testing.assert_allclose(normals[i], expected, rtol, atol)
+
+
+def test_1d_normals_faces():
+	'''
+	Checks the direction of the batched 1D normals
+	'''
+	xpts = np.array([0.83])
+	mesh = mesh_common.mesh_1D(num_elems=2, xmin=-1., xmax=1.)
+
+	normals = basis_tools.calculate_1D_normals_faces(mesh,
+			np.array([0, 0, 1]), np.array([0, 1, 1]), xpts)
+	expected = np.array([-1., 1., 1.]).reshape([3, 1, 1])
+
+	np.testing.assert_allclose(normals, expected, rtol, atol)
+
+
+@pytest.mark.parametrize('perturbed', [False, True])
+@pytest.mark.parametrize('tris', [False, True])
+def test_inv_mass_matrices_matches_elem_inv_mass_matrix(tris, perturbed):
+	'''
+	Checks the batched inverse mass matrices against the per-element
+	version on affine and curved (perturbed) meshes
+	'''
+	if perturbed:
+		mesh = perturbed_mesh_2D(tris)
+	else:
+		mesh = mesh_common.mesh_2D(num_elems_x=3, num_elems_y=2)
+		if tris:
+			mesh = mesh_common.split_quadrils_into_tris(mesh)
+	order = 2
+	if tris:
+		basis = basis_defs.LagrangeTri(order)
+	else:
+		basis = basis_defs.LagrangeQuad(order)
+	basis.set_elem_quadrature_type("GaussLegendre")
+	basis.set_face_quadrature_type("GaussLegendre")
+	mesh.gbasis.set_elem_quadrature_type("GaussLegendre")
+	mesh.gbasis.set_face_quadrature_type("GaussLegendre")
+
+	iMM_elems = basis_tools.get_inv_mass_matrices(mesh, basis, order)
+
+	for elem_ID in range(mesh.num_elems):
+		expected = basis_tools.get_elem_inv_mass_matrix(mesh, basis, order,
+				elem_ID, True)
+		np.testing.assert_allclose(iMM_elems[elem_ID], expected, 1e-12,
+				atol)
+
+
+def test_tensor_product_points_1D():
+	'''
+	Checks that the 1D points of tensor-product quadrature points are
+	recovered and that other points are rejected
+	'''
+	quad = basis_defs.LagrangeQuad(2)
+	quad.set_elem_quadrature_type("GaussLegendre")
+	quad_pts, _ = quad.get_quadrature_data(5)
+	seg = basis_defs.LagrangeSeg(2)
+	seg.set_elem_quadrature_type("GaussLegendre")
+	seg_pts, _ = seg.get_quadrature_data(5)
+
+	np.testing.assert_array_equal(
+			basis_tools.get_tensor_product_points_1D(quad_pts), seg_pts)
+	tri = basis_defs.LagrangeTri(2)
+	tri.set_elem_quadrature_type("Dunavant")
+	tri_pts, _ = tri.get_quadrature_data(5)
+	assert basis_tools.get_tensor_product_points_1D(tri_pts) is None
+	assert basis_tools.get_tensor_product_points_1D(quad_pts[:, ::-1]) is None
@@ -52,4 +52,233 @@ def test_evaluate_gradient_returns_one_when_state_is_linear():
 	gUq = helpers.evaluate_gradient(Uc, basis_phys_grad_elems)
 
 	expected = np.ones_like(gUq)
-	np.testing.assert_allclose(gUq, expected, rtol, atol)
\ No newline at end of file
+	np.testing.assert_allclose(gUq, expected, rtol, atol)
+
+def test_scatter_add_matches_add_at_bit_for_bit():
+	'''
+	This test checks that adding face contributions with a precomputed
+	scatter plan gives exactly the same result as np.add.at, including
+	for repeated element IDs.
+	'''
+	np.random.seed(0)
+	ne = 7
+	elem_IDs = np.random.randint(0, ne, size=40)
+	R = np.random.rand(40, 3, 2)
+	res = np.random.rand(ne, 3, 2)
+
+	expected = res.copy()
+	np.add.at(expected, elem_IDs, R)
+
+	plan = helpers.get_scatter_plan(elem_IDs)
+	helpers.scatter_add(res, plan, R)
+
+	np.testing.assert_array_equal(res, expected)
+
+def test_get_scatter_plan_slots_have_unique_elements():
+	'''
+	This test checks that each slot of the scatter plan targets every
+	element at most once and that all contributions are covered.
+	'''
+	elem_IDs = np.array([2, 0, 2, 1, 2, 0])
+	plan = helpers.get_scatter_plan(elem_IDs)
+
+	assert len(plan) == 3
+	for targets, sources in plan:
+		assert np.unique(targets).size == targets.size
+		np.testing.assert_array_equal(targets, elem_IDs[sources])
+	all_sources = np.sort(np.concatenate([s for _, s in plan]))
+	np.testing.assert_array_equal(all_sources, np.arange(elem_IDs.size))
+
+def test_get_scatter_plan_empty():
+	'''
+	This test checks that an empty set of faces gives an empty plan.
+	'''
+	assert helpers.get_scatter_plan(np.empty(0, dtype=int)) == []
+
+def test_evaluate_state_matches_einsum():
+	'''
+	This test checks that evaluate_state gives the same result as the
+	direct einsum formulation for both element and face basis values.
+	'''
+	rng = np.random.default_rng(0)
+	Uc = rng.random([5, 4, 3])
+	basis_val = rng.random([6, 4])
+	basis_val_faces = rng.random([5, 6, 4])
+
+	np.testing.assert_allclose(helpers.evaluate_state(Uc, basis_val),
+			np.einsum('jn, ink -> ijk', basis_val, Uc), rtol, atol)
+	np.testing.assert_allclose(helpers.evaluate_state(Uc, basis_val_faces),
+			np.einsum('ijn, ink -> ijk', basis_val_faces, Uc), rtol, atol)
+
+def test_evaluate_gradient_matches_einsum():
+	'''
+	This test checks that evaluate_gradient gives the same result as the
+	direct einsum formulation for both shared and per-element basis
+	gradients.
+	'''
+	rng = np.random.default_rng(1)
+	Uc = rng.random([5, 4, 3])
+	grad = rng.random([6, 4, 2])
+	grad_elems = rng.random([5, 6, 4, 2])
+
+	np.testing.assert_allclose(helpers.evaluate_gradient(Uc, grad),
+			np.einsum('jml, imk -> ijkl', grad, Uc), rtol, atol)
+	np.testing.assert_allclose(helpers.evaluate_gradient(Uc, grad_elems),
+			np.einsum('ijml, imk -> ijkl', grad_elems, Uc), rtol, atol)
+
+def test_ref_to_phys_grad_matches_einsum():
+	'''
+	This test checks that ref_to_phys_grad gives the same result as the
+	direct einsum formulation.
+	'''
+	rng = np.random.default_rng(2)
+	ijac = rng.random([5, 6, 2, 2])
+	gU_ref = rng.random([5, 6, 3, 2])
+
+	np.testing.assert_allclose(helpers.ref_to_phys_grad(ijac, gU_ref),
+			np.einsum('ijpl, ijkp -> ijkl', ijac, gU_ref), rtol, atol)
+
+def test_einsum_caches_contraction_path():
+	'''
+	This test checks that the einsum wrapper stores the contraction path
+	and matches np.einsum.
+	'''
+	rng = np.random.default_rng(3)
+	A = rng.random([4, 3, 2])
+	B = rng.random([3, 5])
+	C = rng.random([4, 3])
+	subscripts = 'ijk, jm, ij -> imk'
+
+	result = helpers.einsum(subscripts, A, B, C)
+	key = (subscripts, A.shape, B.shape, C.shape)
+
+	assert key in helpers.einsum_paths
+	np.testing.assert_allclose(result, np.einsum(subscripts, A, B, C),
+			rtol, atol)
+
+def test_work_arrays_reuse_arrays_by_name_and_shape():
+	'''
+	This test checks that WorkArrays hands out the same array for the same
+	name and shape and distinct arrays otherwise.
+	'''
+	work_arrays = helpers.WorkArrays()
+	A = work_arrays.get("A", [4, 3])
+
+	assert work_arrays.get("A", (4, 3)) is A
+	assert work_arrays.get("A", [5, 3]) is not A
+	assert work_arrays.get("B", [4, 3]) is not A
+	assert work_arrays.get_num_bytes() == 8*(12 + 15 + 12)
+
+	A[:] = 1.
+	assert work_arrays.zeros("A", [4, 3]) is A
+	np.testing.assert_array_equal(A, 0.)
+
+def test_work_arrays_take_matches_fancy_indexing():
+	'''
+	This test checks that WorkArrays.take gives the same result as fancy
+	indexing along the first axis.
+	'''
+	a = np.random.default_rng(4).random([6, 3, 2])
+	indices = np.array([5, 0, 0, 3])
+	work_arrays = helpers.WorkArrays()
+
+	np.testing.assert_array_equal(work_arrays.take("a", a, indices),
+			a[indices])
+	assert work_arrays.take("a", a, indices[::-1]) is \
+			work_arrays.get("a", [4, 3, 2])
+
+def test_work_arrays_take_rejects_out_of_range_indices():
+	'''
+	This test checks that WorkArrays.take does not clip out-of-range
+	indices.
+	'''
+	a = np.random.default_rng(4).random([6, 3, 2])
+	work_arrays = helpers.WorkArrays()
+
+	for indices in [np.array([5, 6]), np.array([-1, 0])]:
+		with pytest.raises(IndexError):
+			work_arrays.take("a", a, indices)
+
+def test_kernels_with_out_match_kernels_without_out():
+	'''
+	This test checks that evaluate_state, evaluate_gradient, and
+	ref_to_phys_grad give identical results when writing into a given
+	array.
+	'''
+	rng = np.random.default_rng(5)
+	Uc = rng.random([5, 4, 3])
+	basis_val = rng.random([6, 4])
+	grad = rng.random([6, 4, 2])
+	grad_elems = rng.random([5, 6, 4, 2])
+	ijac = rng.random([5, 6, 2, 2])
+
+	out = np.empty([5, 6, 3])
+	Uq = helpers.evaluate_state(Uc, basis_val, out=out)
+	assert Uq is out
+	np.testing.assert_array_equal(Uq, helpers.evaluate_state(Uc,
+			basis_val))
+
+	for basis_grad in [grad, grad_elems]:
+		out = np.empty([5, 6, 2, 3])
+		gUq = helpers.evaluate_gradient(Uc, basis_grad, out=out)
+		assert np.shares_memory(gUq, out)
+		np.testing.assert_array_equal(gUq, helpers.evaluate_gradient(Uc,
+				basis_grad))
+
+	out = np.empty([5, 6, 3, 2])
+	gU_phys = helpers.ref_to_phys_grad(ijac, gUq, out=out)
+	assert gU_phys is out
+	np.testing.assert_array_equal(gU_phys, helpers.ref_to_phys_grad(ijac,
+			gUq))
+
+@pytest.mark.parametrize('ndims', [1, 2, 3])
+def test_apply_tensor_product_matches_kronecker_product(ndims):
+	'''
+	This test checks that apply_tensor_product gives the same result as
+	the full matrix obtained from the Kronecker product of the 1D
+	matrices (with the first direction varying fastest).
+	'''
+	rng = np.random.default_rng(6)
+	mats = [rng.random([4, 3]) for _ in range(ndims)]
+	Uc = rng.random([5, 3**ndims, 2])
+
+	A = mats[0]
+	for mat in mats[1:]:
+		A = np.kron(mat, A)
+
+	expected = np.matmul(A, Uc)
+	np.testing.assert_allclose(helpers.apply_tensor_product(mats, Uc),
+			expected, 1e-14, 1e-14)
+	out = np.empty([5, 4**ndims, 2])
+	assert helpers.apply_tensor_product(mats, Uc, out=out) is out
+	np.testing.assert_allclose(out, expected, 1e-14, 1e-14)
+
+@pytest.mark.parametrize('basis', [basis_defs.LagrangeQuad(3),
+		basis_defs.LegendreQuad(3)])
+def test_sum_factorization_matches_full_basis(basis):
+	'''
+	This test checks that the state and its gradient evaluated with sum
+	factorization match those evaluated with the full basis of
+	tensor-product bases.
+	'''
+	rng = np.random.default_rng(7)
+	ndims = basis.NDIMS
+	basis.set_elem_quadrature_type("GaussLegendre")
+	quad_pts, _ = basis.get_quadrature_data(6)
+	quad_pts_1D = basis_tools.get_tensor_product_points_1D(quad_pts)
+	basis_1D = basis.get_tensor_product_basis()
+	basis_val_1D = basis_1D.get_values(quad_pts_1D)
+	basis_ref_grad_1D = basis_1D.get_grads(quad_pts_1D)[:, :, 0]
+
+	nq = quad_pts.shape[0]
+	Uc = rng.random([5, basis.nb, 3])
+	ijac = rng.random([5, nq, ndims, ndims])
+	basis.get_basis_val_grads(quad_pts, get_val=True, get_ref_grad=True)
+	basis_phys_grad = basis.get_physical_grads(ijac)
+
+	np.testing.assert_allclose(helpers.evaluate_state_sum_factorization(
+			Uc, basis_val_1D, ndims), helpers.evaluate_state(Uc,
+			basis.basis_val), 1e-13, 1e-13)
+	np.testing.assert_allclose(helpers.evaluate_gradient_sum_factorization(
+			Uc, basis_val_1D, basis_ref_grad_1D, ijac),
+			helpers.evaluate_gradient(Uc, basis_phys_grad), 1e-13, 1e-13)
@@ -0,0 +1,168 @@
+import numpy as np
+import pytest
+import scipy.optimize
+import sys
+sys.path.append('../src')
+
+from numerics.timestepping.source_stepper import SourceSolvers
+
+
+rtol = 1e-10
+atol = 1e-12
+
+
+class PhysicsStub(object):
+	'''
+	Stand-in for a physics object with the nonlinear source terms
+	S = [-k0*U0^2 + U1, -k1*U1 + U0*U1].
+	'''
+	def __init__(self, has_jacobian):
+		self.has_jacobian = has_jacobian
+		self.k = np.array([2., 5.])
+
+	def eval_source_terms(self, Uq, x, t, Sq):
+		Sq[..., 0] += -self.k[0]*Uq[..., 0]**2 + Uq[..., 1]
+		Sq[..., 1] += -self.k[1]*Uq[..., 1] + Uq[..., 0]*Uq[..., 1]
+		return Sq
+
+	def eval_source_term_jacobians(self, Uq, x, t, jac):
+		if not self.has_jacobian:
+			raise NotImplementedError
+		jac[..., 0, 0] += -2.*self.k[0]*Uq[..., 0]
+		jac[..., 0, 1] += 1.
+		jac[..., 1, 0] += Uq[..., 1]
+		jac[..., 1, 1] += -self.k[1] + Uq[..., 0]
+		return jac
+
+
+class StepperStub(object):
+	def __init__(self, dt):
+		self.dt = dt
+
+
+class SolverStub(object):
+	def __init__(self, has_jacobian, dt):
+		self.physics = PhysicsStub(has_jacobian)
+		self.stepper = StepperStub(dt)
+		self.time = 0.
+
+
+@pytest.mark.parametrize('has_jacobian', [True, False])
+def test_trapezoidal_newton_matches_pointwise_root(has_jacobian):
+	'''
+	This test checks that the batched Newton solve of the trapezoidal rule
+	matches scipy's root finder applied to each point separately, with
+	both analytic and finite-difference Jacobians.
+	'''
+	ne, nq, ns = 4, 3, 2
+	rng = np.random.default_rng(0)
+	Uq = rng.random([ne, nq, ns])
+	x = rng.random([ne, nq, 1])
+	solver = SolverStub(has_jacobian, dt=0.5)
+	stepper = SourceSolvers.Trapezoidal(Uq)
+
+	Uq_new = stepper.solve_nonlinear_system(solver, x, Uq.copy())
+
+	assert stepper.fd_jacobian is not has_jacobian
+	for i in range(ne):
+		for j in range(nq):
+			sol = scipy.optimize.root(stepper.rhs_sources, Uq[i, j],
+					args=(solver, x[i, j], Uq[i, j]), tol=1e-14)
+			np.testing.assert_allclose(Uq_new[i, j], sol.x, rtol, atol)
+
+
+def test_trapezoidal_newton_falls_back_to_root():
+	'''
+	This test checks that points for which Newton's method fails are
+	solved with scipy's root finder instead.
+	'''
+	ne, nq, ns = 2, 2, 2
+	rng = np.random.default_rng(1)
+	Uq = rng.random([ne, nq, ns])
+	x = np.zeros([ne, nq, 1])
+	solver = SolverStub(True, dt=0.5)
+	stepper = SourceSolvers.Trapezoidal(Uq)
+
+	expected = stepper.solve_nonlinear_system(solver, x, Uq.copy())
+	stepper.MAX_NEWTON_ITERATIONS = 1
+	Uq_new = stepper.solve_nonlinear_system(solver, x, Uq.copy())
+
+	np.testing.assert_allclose(Uq_new, expected, rtol, 1e-8)
+
+
+def test_trapezoidal_newton_falls_back_only_for_singular_points(
+		monkeypatch):
+	'''
+	This test checks that a point with a singular Jacobian is solved with
+	scipy's root finder while Newton's method continues for the other
+	points.
+	'''
+	ne, nq, ns = 2, 3, 2
+	rng = np.random.default_rng(2)
+	Uq = rng.random([ne, nq, ns])
+	# The Jacobian of the trapezoidal rule, I - dt/2*dS/dU, is singular at
+	# U = [0, 36] for dt = 0.5
+	Uq[1, 2] = [0., 36.]
+	x = np.zeros([ne, nq, 1])
+	solver = SolverStub(True, dt=0.5)
+	stepper = SourceSolvers.Trapezoidal(Uq)
+
+	root = scipy.optimize.root
+	root_points = []
+	def counted_root(fun, x0, args):
+		root_points.append(x0.copy())
+		return root(fun, x0, args=args)
+	monkeypatch.setattr(scipy.optimize, "root", counted_root)
+
+	Uq_new = stepper.solve_nonlinear_system(solver, x, Uq.copy())
+
+	assert len(root_points) == 1
+	np.testing.assert_array_equal(root_points[0], [0., 36.])
+	for i in range(ne):
+		for j in range(nq):
+			np.testing.assert_allclose(stepper.rhs_sources(Uq_new[i, j],
+					solver, x[i, j], Uq[i, j]), 0., atol=1e-8)
+
+
+@pytest.mark.parametrize('scheme', ["LSODA", "BDF"])
+@pytest.mark.parametrize('has_jacobian', [True, False])
+def test_block_diagonal_integrate_matches_pointwise(scheme, has_jacobian):
+	'''
+	This test checks that integrating all points at once with the
+	block-diagonal Jacobian matches integrating each point separately.
+	'''
+	ne, nq, ns = 3, 2, 2
+	rng = np.random.default_rng(2)
+	Uq = rng.random([ne, nq, ns])
+	x = np.zeros([ne, nq, 1])
+	solver = SolverStub(has_jacobian, dt=0.)
+	stepper = getattr(SourceSolvers, scheme)(Uq)
+	stepper.dt = 0.5
+
+	value = stepper.integrate(solver, x, Uq, [])
+
+	for i in range(ne):
+		for j in range(nq):
+			expected = stepper.integrate(solver, x[i:i+1, j:j+1],
+					Uq[i:i+1, j:j+1], [])
+			np.testing.assert_allclose(value[i, j], expected[0, 0], 1e-9,
+					1e-11)
+
+
+def test_get_stiffness_groups_sorts_elements_by_stiffness():
+	'''
+	This test checks that the elements are split into groups of equal
+	size in order of increasing stiffness.
+	'''
+	ne, nq, ns = 5, 2, 2
+	Uq = np.zeros([ne, nq, ns])
+	# The spectral radius of the Jacobian is 2*k0*U0 here
+	Uq[:, :, 0] = np.array([40., 10., 30., 50., 20.])[:, None]
+	x = np.zeros([ne, nq, 1])
+	solver = SolverStub(True, dt=0.5)
+	stepper = SourceSolvers.LSODA(Uq)
+
+	groups = stepper.get_stiffness_groups(solver, x, Uq, 2)
+
+	assert [list(elem_IDs) for elem_IDs in groups] == [[1, 2, 4], [0, 3]]
+	assert len(stepper.get_stiffness_groups(solver, x, Uq, 1)) == 1
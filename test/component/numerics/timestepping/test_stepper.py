@@ -0,0 +1,228 @@
+import numpy as np
+import pytest
+import sys
+sys.path.append('../src')
+
+import errors
+import solver.builder as solver_builder
+
+rtol = 1e-15
+atol = 1e-15
+
+
+def build_solver(physics_params=None, numerics_params=None,
+		**time_stepping_params):
+	'''
+	Builds a DG solver for dU/dt = -U with a uniform initial condition,
+	i.e., U(t) = exp(-t). The physics defaults to constant advection.
+	'''
+	if physics_params is None:
+		physics_params = {"Type" : "ConstAdvScalar", "ConstVelocity" : 1.}
+	if numerics_params is None:
+		numerics_params = {}
+
+	return solver_builder.build_solver_from_defaults(
+			TimeStepping={"FinalTime" : 1., **time_stepping_params},
+			Numerics={"SolutionOrder" : 1, **numerics_params},
+			Mesh={"NumElemsX" : 4, "PeriodicBoundariesX" : ["x1", "x2"]},
+			Physics={"ConvFluxNumerical" : "LaxFriedrichs",
+				**physics_params},
+			InitialCondition={"Function" : "Uniform", "state" : [1.]},
+			SourceTerms={"Source1" : {"Function" : "SimpleSource",
+				"nu" : -1.}},
+			Output={"WriteFinalSolution" : False, "AutoPostProcess" : False,
+				"ProgressBar" : True})
+
+
+def count_residuals(solver):
+	'''
+	Counts the calls to solver.get_residual.
+	'''
+	get_residual = solver.get_residual
+	solver.num_residuals = 0
+	def counted_get_residual(U, res):
+		solver.num_residuals += 1
+		return get_residual(U, res)
+	solver.get_residual = counted_get_residual
+
+
+@pytest.mark.parametrize('time_stepper, nstages', [("BS32", 4),
+		("DP54", 7)])
+def test_adaptive_stepper_reaches_final_time_within_tolerance(
+		time_stepper, nstages):
+	'''
+	This test ensures that the adaptive steppers end at FinalTime with an
+	error of the order of the tolerance and reuse the last stage of each
+	accepted time step (FSAL).
+	'''
+	solver = build_solver(TimeStepper=time_stepper, TimeStepSize=0.01,
+			RelativeTolerance=1e-6, AbsoluteTolerance=1e-6)
+	count_residuals(solver)
+	solver.solve()
+	stepper = solver.stepper
+
+	np.testing.assert_allclose(solver.time, 1., rtol, atol)
+	assert solver.itime == stepper.num_time_steps == stepper.num_accepted
+	assert solver.num_residuals == 1 + (nstages - 1)*(
+			stepper.num_accepted + stepper.num_rejected)
+	error = np.max(np.abs(solver.state_coeffs - np.exp(-1.)))
+	assert 1e-10 < error < 1e-5
+
+
+@pytest.mark.parametrize('time_stepper', ["BS32", "DP54"])
+def test_adaptive_stepper_rejects_too_large_time_step(time_stepper):
+	'''
+	This test ensures that a first time step which is too large is
+	rejected and retried.
+	'''
+	solver = build_solver(TimeStepper=time_stepper, TimeStepSize=0.5,
+			RelativeTolerance=1e-8, AbsoluteTolerance=1e-8)
+	solver.solve()
+	stepper = solver.stepper
+
+	assert stepper.num_rejected > 0
+	np.testing.assert_allclose(solver.time, 1., rtol, atol)
+	np.testing.assert_allclose(solver.state_coeffs, np.exp(-1.), 1e-6)
+
+
+@pytest.mark.parametrize('time_stepper', ["BS32", "DP54"])
+def test_adaptive_stepper_error_decreases_with_tolerance(time_stepper):
+	'''
+	This test ensures that tighter tolerances give smaller errors with
+	more time steps, starting from an automatic first time step.
+	'''
+	errors_tol = []
+	num_time_steps = []
+	for tol in [1e-4, 1e-7]:
+		solver = build_solver(TimeStepper=time_stepper,
+				RelativeTolerance=tol, AbsoluteTolerance=tol)
+		solver.solve()
+		errors_tol.append(np.max(np.abs(solver.state_coeffs -
+				np.exp(-1.))))
+		num_time_steps.append(solver.stepper.num_accepted)
+
+	assert errors_tol[1] < 0.1*errors_tol[0]
+	assert num_time_steps[1] > num_time_steps[0]
+
+
+def test_adaptive_stepper_requires_final_time():
+	'''
+	This test ensures that the adaptive steppers require FinalTime.
+	'''
+	with pytest.raises(errors.IncompatibleError):
+		build_solver(TimeStepper="DP54", FinalTime=None, NumTimeSteps=10,
+				TimeStepSize=0.1)
+
+
+def record_time_steps(solver):
+	'''
+	Records the time steps returned by stepper.get_time_step and the
+	states from which they are computed.
+	'''
+	stepper = solver.stepper
+	get_time_step = stepper.get_time_step
+	solver.time_steps = []
+	solver.states = []
+	def recorded_get_time_step(stepper, solver):
+		solver.states.append(solver.state_coeffs.copy())
+		dt = get_time_step(stepper, solver)
+		solver.time_steps.append(dt)
+		return dt
+	stepper.get_time_step = recorded_get_time_step
+
+
+def test_cfl_wave_speed_from_residual_matches_constant_advection():
+	'''
+	This test ensures that the time steps from the wave speeds recorded by
+	the element residual are the same as those from the state for
+	constant advection.
+	'''
+	solvers = []
+	for from_residual in [False, True]:
+		solver = build_solver(TimeStepper="RK4", CFL=0.1,
+				CFLWaveSpeedFromResidual=from_residual)
+		record_time_steps(solver)
+		solver.solve()
+		solvers.append(solver)
+
+	assert solvers[0].max_wave_speed_elems is None
+	np.testing.assert_array_equal(solvers[1].max_wave_speed_elems, 1.)
+	np.testing.assert_array_equal(solvers[1].time_steps,
+			solvers[0].time_steps)
+	np.testing.assert_array_equal(solvers[1].state_coeffs,
+			solvers[0].state_coeffs)
+
+
+def test_cfl_wave_speed_from_residual_follows_solution():
+	'''
+	This test ensures that the time steps from the wave speeds recorded by
+	the element residual follow the solution, one time step behind, when
+	the wave speed changes, i.e., for Burgers with U(t) = exp(-t).
+	'''
+	solver = build_solver({"Type" : "Burgers"}, TimeStepper="RK4", CFL=0.1,
+			CFLWaveSpeedFromResidual=True)
+	record_time_steps(solver)
+	solver.solve()
+	time_steps = np.array(solver.time_steps[:-1])
+	# The wave speed is U and the elements have a length of 0.5
+	max_wave_speeds = np.array([np.max(np.abs(U)) for U in solver.states])
+
+	# The first two time steps both come from the initial condition
+	np.testing.assert_allclose(time_steps[0], 0.1*0.5/max_wave_speeds[0],
+			rtol, atol)
+	assert np.all(np.diff(time_steps[1:]) > 0.)
+	np.testing.assert_allclose(time_steps[1:],
+			0.1*0.5/max_wave_speeds[:time_steps.shape[0] - 1], 1e-14)
+
+
+def test_cfl_wave_speed_from_residual_evaluates_wave_speed_once_per_step():
+	'''
+	This test ensures that the wave speeds are only computed at the
+	quadrature points of the elements once per time step, or once per CFL
+	update (the numerical flux computes them at the faces).
+	'''
+	for params, expected in [({}, lambda n: n),
+			({"CFLWaveSpeedFromResidual" : True}, lambda n: n + 1),
+			({"CFLWaveSpeedFromResidual" : True, "CFLUpdateInterval" : 3},
+			lambda n: 1 + n//3)]:
+		solver = build_solver({"Type" : "Burgers"}, TimeStepper="RK4",
+				CFL=0.1, **params)
+		physics = solver.physics
+		compute_variable = physics.compute_variable
+		elem_shape = solver.elem_helpers.x_elems.shape[:2]
+		num_wave_speeds = [0]
+		def counted_compute_variable(var_name, Uq, *args, **kwargs):
+			if var_name == "MaxWaveSpeed" and Uq.shape[:2] == elem_shape:
+				num_wave_speeds[0] += 1
+			return compute_variable(var_name, Uq, *args, **kwargs)
+		physics.compute_variable = counted_compute_variable
+		solver.solve()
+
+		assert num_wave_speeds[0] == expected(solver.itime)
+
+
+def test_cfl_update_interval_keeps_time_step():
+	'''
+	This test ensures that the CFL-based time step is only updated every
+	CFLUpdateInterval time steps.
+	'''
+	solver = build_solver({"Type" : "Burgers"}, TimeStepper="RK4",
+			CFL=0.1, CFLUpdateInterval=3, CFLWaveSpeedFromResidual=True)
+	record_time_steps(solver)
+	solver.solve()
+	time_steps = np.array(solver.time_steps[:-1])
+
+	np.testing.assert_allclose(solver.time, 1., rtol, atol)
+	for i in range(0, time_steps.shape[0], 3):
+		np.testing.assert_array_equal(time_steps[i:i+3], time_steps[i])
+	assert np.all(np.diff(time_steps[::3]) > 0.)
+
+
+def test_cfl_wave_speed_from_residual_requires_serial_residual():
+	'''
+	This test ensures that the wave speeds are only recorded by the serial
+	residual.
+	'''
+	with pytest.raises(errors.IncompatibleError):
+		build_solver(numerics_params={"ResidualParallelism" : "Threads"},
+				TimeStepper="RK4", CFL=0.1, CFLWaveSpeedFromResidual=True)
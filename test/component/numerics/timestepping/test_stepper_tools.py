@@ -238,3 +238,16 @@ def test_check_addition_of_explicit_and_implicit_sources():
 	assert(solver.physics.source_terms[0].source_treatment == 'Explicit')
 	assert(solver.physics.source_terms[1].source_treatment == 'Implicit')
 	assert(solver.physics.source_terms[2].source_treatment == 'Implicit')
+
+
+@pytest.mark.parametrize('time_scheme', ["BS32", "DP54"])
+def test_set_stepper_adaptive(time_scheme):
+	'''
+	Checks setter function for the adaptive steppers and their tolerances
+	'''
+	params = {'TimeStepper' : time_scheme, 'RelativeTolerance' : 1e-5,
+			'AbsoluteTolerance' : 1e-7}
+	stepper = stepper_tools.set_stepper(params, None)
+	expected = getattr(stepper_defs, time_scheme)(None)
+	assert stepper == expected
+	assert stepper.rtol == 1e-5 and stepper.atol == 1e-7
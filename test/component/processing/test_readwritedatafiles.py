@@ -0,0 +1,255 @@
+import json
+import numpy as np
+import os
+import pickle
+import pytest
+import sys
+import threading
+sys.path.append('../src')
+
+import errors
+import processing.readwritedatafiles as readwritedatafiles
+import solver.builder as solver_builder
+
+
+def build_solver(tmp_path, **output_params):
+	'''
+	Builds a small 1D constant advection DG solver whose data files are
+	written to tmp_path.
+	'''
+	return solver_builder.build_solver_from_defaults(
+			TimeStepping={"FinalTime" : 0.5, "CFL" : 0.1,
+				"TimeStepper" : "RK4"},
+			Numerics={"SolutionOrder" : 2, "SolutionBasis" : "LagrangeSeg"},
+			Mesh={"ElementShape" : "Segment", "NumElemsX" : 8,
+				"xmin" : -1., "xmax" : 1.,
+				"PeriodicBoundariesX" : ["x1", "x2"]},
+			Physics={"Type" : "ConstAdvScalar",
+				"ConvFluxNumerical" : "LaxFriedrichs", "ConstVelocity" : 1.},
+			InitialCondition={"Function" : "Sine", "omega" : 2*np.pi},
+			Output={"Prefix" : str(tmp_path / "Data"), **output_params})
+
+
+def test_write_checkpoint_and_rebuild_solver(tmp_path):
+	'''
+	This test checks that a checkpoint stores the state and time and that
+	read_data_file rebuilds an equivalent solver from it.
+	'''
+	solver = build_solver(tmp_path)
+	solver.state_coeffs += np.random.default_rng(0).random(
+			solver.state_coeffs.shape)
+	solver.time = 0.25
+	solver.itime = 7
+
+	readwritedatafiles.write_data_file(solver, 3)
+	fname = str(tmp_path / "Data_3.npz")
+	assert os.listdir(tmp_path) == ["Data_3.npz"]
+
+	header, state_coeffs = readwritedatafiles.read_checkpoint(fname)
+	assert header["version"] == readwritedatafiles.CHECKPOINT_VERSION
+	assert header["solver"] == "DG"
+	assert header["basis"] == "LagrangeSeg"
+	assert header["order"] == 2
+	assert header["mesh"]["num_elems"] == 8
+	np.testing.assert_array_equal(state_coeffs, solver.state_coeffs)
+
+	solver_new = readwritedatafiles.read_data_file(fname)
+	assert type(solver_new) is type(solver)
+	assert solver_new.time == 0.25
+	assert solver_new.itime == 7
+	assert solver_new.order == solver.order
+	assert solver_new.basis.BASIS_TYPE == solver.basis.BASIS_TYPE
+	assert solver_new.stepper.num_time_steps == \
+			solver.stepper.num_time_steps
+	np.testing.assert_array_equal(solver_new.state_coeffs,
+			solver.state_coeffs)
+	np.testing.assert_array_equal(solver_new.mesh.node_coords,
+			solver.mesh.node_coords)
+
+
+def test_write_final_pickle(tmp_path):
+	'''
+	This test checks that the legacy pickle format can still be written
+	and read.
+	'''
+	solver = build_solver(tmp_path, DataFileType="Pickle")
+
+	readwritedatafiles.write_data_file(solver, -1)
+	fname = str(tmp_path / "Data_final.pkl")
+
+	solver_new = readwritedatafiles.read_data_file(fname)
+	np.testing.assert_array_equal(solver_new.state_coeffs,
+			solver.state_coeffs)
+
+
+def test_checkpoint_header_arrays_round_trip():
+	'''
+	This test checks that numpy arrays and scalars in the input deck
+	survive the JSON header.
+	'''
+	params = {"state" : np.array([1., 0.5, 2.675]), "n" : np.int64(3),
+			"nested" : {"ids" : np.arange(4, dtype=np.int32)}}
+
+	params_new = json.loads(json.dumps(params,
+			default=readwritedatafiles.encode_json),
+			object_hook=readwritedatafiles.decode_json)
+
+	np.testing.assert_array_equal(params_new["state"], params["state"])
+	assert params_new["n"] == 3
+	assert params_new["nested"]["ids"].dtype == np.int32
+	np.testing.assert_array_equal(params_new["nested"]["ids"], np.arange(4))
+
+
+def test_read_checkpoint_newer_version(tmp_path, monkeypatch):
+	'''
+	This test checks that checkpoints from newer versions are rejected.
+	'''
+	solver = build_solver(tmp_path)
+	monkeypatch.setattr(readwritedatafiles, "CHECKPOINT_VERSION",
+			readwritedatafiles.CHECKPOINT_VERSION + 1)
+	readwritedatafiles.write_data_file(solver, -1)
+	monkeypatch.undo()
+
+	with pytest.raises(errors.FileReadError):
+		readwritedatafiles.read_checkpoint(str(tmp_path / "Data_final.npz"))
+
+
+def test_rebuild_solver_without_deck(tmp_path):
+	'''
+	This test checks that a checkpoint written by a solver that was not
+	built from an input deck can be read but not rebuilt.
+	'''
+	solver = build_solver(tmp_path)
+	del solver.deck_params
+	readwritedatafiles.write_data_file(solver, -1)
+	fname = str(tmp_path / "Data_final.npz")
+
+	header, state_coeffs = readwritedatafiles.read_checkpoint(fname)
+	np.testing.assert_array_equal(state_coeffs, solver.state_coeffs)
+	with pytest.raises(errors.FileReadError):
+		readwritedatafiles.read_data_file(fname)
+
+
+def test_async_writer_matches_synchronous_solve(tmp_path, capsys):
+	'''
+	This test checks that solving with the background writer produces the
+	same data files as writing them synchronously.
+	'''
+	for name, async_write in [("sync", False), ("async", True)]:
+		os.mkdir(tmp_path / name)
+		solver = build_solver(tmp_path / name, WriteInterval=5,
+				WriteInitialSolution=True, AsyncWrite=async_write,
+				WriteQueueSize=2)
+		solver.solve()
+
+	fnames = sorted(os.listdir(tmp_path / "sync"))
+	assert fnames == sorted(os.listdir(tmp_path / "async"))
+	assert "Data_final.npz" in fnames and "Data_0.npz" in fnames
+	for fname in fnames:
+		header, Uc = readwritedatafiles.read_checkpoint(str(tmp_path /
+				"sync" / fname))
+		header_async, Uc_async = readwritedatafiles.read_checkpoint(str(
+				tmp_path / "async" / fname))
+		assert header_async["time"] == header["time"]
+		assert header_async["itime"] == header["itime"]
+		np.testing.assert_array_equal(Uc_async, Uc)
+
+
+def test_async_writer_back_pressure(tmp_path, monkeypatch):
+	'''
+	This test checks that writes block once the queue is full and that
+	each snapshot holds a copy of the state at the time it was queued.
+	'''
+	solver = build_solver(tmp_path)
+	release = threading.Event()
+	save_checkpoint = readwritedatafiles.save_checkpoint
+	def slow_save_checkpoint(*args):
+		release.wait()
+		save_checkpoint(*args)
+	monkeypatch.setattr(readwritedatafiles, "save_checkpoint",
+			slow_save_checkpoint)
+
+	writer = readwritedatafiles.AsyncDataFileWriter(1)
+	Uc0 = solver.state_coeffs.copy()
+	# The first snapshot is taken by the background thread and the second
+	# one fills the queue
+	writer.write(solver, 0)
+	solver.state_coeffs += 1.
+	writer.write(solver, 1)
+	# The third one has to wait
+	third = threading.Thread(target=writer.write, args=(solver, 2))
+	third.start()
+	third.join(0.2)
+	assert third.is_alive()
+
+	release.set()
+	third.join()
+	writer.close()
+
+	assert sorted(os.listdir(tmp_path)) == ["Data_0.npz", "Data_1.npz",
+			"Data_2.npz"]
+	header, Uc = readwritedatafiles.read_checkpoint(str(tmp_path /
+			"Data_0.npz"))
+	np.testing.assert_array_equal(Uc, Uc0)
+	header, Uc = readwritedatafiles.read_checkpoint(str(tmp_path /
+			"Data_1.npz"))
+	np.testing.assert_array_equal(Uc, Uc0 + 1.)
+
+
+def test_async_writer_error(tmp_path):
+	'''
+	This test checks that errors in the background thread are raised in
+	the calling thread.
+	'''
+	solver = build_solver(tmp_path / "missing_directory")
+	writer = readwritedatafiles.AsyncDataFileWriter(2)
+	writer.write(solver, 0)
+
+	with pytest.raises(FileNotFoundError):
+		writer.flush()
+	writer.close()
+
+
+def test_async_writer_error_does_not_replace_solve_error(tmp_path,
+		capsys):
+	'''
+	This test checks that a failed background write does not replace an
+	exception raised by the time loop, that the write error is reported,
+	and that the background writer is stopped.
+	'''
+	num_threads = threading.active_count()
+	solver = build_solver(tmp_path / "missing_directory", WriteInterval=1,
+			AsyncWrite=True)
+	take_time_step = solver.stepper.take_time_step
+	def failing_take_time_step(solver):
+		if solver.itime == 1:
+			raise RuntimeError("time step failed")
+		return take_time_step(solver)
+	solver.stepper.take_time_step = failing_take_time_step
+
+	with pytest.raises(RuntimeError, match="time step failed"):
+		solver.solve()
+	assert "Suppressed data file writer error" in capsys.readouterr().out
+	assert threading.active_count() == num_threads
+
+
+def test_async_writer_stopped_if_final_write_fails(tmp_path):
+	'''
+	This test checks that the background writer is stopped if the final
+	data file cannot be written.
+	'''
+	num_threads = threading.active_count()
+	solver = build_solver(tmp_path / "missing_directory", AsyncWrite=True)
+
+	with pytest.raises(FileNotFoundError):
+		solver.solve()
+	assert threading.active_count() == num_threads
+
+
+def test_async_write_requires_checkpoint(tmp_path):
+	'''
+	This test checks that the background writer cannot be combined with
+	pickle data files.
+	'''
+	with pytest.raises(errors.IncompatibleError):
+		build_solver(tmp_path, DataFileType="Pickle", AsyncWrite=True)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+import sys
+sys.path.append('../src')
+
+import solver.builder as solver_builder
+
+
+def build_solver(**time_stepping_params):
+	'''
+	Builds a small 2D scalar advection ADER-DG solver.
+	'''
+	IC_params = {"Function" : "Gaussian", "x0" : [0., 0.]}
+
+	return solver_builder.build_solver_from_defaults(
+			TimeStepping={"FinalTime" : 1., "TimeStepper" : "ADER",
+				**time_stepping_params},
+			Numerics={"SolutionOrder" : 2, "SolutionBasis" : "LagrangeQuad",
+				"Solver" : "ADERDG"},
+			Mesh={"ElementShape" : "Quadrilateral", "NumElemsX" : 4,
+				"NumElemsY" : 4, "xmin" : -5., "xmax" : 5., "ymin" : -5.,
+				"ymax" : 5.},
+			Physics={"Type" : "ConstAdvScalar",
+				"ConvFluxNumerical" : "LaxFriedrichs", "ConstXVelocity" : 1.,
+				"ConstYVelocity" : 1.},
+			InitialCondition=IC_params,
+			BoundaryConditions={name : {"BCType" : "StateAll", **IC_params}
+				for name in ["x1", "x2", "y1", "y2"]})
+
+
+def take_time_step(solver):
+	stepper = solver.stepper
+	stepper.dt = stepper.get_time_step(stepper, solver)
+	stepper.take_time_step(solver)
+	solver.time += stepper.dt
+
+
+def test_ader_matrices_do_not_depend_on_time_step():
+	'''
+	This test ensures that the precomputed ADER-DG operators are the same
+	for different time step sizes.
+	'''
+	ader_helpers = build_solver(TimeStepSize=0.1).ader_helpers
+	ader_helpers_other = build_solver(TimeStepSize=0.0132).ader_helpers
+
+	for name in ["FTL", "FTR", "SMT", "SMS_elems", "MM", "iMM",
+			"iMM_elems", "K", "iK"]:
+		np.testing.assert_array_equal(getattr(ader_helpers, name),
+				getattr(ader_helpers_other, name))
+
+
+def test_cfl_time_stepping_matches_fixed_time_step():
+	'''
+	This test ensures that CFL-based time stepping can be used with
+	ADER-DG and gives the same solution as a fixed time step of the same
+	size (the wave speed of constant advection does not change).
+	'''
+	solver = build_solver(CFL=0.1)
+	take_time_step(solver)
+	dt = solver.stepper.dt
+	solver_fixed = build_solver(TimeStepSize=dt)
+	take_time_step(solver_fixed)
+	for _ in range(2):
+		take_time_step(solver)
+		take_time_step(solver_fixed)
+
+	assert solver.stepper.dt == dt
+	np.testing.assert_array_equal(solver.state_coeffs,
+			solver_fixed.state_coeffs)
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+import sys
+import tracemalloc
+sys.path.append('../src')
+
+import solver.builder as solver_builder
+
+
+def build_solver(**numerics_params):
+	'''
+	Builds a small 2D Euler DG solver with a CFL-based time step.
+	'''
+	return solver_builder.build_solver_from_defaults(
+			TimeStepping={"FinalTime" : 10., "CFL" : 0.1,
+				"TimeStepper" : "RK4"},
+			Numerics={"SolutionOrder" : 2, "SolutionBasis" : "LagrangeQuad",
+				**numerics_params},
+			Mesh={"ElementShape" : "Quadrilateral", "NumElemsX" : 8,
+				"NumElemsY" : 8, "xmin" : -5., "xmax" : 5., "ymin" : -5.,
+				"ymax" : 5., "PeriodicBoundariesX" : ["x1", "x2"],
+				"PeriodicBoundariesY" : ["y1", "y2"]},
+			Physics={"Type" : "Euler", "ConvFluxNumerical" : "Roe",
+				"GasConstant" : 1., "SpecificHeatRatio" : 1.4},
+			InitialCondition={"Function" : "IsentropicVortex"})
+
+
+def take_time_step(solver):
+	stepper = solver.stepper
+	stepper.dt = stepper.get_time_step(stepper, solver)
+	stepper.take_time_step(solver)
+	solver.time += stepper.dt
+
+
+def test_time_step_allocations_stay_flat():
+	'''
+	This test ensures that once the work arrays have been allocated, time
+	steps neither retain memory nor allocate more from one step to the
+	next.
+	'''
+	solver = build_solver()
+	for _ in range(2):
+		take_time_step(solver)
+	num_work_bytes = solver.work_arrays.get_num_bytes()
+
+	peaks = []
+	currents = []
+	tracemalloc.start()
+	try:
+		# The first traced step also records one-off allocations
+		take_time_step(solver)
+		for _ in range(4):
+			tracemalloc.reset_peak()
+			start = tracemalloc.get_traced_memory()[0]
+			take_time_step(solver)
+			current, peak = tracemalloc.get_traced_memory()
+			peaks.append(peak - start)
+			currents.append(current)
+	finally:
+		tracemalloc.stop()
+
+	assert solver.work_arrays.get_num_bytes() == num_work_bytes
+	assert currents[-1] - currents[0] < 16384
+	assert max(peaks) - min(peaks) < 16384
+
+
+@pytest.mark.parametrize('basis', ["LagrangeQuad", "LegendreQuad"])
+def test_sum_factorization_matches_full_basis(basis):
+	'''
+	This test ensures that the element residual evaluated with sum
+	factorization matches the one evaluated with the full basis matrices.
+	'''
+	residuals = []
+	for min_order in [None, 0]:
+		solver = build_solver(SolutionOrder=3, SolutionBasis=basis,
+				SumFactorizationMinOrder=min_order)
+		assert solver.sum_factorization == (min_order is not None)
+		Uc = solver.state_coeffs
+		residuals.append(solver.get_element_residual(Uc,
+				np.zeros_like(Uc)))
+
+	np.testing.assert_allclose(residuals[1], residuals[0], rtol=1e-12,
+			atol=1e-12)
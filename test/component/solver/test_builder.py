@@ -0,0 +1,87 @@
+import copy
+import numpy as np
+import os
+import pytest
+import sys
+sys.path.append('../src')
+
+import defaultparams as default_deck
+import meshing.tools as mesh_tools
+import solver.builder as solver_builder
+
+
+def get_mesh_params(cache_dir, **kwargs):
+	'''
+	Returns the default mesh parameters for a periodic quadrilateral mesh,
+	with the given overrides.
+	'''
+	mesh_params = copy.deepcopy(default_deck.Mesh)
+	mesh_params.update({
+		"ElementShape" : "Quadrilateral",
+		"NumElemsX" : 4,
+		"NumElemsY" : 3,
+		"PeriodicBoundariesX" : ["x1", "x2"],
+		"CacheDirectory" : cache_dir,
+	})
+	mesh_params.update(kwargs)
+
+	return mesh_params
+
+
+def test_create_mesh_should_reuse_cached_mesh(tmp_path, monkeypatch):
+	'''
+	This test checks that a processed mesh is written to the cache
+	directory and reused, without processing it again, by a later call
+	with the same mesh parameters.
+	'''
+	mesh_params = get_mesh_params(str(tmp_path))
+	mesh = solver_builder.create_mesh(mesh_params)
+	cache_file = mesh_tools.get_mesh_cache_file(mesh_params)
+	assert os.path.isfile(cache_file)
+
+	def fail(*args, **kwargs):
+		raise AssertionError("Mesh should have been loaded from the cache")
+	monkeypatch.setattr(mesh_tools, "make_periodic_translational", fail)
+	cached_mesh = solver_builder.create_mesh(mesh_params)
+
+	np.testing.assert_array_equal(cached_mesh.node_coords, mesh.node_coords)
+	np.testing.assert_array_equal(cached_mesh.elem_to_node_IDs,
+			mesh.elem_to_node_IDs)
+	assert cached_mesh.num_interior_faces == mesh.num_interior_faces
+	assert list(cached_mesh.boundary_groups) == ["y1", "y2"]
+
+
+def test_mesh_cache_file_changes_with_mesh_params(tmp_path):
+	'''
+	This test checks that the cache file name depends on the mesh
+	parameters and that caching is disabled by default.
+	'''
+	fname = mesh_tools.get_mesh_cache_file(get_mesh_params(str(tmp_path)))
+
+	assert fname == mesh_tools.get_mesh_cache_file(get_mesh_params(
+			str(tmp_path)))
+	assert fname != mesh_tools.get_mesh_cache_file(get_mesh_params(
+			str(tmp_path), NumElemsX=5))
+	assert fname != mesh_tools.get_mesh_cache_file(get_mesh_params(
+			str(tmp_path), PeriodicBoundariesX=[]))
+	assert mesh_tools.get_mesh_cache_file(get_mesh_params(None)) is None
+
+
+def test_build_solver_from_defaults_updates_given_sections():
+	'''
+	This test checks that the given sections overwrite the defaults, that
+	the other sections keep their defaults, and that the default input
+	deck is left unchanged.
+	'''
+	default_mesh = copy.deepcopy(default_deck.Mesh)
+	solver = solver_builder.build_solver_from_defaults(
+			Mesh={"NumElemsX" : 3, "PeriodicBoundariesX" : ["x1", "x2"]},
+			Physics={"Type" : "ConstAdvScalar",
+				"ConvFluxNumerical" : "LaxFriedrichs"},
+			InitialCondition={"state" : [1.]})
+
+	assert solver.mesh.num_elems == 3
+	assert solver.deck_params["Mesh"]["NumElemsX"] == 3
+	assert solver.deck_params["Mesh"]["xmax"] == default_deck.Mesh["xmax"]
+	assert solver.deck_params["Numerics"] == default_deck.Numerics
+	assert default_deck.Mesh == default_mesh
@@ -0,0 +1,228 @@
+import numpy as np
+import pytest
+import sys
+sys.path.append('../src')
+
+import errors
+import meshing.common as mesh_common
+import numerics.basis.ader_tools as basis_st_tools
+import solver.builder as solver_builder
+import solver.lts as lts
+
+rtol = 1e-15
+atol = 1e-15
+
+
+def build_solver(mesh_params, **time_stepping_params):
+	'''
+	Builds a periodic scalar advection ADER-DG solver.
+	'''
+	return solver_builder.build_solver_from_defaults(
+			TimeStepping={"TimeStepper" : "ADER", **time_stepping_params},
+			Numerics={"SolutionOrder" : 2, "Solver" : "ADERDG"},
+			Mesh=mesh_params,
+			Physics={"Type" : "ConstAdvScalar",
+				"ConvFluxNumerical" : "LaxFriedrichs", "ConstVelocity" : 1.},
+			InitialCondition={"Function" : "Sine", "omega" : np.pi})
+
+
+def graded_mesh_params(tmp_path):
+	'''
+	Writes a periodic 1D mesh on [0, 2] whose elements on [0, 1] are four
+	times smaller than those on [1, 2].
+	'''
+	mesh = mesh_common.mesh_1D(num_elems=20, xmin=0., xmax=2.)
+	mesh.node_coords[:, 0] = np.concatenate([np.linspace(0., 1., 17),
+			np.linspace(1., 2., 5)[1:]])
+	fname = str(tmp_path / "graded.qmesh")
+	mesh.save(fname)
+
+	return {"File" : fname, "PeriodicBoundariesX" : ["x1", "x2"]}
+
+
+def build_solver_2D(mesh_params, basis, **time_stepping_params):
+	'''
+	Builds a doubly periodic 2D scalar advection ADER-DG solver with a
+	Gaussian initial condition.
+	'''
+	return solver_builder.build_solver_from_defaults(
+			TimeStepping={"TimeStepper" : "ADER", **time_stepping_params},
+			Numerics={"SolutionOrder" : 2, "Solver" : "ADERDG",
+				"SolutionBasis" : basis},
+			Mesh=mesh_params,
+			Physics={"Type" : "ConstAdvScalar",
+				"ConvFluxNumerical" : "LaxFriedrichs", "ConstXVelocity" : 1.,
+				"ConstYVelocity" : 1.},
+			InitialCondition={"Function" : "Gaussian", "x0" : [0., 0.]})
+
+
+def graded_mesh_params_2D(tmp_path, split_into_tris):
+	'''
+	Writes a doubly periodic 2D mesh on [-5, 5]^2 whose elements on
+	[-5, -3] in each direction are four times smaller than the others, so
+	that the elements between the fine and coarse regions are elongated.
+	'''
+	coords = np.concatenate([np.linspace(-5., -3., 9),
+			np.linspace(-3., 5., 9)[1:]])
+	mesh = mesh_common.mesh_2D(num_elems_x=16, num_elems_y=16, xmin=0.,
+			xmax=16., ymin=0., ymax=16.)
+	mesh.node_coords[:] = coords[np.rint(mesh.node_coords).astype(int)]
+	if split_into_tris:
+		mesh = mesh_common.split_quadrils_into_tris(mesh)
+	fname = str(tmp_path / "graded.qmesh")
+	mesh.save(fname)
+
+	return {"File" : fname, "PeriodicBoundariesX" : ["x1", "x2"],
+			"PeriodicBoundariesY" : ["y1", "y2"]}
+
+
+def solve(solver):
+	stepper = solver.stepper
+	while solver.time < solver.params["FinalTime"] - 1e-12:
+		stepper.dt = stepper.get_time_step(stepper, solver)
+		stepper.take_time_step(solver)
+		solver.time += stepper.dt
+
+
+def get_mass(solver):
+	elem_helpers = solver.elem_helpers
+	Uq = np.matmul(elem_helpers.basis_val, solver.state_coeffs)
+
+	return np.sum(Uq[:, :, 0]*elem_helpers.quad_wts[:, 0]*
+			elem_helpers.djac_elems[:, :, 0])
+
+
+def get_error(solver):
+	elem_helpers = solver.elem_helpers
+	Uq = np.matmul(elem_helpers.basis_val, solver.state_coeffs)
+	x = elem_helpers.x_elems
+
+	return np.max(np.abs(Uq - solver.physics.IC.get_state(solver.physics, x,
+			solver.time)))
+
+
+def test_time_step_levels_of_neighbors_differ_by_at_most_one():
+	'''
+	This test ensures that elements are assigned to the largest allowable
+	power-of-two time step level and that the levels of neighbors differ
+	by at most one.
+	'''
+	dt_elems = np.array([1., 1.5, 8., 8., 8., 8., 2.5])
+	elemL_IDs = np.arange(6)
+	elemR_IDs = np.arange(1, 7)
+
+	dt_min, levels = lts.get_time_step_levels(dt_elems, 4, elemL_IDs,
+			elemR_IDs)
+	assert dt_min == 1.
+	np.testing.assert_array_equal(levels, [0, 0, 1, 2, 3, 2, 1])
+
+	_, levels = lts.get_time_step_levels(dt_elems, 2, elemL_IDs,
+			elemR_IDs)
+	np.testing.assert_array_equal(levels, [0, 0, 1, 1, 1, 1, 1])
+
+
+@pytest.mark.parametrize('ratio', [2, 4])
+def test_time_restriction_matrices_are_exact(ratio):
+	'''
+	This test ensures that the time restriction matrices give the
+	space-time polynomial on each subinterval.
+	'''
+	order = 2
+	mesh = mesh_common.mesh_1D(num_elems=1)
+	basis_st = basis_st_tools.set_basis_spacetime(mesh, order,
+			"LagrangeSeg")
+	basis_st.set_elem_quadrature_type("GaussLegendre")
+	P = lts.get_time_restriction_matrices(basis_st, order, ratio)
+
+	rng = np.random.default_rng(0)
+	Up = rng.random([basis_st.nb])
+	pts = np.stack([np.linspace(-1., 1., 5), np.linspace(-0.9, 1., 5)],
+			axis=1)
+	for j in range(ratio):
+		sub_pts = pts.copy()
+		sub_pts[:, -1] = (2.*j + 1. + pts[:, -1])/ratio - 1.
+		np.testing.assert_allclose(
+				np.matmul(basis_st.get_values(pts), np.matmul(P[j], Up)),
+				np.matmul(basis_st.get_values(sub_pts), Up), rtol, 1e-14)
+
+
+def test_single_level_matches_ader():
+	'''
+	This test ensures that local time stepping with a single level gives
+	the same solution as ADER-DG with the same time step.
+	'''
+	mesh_params = {"NumElemsX" : 8, "xmin" : 0., "xmax" : 2.,
+			"PeriodicBoundariesX" : ["x1", "x2"]}
+	solver = build_solver(mesh_params, FinalTime=0.5, CFL=0.1,
+			LocalTimeSteppingLevels=3)
+	stepper = solver.stepper
+	dt = stepper.get_time_step(stepper, solver)
+	solve(solver)
+	assert np.all(stepper.levels == 0)
+
+	solver_ader = build_solver(mesh_params, FinalTime=0.5,
+			TimeStepSize=dt)
+	solve(solver_ader)
+
+	np.testing.assert_array_equal(solver.state_coeffs,
+			solver_ader.state_coeffs)
+
+
+def test_lts_is_conservative_and_accurate(tmp_path):
+	'''
+	This test ensures that local time stepping on a graded mesh conserves
+	mass and is as accurate as global time stepping.
+	'''
+	mesh_params = graded_mesh_params(tmp_path)
+	solver = build_solver(mesh_params, FinalTime=0.5, CFL=0.1,
+			LocalTimeSteppingLevels=3)
+	mass = get_mass(solver)
+	solve(solver)
+	np.testing.assert_array_equal(np.unique(solver.stepper.levels),
+			[0, 1, 2])
+	np.testing.assert_allclose(get_mass(solver), mass, rtol, 1e-14)
+
+	solver_global = build_solver(mesh_params, FinalTime=0.5, CFL=0.1)
+	solve(solver_global)
+	assert solver.stepper.num_time_steps < \
+			solver_global.stepper.num_time_steps/3
+	assert get_error(solver) < 1.1*get_error(solver_global)
+
+
+@pytest.mark.parametrize('basis, split_into_tris', [
+		("LagrangeQuad", False), ("LagrangeTri", True)])
+def test_lts_is_conservative_and_accurate_on_graded_2D_mesh(tmp_path,
+		basis, split_into_tris):
+	'''
+	This test ensures that local time stepping on a graded 2D mesh keeps
+	the elongated elements between the fine and coarse regions on the
+	finest level, so that it conserves mass and is as accurate as global
+	time stepping.
+	'''
+	mesh_params = graded_mesh_params_2D(tmp_path, split_into_tris)
+	solver = build_solver_2D(mesh_params, basis, FinalTime=1., CFL=0.1,
+			LocalTimeSteppingLevels=2)
+	mass = get_mass(solver)
+	solve(solver)
+	levels = solver.stepper.levels
+	height_elems = solver.elem_helpers.height_elems
+	np.testing.assert_array_equal(np.unique(levels), [0, 1])
+	assert np.all(levels[height_elems < 2.*np.min(height_elems)] == 0)
+	np.testing.assert_allclose(get_mass(solver), mass, rtol, 1e-14)
+
+	solver_global = build_solver_2D(mesh_params, basis, FinalTime=1.,
+			CFL=0.1)
+	solve(solver_global)
+	assert get_error(solver) < 1.1*get_error(solver_global)
+
+
+def test_lts_requires_cfl():
+	'''
+	This test ensures that local time stepping is only used with CFL-based
+	time steps.
+	'''
+	mesh_params = {"NumElemsX" : 8, "xmin" : 0., "xmax" : 2.,
+			"PeriodicBoundariesX" : ["x1", "x2"]}
+	with pytest.raises(errors.IncompatibleError):
+		build_solver(mesh_params, FinalTime=0.5, TimeStepSize=0.01,
+				LocalTimeSteppingLevels=3)
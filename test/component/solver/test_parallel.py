@@ -0,0 +1,177 @@
+import numpy as np
+import pytest
+import sys
+sys.path.append('../src')
+
+import errors
+import solver.builder as solver_builder
+import solver.parallel as parallel
+
+
+def build_solver(time_stepper="RK4", **numerics_params):
+	'''
+	Builds a small 2D advection-diffusion solver with boundary groups on
+	all sides.
+	'''
+	IC_params = {"Function" : "DiffGaussian2D", "xo" : 0.5, "yo" : 0.5}
+
+	return solver_builder.build_solver_from_defaults(
+			TimeStepping={"FinalTime" : 0.1, "TimeStepSize" : 0.01,
+				"TimeStepper" : time_stepper},
+			Numerics={"SolutionOrder" : 2, "SolutionBasis" : "LagrangeQuad",
+				**numerics_params},
+			Mesh={"ElementShape" : "Quadrilateral", "NumElemsX" : 5,
+				"NumElemsY" : 5, "xmin" : 0., "xmax" : 2., "ymin" : 0.,
+				"ymax" : 2.},
+			Physics={"Type" : "ConstAdvDiffScalar",
+				"ConvFluxNumerical" : "LaxFriedrichs",
+				"DiffFluxNumerical" : "SIP", "ConstXVelocity" : 0.2,
+				"ConstYVelocity" : 0.2, "DiffCoefficientX" : 0.01,
+				"DiffCoefficientY" : 0.01},
+			InitialCondition=IC_params,
+			BoundaryConditions={name : {"BCType" : "StateAll", **IC_params}
+				for name in ["x1", "x2", "y1", "y2"]})
+
+
+def get_serial_residual(solver, U):
+	res = np.zeros_like(U)
+	solver.get_residual(U, res)
+
+	return res
+
+
+@pytest.mark.parametrize('num_items, num_parts', [(25, 1), (25, 3),
+		(40, 4), (5, 3), (0, 2)])
+def test_partition_range_is_aligned_and_complete(num_items, num_parts):
+	'''
+	This test ensures that the partition ranges cover all items and start
+	at multiples of the alignment.
+	'''
+	ranges = parallel.partition_range(num_items, num_parts)
+
+	assert len(ranges) == num_parts
+	assert ranges[0][0] == 0 and ranges[-1][1] == num_items
+	for (first, last), (next_first, _) in zip(ranges[:-1], ranges[1:]):
+		assert last == next_first
+	for first, last in ranges:
+		assert first <= last
+		assert first % parallel.ALIGNMENT == 0 or first == num_items
+
+
+@pytest.mark.parametrize('num_parts', [1, 2, 3, 4])
+def test_partitioned_residual_is_identical_to_serial(num_parts):
+	'''
+	This test ensures that assembling the residual from partitions gives
+	exactly the serial residual.
+	'''
+	solver = build_solver()
+	U = solver.state_coeffs + 0.1*np.random.default_rng(0).random(
+			solver.state_coeffs.shape)
+	res_serial = get_serial_residual(solver, U)
+
+	ne, nb, ns = U.shape
+	num_int_faces = solver.int_face_helpers.elemL_IDs.shape[0]
+	num_bfaces = [elem_IDs.shape[0] for elem_IDs in
+			solver.bface_helpers.elem_IDs]
+	R_int = np.zeros([2*num_int_faces, nb, ns])
+	R_int_diff = np.zeros_like(R_int)
+	R_bfaces = np.split(np.zeros([sum(num_bfaces), nb, ns]),
+			np.cumsum(num_bfaces)[:-1])
+
+	partitions = [parallel.PartitionResidual(solver, part_num, num_parts)
+			for part_num in range(num_parts)]
+	has_diff = [partition.get_face_residuals(U, R_int, R_int_diff,
+			R_bfaces) for partition in partitions]
+	res = np.zeros_like(U)
+	for partition in partitions:
+		partition.get_residual(U, res, R_int, R_int_diff, R_bfaces,
+				any(has_diff))
+
+	np.testing.assert_array_equal(res, res_serial)
+
+
+def test_process_pool_residual_is_identical_to_serial():
+	'''
+	This test ensures that the residual evaluated by worker processes is
+	exactly the serial residual.
+	'''
+	try:
+		pool_solver = build_solver(ResidualParallelism="Processes",
+				NumWorkers=2)
+		pool_solver.get_residual(pool_solver.state_coeffs,
+				np.zeros_like(pool_solver.state_coeffs))
+	except errors.IncompatibleError:
+		pytest.skip("fork start method not available")
+
+	solver = build_solver()
+	U = solver.state_coeffs + 0.1*np.random.default_rng(0).random(
+			solver.state_coeffs.shape)
+	try:
+		res = pool_solver.get_residual(U, np.zeros_like(U))
+		assert len(pool_solver.residual_pool.processes) == 2
+	finally:
+		pool_solver.residual_pool.close()
+
+	np.testing.assert_array_equal(res, get_serial_residual(solver, U))
+	assert all(not process.is_alive() for process in
+			pool_solver.residual_pool.processes)
+
+
+@pytest.mark.parametrize('num_workers, block_size', [(1, 8), (3, 8),
+		(2, 16), (2, 0)])
+def test_thread_pool_residual_is_identical_to_serial(num_workers,
+		block_size):
+	'''
+	This test ensures that the residual evaluated in blocks by a thread
+	pool is exactly the serial residual.
+	'''
+	pool_solver = build_solver(ResidualParallelism="Threads",
+			NumWorkers=num_workers, ResidualBlockSize=block_size)
+	solver = build_solver()
+	U = solver.state_coeffs + 0.1*np.random.default_rng(0).random(
+			solver.state_coeffs.shape)
+	try:
+		res = pool_solver.get_residual(U, np.zeros_like(U))
+		# Evaluate twice to check that the work arrays are reused safely
+		res = pool_solver.get_residual(U, np.zeros_like(U))
+	finally:
+		pool_solver.residual_pool.close()
+
+	np.testing.assert_array_equal(res, get_serial_residual(solver, U))
+
+
+@pytest.mark.parametrize('block_size, expected', [(8, 8), (20, 16),
+		(3, 8)])
+def test_get_block_size_rounds_to_alignment(block_size, expected):
+	'''
+	This test ensures that requested block sizes are rounded to multiples
+	of the alignment.
+	'''
+	assert parallel.get_block_size(block_size, None) == expected
+
+
+def test_get_block_size_auto_fits_cache():
+	'''
+	This test ensures that the automatic block size keeps the per-block
+	temporaries within the cache size.
+	'''
+	solver = build_solver()
+	block_size = parallel.get_block_size(0, solver)
+
+	nq = solver.elem_helpers.quad_wts.shape[0]
+	nb = solver.basis.nb
+	elem_bytes = 8*nq*(nb*2 + 1 + 2*2)
+	assert block_size % parallel.ALIGNMENT == 0
+	assert block_size*elem_bytes <= parallel.BLOCK_CACHE_SIZE
+
+
+@pytest.mark.parametrize('parallelism', ["Processes", "Threads"])
+def test_aderdg_with_parallel_residual_raises_incompatible_error(
+		parallelism):
+	'''
+	This test ensures that the ADER-DG solver rejects parallel residual
+	evaluation.
+	'''
+	with pytest.raises(errors.IncompatibleError):
+		build_solver(time_stepper="ADER", Solver="ADERDG",
+				ResidualParallelism=parallelism)
@@ -0,0 +1,118 @@
+import json
+import numpy as np
+import pytest
+import sys
+sys.path.append('../src')
+
+import solver.builder as solver_builder
+import solver.profiling as profiling
+
+
+def build_solver(**output_params):
+	'''
+	Builds a small 2D advection-diffusion solver with boundary groups on
+	all sides.
+	'''
+	IC_params = {"Function" : "DiffGaussian2D", "xo" : 0.5, "yo" : 0.5}
+
+	return solver_builder.build_solver_from_defaults(
+			TimeStepping={"FinalTime" : 0.03, "TimeStepSize" : 0.01,
+				"TimeStepper" : "RK4"},
+			Numerics={"SolutionOrder" : 1, "SolutionBasis" : "LagrangeQuad"},
+			Mesh={"ElementShape" : "Quadrilateral", "NumElemsX" : 3,
+				"NumElemsY" : 3, "xmin" : 0., "xmax" : 2., "ymin" : 0.,
+				"ymax" : 2.},
+			Physics={"Type" : "ConstAdvDiffScalar",
+				"ConvFluxNumerical" : "LaxFriedrichs",
+				"DiffFluxNumerical" : "SIP", "ConstXVelocity" : 0.2,
+				"ConstYVelocity" : 0.2, "DiffCoefficientX" : 0.01,
+				"DiffCoefficientY" : 0.01},
+			InitialCondition=IC_params,
+			BoundaryConditions={name : {"BCType" : "StateAll", **IC_params}
+				for name in ["x1", "x2", "y1", "y2"]},
+			Output={"WriteFinalSolution" : False, "AutoPostProcess" : False,
+				**output_params})
+
+
+def test_disabled_profiler_records_nothing():
+	'''
+	This test ensures that a disabled profiler hands out the shared no-op
+	context manager and records nothing.
+	'''
+	profiler = profiling.Profiler()
+
+	assert profiler.phase(profiling.TIME_STEP) is profiling.NULL_PHASE
+	with profiler.phase(profiling.TIME_STEP):
+		pass
+	profiler.end_time_step()
+
+	assert profiler.totals == {}
+	assert profiler.num_time_steps == 0
+
+
+def test_profiler_pads_step_times_of_new_phases():
+	'''
+	This test ensures that the per-time-step times of a phase first
+	entered after some time steps are padded with zeros.
+	'''
+	profiler = profiling.Profiler(True)
+
+	profiler.add(profiling.TIME_STEP, 1.)
+	profiler.end_time_step()
+	profiler.add(profiling.TIME_STEP, 2.)
+	profiler.add(profiling.IO, 3.)
+	profiler.add(profiling.IO, 4.)
+	profiler.end_time_step()
+
+	phases = profiler.get_summary()["phases"]
+	assert phases[profiling.TIME_STEP]["step_times"] == [1., 2.]
+	assert phases[profiling.IO]["step_times"] == [0., 7.]
+	assert phases[profiling.IO]["total"] == 7.
+	assert phases[profiling.IO]["calls"] == 2
+
+
+def test_profiler_times_reentered_phase_once(monkeypatch):
+	'''
+	This test ensures that a phase re-entered while it is active is timed
+	from its outermost entry, while other nested phases are timed
+	separately.
+	'''
+	clock = iter([0., 1., 3., 6.])
+	monkeypatch.setattr(profiling.time, "perf_counter", lambda: next(clock))
+	profiler = profiling.Profiler(True)
+
+	with profiler.phase(profiling.IO):
+		with profiler.phase(profiling.IO):
+			with profiler.phase(profiling.TIME_STEP):
+				pass
+
+	assert profiler.totals == {profiling.IO : 6.,
+			profiling.TIME_STEP : 2.}
+	assert profiler.counts == {profiling.IO : 1, profiling.TIME_STEP : 1}
+
+
+def test_solve_writes_profile(tmp_path, capsys):
+	'''
+	This test ensures that a profiled solve times the expected phases in
+	every time step and writes them to the JSON file.
+	'''
+	fname = str(tmp_path / "profile.json")
+	solver = build_solver(Profile=True, ProfileFile=fname)
+	solver.solve()
+
+	with open(fname) as fo:
+		summary = json.load(fo)
+
+	assert "Profile" in capsys.readouterr().out
+	assert summary["num_time_steps"] == 3
+	assert summary["wall_clock_time"] == solver.wall_clock_time
+	expected_phases = [profiling.ELEMENT_RESIDUAL, profiling.INTERIOR_FACES,
+			profiling.TIME_STEP] + [profiling.BOUNDARY_FACES + "/" + name for
+			name in ["x1", "x2", "y1", "y2"]]
+	assert sorted(summary["phases"]) == sorted(expected_phases)
+	for name, phase in summary["phases"].items():
+		assert len(phase["step_times"]) == 3
+		np.testing.assert_allclose(sum(phase["step_times"]),
+				phase["total"])
+	# RK4 evaluates the residual four times per time step
+	assert summary["phases"][profiling.ELEMENT_RESIDUAL]["calls"] == 12
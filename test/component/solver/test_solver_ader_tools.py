@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from scipy.linalg import schur, solve_sylvester
+import sys
+sys.path.append('../src')
+
+import solver.ader_tools as solver_tools
+
+
+rtol = 1e-12
+atol = 1e-12
+
+
+@pytest.mark.parametrize('nb_st, ns', [(1, 1), (9, 1), (9, 3), (16, 4)])
+def test_solve_sylvester_batched_matches_scipy(nb_st, ns):
+	'''
+	This test checks the batched Sylvester solve against scipy's
+	solve_sylvester for each element.
+	'''
+	ne = 5
+	rng = np.random.default_rng(0)
+	A = rng.random([nb_st, nb_st]) + nb_st*np.eye(nb_st)
+	B = rng.random([ne, ns, ns])
+	C = rng.random([ne, nb_st, ns])
+
+	T, Z = schur(A, output="complex")
+	X = solver_tools.solve_sylvester_batched(T, Z, B, C)
+
+	assert X.shape == C.shape and np.isrealobj(X)
+	for ie in range(ne):
+		np.testing.assert_allclose(X[ie], solve_sylvester(A, B[ie], C[ie]),
+				rtol, atol)
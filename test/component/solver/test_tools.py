@@ -0,0 +1,257 @@
+import numpy as np
+import os
+import pytest
+import sys
+sys.path.append('../src')
+
+import meshing.common as mesh_common
+import numerics.basis.basis as basis_defs
+import numerics.helpers.helpers as helpers
+import solver.tools as solver_tools
+
+
+rtol = 1e-14
+atol = 1e-14
+
+
+class ElemHelpersStub(object):
+	'''
+	Minimal stand-in for ElemHelpers holding only the arrays needed by
+	the integral routines.
+	'''
+	def __init__(self, ne, nq, nb, ndims):
+		rng = np.random.default_rng(0)
+		self.quad_wts = rng.random([nq, 1])
+		self.basis_val = rng.random([nq, nb])
+		self.basis_phys_grad_elems = rng.random([ne, nq, nb, ndims])
+		self.djac_elems = rng.random([ne, nq, 1])
+
+
+@pytest.mark.parametrize('ndims', [1, 2, 3])
+def test_calculate_volume_flux_integral_matches_einsum(ndims):
+	'''
+	This test checks the volume flux integral against the direct
+	einsum formulation.
+	'''
+	ne, nq, nb, ns = 6, 5, 4, 3
+	elem_helpers = ElemHelpersStub(ne, nq, nb, ndims)
+	Fq = np.random.default_rng(1).random([ne, nq, ns, ndims])
+
+	res = solver_tools.calculate_volume_flux_integral(None, elem_helpers,
+			Fq)
+
+	F_quad = np.einsum('ijkl, jm, ijm -> ijkl', Fq, elem_helpers.quad_wts,
+			elem_helpers.djac_elems)
+	expected = np.einsum('ijnl, ijkl -> ink',
+			elem_helpers.basis_phys_grad_elems, F_quad)
+	np.testing.assert_allclose(res, expected, rtol, atol)
+
+def test_calculate_boundary_flux_integral_matches_einsum():
+	'''
+	This test checks the boundary flux integral against the direct
+	einsum formulation.
+	'''
+	nf, nq, nb, ns = 6, 3, 4, 2
+	rng = np.random.default_rng(2)
+	basis_val = rng.random([nf, nq, nb])
+	quad_wts = rng.random([nq, 1])
+	Fq = rng.random([nf, nq, ns])
+
+	resB = solver_tools.calculate_boundary_flux_integral(basis_val,
+			quad_wts, Fq)
+
+	expected = np.einsum('ijn, ijk -> ink', basis_val,
+			np.einsum('ijk, jm -> ijk', Fq, quad_wts))
+	np.testing.assert_allclose(resB, expected, rtol, atol)
+
+@pytest.mark.parametrize('ndims', [1, 2])
+def test_calculate_boundary_flux_integral_sum_matches_einsum(ndims):
+	'''
+	This test checks the directional boundary flux integral against the
+	direct einsum formulation.
+	'''
+	nf, nq, nb, ns = 6, 3, 4, 2
+	rng = np.random.default_rng(3)
+	basis_ref_grad = rng.random([nf, nq, nb, ndims])
+	quad_wts = rng.random([nq, 1])
+	Fq = rng.random([nf, nq, ns, ndims])
+
+	resB = solver_tools.calculate_boundary_flux_integral_sum(
+			basis_ref_grad, quad_wts, Fq)
+
+	expected = np.einsum('ijnl, ijkl -> ink', basis_ref_grad,
+			np.einsum('ijkl, jm -> ijkl', Fq, quad_wts))
+	np.testing.assert_allclose(resB, expected, rtol, atol)
+
+def test_calculate_source_term_integral_matches_einsum():
+	'''
+	This test checks the source term integral against the direct einsum
+	formulation.
+	'''
+	ne, nq, nb, ns = 6, 5, 4, 3
+	elem_helpers = ElemHelpersStub(ne, nq, nb, 2)
+	Sq = np.random.default_rng(4).random([ne, nq, ns])
+
+	res = solver_tools.calculate_source_term_integral(elem_helpers, Sq)
+
+	Sq_quad = np.einsum('ijk, jm, ijm -> ijk', Sq, elem_helpers.quad_wts,
+			elem_helpers.djac_elems)
+	expected = np.einsum('jn, ijk -> ink', elem_helpers.basis_val, Sq_quad)
+	np.testing.assert_allclose(res, expected, rtol, atol)
+
+@pytest.mark.parametrize('ndims', [1, 2])
+def test_integrals_with_work_arrays_match_integrals_without(ndims):
+	'''
+	This test checks that the integral routines give identical results
+	when writing into given arrays and drawing their temporaries from a
+	WorkArrays object, also when the work arrays are reused.
+	'''
+	ne, nq, nb, ns = 6, 5, 4, 3
+	elem_helpers = ElemHelpersStub(ne, nq, nb, ndims)
+	rng = np.random.default_rng(5)
+	Fq = rng.random([ne, nq, ns, ndims])
+	FqB = rng.random([ne, nq, ns])
+	Sq = rng.random([ne, nq, ns])
+	basis_val = rng.random([ne, nq, nb])
+	work_arrays = helpers.WorkArrays()
+	out = np.empty([ne, nb, ns])
+
+	for _ in range(2):
+		np.testing.assert_array_equal(
+				solver_tools.calculate_volume_flux_integral(None,
+				elem_helpers, Fq, out=out, work=work_arrays),
+				solver_tools.calculate_volume_flux_integral(None,
+				elem_helpers, Fq))
+		np.testing.assert_array_equal(
+				solver_tools.calculate_boundary_flux_integral(basis_val,
+				elem_helpers.quad_wts, FqB, out=out, work=work_arrays),
+				solver_tools.calculate_boundary_flux_integral(basis_val,
+				elem_helpers.quad_wts, FqB))
+		np.testing.assert_array_equal(
+				solver_tools.calculate_boundary_flux_integral_sum(
+				elem_helpers.basis_phys_grad_elems, elem_helpers.quad_wts,
+				Fq, out=out, work=work_arrays),
+				solver_tools.calculate_boundary_flux_integral_sum(
+				elem_helpers.basis_phys_grad_elems, elem_helpers.quad_wts,
+				Fq))
+		np.testing.assert_array_equal(
+				solver_tools.calculate_source_term_integral(elem_helpers,
+				Sq, out=out, work=work_arrays),
+				solver_tools.calculate_source_term_integral(elem_helpers,
+				Sq))
+
+
+class PhysicsStub(object):
+	'''
+	Minimal stand-in for a physics object for the helper cache key.
+	'''
+	NUM_STATE_VARS = 1
+	NDIMS = 1
+
+	def get_quadrature_order(self, order):
+		return 2*order + 1
+
+
+class SolverStub(object):
+	'''
+	Minimal stand-in for a solver object for the helper cache key.
+	'''
+	def __init__(self, cache_dir, num_elems=4, order=2):
+		self.params = {
+			"HelperCacheDirectory" : cache_dir,
+			"ElementQuadrature" : "GaussLegendre",
+			"FaceQuadrature" : "GaussLegendre",
+			"NodeType" : "Equidistant",
+			"ColocatedPoints" : False,
+		}
+		self.mesh = mesh_common.mesh_1D(num_elems=num_elems)
+		self.physics = PhysicsStub()
+		self.order = order
+		self.basis = basis_defs.LagrangeSeg(order)
+
+
+def test_get_helpers_cache_file_disabled_by_default():
+	'''
+	This test checks that no cache file is used without a cache directory.
+	'''
+	assert solver_tools.get_helpers_cache_file(SolverStub(None)) is None
+
+def test_get_helpers_cache_file_changes_with_inputs(tmp_path):
+	'''
+	This test checks that the cache file name depends on the mesh, the
+	order, the quadrature settings, and any extra inputs, and is
+	otherwise reproducible.
+	'''
+	solver = SolverStub(str(tmp_path))
+	fname = solver_tools.get_helpers_cache_file(solver)
+
+	assert fname == solver_tools.get_helpers_cache_file(
+			SolverStub(str(tmp_path)))
+	assert os.path.dirname(fname) == str(tmp_path)
+
+	other_fnames = []
+	other_fnames.append(solver_tools.get_helpers_cache_file(
+			SolverStub(str(tmp_path), num_elems=5)))
+	other_fnames.append(solver_tools.get_helpers_cache_file(
+			SolverStub(str(tmp_path), order=3)))
+
+	solver_moved = SolverStub(str(tmp_path))
+	solver_moved.mesh.node_coords[1, 0] += 1e-12
+	other_fnames.append(solver_tools.get_helpers_cache_file(solver_moved))
+
+	solver_quad = SolverStub(str(tmp_path))
+	solver_quad.params["ElementQuadrature"] = "GaussLobatto"
+	other_fnames.append(solver_tools.get_helpers_cache_file(solver_quad))
+
+	other_fnames.append(solver_tools.get_helpers_cache_file(solver,
+			extra_inputs=(0.1,)))
+
+	assert len(set(other_fnames + [fname])) == len(other_fnames) + 1
+
+def test_save_and_load_helpers_round_trip(tmp_path):
+	'''
+	This test checks that helper objects are restored exactly from the
+	cache, including nested lists/tuples and scalars, along with the
+	evaluated basis data.
+	'''
+	class HelperStub(object):
+		def __init__(self):
+			self.quad_wts = np.zeros(0)
+
+	solver = SolverStub(str(tmp_path))
+	helpers = HelperStub()
+	helpers.quad_wts = np.random.default_rng(0).random([3, 1])
+	helpers.IDs = [np.arange(4), np.arange(2)]
+	helpers.plan = [(np.array([0, 2]), np.array([1, 0]))]
+	helpers.vol = np.float64(2.5)
+	helpers.flag = True
+	helpers.nothing = None
+	solver.helpers = helpers
+	solver.basis.basis_val = np.eye(3)
+
+	fname = solver_tools.get_helpers_cache_file(solver)
+	solver_tools.save_helpers(fname, solver, ["helpers"], ["basis"])
+
+	loaded = SolverStub(str(tmp_path))
+	assert solver_tools.load_helpers(fname, loaded,
+			{"helpers" : HelperStub})
+
+	np.testing.assert_array_equal(loaded.helpers.quad_wts, helpers.quad_wts)
+	for a, b in zip(loaded.helpers.IDs, helpers.IDs):
+		np.testing.assert_array_equal(a, b)
+	assert isinstance(loaded.helpers.plan[0], tuple)
+	np.testing.assert_array_equal(loaded.helpers.plan[0][1],
+			helpers.plan[0][1])
+	assert loaded.helpers.vol == 2.5
+	assert loaded.helpers.flag is True
+	assert loaded.helpers.nothing is None
+	np.testing.assert_array_equal(loaded.basis.basis_val, np.eye(3))
+
+def test_load_helpers_missing_file(tmp_path):
+	'''
+	This test checks that a missing cache file is reported as a miss.
+	'''
+	solver = SolverStub(str(tmp_path))
+	fname = solver_tools.get_helpers_cache_file(solver)
+
+	assert not solver_tools.load_helpers(fname, solver, {})
@@ -4,6 +4,7 @@ import sys
 sys.path.append('../src')
 
 import meshing.common as mesh_common
+import meshing.tools as mesh_tools
 
 rtol = 1e-15
 atol = 1e-15
@@ -146,3 +147,29 @@ def test_split_quadrils_into_tris_for_1_quad():
 	assert(mesh.boundary_groups['y1'].boundary_faces[0].face_ID == 2)
 	assert(mesh.boundary_groups['y2'].boundary_faces[0].elem_ID == 1)
 	assert(mesh.boundary_groups['y2'].boundary_faces[0].face_ID == 2)
+
+@pytest.mark.parametrize('split', [False, True])
+def test_mesh_2D_faces_connect_matching_nodes(split):
+	'''
+	Make sure that each interior face of a rectangular (or split) mesh
+	connects two elements through the same nodes with opposite orientation,
+	and that each element face is either an interior or a boundary face.
+	'''
+	mesh = mesh_common.mesh_2D(num_elems_x=4, num_elems_y=3)
+	if split:
+		mesh = mesh_common.split_quadrils_into_tris(mesh)
+
+	nodesL = mesh_tools.get_face_node_IDs(mesh, mesh.int_face_elemL_IDs,
+			mesh.int_face_faceL_IDs)
+	nodesR = mesh_tools.get_face_node_IDs(mesh, mesh.int_face_elemR_IDs,
+			mesh.int_face_faceR_IDs)
+	np.testing.assert_array_equal(nodesL, nodesR[:, ::-1])
+
+	num_faces = np.zeros([mesh.num_elems, mesh.gbasis.NFACES], dtype=int)
+	np.add.at(num_faces, (mesh.int_face_elemL_IDs, mesh.int_face_faceL_IDs),
+			1)
+	np.add.at(num_faces, (mesh.int_face_elemR_IDs, mesh.int_face_faceR_IDs),
+			1)
+	for bgroup in mesh.boundary_groups.values():
+		np.add.at(num_faces, (bgroup.elem_IDs, bgroup.face_IDs), 1)
+	np.testing.assert_array_equal(num_faces, 1)
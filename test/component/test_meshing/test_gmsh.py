@@ -4,6 +4,7 @@ import pytest
 import sys
 sys.path.append('../src')
 
+import errors
 import meshing.gmsh as mesh_gmsh
 
 rtol = 1e-15
@@ -13,6 +14,7 @@ atol = 1e-15
 	# Name of gmsh file
 	'two_triangles_v4.msh',
 	'two_triangles_v2.msh',
+	'two_triangles_v4_binary.msh',
 ])
 def test_two_triangles_should_be_loaded_correctly(mesh_file_name):
 	'''
@@ -44,3 +46,112 @@ def test_two_triangles_should_be_loaded_correctly(mesh_file_name):
 	assert(len(mesh.interior_faces) == 1)
 	assert(mesh.interior_faces[0].elemL_ID in [0, 1])
 	assert(mesh.interior_faces[0].elemR_ID in [0, 1])
+
+def test_interleaved_elements_and_boundary_faces_should_be_loaded_correctly(
+		tmp_path):
+	'''
+	Make sure that a Gmsh 2.2 mesh with elements and boundary faces listed
+	in an arbitrary order, with different numbers of tags, and with nodes
+	not listed in order of their IDs is correctly loaded.
+	'''
+	file_path = str(tmp_path / 'two_triangles_shuffled.msh')
+	with open(file_path, 'w') as fo:
+		fo.write('\n'.join([
+			'$MeshFormat', '2.2 0 8', '$EndMeshFormat',
+			'$Nodes', '4',
+			'3 1 1 0', '1 0 0 0', '4 0 1 0', '2 1 0 0',
+			'$EndNodes',
+			'$Elements', '6',
+			'1 1 2 3 0 3 4',
+			'2 2 2 0 0 1 2 4',
+			'3 1 3 1 0 7 1 2',
+			'4 1 2 4 0 4 1',
+			'5 2 3 0 0 7 2 3 4',
+			'6 1 2 2 0 2 3',
+			'$EndElements',
+			'$PhysicalNames', '5',
+			'2 0 "MeshInterior"', '1 1 "y1"', '1 2 "x2"', '1 3 "y2"',
+			'1 4 "x1"',
+			'$EndPhysicalNames', '']))
+
+	mesh = mesh_gmsh.import_gmsh_mesh(file_path)
+
+	# New node IDs follow the order in which the nodes are listed
+	np.testing.assert_allclose(mesh.node_coords, np.array([
+			[1, 1],
+			[0, 0],
+			[0, 1],
+			[1, 0]]), rtol, atol)
+	np.testing.assert_array_equal(mesh.elem_to_node_IDs,
+			np.array([[1, 3, 2], [3, 0, 2]]))
+
+	# Boundary groups are numbered in order of appearance
+	assert [mesh.boundary_groups[group].number for group in
+			['y2', 'y1', 'x1', 'x2']] == [0, 1, 2, 3]
+	# Each boundary face should be attached to the element face with the
+	# same nodes
+	bface_nodes = {'y1' : [1, 3], 'x2' : [3, 0], 'y2' : [0, 2],
+			'x1' : [2, 1]}
+	for group, nodes in bface_nodes.items():
+		boundary_face = mesh.boundary_groups[group].boundary_faces[0]
+		local_node_nums = mesh.gbasis.get_local_face_principal_node_nums(
+				mesh.gorder, boundary_face.face_ID)
+		face_nodes = mesh.elem_to_node_IDs[boundary_face.elem_ID,
+				local_node_nums]
+		assert sorted(face_nodes) == sorted(nodes)
+
+	# One interior face, with the first element on the left
+	assert len(mesh.interior_faces) == 1
+	assert mesh.interior_faces[0].elemL_ID == 0
+	assert mesh.interior_faces[0].elemR_ID == 1
+
+def test_binary_version2_should_be_rejected(tmp_path):
+	'''
+	Make sure that an error is raised for binary Gmsh 2.2 files, which are
+	not supported.
+	'''
+	file_path = str(tmp_path / 'binary_v2.msh')
+	with open(file_path, 'wb') as fo:
+		fo.write(b'$MeshFormat\n2.2 1 8\n\x01\x00\x00\x00\n' +
+				b'$EndMeshFormat\n')
+
+	with pytest.raises(errors.FileReadError):
+		mesh_gmsh.import_gmsh_mesh(file_path)
+
+def test_count_entries_per_line():
+	'''
+	Make sure that entries are counted correctly regardless of the
+	whitespace separating them.
+	'''
+	text = b'1 2 3\n 4  5\t6 7 \n\n8\r\n'
+	np.testing.assert_array_equal(mesh_gmsh.count_entries_per_line(text),
+			np.array([3, 4, 0, 1]))
+
+def test_match_faces():
+	'''
+	Make sure that element faces are matched to each other and to
+	boundary faces for a 1D mesh with three elements.
+	'''
+	# Element faces (two per element) and boundary faces
+	elem_face_node_IDs = np.array([[0], [1], [2], [3], [1], [2]])
+	bface_node_IDs = np.array([[3], [0]])
+
+	int_face_IDs, bface_to_elem_face_IDs = mesh_gmsh.match_faces(
+			elem_face_node_IDs, bface_node_IDs)
+
+	# Interior faces are ordered by their right element face
+	np.testing.assert_array_equal(int_face_IDs, np.array([[1, 4], [2, 5]]))
+	np.testing.assert_array_equal(bface_to_elem_face_IDs, np.array([3, 0]))
+
+def test_match_faces_should_reject_unmatched_faces():
+	'''
+	Make sure that an error is raised if a face is neither a boundary face
+	nor shared by two elements.
+	'''
+	elem_face_node_IDs = np.array([[0], [1], [1], [2]])
+
+	with pytest.raises(ValueError):
+		mesh_gmsh.match_faces(elem_face_node_IDs, np.array([[0]]))
+	with pytest.raises(ValueError):
+		mesh_gmsh.match_faces(elem_face_node_IDs,
+				np.array([[0], [1], [2]]))
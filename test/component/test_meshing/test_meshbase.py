@@ -3,7 +3,10 @@ import pytest
 import sys
 sys.path.append('../src')
 
+import errors
+import meshing.common as mesh_common
 import meshing.meshbase as mesh_defs
+import meshing.tools as mesh_tools
 
 rtol = 1e-15
 atol = 1e-15
@@ -113,3 +116,106 @@ def test_mesh_should_get_face_neighbors_correctly(filled_mesh):
 			np.array([1, -1, -1]))
 	np.testing.assert_array_equal(filled_mesh.elements[1].face_to_neighbors,
 			np.array([0, -1, -1]))
+
+def test_mesh_should_map_elements_to_interior_faces(filled_mesh):
+	'''
+	Make sure that the element-to-neighbor and element-to-face maps are
+	created from the interior face arrays.
+	'''
+	filled_mesh.create_elements()
+	np.testing.assert_array_equal(filled_mesh.elem_to_neighbor_IDs,
+			np.array([[1, -1, -1], [0, -1, -1]]))
+	np.testing.assert_array_equal(filled_mesh.elem_to_face_IDs,
+			np.array([[0, -1, -1], [0, -1, -1]]))
+
+def test_interior_faces_should_be_views_into_arrays(mesh):
+	'''
+	Make sure that modifying an interior face object modifies the interior
+	face arrays of the mesh, and vice versa.
+	'''
+	mesh.allocate_interior_faces()
+	mesh.interior_faces[0].elemR_ID = 1
+	mesh.interior_faces[0].faceR_ID = 2
+	np.testing.assert_array_equal(mesh.int_face_elemR_IDs, np.array([1]))
+	np.testing.assert_array_equal(mesh.int_face_faceR_IDs, np.array([2]))
+
+	mesh.int_face_faceL_IDs[0] = 1
+	assert(mesh.interior_faces[0].faceL_ID == 1)
+
+	# Replacing the list copies the faces into new arrays
+	face = mesh_defs.InteriorFace()
+	face.elemL_ID = 1
+	mesh.interior_faces = mesh.interior_faces + [face]
+	assert(mesh.num_interior_faces == 2)
+	np.testing.assert_array_equal(mesh.int_face_elemL_IDs, np.array([0, 1]))
+	np.testing.assert_array_equal(mesh.int_face_faceL_IDs, np.array([1, 0]))
+	face.faceL_ID = 2
+	np.testing.assert_array_equal(mesh.int_face_faceL_IDs, np.array([1, 2]))
+
+def test_boundary_faces_should_be_views_into_arrays():
+	'''
+	Make sure that modifying a boundary face object modifies the arrays of
+	the boundary group.
+	'''
+	boundary_group = mesh_defs.BoundaryGroup()
+	boundary_group.set_boundary_faces([3, 4], [1, 0])
+	assert(boundary_group.num_boundary_faces == 2)
+	assert(boundary_group.boundary_faces[1].elem_ID == 4)
+
+	boundary_group.boundary_faces[1].face_ID = 2
+	np.testing.assert_array_equal(boundary_group.face_IDs, np.array([1, 2]))
+
+def test_mesh_should_be_restored_from_saved_file(tmp_path):
+	'''
+	Make sure that a periodic triangular mesh written with Mesh.save is
+	restored exactly by Mesh.load.
+	'''
+	mesh = mesh_common.split_quadrils_into_tris(mesh_common.mesh_2D(
+			num_elems_x=3, num_elems_y=2))
+	mesh_tools.make_periodic_translational(mesh, x1='x1', x2='x2')
+	fname = str(tmp_path / 'mesh.qmesh')
+	mesh.save(fname)
+
+	loaded = mesh_defs.Mesh()
+	loaded.load(fname)
+
+	assert loaded.ndims == mesh.ndims
+	assert loaded.gorder == mesh.gorder
+	assert loaded.gbasis.BASIS_TYPE == mesh.gbasis.BASIS_TYPE
+	assert loaded.num_elems == mesh.num_elems
+	assert loaded.num_nodes == mesh.num_nodes
+	np.testing.assert_array_equal(loaded.node_coords, mesh.node_coords)
+	np.testing.assert_array_equal(loaded.elem_to_node_IDs,
+			mesh.elem_to_node_IDs)
+	assert loaded.num_interior_faces == mesh.num_interior_faces
+	for face, loaded_face in zip(mesh.interior_faces,
+			loaded.interior_faces):
+		assert (loaded_face.elemL_ID, loaded_face.faceL_ID,
+				loaded_face.elemR_ID, loaded_face.faceR_ID) == \
+				(face.elemL_ID, face.faceL_ID, face.elemR_ID, face.faceR_ID)
+	assert list(loaded.boundary_groups) == list(mesh.boundary_groups)
+	for name, bgroup in mesh.boundary_groups.items():
+		loaded_bgroup = loaded.boundary_groups[name]
+		assert loaded_bgroup.number == bgroup.number
+		assert [(bface.elem_ID, bface.face_ID) for bface in
+				loaded_bgroup.boundary_faces] == [(bface.elem_ID,
+				bface.face_ID) for bface in bgroup.boundary_faces]
+	for elem, loaded_elem in zip(mesh.elements, loaded.elements):
+		np.testing.assert_array_equal(loaded_elem.face_to_neighbors,
+				elem.face_to_neighbors)
+		np.testing.assert_array_equal(loaded_elem.node_coords,
+				elem.node_coords)
+
+def test_mesh_should_reject_incompatible_file_version(tmp_path,
+		monkeypatch):
+	'''
+	Make sure that loading a mesh file written with another version of the
+	file format raises an error.
+	'''
+	fname = str(tmp_path / 'mesh.qmesh')
+	monkeypatch.setattr(mesh_defs, 'QMESH_VERSION', 0)
+	mesh_common.mesh_1D(num_elems=4).save(fname)
+	monkeypatch.undo()
+
+	with pytest.raises(errors.FileReadError):
+		mesh_defs.Mesh().load(fname)
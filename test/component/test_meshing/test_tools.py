@@ -4,6 +4,7 @@ import pytest
 import sys
 sys.path.append('../src')
 
+import meshing.common as mesh_common
 import meshing.gmsh as mesh_gmsh
 import meshing.tools as mesh_tools
 
@@ -68,3 +69,35 @@ def test_periodic_translational_for_2x2_triangles():
 			np.ones(3))
 	np.testing.assert_array_equal(mesh.elements[1].face_to_neighbors,
 			np.zeros(3))
+
+def test_get_face_node_IDs_for_quadrilaterals():
+	'''
+	Make sure that the batched face node IDs match the local face node
+	numbers of each element.
+	'''
+	mesh = mesh_common.mesh_2D(num_elems_x=2, num_elems_y=2)
+	elem_IDs = np.array([0, 3, 1, 2])
+	face_IDs = np.array([2, 0, 1, 3])
+
+	for principal, get_local_node_nums in [
+			(True, mesh.gbasis.get_local_face_principal_node_nums),
+			(False, mesh.gbasis.get_local_face_node_nums)]:
+		face_node_IDs = mesh_tools.get_face_node_IDs(mesh, elem_IDs,
+				face_IDs, principal)
+		for i, (elem_ID, face_ID) in enumerate(zip(elem_IDs, face_IDs)):
+			np.testing.assert_array_equal(face_node_IDs[i],
+					mesh.elem_to_node_IDs[elem_ID][get_local_node_nums(
+					mesh.gorder, face_ID)])
+
+def test_ref_to_phys_elems_gives_physical_nodes(filled_mesh):
+	'''
+	Make sure that the batched conversion from reference geometric nodes
+	to physical space returns the physical nodes of every element.
+	'''
+	# Reference geometric nodes
+	xref = np.array([ [0, 0], [1, 0], [0, 1] ])
+	# Get nodes in physical space for all elements
+	xphys = mesh_tools.ref_to_phys_elems(filled_mesh, None, xref)
+	# These should be the physical nodes of each element
+	expected = filled_mesh.node_coords[filled_mesh.elem_to_node_IDs]
+	np.testing.assert_allclose(xphys, expected, rtol, atol)
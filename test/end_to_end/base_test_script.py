@@ -1,7 +1,6 @@
 import numpy as np
 import pytest
 import os
-import pickle
 import subprocess
 import sys
 sys.path.append('../src')
@@ -12,6 +11,7 @@ import physics.scalar.scalar as scalar
 import physics.chemistry.chemistry as chemistry
 import solver.DG as DG
 import solver.ADERDG as ADERDG
+import processing.readwritedatafiles as readwritedatafiles
 
 # Tolerances
 
@@ -51,10 +51,7 @@ def test_case(test_data):
 	# Print results of run
 	print(result.decode('utf-8'))
 
-	# Open resulting data file
-	with open('Data_final.pkl', 'rb') as f:
-		# Read final solution from file
-		solver = pickle.load(f)
-		Uc = solver.state_coeffs
-		# Assert
-		np.testing.assert_allclose(Uc, Uc_expected, rtol, atol)
+	# Read final solution from resulting data file
+	header, Uc = readwritedatafiles.read_checkpoint('Data_final.npz')
+	# Assert
+	np.testing.assert_allclose(Uc, Uc_expected, rtol, atol)
@@ -1,5 +1,4 @@
 import os
-import pickle
 import subprocess
 import sys
 sys.path.append('../../src')
@@ -13,6 +12,7 @@ import physics.navierstokes.tools as ns_tools
 import physics.chemistry.chemistry as chemistry
 import solver.DG as DG
 import solver.ADERDG as ADERDG
+import processing.readwritedatafiles as readwritedatafiles
 
 
 def generate_regression_test_data():
@@ -55,12 +55,10 @@ def generate_regression_test_data():
 		# Print text output of Quail
 		print(text_output.decode('utf-8'))
 
-		# Open resulting solution file
-		with open('Data_final.pkl', 'rb') as solutionfile:
-			# Load data
-			solver = pickle.load(solutionfile)
-			# Save final solution
-			results.append(solver.state_coeffs)
+		# Read final solution from resulting data file
+		header, Uc = readwritedatafiles.read_checkpoint('Data_final.npz')
+		# Save final solution
+		results.append(Uc)
 
 	# Save results to the regression test datafile
 	with open(datafile_name, 'wb') as datafile: